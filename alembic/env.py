@@ -0,0 +1,59 @@
+"""
+Alembic environment for 16型花名册
+
+Migrations run either from the ``alembic`` command line, against
+``settings.database_url``, or from ``app.database.migrations``, which passes
+an open connection in ``config.attributes["connection"]``.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.database.models import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting to a database"""
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=settings.database_url.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online(connection) -> None:
+    """Apply migrations over ``connection``"""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+        # Online index builds leave the transaction, so keep each file separate
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    run_migrations_offline()
+elif config.attributes.get("connection") is not None:
+    run_migrations_online(config.attributes["connection"])
+else:
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    engine = create_engine(settings.database_url)
+    with engine.connect() as connection:
+        run_migrations_online(connection)
+        connection.commit()
+    engine.dispose()
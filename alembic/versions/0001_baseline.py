@@ -0,0 +1,199 @@
+"""Baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+
+Databases created before migrations were introduced (by ``create_all`` at
+startup) already have some or all of these tables; only missing tables are
+created, so such databases can simply be upgraded.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MBTI_TYPES = (
+    "INTJ",
+    "INTP",
+    "ENTJ",
+    "ENTP",
+    "INFJ",
+    "INFP",
+    "ENFJ",
+    "ENFP",
+    "ISTJ",
+    "ISFJ",
+    "ESTJ",
+    "ESFJ",
+    "ISTP",
+    "ISFP",
+    "ESTP",
+    "ESFP",
+)
+
+
+def mbti_enum() -> sa.types.TypeEngine:
+    # Shared by two tables; on PostgreSQL the type is created once, up front
+    return sa.Enum(*MBTI_TYPES, name="mbtitype").with_variant(
+        postgresql.ENUM(*MBTI_TYPES, name="mbtitype", create_type=False),
+        "postgresql",
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(*MBTI_TYPES, name="mbtitype").create(bind, checkfirst=True)
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("role", sa.Enum("SYSTEM", "CLIENT", name="userrole")),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column(
+                "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "celebrities" not in existing:
+        op.create_table(
+            "celebrities",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("name_en", sa.String()),
+            sa.Column("description", sa.Text()),
+            sa.Column("image_url", sa.String()),
+            sa.Column(
+                "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_celebrities_name", "celebrities", ["name"])
+
+    if "tags" not in existing:
+        op.create_table(
+            "tags",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column(
+                "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name"),
+        )
+
+    if "celebrity_tags" not in existing:
+        op.create_table(
+            "celebrity_tags",
+            sa.Column("celebrity_id", sa.String(), nullable=False),
+            sa.Column("tag_id", sa.String(), nullable=False),
+            sa.ForeignKeyConstraint(["celebrity_id"], ["celebrities.id"]),
+            sa.ForeignKeyConstraint(["tag_id"], ["tags.id"]),
+            sa.PrimaryKeyConstraint("celebrity_id", "tag_id"),
+        )
+
+    if "votes" not in existing:
+        op.create_table(
+            "votes",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("celebrity_id", sa.String(), nullable=False),
+            sa.Column("mbti_type", mbti_enum(), nullable=False),
+            sa.Column("reason", sa.Text()),
+            sa.Column(
+                "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.ForeignKeyConstraint(["celebrity_id"], ["celebrities.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_user_celebrity_vote", "votes", ["user_id", "celebrity_id"], unique=True
+        )
+
+    if "comments" not in existing:
+        op.create_table(
+            "comments",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("celebrity_id", sa.String(), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("parent_id", sa.String()),
+            sa.Column("level", sa.Integer()),
+            sa.Column(
+                "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+            sa.ForeignKeyConstraint(["celebrity_id"], ["celebrities.id"]),
+            sa.ForeignKeyConstraint(["parent_id"], ["comments.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "daily_user_stats" not in existing:
+        op.create_table(
+            "daily_user_stats",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("votes_count", sa.Integer()),
+            sa.Column("votes_no_reason", sa.Integer()),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_user_date_stats", "daily_user_stats", ["user_id", "date"], unique=True
+        )
+
+    if "celebrity_vote_tallies" not in existing:
+        count_columns = [
+            sa.Column(f"{mbti_type.lower()}_count", sa.Integer(), nullable=False)
+            for mbti_type in MBTI_TYPES
+        ]
+        op.create_table(
+            "celebrity_vote_tallies",
+            sa.Column("celebrity_id", sa.String(), nullable=False),
+            sa.Column("total_votes", sa.Integer(), nullable=False),
+            sa.Column("votes_with_reason", sa.Integer(), nullable=False),
+            *count_columns,
+            sa.Column("top_mbti_type", mbti_enum()),
+            sa.Column(
+                "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.ForeignKeyConstraint(["celebrity_id"], ["celebrities.id"]),
+            sa.PrimaryKeyConstraint("celebrity_id"),
+        )
+        op.create_index(
+            "ix_vote_tally_leaderboard",
+            "celebrity_vote_tallies",
+            ["total_votes", "celebrity_id"],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("celebrity_vote_tallies")
+    op.drop_table("daily_user_stats")
+    op.drop_table("comments")
+    op.drop_table("votes")
+    op.drop_table("celebrity_tags")
+    op.drop_table("tags")
+    op.drop_table("celebrities")
+    op.drop_table("users")
+    sa.Enum(name="mbtitype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
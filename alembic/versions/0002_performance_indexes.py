@@ -0,0 +1,61 @@
+"""Performance index pack
+
+Revision ID: 0002_performance_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-16
+
+Composite indexes for the hot filters and the (created_at, id) keyset
+ordering of the list endpoints. On PostgreSQL they are built with
+CREATE INDEX CONCURRENTLY so that existing tables stay writable. Indexes that
+already exist (e.g. from a database built with ``create_all``) are skipped.
+"""
+
+from alembic import op
+
+revision = "0002_performance_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_votes_celebrity_mbti", "votes", ["celebrity_id", "mbti_type"]),
+    ("ix_votes_celebrity_created", "votes", ["celebrity_id", "created_at", "id"]),
+    ("ix_votes_user_created", "votes", ["user_id", "created_at"]),
+    ("ix_votes_created", "votes", ["created_at", "id"]),
+    (
+        "ix_comments_celebrity_parent_created",
+        "comments",
+        ["celebrity_id", "parent_id", "created_at"],
+    ),
+    ("ix_comments_user_created", "comments", ["user_id", "created_at"]),
+    ("ix_comments_parent_created", "comments", ["parent_id", "created_at"]),
+    ("ix_celebrity_tags_tag", "celebrity_tags", ["tag_id"]),
+    ("ix_celebrities_created", "celebrities", ["created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(
+                    name,
+                    table,
+                    columns,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
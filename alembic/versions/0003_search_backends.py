@@ -0,0 +1,156 @@
+"""Search backend plumbing
+
+Revision ID: 0003_search_backends
+Revises: 0002_performance_indexes
+Create Date: 2026-10-16
+
+SQLite: a ``celebrity_search_fts`` FTS5 table (trigram tokenizer), kept in
+sync with ``celebrities``, ``celebrity_tags`` and ``tags`` by triggers.
+``celebrity_search_keys`` maps FTS rowids to celebrity ids; celebrities'
+own rowids are not used because VACUUM may renumber them.
+
+PostgreSQL: the pg_trgm extension and trigram GIN indexes on the lowercased
+text columns, which make the ``lower(col) LIKE '%q%'`` predicates indexable.
+
+An SQLite build without the FTS5 trigram tokenizer gets no FTS table; the
+skip is logged, and the ``fts5`` backend refuses to start without it.
+"""
+
+import logging
+
+from alembic import op
+
+revision = "0003_search_backends"
+down_revision = "0002_performance_indexes"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+FTS_TABLE = "celebrity_search_fts"
+KEYS_TABLE = "celebrity_search_keys"
+
+# Newline-separated tag names of one celebrity
+TAGS_OF = """(
+    SELECT group_concat(t.name, char(10))
+    FROM celebrity_tags ct JOIN tags t ON t.id = ct.tag_id
+    WHERE ct.celebrity_id = {celebrity_id}
+)"""
+
+
+def doc_id(celebrity_id: str) -> str:
+    return f"(SELECT doc_id FROM {KEYS_TABLE} WHERE celebrity_id = {celebrity_id})"
+
+
+SQLITE_TRIGGERS = {
+    "celebrities_search_ai": f"""
+        AFTER INSERT ON celebrities BEGIN
+            INSERT INTO {KEYS_TABLE}(celebrity_id) VALUES (new.id);
+            INSERT INTO {FTS_TABLE}(rowid, name, name_en, description, tags)
+            VALUES (
+                {doc_id("new.id")}, new.name, new.name_en, new.description,
+                {TAGS_OF.format(celebrity_id="new.id")}
+            );
+        END""",
+    "celebrities_search_au": f"""
+        AFTER UPDATE OF name, name_en, description ON celebrities BEGIN
+            UPDATE {FTS_TABLE}
+            SET name = new.name, name_en = new.name_en,
+                description = new.description
+            WHERE rowid = {doc_id("new.id")};
+        END""",
+    "celebrities_search_ad": f"""
+        AFTER DELETE ON celebrities BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = {doc_id("old.id")};
+            DELETE FROM {KEYS_TABLE} WHERE celebrity_id = old.id;
+        END""",
+    "celebrity_tags_search_ai": f"""
+        AFTER INSERT ON celebrity_tags BEGIN
+            UPDATE {FTS_TABLE}
+            SET tags = {TAGS_OF.format(celebrity_id="new.celebrity_id")}
+            WHERE rowid = {doc_id("new.celebrity_id")};
+        END""",
+    "celebrity_tags_search_ad": f"""
+        AFTER DELETE ON celebrity_tags BEGIN
+            UPDATE {FTS_TABLE}
+            SET tags = {TAGS_OF.format(celebrity_id="old.celebrity_id")}
+            WHERE rowid = {doc_id("old.celebrity_id")};
+        END""",
+    "tags_search_au": f"""
+        AFTER UPDATE OF name ON tags BEGIN
+            UPDATE {FTS_TABLE}
+            SET tags = {TAGS_OF.format(celebrity_id=f"{KEYS_TABLE}.celebrity_id")}
+            FROM {KEYS_TABLE}
+            WHERE {FTS_TABLE}.rowid = {KEYS_TABLE}.doc_id
+              AND {KEYS_TABLE}.celebrity_id IN (
+                  SELECT celebrity_id FROM celebrity_tags WHERE tag_id = new.id
+              );
+        END""",
+}
+
+POSTGRES_TRIGRAM_INDEXES = {
+    "ix_celebrities_name_trgm": ("celebrities", "lower(name)"),
+    "ix_celebrities_name_en_trgm": ("celebrities", "lower(name_en)"),
+    "ix_celebrities_description_trgm": ("celebrities", "lower(description)"),
+    "ix_tags_name_trgm": ("tags", "lower(name)"),
+}
+
+
+def fts5_trigram_available(bind) -> bool:
+    """The trigram tokenizer needs SQLite 3.34+ built with FTS5"""
+    version = tuple(int(part) for part in bind.dialect.dbapi.sqlite_version.split("."))
+    options = {row[0] for row in bind.exec_driver_sql("PRAGMA compile_options")}
+    return version >= (3, 34) and "ENABLE_FTS5" in options
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        if not fts5_trigram_available(bind):
+            # The fts5 search backend is unavailable; other backends still work
+            logger.warning(
+                "SQLite lacks the FTS5 trigram tokenizer (needs 3.34+ with FTS5); "
+                "%s is not created and SEARCH_BACKEND=fts5 cannot be used",
+                FTS_TABLE,
+            )
+            return
+        op.execute(
+            f"CREATE TABLE {KEYS_TABLE} ("
+            "doc_id INTEGER PRIMARY KEY, celebrity_id VARCHAR NOT NULL UNIQUE)"
+        )
+        op.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} "
+            "USING fts5(name, name_en, description, tags, tokenize='trigram')"
+        )
+        for name, body in SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER {name} {body}")
+        # Backfill rows written before the triggers existed
+        op.execute(f"INSERT INTO {KEYS_TABLE}(celebrity_id) SELECT id FROM celebrities")
+        op.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, name_en, description, tags) "
+            "SELECT k.doc_id, c.name, c.name_en, c.description, "
+            f"{TAGS_OF.format(celebrity_id='c.id')} "
+            f"FROM celebrities c JOIN {KEYS_TABLE} k ON k.celebrity_id = c.id"
+        )
+    elif dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        with op.get_context().autocommit_block():
+            for name, (table, expression) in POSTGRES_TRIGRAM_INDEXES.items():
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON {table} USING gin ({expression} gin_trgm_ops)"
+                )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        op.execute(f"DROP TABLE IF EXISTS {KEYS_TABLE}")
+    elif dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            for name in POSTGRES_TRIGRAM_INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,45 @@
+"""Popular search snapshots
+
+Revision ID: 0004_popular_search_snapshots
+Revises: 0003_search_backends
+Create Date: 2026-10-16
+
+Periodic copies of the in-memory top search queries per window
+(``app.search.popular``).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_popular_search_snapshots"
+down_revision = "0003_search_backends"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "popular_search_snapshots" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "popular_search_snapshots",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("window", sa.String(length=8), nullable=False),
+        sa.Column("term", sa.String(length=100), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("captured_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_popular_search_snapshots_window_captured",
+        "popular_search_snapshots",
+        ["window", "captured_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_popular_search_snapshots_window_captured",
+        table_name="popular_search_snapshots",
+    )
+    op.drop_table("popular_search_snapshots")
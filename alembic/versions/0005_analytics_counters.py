@@ -0,0 +1,65 @@
+"""Analytics counters
+
+Revision ID: 0005_analytics_counters
+Revises: 0004_popular_search_snapshots
+Create Date: 2026-10-16
+
+``analytics_counters`` holds global totals (celebrities, tags, votes and
+votes per MBTI type); ``tag_usage_counts`` holds the number of celebrities
+per tag. Both are maintained by the services on every write and backfilled
+here from the existing rows.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_analytics_counters"
+down_revision = "0004_popular_search_snapshots"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+
+    if "analytics_counters" not in existing:
+        op.create_table(
+            "analytics_counters",
+            sa.Column("name", sa.String(length=32), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+    if "tag_usage_counts" not in existing:
+        op.create_table(
+            "tag_usage_counts",
+            sa.Column("tag_id", sa.String(), nullable=False),
+            sa.Column("usage_count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["tag_id"], ["tags.id"]),
+            sa.PrimaryKeyConstraint("tag_id"),
+        )
+        op.create_index(
+            "ix_tag_usage_counts_usage", "tag_usage_counts", ["usage_count", "tag_id"]
+        )
+
+    # Backfill, unless the counters are already being maintained
+    if bind.exec_driver_sql("SELECT count(*) FROM analytics_counters").scalar():
+        return
+    op.execute(
+        "INSERT INTO analytics_counters (name, value) "
+        "SELECT 'celebrities', count(*) FROM celebrities "
+        "UNION ALL SELECT 'tags', count(*) FROM tags "
+        "UNION ALL SELECT 'votes', count(*) FROM votes "
+        "UNION ALL SELECT 'votes:' || CAST(mbti_type AS VARCHAR), count(*) "
+        "FROM votes GROUP BY mbti_type"
+    )
+    op.execute(
+        "INSERT INTO tag_usage_counts (tag_id, usage_count) "
+        "SELECT tag_id, count(*) FROM celebrity_tags GROUP BY tag_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tag_usage_counts_usage", table_name="tag_usage_counts")
+    op.drop_table("tag_usage_counts")
+    op.drop_table("analytics_counters")
@@ -0,0 +1,124 @@
+"""Denormalized celebrity search document
+
+Revision ID: 0006_celebrity_search_document
+Revises: 0005_analytics_counters
+Create Date: 2026-10-16
+
+``celebrities.search_document`` holds each celebrity's normalized names,
+description and tag names. The normalization (NFKC width folding) has no SQL
+equivalent, so existing rows are backfilled in Python here;
+``rebuild_search_documents.py`` does the same for rows written behind the
+services' back later on. The document layout is copied below as it was at
+this revision, so later changes to ``app.search.text`` do not change what
+this migration writes.
+
+PostgreSQL: one trigram GIN index on the document replaces the per-column
+``lower(...)`` trigram indexes of ``0003_search_backends``.
+"""
+
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_celebrity_search_document"
+down_revision = "0005_analytics_counters"
+branch_labels = None
+depends_on = None
+
+POSTGRES_DOCUMENT_INDEX = "ix_celebrities_search_document_trgm"
+POSTGRES_REPLACED_INDEXES = {
+    "ix_celebrities_name_trgm": ("celebrities", "lower(name)"),
+    "ix_celebrities_name_en_trgm": ("celebrities", "lower(name_en)"),
+    "ix_celebrities_description_trgm": ("celebrities", "lower(description)"),
+    "ix_tags_name_trgm": ("tags", "lower(name)"),
+}
+
+BATCH_SIZE = 500
+
+FIELD_SEPARATOR = "\x1f"
+DESCRIPTION_MARKER = "\x1d"
+TAGS_MARKER = "\x1e"
+MARKERS = str.maketrans(
+    {FIELD_SEPARATOR: " ", DESCRIPTION_MARKER: " ", TAGS_MARKER: " "}
+)
+
+
+def document_text(text) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower().translate(MARKERS)
+
+
+def search_document(name, name_en, description, tag_names) -> str:
+    return (
+        document_text(name)
+        + FIELD_SEPARATOR
+        + document_text(name_en)
+        + DESCRIPTION_MARKER
+        + document_text(description)
+        + TAGS_MARKER
+        + FIELD_SEPARATOR.join(sorted(document_text(tag) for tag in tag_names))
+    )
+
+
+def backfill(bind) -> None:
+    tag_names = {}
+    for celebrity_id, tag_name in bind.execute(
+        sa.text(
+            "SELECT ct.celebrity_id, t.name FROM celebrity_tags ct "
+            "JOIN tags t ON t.id = ct.tag_id"
+        )
+    ):
+        tag_names.setdefault(celebrity_id, []).append(tag_name)
+
+    rows = bind.execute(
+        sa.text("SELECT id, name, name_en, description FROM celebrities")
+    ).all()
+    update = sa.text(
+        "UPDATE celebrities SET search_document = :document WHERE id = :id"
+    )
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(
+            update,
+            [
+                {
+                    "id": row.id,
+                    "document": search_document(
+                        row.name,
+                        row.name_en,
+                        row.description,
+                        tag_names.get(row.id, []),
+                    ),
+                }
+                for row in rows[start : start + BATCH_SIZE]
+            ],
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("celebrities")}
+    if "search_document" not in columns:
+        op.add_column("celebrities", sa.Column("search_document", sa.Text()))
+    backfill(bind)
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {POSTGRES_DOCUMENT_INDEX} "
+                "ON celebrities USING gin (search_document gin_trgm_ops)"
+            )
+            for name in POSTGRES_REPLACED_INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, (table, expression) in POSTGRES_REPLACED_INDEXES.items():
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON {table} USING gin ({expression} gin_trgm_ops)"
+                )
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {POSTGRES_DOCUMENT_INDEX}")
+    op.drop_column("celebrities", "search_document")
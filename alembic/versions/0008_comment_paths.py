@@ -0,0 +1,121 @@
+"""Materialized comment paths and reply counts
+
+Revision ID: 0008_comment_paths
+Revises: 0007_celebrity_name_keys
+Create Date: 2026-10-16
+
+``comments.path`` places each comment in its thread (see
+``app.core.comment_paths``; the segment format of this revision is copied
+below) and ``comments.reply_count`` counts its direct
+replies. ``ix_comments_celebrity_path`` turns a celebrity's thread listing
+into one index range scan instead of a query per comment.
+"""
+
+import calendar
+import zlib
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_comment_paths"
+down_revision = "0007_celebrity_name_keys"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+TIMESTAMP_DIGITS = 13
+TIMESTAMP_MAX = 16**TIMESTAMP_DIGITS - 1
+
+
+def child_path(parent_path, comment_id, created_at) -> str:
+    # Naive datetimes are UTC, as stored by the database defaults
+    timestamp = (
+        calendar.timegm(created_at.utctimetuple()) * 10**6 + created_at.microsecond
+    )
+    if parent_path is None:
+        timestamp = TIMESTAMP_MAX - timestamp
+    segment = f"{timestamp:0{TIMESTAMP_DIGITS}x}{zlib.crc32(comment_id.encode()):08x}"
+    return (parent_path or "") + segment
+
+
+def backfill(bind) -> None:
+    rows = {
+        row.id: row
+        for row in bind.execute(
+            sa.text("SELECT id, parent_id, created_at FROM comments").columns(
+                created_at=sa.DateTime()
+            )
+        )
+    }
+
+    def parent_of(comment_id):
+        parent_id = rows[comment_id].parent_id
+        return parent_id if parent_id in rows else None
+
+    # Walk up to the nearest ancestor with a known path, then fill in downwards
+    paths = {}
+    for comment_id in rows:
+        chain, node = [], comment_id
+        while node is not None and node not in paths:
+            chain.append(node)
+            node = parent_of(node)
+        for node in reversed(chain):
+            paths[node] = child_path(
+                paths.get(parent_of(node)), node, rows[node].created_at
+            )
+
+    reply_counts = Counter(row.parent_id for row in rows.values() if row.parent_id)
+    update = sa.text(
+        "UPDATE comments SET path = :path, reply_count = :reply_count WHERE id = :id"
+    )
+    ids = list(rows)
+    for start in range(0, len(ids), BATCH_SIZE):
+        bind.execute(
+            update,
+            [
+                {
+                    "id": comment_id,
+                    "path": paths[comment_id],
+                    "reply_count": reply_counts[comment_id],
+                }
+                for comment_id in ids[start : start + BATCH_SIZE]
+            ],
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("comments")}
+    if "path" not in columns:
+        op.add_column("comments", sa.Column("path", sa.String()))
+    if "reply_count" not in columns:
+        op.add_column(
+            "comments",
+            sa.Column("reply_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+    backfill(bind)
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_comments_celebrity_path",
+                "comments",
+                ["celebrity_id", "path"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            "ix_comments_celebrity_path",
+            "comments",
+            ["celebrity_id", "path"],
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comments_celebrity_path", table_name="comments")
+    op.drop_column("comments", "reply_count")
+    op.drop_column("comments", "path")
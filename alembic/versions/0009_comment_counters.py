@@ -0,0 +1,102 @@
+"""Comment counters
+
+Revision ID: 0009_comment_counters
+Revises: 0008_comment_paths
+Create Date: 2026-10-16
+
+``celebrity_comment_stats`` and ``user_comment_stats`` hold the total and
+reply counts behind the comment statistics endpoints;
+``celebrity_commenter_counts`` ranks each celebrity's most active commenters.
+All three are maintained by ``CommentService`` on every comment write and
+backfilled here from the existing comments.
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_comment_counters"
+down_revision = "0008_comment_paths"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+
+    if "celebrity_comment_stats" not in existing:
+        op.create_table(
+            "celebrity_comment_stats",
+            sa.Column("celebrity_id", sa.String(), nullable=False),
+            sa.Column("total_comments", sa.Integer(), nullable=False),
+            sa.Column("reply_comments", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["celebrity_id"], ["celebrities.id"]),
+            sa.PrimaryKeyConstraint("celebrity_id"),
+        )
+    if "celebrity_commenter_counts" not in existing:
+        op.create_table(
+            "celebrity_commenter_counts",
+            sa.Column("celebrity_id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("comment_count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["celebrity_id"], ["celebrities.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("celebrity_id", "user_id"),
+        )
+        op.create_index(
+            "ix_celebrity_commenter_counts_rank",
+            "celebrity_commenter_counts",
+            ["celebrity_id", "comment_count", "user_id"],
+        )
+    if "user_comment_stats" not in existing:
+        op.create_table(
+            "user_comment_stats",
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("total_comments", sa.Integer(), nullable=False),
+            sa.Column("reply_comments", sa.Integer(), nullable=False),
+            sa.Column("recent_date", sa.Date(), nullable=True),
+            sa.Column("recent_comments", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+    # Backfill, unless the counters are already being maintained
+    if bind.exec_driver_sql("SELECT count(*) FROM user_comment_stats").scalar():
+        return
+    op.execute(
+        "INSERT INTO celebrity_comment_stats "
+        "(celebrity_id, total_comments, reply_comments) "
+        "SELECT celebrity_id, count(*), count(parent_id) FROM comments "
+        "GROUP BY celebrity_id"
+    )
+    op.execute(
+        "INSERT INTO celebrity_commenter_counts "
+        "(celebrity_id, user_id, comment_count) "
+        "SELECT celebrity_id, user_id, count(*) FROM comments "
+        "GROUP BY celebrity_id, user_id"
+    )
+    today = datetime.utcnow().date()
+    bind.execute(
+        sa.text(
+            "INSERT INTO user_comment_stats "
+            "(user_id, total_comments, reply_comments, recent_date, recent_comments) "
+            "SELECT user_id, count(*), count(parent_id), :today, "
+            "sum(CASE WHEN created_at >= :midnight THEN 1 ELSE 0 END) "
+            "FROM comments GROUP BY user_id"
+        ).bindparams(
+            sa.bindparam("today", type_=sa.Date()),
+            sa.bindparam("midnight", type_=sa.DateTime()),
+        ),
+        {"today": today, "midnight": datetime.combine(today, datetime.min.time())},
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_comment_stats")
+    op.drop_index(
+        "ix_celebrity_commenter_counts_rank", table_name="celebrity_commenter_counts"
+    )
+    op.drop_table("celebrity_commenter_counts")
+    op.drop_table("celebrity_comment_stats")
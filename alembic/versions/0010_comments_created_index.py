@@ -0,0 +1,48 @@
+"""Global comment feed index
+
+Revision ID: 0010_comments_created_index
+Revises: 0009_comment_counters
+Create Date: 2026-10-16
+
+``ix_comments_created`` serves the site-wide recent comments feed, a
+``(created_at, id)`` keyset scan with no celebrity or user filter.
+"""
+
+from alembic import op
+
+revision = "0010_comments_created_index"
+down_revision = "0009_comment_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_comments_created",
+                "comments",
+                ["created_at", "id"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            "ix_comments_created",
+            "comments",
+            ["created_at", "id"],
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                "ix_comments_created",
+                table_name="comments",
+                postgresql_concurrently=True,
+            )
+    else:
+        op.drop_index("ix_comments_created", table_name="comments")
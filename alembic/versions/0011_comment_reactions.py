@@ -0,0 +1,148 @@
+"""Comment reactions and hot scores
+
+Revision ID: 0011_comment_reactions
+Revises: 0010_comments_created_index
+Create Date: 2026-10-16
+
+``comment_reactions`` holds one reaction per user and comment;
+``comment_reaction_counts`` aggregates them per comment and type over
+several shard rows, so concurrent reactions to one comment do not contend
+for a single row. ``comments.reaction_count`` and ``comments.hot_score``
+(see ``app.core.hot_score``) are refreshed in batches from those counters,
+and ``ix_comments_celebrity_hot`` makes the hot comments page an index range
+scan. Existing comments have no reactions; their scores are backfilled from
+their creation time, with the score formula copied below as of this
+revision.
+"""
+
+import calendar
+import math
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0011_comment_reactions"
+down_revision = "0010_comments_created_index"
+branch_labels = None
+depends_on = None
+
+REACTION_TYPES = ("LIKE", "LOVE", "HAHA", "INSIGHTFUL")
+
+BATCH_SIZE = 500
+
+HALF_LIFE_SECONDS = 12 * 60 * 60
+
+
+def hot_score(reaction_count, created_at) -> float:
+    seconds = 0.0
+    if created_at is not None:
+        # Naive datetimes are UTC, as stored by the database defaults
+        seconds = calendar.timegm(created_at.utctimetuple()) + (
+            created_at.microsecond / 10**6
+        )
+    return math.log2(1 + max(reaction_count, 0)) + seconds / HALF_LIFE_SECONDS
+
+
+def reaction_enum() -> sa.types.TypeEngine:
+    # Shared by two tables; on PostgreSQL the type is created once, up front
+    return sa.Enum(*REACTION_TYPES, name="reactiontype").with_variant(
+        postgresql.ENUM(*REACTION_TYPES, name="reactiontype", create_type=False),
+        "postgresql",
+    )
+
+
+def backfill(bind) -> None:
+    rows = bind.execute(
+        sa.text("SELECT id, reaction_count, created_at FROM comments").columns(
+            created_at=sa.DateTime()
+        )
+    ).all()
+    update = sa.text("UPDATE comments SET hot_score = :hot_score WHERE id = :id")
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(
+            update,
+            [
+                {
+                    "id": row.id,
+                    "hot_score": hot_score(row.reaction_count, row.created_at),
+                }
+                for row in rows[start : start + BATCH_SIZE]
+            ],
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+    columns = {column["name"] for column in inspector.get_columns("comments")}
+
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(*REACTION_TYPES, name="reactiontype").create(
+            bind, checkfirst=True
+        )
+
+    if "comment_reactions" not in existing:
+        op.create_table(
+            "comment_reactions",
+            sa.Column("comment_id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("reaction", reaction_enum(), nullable=False),
+            sa.Column(
+                "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            ),
+            sa.ForeignKeyConstraint(["comment_id"], ["comments.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("comment_id", "user_id"),
+        )
+    if "comment_reaction_counts" not in existing:
+        op.create_table(
+            "comment_reaction_counts",
+            sa.Column("comment_id", sa.String(), nullable=False),
+            sa.Column("reaction", reaction_enum(), nullable=False),
+            sa.Column("shard", sa.Integer(), nullable=False),
+            sa.Column("reaction_count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["comment_id"], ["comments.id"]),
+            sa.PrimaryKeyConstraint("comment_id", "reaction", "shard"),
+        )
+
+    if "reaction_count" not in columns:
+        op.add_column(
+            "comments",
+            sa.Column(
+                "reaction_count", sa.Integer(), nullable=False, server_default="0"
+            ),
+        )
+    if "hot_score" not in columns:
+        op.add_column(
+            "comments",
+            sa.Column("hot_score", sa.Float(), nullable=False, server_default="0"),
+        )
+        backfill(bind)
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_comments_celebrity_hot",
+                "comments",
+                ["celebrity_id", "hot_score", "id"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            "ix_comments_celebrity_hot",
+            "comments",
+            ["celebrity_id", "hot_score", "id"],
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comments_celebrity_hot", table_name="comments")
+    op.drop_column("comments", "hot_score")
+    op.drop_column("comments", "reaction_count")
+    op.drop_table("comment_reaction_counts")
+    op.drop_table("comment_reactions")
+    sa.Enum(name="reactiontype").drop(op.get_bind(), checkfirst=True)
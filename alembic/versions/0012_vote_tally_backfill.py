@@ -0,0 +1,81 @@
+"""Backfill vote tallies
+
+Revision ID: 0012_vote_tally_backfill
+Revises: 0011_comment_reactions
+Create Date: 2026-10-16
+
+``celebrity_vote_tallies`` was created empty by ``0001_baseline``, so on a
+database that already had votes the statistics and the leaderboard showed
+zero votes until ``rebuild_vote_tallies.py`` was run. Every celebrity
+without a tally row now gets one computed from its votes. Rows already being
+maintained are left alone.
+"""
+
+from alembic import op
+
+revision = "0012_vote_tally_backfill"
+down_revision = "0011_comment_reactions"
+branch_labels = None
+depends_on = None
+
+MBTI_TYPES = (
+    "INTJ",
+    "INTP",
+    "ENTJ",
+    "ENTP",
+    "INFJ",
+    "INFP",
+    "ENFJ",
+    "ENFP",
+    "ISTJ",
+    "ISFJ",
+    "ESTJ",
+    "ESFJ",
+    "ISTP",
+    "ISFP",
+    "ESTP",
+    "ESFP",
+)
+
+
+def top_type_expression() -> str:
+    """Most voted type, ties to the earlier type, NULL without votes"""
+    columns = [f"{mbti_type.lower()}_count" for mbti_type in MBTI_TYPES]
+    whens = []
+    for position, (mbti_type, column) in enumerate(zip(MBTI_TYPES, columns)):
+        conditions = [f"{column} > 0"]
+        conditions += [f"{column} > {other}" for other in columns[:position]]
+        conditions += [f"{column} >= {other}" for other in columns[position + 1 :]]
+        whens.append(f"WHEN {' AND '.join(conditions)} THEN '{mbti_type}'")
+    return f"CASE {' '.join(whens)} END"
+
+
+def upgrade() -> None:
+    columns = [f"{mbti_type.lower()}_count" for mbti_type in MBTI_TYPES]
+    per_type = ", ".join(
+        f"sum(CASE WHEN v.mbti_type = '{mbti_type}' THEN 1 ELSE 0 END) AS {column}"
+        for mbti_type, column in zip(MBTI_TYPES, columns)
+    )
+    top_type = top_type_expression()
+    if op.get_bind().dialect.name == "postgresql":
+        top_type = f"CAST({top_type} AS mbtitype)"
+
+    op.execute(
+        "INSERT INTO celebrity_vote_tallies "
+        f"(celebrity_id, total_votes, votes_with_reason, {', '.join(columns)}, "
+        "top_mbti_type) "
+        f"SELECT celebrity_id, total_votes, votes_with_reason, {', '.join(columns)}, "
+        f"{top_type} FROM ("
+        "SELECT c.id AS celebrity_id, count(v.id) AS total_votes, "
+        "sum(CASE WHEN v.reason IS NOT NULL THEN 1 ELSE 0 END) AS votes_with_reason, "
+        f"{per_type} "
+        "FROM celebrities c LEFT JOIN votes v ON v.celebrity_id = c.id "
+        "WHERE c.id NOT IN (SELECT celebrity_id FROM celebrity_vote_tallies) "
+        "GROUP BY c.id"
+        ") counts"
+    )
+
+
+def downgrade() -> None:
+    # The rows are indistinguishable from maintained ones; keep them
+    pass
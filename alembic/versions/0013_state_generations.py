@@ -0,0 +1,34 @@
+"""State generations
+
+Revision ID: 0013_state_generations
+Revises: 0012_vote_tally_backfill
+Create Date: 2026-10-16
+
+``state_generations`` holds one counter per kind of write (see
+``app.core.generations``). Writes bump it in their own transaction; every
+worker compares it with the value its in-memory search structures were
+built at and rebuilds them when another worker has written since.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_state_generations"
+down_revision = "0012_vote_tally_backfill"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "state_generations" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "state_generations",
+            sa.Column("name", sa.String(length=32), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("state_generations")
@@ -0,0 +1,173 @@
+"""FTS5 table over the folded search document
+
+Revision ID: 0014_fts5_search_document
+Revises: 0013_state_generations
+Create Date: 2026-10-16
+
+``celebrity_search_fts`` held the names, description and tags as written,
+so the fts5 backend matched Traditional, full-width and mixed-case text
+differently from the other backends. It now holds one column, a copy of
+``celebrities.search_document``, which the application has already folded.
+Triggers copy the document whenever it is written; tag changes rewrite the
+document, so they need no triggers of their own.
+
+SQLite only. An SQLite build without the FTS5 trigram tokenizer keeps no
+FTS table, as in ``0003_search_backends``.
+"""
+
+import logging
+
+from alembic import op
+
+revision = "0014_fts5_search_document"
+down_revision = "0013_state_generations"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+FTS_TABLE = "celebrity_search_fts"
+KEYS_TABLE = "celebrity_search_keys"
+
+
+def doc_id(celebrity_id: str) -> str:
+    return f"(SELECT doc_id FROM {KEYS_TABLE} WHERE celebrity_id = {celebrity_id})"
+
+
+TRIGGERS = {
+    "celebrities_search_ai": f"""
+        AFTER INSERT ON celebrities BEGIN
+            INSERT INTO {KEYS_TABLE}(celebrity_id) VALUES (new.id);
+            INSERT INTO {FTS_TABLE}(rowid, document)
+            VALUES ({doc_id("new.id")}, new.search_document);
+        END""",
+    "celebrities_search_au": f"""
+        AFTER UPDATE OF search_document ON celebrities BEGIN
+            UPDATE {FTS_TABLE} SET document = new.search_document
+            WHERE rowid = {doc_id("new.id")};
+        END""",
+    "celebrities_search_ad": f"""
+        AFTER DELETE ON celebrities BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = {doc_id("old.id")};
+            DELETE FROM {KEYS_TABLE} WHERE celebrity_id = old.id;
+        END""",
+}
+
+# Triggers of 0003_search_backends, which fed the fields as written
+OLD_TRIGGERS = (
+    "celebrities_search_ai",
+    "celebrities_search_au",
+    "celebrities_search_ad",
+    "celebrity_tags_search_ai",
+    "celebrity_tags_search_ad",
+    "tags_search_au",
+)
+OLD_TAGS_OF = """(
+    SELECT group_concat(t.name, char(10))
+    FROM celebrity_tags ct JOIN tags t ON t.id = ct.tag_id
+    WHERE ct.celebrity_id = {celebrity_id}
+)"""
+OLD_TRIGGER_BODIES = {
+    "celebrities_search_ai": f"""
+        AFTER INSERT ON celebrities BEGIN
+            INSERT INTO {KEYS_TABLE}(celebrity_id) VALUES (new.id);
+            INSERT INTO {FTS_TABLE}(rowid, name, name_en, description, tags)
+            VALUES (
+                {doc_id("new.id")}, new.name, new.name_en, new.description,
+                {OLD_TAGS_OF.format(celebrity_id="new.id")}
+            );
+        END""",
+    "celebrities_search_au": f"""
+        AFTER UPDATE OF name, name_en, description ON celebrities BEGIN
+            UPDATE {FTS_TABLE}
+            SET name = new.name, name_en = new.name_en,
+                description = new.description
+            WHERE rowid = {doc_id("new.id")};
+        END""",
+    "celebrities_search_ad": TRIGGERS["celebrities_search_ad"],
+    "celebrity_tags_search_ai": f"""
+        AFTER INSERT ON celebrity_tags BEGIN
+            UPDATE {FTS_TABLE}
+            SET tags = {OLD_TAGS_OF.format(celebrity_id="new.celebrity_id")}
+            WHERE rowid = {doc_id("new.celebrity_id")};
+        END""",
+    "celebrity_tags_search_ad": f"""
+        AFTER DELETE ON celebrity_tags BEGIN
+            UPDATE {FTS_TABLE}
+            SET tags = {OLD_TAGS_OF.format(celebrity_id="old.celebrity_id")}
+            WHERE rowid = {doc_id("old.celebrity_id")};
+        END""",
+    "tags_search_au": f"""
+        AFTER UPDATE OF name ON tags BEGIN
+            UPDATE {FTS_TABLE}
+            SET tags = {OLD_TAGS_OF.format(celebrity_id=f"{KEYS_TABLE}.celebrity_id")}
+            FROM {KEYS_TABLE}
+            WHERE {FTS_TABLE}.rowid = {KEYS_TABLE}.doc_id
+              AND {KEYS_TABLE}.celebrity_id IN (
+                  SELECT celebrity_id FROM celebrity_tags WHERE tag_id = new.id
+              );
+        END""",
+}
+
+
+def fts5_trigram_available(bind) -> bool:
+    """The trigram tokenizer needs SQLite 3.34+ built with FTS5"""
+    version = tuple(int(part) for part in bind.dialect.dbapi.sqlite_version.split("."))
+    options = {row[0] for row in bind.exec_driver_sql("PRAGMA compile_options")}
+    return version >= (3, 34) and "ENABLE_FTS5" in options
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    if not fts5_trigram_available(bind):
+        logger.warning(
+            "SQLite lacks the FTS5 trigram tokenizer; %s is not created", FTS_TABLE
+        )
+        return
+
+    for name in OLD_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {KEYS_TABLE} ("
+        "doc_id INTEGER PRIMARY KEY, celebrity_id VARCHAR NOT NULL UNIQUE)"
+    )
+    op.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(document, tokenize='trigram')"
+    )
+    for name, body in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+    op.execute(
+        f"INSERT INTO {KEYS_TABLE}(celebrity_id) SELECT id FROM celebrities "
+        f"WHERE id NOT IN (SELECT celebrity_id FROM {KEYS_TABLE})"
+    )
+    op.execute(
+        f"INSERT INTO {FTS_TABLE}(rowid, document) "
+        "SELECT k.doc_id, c.search_document "
+        f"FROM celebrities c JOIN {KEYS_TABLE} k ON k.celebrity_id = c.id"
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite" or not fts5_trigram_available(bind):
+        return
+
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    op.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} "
+        "USING fts5(name, name_en, description, tags, tokenize='trigram')"
+    )
+    for name, body in OLD_TRIGGER_BODIES.items():
+        op.execute(f"CREATE TRIGGER {name} {body}")
+    op.execute(
+        f"INSERT INTO {FTS_TABLE}(rowid, name, name_en, description, tags) "
+        "SELECT k.doc_id, c.name, c.name_en, c.description, "
+        f"{OLD_TAGS_OF.format(celebrity_id='c.id')} "
+        f"FROM celebrities c JOIN {KEYS_TABLE} k ON k.celebrity_id = c.id"
+    )
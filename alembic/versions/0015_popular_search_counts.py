@@ -0,0 +1,59 @@
+"""Popular search counts
+
+Revision ID: 0015_popular_search_counts
+Revises: 0014_fts5_search_document
+Create Date: 2026-10-17
+
+``popular_search_snapshots`` held the top queries each worker saw, but
+nothing read them back and nothing pruned them. Every worker now adds the
+searches it saw to ``popular_search_counts``, per rolling window and time
+bucket, and reads the sum of all workers from there (see
+``app.search.popular``). Old snapshot rows are per-worker top lists and cannot
+be turned into bucket counts, so the table is dropped.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015_popular_search_counts"
+down_revision = "0014_fts5_search_document"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "popular_search_counts" not in tables:
+        op.create_table(
+            "popular_search_counts",
+            sa.Column("window", sa.String(length=8), nullable=False),
+            sa.Column("bucket", sa.Integer(), nullable=False),
+            sa.Column("term", sa.String(length=100), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("window", "bucket", "term"),
+        )
+    if "popular_search_snapshots" in tables:
+        op.drop_index(
+            "ix_popular_search_snapshots_window_captured",
+            table_name="popular_search_snapshots",
+        )
+        op.drop_table("popular_search_snapshots")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "popular_search_snapshots",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("window", sa.String(length=8), nullable=False),
+        sa.Column("term", sa.String(length=100), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("captured_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_popular_search_snapshots_window_captured",
+        "popular_search_snapshots",
+        ["window", "captured_at"],
+    )
+    op.drop_table("popular_search_counts")
@@ -0,0 +1,107 @@
+"""Comment path segments ordered by comment ID
+
+Revision ID: 0016_comment_path_ids
+Revises: 0015_popular_search_counts
+Create Date: 2026-10-17
+
+Path segments broke timestamp ties with a CRC32 of the comment ID, while the
+keyset pages break them by the ID itself. Comments created in the same
+instant (common for older rows stored with second resolution) could list in
+a different order in thread paths than in keyset pages. Segments now carry the
+ID's own 32 hex digits (see ``app.core.comment_paths``; both segment formats
+are copied below) and every path is recomputed.
+"""
+
+import calendar
+import uuid
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016_comment_path_ids"
+down_revision = "0015_popular_search_counts"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+TIMESTAMP_DIGITS = 13
+TIMESTAMP_MAX = 16**TIMESTAMP_DIGITS - 1
+ID_DIGITS = 32
+ID_MAX = 16**ID_DIGITS - 1
+
+
+def microseconds(created_at) -> int:
+    # Naive datetimes are UTC, as stored by the database defaults
+    return calendar.timegm(created_at.utctimetuple()) * 10**6 + created_at.microsecond
+
+
+def id_number(comment_id) -> int:
+    try:
+        return uuid.UUID(comment_id).int
+    except ValueError:
+        return int.from_bytes(comment_id.encode()[:16].ljust(16, b"\0"), "big")
+
+
+def child_path(parent_path, comment_id, created_at) -> str:
+    timestamp, number = microseconds(created_at), id_number(comment_id)
+    if parent_path is None:
+        timestamp, number = TIMESTAMP_MAX - timestamp, ID_MAX - number
+    segment = f"{timestamp:0{TIMESTAMP_DIGITS}x}{number:0{ID_DIGITS}x}"
+    return (parent_path or "") + segment
+
+
+def crc_child_path(parent_path, comment_id, created_at) -> str:
+    """Segment format of ``0008_comment_paths``"""
+    timestamp = microseconds(created_at)
+    if parent_path is None:
+        timestamp = TIMESTAMP_MAX - timestamp
+    segment = f"{timestamp:0{TIMESTAMP_DIGITS}x}{zlib.crc32(comment_id.encode()):08x}"
+    return (parent_path or "") + segment
+
+
+def rewrite_paths(bind, make_path) -> None:
+    rows = {
+        row.id: row
+        for row in bind.execute(
+            sa.text("SELECT id, parent_id, created_at FROM comments").columns(
+                created_at=sa.DateTime()
+            )
+        )
+    }
+
+    def parent_of(comment_id):
+        parent_id = rows[comment_id].parent_id
+        return parent_id if parent_id in rows else None
+
+    # Walk up to the nearest ancestor with a known path, then fill in downwards
+    paths = {}
+    for comment_id in rows:
+        chain, node = [], comment_id
+        while node is not None and node not in paths:
+            chain.append(node)
+            node = parent_of(node)
+        for node in reversed(chain):
+            paths[node] = make_path(
+                paths.get(parent_of(node)), node, rows[node].created_at
+            )
+
+    update = sa.text("UPDATE comments SET path = :path WHERE id = :id")
+    ids = list(rows)
+    for start in range(0, len(ids), BATCH_SIZE):
+        bind.execute(
+            update,
+            [
+                {"id": comment_id, "path": paths[comment_id]}
+                for comment_id in ids[start : start + BATCH_SIZE]
+            ],
+        )
+
+
+def upgrade() -> None:
+    rewrite_paths(op.get_bind(), child_path)
+
+
+def downgrade() -> None:
+    rewrite_paths(op.get_bind(), crc_child_path)
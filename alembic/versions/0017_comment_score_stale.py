@@ -0,0 +1,83 @@
+"""Persisted hot score refresh queue
+
+Revision ID: 0017_comment_score_stale
+Revises: 0016_comment_path_ids
+Create Date: 2026-10-17
+
+Comments awaiting a hot score refresh were queued in worker memory, so a
+restart or a crash lost them and their scores stayed stale until their next
+reaction. A reaction now also sets ``comment_reaction_counts.score_stale`` on
+the counter shard it updates anyway, and the refresh clears it (see
+``app.services.comment_reaction_service``). A partial index keeps the flagged
+rows cheap to find. Comments whose stored count already differs from their
+shards are flagged on upgrade.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0017_comment_score_stale"
+down_revision = "0016_comment_path_ids"
+branch_labels = None
+depends_on = None
+
+
+def flag_drifted(bind) -> None:
+    counts = sa.table(
+        "comment_reaction_counts",
+        sa.column("comment_id", sa.String()),
+        sa.column("reaction_count", sa.Integer()),
+        sa.column("score_stale", sa.Boolean()),
+    )
+    comments = sa.table(
+        "comments", sa.column("id", sa.String()), sa.column("reaction_count")
+    )
+    totals = (
+        sa.select(
+            counts.c.comment_id, sa.func.sum(counts.c.reaction_count).label("total")
+        )
+        .group_by(counts.c.comment_id)
+        .subquery()
+    )
+    drifted = (
+        sa.select(comments.c.id)
+        .join(totals, totals.c.comment_id == comments.c.id)
+        .where(comments.c.reaction_count != totals.c.total)
+    )
+    bind.execute(
+        counts.update()
+        .where(counts.c.comment_id.in_(drifted))
+        .values(score_stale=sa.true())
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {
+        column["name"] for column in inspector.get_columns("comment_reaction_counts")
+    }
+    if "score_stale" not in columns:
+        op.add_column(
+            "comment_reaction_counts",
+            sa.Column(
+                "score_stale", sa.Boolean(), nullable=False, server_default=sa.false()
+            ),
+        )
+    flag_drifted(bind)
+
+    op.create_index(
+        "ix_comment_reaction_counts_stale",
+        "comment_reaction_counts",
+        ["comment_id"],
+        postgresql_where=sa.text("score_stale"),
+        sqlite_where=sa.text("score_stale"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_comment_reaction_counts_stale", table_name="comment_reaction_counts"
+    )
+    op.drop_column("comment_reaction_counts", "score_stale")
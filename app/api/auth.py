@@ -1,6 +1,6 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
@@ -26,16 +26,21 @@ def get_current_user(
 
 
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+def register_user(
+    user_data: UserCreate, request: Request, db: Session = Depends(get_db)
+):
     """
     Register a new user account
 
     - **email**: User's email address (must be unique)
     - **password**: User's password (minimum 6 characters)
     - **name**: User's display name
+
+    Note: each IP can register `daily_registrations_per_ip` accounts per day
     """
     auth_service = AuthService(db)
-    user = auth_service.register_user(user_data)
+    client_ip = request.client.host if request.client else None
+    user = auth_service.register_user(user_data, client_ip=client_ip)
 
     # Create access token for the newly registered user
     access_token_expires = timedelta(hours=24)
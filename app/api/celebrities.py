@@ -1,11 +1,21 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.live_events import get_live_event_hub
+from app.core.pagination import set_next_cursor
 from app.database.database import get_db
 from app.services.celebrity_service import CelebrityService
 from app.services.auth_service import AuthService
-from app.schemas.celebrity import CelebrityCreate, CelebrityUpdate, CelebrityResponse
+from app.schemas.celebrity import (
+    CelebrityCreate,
+    CelebrityUpdate,
+    CelebrityResponse,
+    CelebrityBatchResponse,
+    CelebrityFullResponse,
+)
+from app.schemas.comment import CommentResponse, CommentThreadResponse
 from app.database.models import User, UserRole
 
 router = APIRouter(prefix="/celebrities", tags=["celebrities"])
@@ -52,8 +62,12 @@ def create_celebrity(
 
 @router.get("/", response_model=List[CelebrityResponse])
 def get_celebrities(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     search: Optional[str] = Query(
         None, description="Search term for name or description"
     ),
@@ -64,12 +78,14 @@ def get_celebrities(
 
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     - **search**: Search term to filter by name or description
     """
     celebrity_service = CelebrityService(db)
     celebrities = celebrity_service.get_all_celebrities(
-        skip=skip, limit=limit, search=search
+        skip=skip, limit=limit, cursor=cursor, search=search
     )
+    set_next_cursor(response, celebrities, limit)
     return [CelebrityResponse.model_validate(celebrity) for celebrity in celebrities]
 
 
@@ -93,8 +109,12 @@ def get_popular_celebrities(
 @router.get("/tag/{tag_name}", response_model=List[CelebrityResponse])
 def get_celebrities_by_tag(
     tag_name: str,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -103,14 +123,44 @@ def get_celebrities_by_tag(
     - **tag_name**: Name of the tag to filter by
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     """
     celebrity_service = CelebrityService(db)
     celebrities = celebrity_service.get_celebrities_by_tag(
-        tag_name, skip=skip, limit=limit
+        tag_name, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, celebrities, limit)
     return [CelebrityResponse.model_validate(celebrity) for celebrity in celebrities]
 
 
+@router.get("/batch", response_model=CelebrityBatchResponse)
+def get_celebrities_batch(
+    ids: List[str] = Query(
+        ..., description="Celebrity IDs, comma-separated or repeated (max 500)"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Get many celebrities by ID in one request
+
+    - **ids**: Celebrity IDs, e.g. `?ids=a,b,c` or `?ids=a&ids=b` (max 500)
+
+    Returns:
+    - `celebrities`: the celebrities found, with their tags, in request order
+    - `missing_ids`: requested IDs with no celebrity, in request order
+    """
+    celebrity_ids = [id_.strip() for value in ids for id_ in value.split(",")]
+    celebrity_ids = [id_ for id_ in celebrity_ids if id_]
+    celebrity_service = CelebrityService(db)
+    celebrities, missing_ids = celebrity_service.get_celebrities_by_ids(celebrity_ids)
+    return CelebrityBatchResponse(
+        celebrities=[
+            CelebrityResponse.model_validate(celebrity) for celebrity in celebrities
+        ],
+        missing_ids=missing_ids,
+    )
+
+
 @router.get("/{celebrity_id}", response_model=CelebrityResponse)
 def get_celebrity(celebrity_id: str, db: Session = Depends(get_db)):
     """
@@ -127,6 +177,68 @@ def get_celebrity(celebrity_id: str, db: Session = Depends(get_db)):
     return CelebrityResponse.model_validate(celebrity)
 
 
+@router.get("/{celebrity_id}/full", response_model=CelebrityFullResponse)
+def get_celebrity_full(
+    celebrity_id: str,
+    comment_limit: int = Query(
+        20, ge=1, le=100, description="Number of comment threads to return"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Get everything a celebrity page needs in one request
+
+    - **celebrity_id**: Unique identifier of the celebrity
+    - **comment_limit**: Number of comment threads to return (max 100)
+
+    Returns:
+    - The celebrity profile and its tag names
+    - Vote statistics (as `/votes/statistics/celebrity/{id}`)
+    - The newest comment threads, each with its nested replies; continue
+      with `/comments/celebrity/{id}?include_replies=false&cursor=` and
+      `comments_next_cursor`
+    - Comment statistics (as `/comments/statistics/celebrity/{id}`)
+    """
+    celebrity_service = CelebrityService(db)
+    full = celebrity_service.get_celebrity_full(celebrity_id, comment_limit)
+    full["celebrity"] = CelebrityResponse.model_validate(full["celebrity"])
+    full["comments"] = [_thread_response(thread) for thread in full["comments"]]
+    return CelebrityFullResponse(**full)
+
+
+def _thread_response(thread) -> CommentThreadResponse:
+    return CommentThreadResponse(
+        **CommentResponse.model_validate(thread["comment"]).model_dump(),
+        replies=[_thread_response(reply) for reply in thread["replies"]],
+    )
+
+
+@router.get("/{celebrity_id}/events")
+def stream_celebrity_events(celebrity_id: str, db: Session = Depends(get_db)):
+    """
+    Live comments and votes for a celebrity, as Server-Sent Events
+
+    - **celebrity_id**: Unique identifier of the celebrity
+
+    Every few hundred milliseconds with activity, an `activity` event carries
+    the new comments (as `/comments/celebrity/{id}`) and the net vote change
+    per MBTI type, e.g. `{"celebrity_id": "...", "comments": [...],
+    "votes": {"INTJ": 2}}`. Use it with `EventSource` instead of polling.
+    """
+    celebrity_service = CelebrityService(db)
+    if not celebrity_service.get_celebrity_by_id(celebrity_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Celebrity not found"
+        )
+    # The stream may stay open for hours; do not hold a connection meanwhile
+    db.close()
+    return StreamingResponse(
+        get_live_event_hub().stream(celebrity_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/search/{name}", response_model=CelebrityResponse)
 def get_celebrity_by_name(name: str, db: Session = Depends(get_db)):
     """
@@ -1,11 +1,19 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.pagination import NEXT_CURSOR_HEADER, set_next_cursor
 from app.database.database import get_db
 from app.services.comment_service import CommentService
+from app.services.comment_reaction_service import CommentReactionService
 from app.services.auth_service import AuthService
-from app.schemas.comment import CommentCreate, CommentResponse
+from app.schemas.comment import (
+    CommentCreate,
+    CommentResponse,
+    CommentTreeNodeResponse,
+    ReactionCreate,
+    ReactionSummaryResponse,
+)
 from app.database.models import User
 
 router = APIRouter(prefix="/comments", tags=["comments"])
@@ -45,8 +53,12 @@ def create_comment(
 
 @router.get("/", response_model=List[CommentResponse])
 def get_comments(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     celebrity_id: Optional[str] = Query(None, description="Filter by celebrity ID"),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
     include_replies: bool = Query(
@@ -55,10 +67,12 @@ def get_comments(
     db: Session = Depends(get_db),
 ):
     """
-    Get all comments with optional filters
+    Get comments with optional filters; without filters, the newest comments
+    across all celebrities
 
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     - **celebrity_id**: Filter comments by celebrity ID
     - **user_id**: Filter comments by user ID
     - **include_replies**: Whether to include reply comments
@@ -67,23 +81,33 @@ def get_comments(
 
     if celebrity_id:
         comments = comment_service.get_celebrity_comments(
-            celebrity_id, skip=skip, limit=limit, include_replies=include_replies
+            celebrity_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            include_replies=include_replies,
         )
     elif user_id:
-        comments = comment_service.get_user_comments(user_id, skip=skip, limit=limit)
+        comments = comment_service.get_user_comments(
+            user_id, skip=skip, limit=limit, cursor=cursor
+        )
     else:
-        # Get all comments (you might want to limit this in production)
-        comments = comment_service.get_celebrity_comments(
-            "", skip=skip, limit=limit, include_replies=include_replies
+        comments = comment_service.get_recent_comments(
+            skip=skip, limit=limit, cursor=cursor, include_replies=include_replies
         )
 
+    set_next_cursor(response, comments, limit)
     return [CommentResponse.model_validate(comment) for comment in comments]
 
 
 @router.get("/my-comments", response_model=List[CommentResponse])
 def get_my_comments(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -92,19 +116,25 @@ def get_my_comments(
 
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     """
     comment_service = CommentService(db)
     comments = comment_service.get_user_comments(
-        current_user.id, skip=skip, limit=limit
+        current_user.id, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, comments, limit)
     return [CommentResponse.model_validate(comment) for comment in comments]
 
 
 @router.get("/user/{user_id}", response_model=List[CommentResponse])
 def get_user_comments(
     user_id: str,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -113,20 +143,31 @@ def get_user_comments(
     - **user_id**: ID of the user
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     """
     comment_service = CommentService(db)
-    comments = comment_service.get_user_comments(user_id, skip=skip, limit=limit)
+    comments = comment_service.get_user_comments(
+        user_id, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, comments, limit)
     return [CommentResponse.model_validate(comment) for comment in comments]
 
 
 @router.get("/celebrity/{celebrity_id}", response_model=List[CommentResponse])
 def get_celebrity_comments(
     celebrity_id: str,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     include_replies: bool = Query(
         True, description="Whether to include reply comments"
     ),
+    sort: str = Query(
+        "new", pattern="^(new|hot)$", description="Sort order: new or hot"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -135,15 +176,68 @@ def get_celebrity_comments(
     - **celebrity_id**: ID of the celebrity
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`;
+      `sort=new` only)
     - **include_replies**: Whether to include reply comments
+    - **sort**: `new` (newest first) or `hot` (reactions with time decay: a
+      comment needs twice the reactions every 12 hours to keep its rank)
     """
     comment_service = CommentService(db)
+    if sort == "hot":
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not supported with sort=hot",
+            )
+        comments = comment_service.get_hot_comments(
+            celebrity_id, skip=skip, limit=limit, include_replies=include_replies
+        )
+        return [CommentResponse.model_validate(comment) for comment in comments]
+
     comments = comment_service.get_celebrity_comments(
-        celebrity_id, skip=skip, limit=limit, include_replies=include_replies
+        celebrity_id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        include_replies=include_replies,
     )
+    set_next_cursor(response, comments, limit)
     return [CommentResponse.model_validate(comment) for comment in comments]
 
 
+@router.get(
+    "/celebrity/{celebrity_id}/tree", response_model=List[CommentTreeNodeResponse]
+)
+def get_celebrity_comment_tree(
+    celebrity_id: str,
+    response: Response,
+    limit: int = Query(200, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a celebrity's comments as a thread tree, in display order
+
+    - **celebrity_id**: ID of the celebrity
+    - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
+
+    Threads come newest first and every comment is directly followed by its
+    replies (oldest first), so a client renders the list in order, indenting
+    by `depth`. `reply_count` is the number of direct replies. A page may end
+    inside a thread; the next page continues where it stopped.
+    """
+    comment_service = CommentService(db)
+    comments = comment_service.get_comment_tree(
+        celebrity_id, limit=limit, cursor=cursor
+    )
+    if len(comments) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = comments[-1].path
+    return [CommentTreeNodeResponse.model_validate(comment) for comment in comments]
+
+
 @router.get("/{comment_id}", response_model=CommentResponse)
 def get_comment(comment_id: str, db: Session = Depends(get_db)):
     """
@@ -179,6 +273,56 @@ def get_comment_replies(
     return [CommentResponse.model_validate(reply) for reply in replies]
 
 
+@router.get("/{comment_id}/reactions", response_model=ReactionSummaryResponse)
+def get_comment_reactions(comment_id: str, db: Session = Depends(get_db)):
+    """
+    Get the reaction counts of a comment
+
+    - **comment_id**: ID of the comment
+    """
+    reaction_service = CommentReactionService(db)
+    return reaction_service.get_reaction_summary(comment_id)
+
+
+@router.put("/{comment_id}/reactions", response_model=ReactionSummaryResponse)
+def set_comment_reaction(
+    comment_id: str,
+    reaction_data: ReactionCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    React to a comment, or change your reaction
+
+    - **comment_id**: ID of the comment
+    - **reaction**: LIKE, LOVE, HAHA or INSIGHTFUL
+
+    Each user has at most one reaction per comment. The comment's
+    `reaction_count` and hot ranking follow within a few seconds; the counts
+    returned here are exact.
+    """
+    reaction_service = CommentReactionService(db)
+    return reaction_service.set_reaction(
+        comment_id, current_user.id, reaction_data.reaction
+    )
+
+
+@router.delete("/{comment_id}/reactions", status_code=status.HTTP_204_NO_CONTENT)
+def remove_comment_reaction(
+    comment_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Remove your reaction from a comment
+
+    - **comment_id**: ID of the comment
+    """
+    reaction_service = CommentReactionService(db)
+    reaction_service.remove_reaction(comment_id, current_user.id)
+    return None
+
+
 @router.put("/{comment_id}", response_model=CommentResponse)
 def update_comment(
     comment_id: str,
@@ -1,11 +1,36 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import json
+from typing import Any, Dict, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Response,
+    status,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.database.database import get_db
+from app.search import get_popular_search_tracker, get_search_cache
+from app.search.popular import WINDOWS
+from app.search.cache import serialize
 from app.services.search_service import SearchService
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+SEARCH_CACHE_HEADER = "X-Search-Cache"
+
+SEARCH_TYPES = ["all", "name", "description", "tag", "mbti"]
+
+# Search-as-you-type: results and suggestions pushed per settled query
+LIVE_SEARCH_LIMIT = 10
+LIVE_SEARCH_MAX_LIMIT = 50
+LIVE_SUGGESTION_LIMIT = 5
+
 
 @router.get("/")
 def search_celebrities(
@@ -45,15 +70,25 @@ def search_celebrities(
     - Name contains: 80 points
     - Description contains: 60 points
     - Tag matches: 40 points
+    - Name with a typo (e.g. "Xiao Zan"): 20 points, only when the tiers
+      above do not fill the page
+
+    **Facets:** counts over every match (not just the returned page), so
+    filter options can show how many results they would leave:
+    - `facets.top_mbti_type`: matches per most voted MBTI type
+    - `facets.tags`: the most frequent tags among the matches, with counts
+
+    Results are cached until the next celebrity or tag write, or the next
+    vote when sorted or filtered by votes (or the cache TTL); the
+    `X-Search-Cache` header reports `HIT` or `MISS`.
     """
     search_service = SearchService(db)
 
     # Validate search type
-    valid_search_types = ["all", "name", "description", "tag", "mbti"]
-    if search_type not in valid_search_types:
+    if search_type not in SEARCH_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid search_type. Must be one of: {valid_search_types}",
+            detail=f"Invalid search_type. Must be one of: {SEARCH_TYPES}",
         )
 
     # Validate popularity filter
@@ -89,28 +124,56 @@ def search_celebrities(
                 detail=f"Invalid MBTI type. Must be one of: {valid_mbti_types}",
             )
 
+    get_popular_search_tracker().record(q)
+
+    search_cache = get_search_cache()
     try:
-        results = search_service.search_celebrities(
-            query=q,
-            search_type=search_type,
-            mbti_type=mbti_type,
-            tag_filter=tag_filter,
-            popularity_filter=popularity_filter,
-            skip=skip,
-            limit=limit,
+        cached, hit = search_cache.get_or_compute(
+            search_cache.make_key(
+                db,
+                q,
+                search_type,
+                mbti_type,
+                tag_filter,
+                popularity_filter,
+                skip,
+                limit,
+            ),
+            lambda: search_service.search_with_facets(
+                query=q,
+                search_type=search_type,
+                mbti_type=mbti_type,
+                tag_filter=tag_filter,
+                popularity_filter=popularity_filter,
+                skip=skip,
+                limit=limit,
+            ),
         )
 
-        return {
-            "query": q,
-            "search_type": search_type,
-            "total_results": len(results),
-            "results": results,
-            "pagination": {
-                "skip": skip,
-                "limit": limit,
-                "has_more": len(results) == limit,
-            },
-        }
+        # The results array is spliced in as cached, without re-serializing
+        pagination = {"skip": skip, "limit": limit, "has_more": cached.total == limit}
+        body = b"".join(
+            [
+                b'{"query":',
+                serialize(q),
+                b',"search_type":',
+                serialize(search_type),
+                b',"total_results":',
+                serialize(cached.total),
+                b',"results":',
+                cached.body,
+                b',"facets":',
+                cached.facets,
+                b',"pagination":',
+                serialize(pagination),
+                b"}",
+            ]
+        )
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={SEARCH_CACHE_HEADER: "HIT" if hit else "MISS"},
+        )
 
     except HTTPException:
         raise
@@ -121,6 +184,157 @@ def search_celebrities(
         )
 
 
+@router.websocket("/ws")
+async def search_as_you_type(websocket: WebSocket, db: Session = Depends(get_db)):
+    """
+    Search-as-you-type over one WebSocket connection
+
+    The client sends each partial query as it is typed, either as plain text
+    or as a JSON object:
+
+    - **q**: Partial search query
+    - **search_type**: Type of search (all, name, description, tag, mbti)
+    - **limit**: Number of results to return (default 10, max 50)
+    - **seq**: Client sequence number, echoed back in the reply
+
+    The server waits until no newer query has arrived for
+    `SEARCH_WS_DEBOUNCE_MS` milliseconds, then replies with `seq`, `query`,
+    `search_type`, `suggestions` (from the autocomplete index),
+    `total_results` and `results` (ranked as in `GET /search/`). A query
+    superseded before its reply is ready gets no reply; replies to invalid
+    frames carry an `error` instead. Partial queries do not count towards
+    `/search/popular-searches`.
+    """
+    await websocket.accept()
+    debounce = settings.search_ws_debounce_ms / 1000
+    loop = asyncio.get_running_loop()
+    # The newest valid frame, how many came before it and when it arrived
+    latest: Dict[str, Any] = {"number": 0, "frame": None, "arrived_at": 0.0}
+    arrived = asyncio.Event()
+    # Search running on the threadpool; at most one per connection
+    running: Optional[asyncio.Future] = None
+
+    async def answer() -> None:
+        nonlocal running
+        answered = 0
+        while True:
+            await arrived.wait()
+            arrived.clear()
+            # Nothing reaches the threadpool until typing pauses
+            while True:
+                remaining = latest["arrived_at"] + debounce - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+            number = latest["number"]
+            if number == answered:
+                continue
+            answered = number
+            running = asyncio.ensure_future(
+                run_in_threadpool(_live_search, db, latest["frame"])
+            )
+            reply = await asyncio.shield(running)
+            running = None
+            # A newer query arrived meanwhile and gets its own reply
+            if latest["number"] == number:
+                await websocket.send_text(reply)
+
+    answering = asyncio.create_task(answer())
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                frame = _parse_live_search_frame(text)
+            except ValueError as e:
+                await websocket.send_text(json.dumps({"error": str(e)}))
+                continue
+            latest.update(
+                number=latest["number"] + 1, frame=frame, arrived_at=loop.time()
+            )
+            arrived.set()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        answering.cancel()
+        # The session is closed after the handler returns
+        if running is not None:
+            await asyncio.wait([running])
+
+
+def _parse_live_search_frame(text: str) -> Dict[str, Any]:
+    """Query parameters from a plain-text or JSON search frame"""
+    try:
+        frame = json.loads(text)
+    except ValueError:
+        frame = None
+    if not isinstance(frame, dict):
+        return {"q": text, "search_type": "all", "limit": LIVE_SEARCH_LIMIT}
+
+    query = frame.get("q")
+    if not isinstance(query, str):
+        raise ValueError("Search frame must have a string 'q'")
+    search_type = frame.get("search_type") or "all"
+    if search_type not in SEARCH_TYPES:
+        raise ValueError(f"Invalid search_type. Must be one of: {SEARCH_TYPES}")
+    limit = frame.get("limit", LIVE_SEARCH_LIMIT)
+    if not isinstance(limit, int) or not 1 <= limit <= LIVE_SEARCH_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {LIVE_SEARCH_MAX_LIMIT}")
+    return {
+        "q": query,
+        "search_type": search_type,
+        "limit": limit,
+        "seq": frame.get("seq"),
+    }
+
+
+def _live_search(db: Session, frame: Dict[str, Any]) -> str:
+    """Reply to one settled search-as-you-type query, as JSON text"""
+    query, search_type, limit = frame["q"], frame["search_type"], frame["limit"]
+    try:
+        search_service = SearchService(db)
+        suggestions = search_service.get_search_suggestions(
+            query, LIVE_SUGGESTION_LIMIT
+        )
+        count, results = 0, b"[]"
+        if query.strip():
+            # Partial queries are not counted as popular searches; only
+            # submitted ones (GET /search/) are
+            search_cache = get_search_cache()
+            cached, _ = search_cache.get_or_compute(
+                search_cache.make_key(db, query, search_type, limit=limit),
+                lambda: search_service.search_with_facets(
+                    query=query, search_type=search_type, limit=limit
+                ),
+            )
+            count, results = cached.total, cached.body
+        body = b"".join(
+            [
+                b'{"seq":',
+                serialize(frame.get("seq")),
+                b',"query":',
+                serialize(query),
+                b',"search_type":',
+                serialize(search_type),
+                b',"suggestions":',
+                serialize(suggestions),
+                b',"total_results":',
+                serialize(count),
+                b',"results":',
+                results,
+                b"}",
+            ]
+        )
+        return body.decode("utf-8")
+    except Exception as e:
+        return json.dumps(
+            {"seq": frame.get("seq"), "error": f"Search error: {str(e)}"},
+            ensure_ascii=False,
+        )
+    finally:
+        # End the read transaction; the connection stays open between queries
+        db.rollback()
+
+
 @router.get("/suggestions")
 def get_search_suggestions(
     q: str = Query(
@@ -136,8 +350,10 @@ def get_search_suggestions(
     - **limit**: Number of suggestions to return (max 20)
 
     Returns suggestions from:
-    - Celebrity names (Chinese and English)
+    - Celebrity names (Chinese and English, matched from any word start)
     - Tag names
+
+    Suggestions complete the query as a prefix and are ranked by vote count.
     """
     search_service = SearchService(db)
 
@@ -175,7 +391,7 @@ def get_search_analytics(db: Session = Depends(get_db)):
         return {
             "statistics": analytics,
             "search_capabilities": {
-                "search_types": ["all", "name", "description", "tag", "mbti"],
+                "search_types": SEARCH_TYPES,
                 "filters": ["mbti_type", "tag_filter", "popularity_filter"],
                 "relevance_scoring": True,
                 "autocomplete": True,
@@ -190,6 +406,17 @@ def get_search_analytics(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/cache-stats")
+def get_search_cache_stats():
+    """
+    Search result cache metrics
+
+    Hits, misses, hit rate, evictions, expirations, invalidations (writes
+    that retired the cached results) and current size.
+    """
+    return get_search_cache().stats()
+
+
 @router.get("/mbti-types")
 def get_mbti_types():
     """
@@ -223,48 +450,36 @@ def get_mbti_types():
 
 @router.get("/popular-searches")
 def get_popular_searches(
+    window: str = Query("day", description="Time window: hour, day, week"),
     limit: int = Query(
         10, ge=1, le=50, description="Number of popular searches to return"
     ),
-    db: Session = Depends(get_db),
 ):
     """
-    Get popular search terms and trends
+    Get the most searched queries
 
+    - **window**: Rolling time window (hour, day, week)
     - **limit**: Number of popular searches to return (max 50)
 
-    Note: This endpoint can be enhanced in the future to track actual search queries
+    Counts cover the searches of every worker, as summed in the database at
+    the last periodic sync, plus the searches this worker has seen since.
+    They come from heavy-hitters summaries and may slightly overestimate
+    rare queries; the database is not read per request.
     """
-    # For now, return sample popular searches based on existing data
-    # In the future, this could be enhanced with actual search query tracking
-
-    search_service = SearchService(db)
-    analytics = search_service.get_search_analytics()
-
-    # Generate popular searches based on popular tags and MBTI types
-    popular_searches = []
-
-    # Add popular tags as search suggestions
-    for tag_data in analytics["popular_tags"][: limit // 2]:
-        popular_searches.append(
-            {"term": tag_data["tag"], "type": "tag", "count": tag_data["count"]}
-        )
-
-    # Add popular MBTI types as search suggestions
-    for mbti_data in analytics["popular_mbti_types"][: limit // 2]:
-        popular_searches.append(
-            {"term": mbti_data["type"], "type": "mbti", "count": mbti_data["count"]}
+    if window not in WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid window. Must be one of: {list(WINDOWS)}",
         )
 
-    # Sort by count and limit
-    popular_searches.sort(key=lambda x: x["count"], reverse=True)
-    popular_searches = popular_searches[:limit]
+    top, searches_in_window = get_popular_search_tracker().top(window, limit)
+    popular_searches = [
+        {"term": term, "type": "query", "count": count} for term, count in top
+    ]
 
     return {
+        "window": window,
         "popular_searches": popular_searches,
         "total_searches": len(popular_searches),
-        "note": (
-            "Based on tag usage and MBTI vote counts. "
-            "Future versions will track actual search queries."
-        ),
+        "searches_in_window": searches_in_window,
     }
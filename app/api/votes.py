@@ -1,7 +1,8 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.pagination import set_next_cursor
 from app.database.database import get_db
 from app.services.vote_service import VoteService
 from app.services.auth_service import AuthService
@@ -36,18 +37,26 @@ def create_vote(
 
     Note:
     - You can only vote once per celebrity
-    - Daily limit: 10 votes per day
+    - Daily limits: `daily_vote_limit` votes, of which at most
+      `daily_no_reason_limit` without a reason (per 24 hours)
+    - New accounts are limited to `new_user_24h_limit` votes in their first day
     - Reason is optional but encouraged
     """
     vote_service = VoteService(db)
-    vote = vote_service.create_vote(current_user.id, vote_data)
+    vote = vote_service.create_vote(
+        current_user.id, vote_data, user_created_at=current_user.created_at
+    )
     return VoteResponse.model_validate(vote)
 
 
 @router.get("/", response_model=List[VoteResponse])
 def get_votes(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     celebrity_id: Optional[str] = Query(None, description="Filter by celebrity ID"),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
     mbti_type: Optional[MBTIType] = Query(None, description="Filter by MBTI type"),
@@ -58,6 +67,7 @@ def get_votes(
 
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     - **celebrity_id**: Filter votes by celebrity ID
     - **user_id**: Filter votes by user ID
     - **mbti_type**: Filter votes by MBTI type
@@ -66,17 +76,23 @@ def get_votes(
     votes = vote_service.get_all_votes(
         skip=skip,
         limit=limit,
+        cursor=cursor,
         celebrity_id=celebrity_id,
         user_id=user_id,
         mbti_type=mbti_type,
     )
+    set_next_cursor(response, votes, limit)
     return [VoteResponse.model_validate(vote) for vote in votes]
 
 
 @router.get("/my-votes", response_model=List[VoteResponse])
 def get_my_votes(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -85,17 +101,25 @@ def get_my_votes(
 
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     """
     vote_service = VoteService(db)
-    votes = vote_service.get_user_votes(current_user.id, skip=skip, limit=limit)
+    votes = vote_service.get_user_votes(
+        current_user.id, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, votes, limit)
     return [VoteResponse.model_validate(vote) for vote in votes]
 
 
 @router.get("/user/{user_id}", response_model=List[VoteResponse])
 def get_user_votes(
     user_id: str,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -104,17 +128,23 @@ def get_user_votes(
     - **user_id**: ID of the user
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     """
     vote_service = VoteService(db)
-    votes = vote_service.get_user_votes(user_id, skip=skip, limit=limit)
+    votes = vote_service.get_user_votes(user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, votes, limit)
     return [VoteResponse.model_validate(vote) for vote in votes]
 
 
 @router.get("/celebrity/{celebrity_id}", response_model=List[VoteResponse])
 def get_celebrity_votes(
     celebrity_id: str,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -123,9 +153,13 @@ def get_celebrity_votes(
     - **celebrity_id**: ID of the celebrity
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Number of records to return (max 1000)
+    - **cursor**: Continue after the previous page (see `X-Next-Cursor`)
     """
     vote_service = VoteService(db)
-    votes = vote_service.get_celebrity_votes(celebrity_id, skip=skip, limit=limit)
+    votes = vote_service.get_celebrity_votes(
+        celebrity_id, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, votes, limit)
     return [VoteResponse.model_validate(vote) for vote in votes]
 
 
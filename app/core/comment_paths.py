@@ -0,0 +1,73 @@
+"""
+Materialized paths for comment threads
+
+Every comment stores its position in the thread as a path: the parent's path
+followed by one fixed-width segment of its own. Ordering a celebrity's
+comments by ``(celebrity_id, path)`` lists each thread depth-first, a parent
+directly before its replies, so a whole page of threads is one index range
+scan.
+
+A segment is 13 hex digits of microseconds since the epoch followed by the
+comment ID as 32 hex digits (a UUID's own digits), so comments created in the
+same instant are ordered by ID, exactly like the ``(created_at, id)`` keyset
+pages. Top-level segments store both inverted so that the newest thread sorts
+first, while replies within a thread stay oldest first. Paths only contain
+``[0-9a-f]``, which sorts the same under any collation.
+"""
+
+import calendar
+import re
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+SEGMENT_LENGTH = 45
+_TIMESTAMP_DIGITS = 13
+_TIMESTAMP_MAX = 16**_TIMESTAMP_DIGITS - 1
+_ID_DIGITS = 32
+_ID_MAX = 16**_ID_DIGITS - 1
+_PATH_PATTERN = re.compile(rf"^(?:[0-9a-f]{{{SEGMENT_LENGTH}}})+$")
+
+# Sorts after every path that starts with a given prefix
+SUBTREE_END = "g"
+
+
+def _microseconds(moment: datetime) -> int:
+    # Naive datetimes are UTC, as stored by the database defaults
+    return calendar.timegm(moment.utctimetuple()) * 10**6 + moment.microsecond
+
+
+def _id_number(comment_id: str) -> int:
+    """The comment ID as a number that sorts like the ID"""
+    try:
+        return uuid.UUID(comment_id).int
+    except ValueError:
+        # Not a UUID: its first 16 bytes, so at least short IDs keep their order
+        return int.from_bytes(comment_id.encode()[:16].ljust(16, b"\0"), "big")
+
+
+def child_path(
+    parent_path: Optional[str], comment_id: str, created_at: datetime
+) -> str:
+    """Path of a new comment under ``parent_path`` (None for a new thread)"""
+    timestamp, number = _microseconds(created_at), _id_number(comment_id)
+    if parent_path is None:
+        timestamp, number = _TIMESTAMP_MAX - timestamp, _ID_MAX - number
+    segment = f"{timestamp:0{_TIMESTAMP_DIGITS}x}{number:0{_ID_DIGITS}x}"
+    return (parent_path or "") + segment
+
+
+def depth(path: str) -> int:
+    """Nesting depth of a comment; top-level comments are at depth 0"""
+    return len(path) // SEGMENT_LENGTH - 1
+
+
+def parse_path_cursor(cursor: str) -> str:
+    """Validate a tree cursor, which is the path of the last comment returned"""
+    if not _PATH_PATTERN.match(cursor):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+        )
+    return cursor
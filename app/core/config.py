@@ -1,6 +1,15 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import make_url
+from typing import Optional
 import os
 
+# Backends whose state must be shared by every worker process
+SHARED_STATE_BACKENDS = ("rate_limit_backend", "live_events_backend")
+
+# Search backends that only work on one database dialect
+SEARCH_BACKEND_DIALECTS = {"fts5": "sqlite", "postgres": "postgresql"}
+
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./mbti_roster.db"  # Default to SQLite
@@ -14,9 +23,81 @@ class Settings(BaseSettings):
     new_user_24h_limit: int = 3
     daily_registrations_per_ip: int = 3
 
+    # 工作进程数（gunicorn 也从 WEB_CONCURRENCY 读取）。多于一个进程时，
+    # 进程内的 "memory" 后端无法共享状态，下面未设置的后端默认改用 "redis"
+    web_concurrency: int = 1
+
+    # 限流后端: "memory"（单进程）或 "redis"（多进程共享，使用 redis_url）；
+    # 未设置时按 web_concurrency 选择
+    rate_limit_backend: Optional[str] = None
+
+    # 搜索后端: "memory"（进程内倒排索引）、"like"（SQL LIKE）、
+    # "fts5"（SQLite FTS5）或 "postgres"（PostgreSQL pg_trgm）
+    search_backend: str = "memory"
+
+    # 进程内搜索索引: 检查其他进程是否改动过名人数据、需要重建的间隔（秒），
+    # 以及重新加载投票权重（联想排序、MBTI 筛选计数）的间隔（秒）
+    search_refresh_interval: int = 5
+    search_vote_refresh_interval: int = 60
+
+    # 搜索结果缓存: 最多缓存的查询数与过期时间（秒）；0 表示关闭缓存
+    search_cache_size: int = 1024
+    search_cache_ttl: int = 60
+
+    # 边输边搜（/search/ws）: 最后一次输入后等待多少毫秒再执行搜索
+    search_ws_debounce_ms: int = 150
+
+    # 全站最新评论: 内存中保留的最新评论条数，以及重新从数据库加载的间隔（秒）
+    recent_comments_buffer_size: int = 200
+    recent_comments_buffer_ttl: int = 30
+
+    # 评论热度: 批量刷新反应数与热度排序键的间隔（秒）
+    comment_hot_score_interval: int = 10
+
+    # 名人实时动态（SSE）: 事件合并推送的间隔（毫秒），以及事件总线后端
+    # "memory"（单进程）或 "redis"（多进程通过 pub/sub 共享，使用 redis_url）；
+    # 未设置时按 web_concurrency 选择
+    live_events_tick_ms: int = 250
+    live_events_backend: Optional[str] = None
+
+    # 热门搜索: 每个时间桶保留的计数器数量，以及与数据库同步（写入本进程的计数、
+    # 读回所有进程的合计）的间隔（秒）
+    popular_search_capacity: int = 200
+    popular_search_sync_interval: int = 60
+
+    # 统计计数器与原始表对账的间隔（秒）；0 表示不在服务进程内对账，
+    # 改由 cron 运行 reconcile_analytics_counters.py
+    analytics_reconcile_interval: int = 3600
+
     class Config:
         env_file = ".env"
 
+    @model_validator(mode="after")
+    def _check_shared_backends(self) -> "Settings":
+        """Pick shared backends for several workers; refuse process-local ones"""
+        for field in SHARED_STATE_BACKENDS:
+            backend = getattr(self, field)
+            if backend is None:
+                backend = "redis" if self.web_concurrency > 1 else "memory"
+                setattr(self, field, backend)
+            elif backend == "memory" and self.web_concurrency > 1:
+                raise ValueError(
+                    f"{field.upper()}=memory keeps state inside one process and "
+                    f"cannot serve WEB_CONCURRENCY={self.web_concurrency} workers; "
+                    f"use redis"
+                )
+        return self
+
+    @model_validator(mode="after")
+    def _check_search_backend(self) -> "Settings":
+        """Refuse a search backend the configured database cannot serve"""
+        dialect = SEARCH_BACKEND_DIALECTS.get(self.search_backend)
+        if dialect and make_url(self.database_url).get_backend_name() != dialect:
+            raise ValueError(
+                f"SEARCH_BACKEND={self.search_backend} needs a {dialect} database"
+            )
+        return self
+
     def __init__(self, **kwargs):
         # Override secret_key for CI environment if not provided
         if "secret_key" not in kwargs and os.getenv("CI"):
@@ -0,0 +1,119 @@
+"""
+Shared write generations for per-process state
+
+Each worker keeps derived state in memory (the search, suggestion, fuzzy and
+facet indexes, the recent comments buffer). A worker applies its own writes
+to that state directly but never sees another worker's. So every such write
+also bumps a named counter in ``state_generations``. A worker that remembers
+the value its state was built at can tell, with one primary key read,
+whether any worker has written since.
+
+Rare writes (the catalog) bump inside their own transaction, so the counter
+only moves if the write commits. Frequent writes (votes, comments) bump
+right after committing, in a transaction of their own (``bump_committed``):
+inside theirs, the single counter row would stay locked until each write
+commits and serialize them all.
+"""
+
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database.database import upsert
+from app.database.models import StateGeneration
+
+# Celebrities, their names, descriptions and tags
+CATALOG = "catalog"
+# Votes, which weigh suggestions and fill the MBTI facets
+VOTES = "votes"
+# Comments: created, edited or deleted
+COMMENTS = "comments"
+
+
+def bump(db: Session, *names: str) -> Dict[str, int]:
+    """Advance generations by one inside the caller's transaction
+
+    Returns the new values, which include this bump.
+    """
+    return dict(
+        upsert(
+            db,
+            StateGeneration,
+            [{"name": name, "value": 1} for name in names],
+            [StateGeneration.name],
+            lambda excluded: {"value": StateGeneration.value + excluded.value},
+            returning=[StateGeneration.name, StateGeneration.value],
+        )
+    )
+
+
+def bump_committed(db: Session, name: str) -> Optional[int]:
+    """
+    Advance a generation in a short transaction of its own, once the write it
+    stands for has committed
+
+    Runs in a session of its own, so the caller's objects are not expired
+    by this commit. Returns the new value, or None if the bump failed. The
+    write is kept either way; until the next bump of ``name``, other workers
+    only catch up on their periodic reloads.
+    """
+    with Session(db.get_bind()) as own:
+        try:
+            value = bump(own, name)[name]
+            own.commit()
+            return value
+        except SQLAlchemyError as e:
+            own.rollback()
+            print(f"Could not bump the {name} generation: {e}")
+            return None
+
+
+def read(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Current value of each generation; 0 if it was never bumped"""
+    names = list(names)
+    stored = dict(
+        db.query(StateGeneration.name, StateGeneration.value).filter(
+            StateGeneration.name.in_(names)
+        )
+    )
+    return {name: stored.get(name, 0) for name in names}
+
+
+class GenerationTracker:
+    """The generation a process-local structure was last built at"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._built: Optional[int] = None
+
+    def current(self, db: Session) -> int:
+        return read(db, [self.name])[self.name]
+
+    def mark_built(self, generation: int) -> None:
+        """Record a rebuild from data read after ``generation`` was read"""
+        with self._lock:
+            self._built = generation
+
+    def is_stale(self, db: Session) -> bool:
+        """Whether anything was written since the last rebuild"""
+        with self._lock:
+            built = self._built
+        return built is None or self.current(db) != built
+
+    def acknowledge_own_write(self, generation: Optional[int]) -> None:
+        """
+        Call with the value ``bump`` or ``bump_committed`` returned, once
+        that write has committed and been applied locally
+
+        If the generation moved by exactly that bump, no other worker wrote
+        in between and the local state is still current. Otherwise it stays
+        stale until the next rebuild.
+        """
+        if generation is None:
+            return
+        with self._lock:
+            if self._built is not None and generation == self._built + 1:
+                self._built = generation
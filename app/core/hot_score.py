@@ -0,0 +1,32 @@
+"""
+Hot ordering for comments
+
+A comment's hot score is ``log2(1 + reactions) + created_at / HALF_LIFE``
+(seconds since the epoch). Comparing two scores is the same as comparing
+``(1 + reactions) * 2 ** -(age / HALF_LIFE)`` at any moment: every half-life
+a comment needs twice the reactions to keep its place. Because time only
+enters through ``created_at``, a score changes when the reactions change and
+never merely because time passes, so it can be stored and indexed as the
+sort key of the hot comments page.
+
+Changing ``HALF_LIFE_SECONDS`` requires recomputing every stored score
+(``rebuild_comment_hot_scores.py``).
+"""
+
+import calendar
+import math
+from datetime import datetime
+from typing import Optional
+
+HALF_LIFE_SECONDS = 12 * 60 * 60
+
+
+def hot_score(reaction_count: int, created_at: Optional[datetime]) -> float:
+    """Sort key of a comment with ``reaction_count`` reactions"""
+    seconds = 0.0
+    if created_at is not None:
+        # Naive datetimes are UTC, as stored by the database defaults
+        seconds = calendar.timegm(created_at.utctimetuple()) + (
+            created_at.microsecond / 10**6
+        )
+    return math.log2(1 + max(reaction_count, 0)) + seconds / HALF_LIFE_SECONDS
@@ -0,0 +1,327 @@
+"""
+Live celebrity activity for Server-Sent Events
+
+Services report writes after committing: ``comment_created`` for a new
+comment and ``votes_changed`` for a vote added or removed. Events are not
+sent to clients one by one. ``LiveEventHub`` collects them per celebrity and
+every ``settings.live_events_tick_ms`` milliseconds turns each celebrity's
+batch into one SSE frame, shared by all of its subscribers: a tick costs one
+serialization per active celebrity, however many clients are listening.
+Events for celebrities nobody is watching are dropped.
+
+A frame carries the new comments and the net vote change per MBTI type since
+the previous tick::
+
+    event: activity
+    data: {"celebrity_id": "...", "comments": [...], "votes": {"INTJ": 2}}
+
+Events reach the hub through a transport: ``LocalTransport`` for a single
+process, or ``RedisTransport`` (``settings.redis_url``) when several workers
+serve subscribers. The Redis transport queues every event for a publisher
+thread, so a slow or unreachable Redis never holds up the request that
+wrote, and a listener thread feeds everything received on the pub/sub
+channels, including the worker's own events, into the local hub. Select one
+with ``settings.live_events_backend``; it defaults to Redis with several
+workers, whose subscribers would otherwise miss the other workers' writes.
+"""
+
+import asyncio
+import json
+import threading
+from collections import Counter
+from queue import Full, Queue
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
+
+from app.core.config import settings
+from app.database.models import Comment, MBTIType
+from app.schemas.comment import CommentResponse
+
+# Ticks a subscriber may fall behind before it is disconnected
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Comment line sent when nothing happened, so proxies keep the stream open
+HEARTBEAT_SECONDS = 15.0
+
+# Reconnection delay suggested to EventSource clients (milliseconds)
+RECONNECT_MS = 3000
+
+# Events waiting for the Redis publisher thread; more are dropped
+PUBLISH_QUEUE_SIZE = 1000
+
+# Seconds a Redis command or connection attempt may take
+REDIS_SOCKET_TIMEOUT = 2.0
+
+
+class _Batch:
+    """Everything that happened to one celebrity during the current tick"""
+
+    def __init__(self) -> None:
+        self.comments: List[Dict[str, Any]] = []
+        self.votes: Counter = Counter()
+
+    def add(self, event: Dict[str, Any]) -> None:
+        if event["type"] == "comment":
+            self.comments.append(event["comment"])
+        elif event["type"] == "votes":
+            self.votes[event["mbti_type"]] += event["delta"]
+
+    def payload(self, celebrity_id: str) -> Dict[str, Any]:
+        return {
+            "celebrity_id": celebrity_id,
+            "comments": self.comments,
+            "votes": {mbti: delta for mbti, delta in self.votes.items() if delta},
+        }
+
+
+class LiveEventHub:
+    """Per-celebrity subscriber queues fed once per tick"""
+
+    def __init__(
+        self, tick_seconds: float, queue_size: int = SUBSCRIBER_QUEUE_SIZE
+    ) -> None:
+        self.tick_seconds = tick_seconds
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._pending: Dict[str, _Batch] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._ticker: Optional[asyncio.Task] = None
+        self._tick = 0
+
+    def add(self, celebrity_id: str, event: Dict[str, Any]) -> None:
+        """Queue an event for the next tick; safe to call from any thread"""
+        with self._lock:
+            if celebrity_id not in self._subscribers:
+                return
+            self._pending.setdefault(celebrity_id, _Batch()).add(event)
+
+    def subscribe(self, celebrity_id: str) -> asyncio.Queue:
+        """Queue receiving one SSE frame per tick with activity"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(celebrity_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, celebrity_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            queues = self._subscribers.get(celebrity_id)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[celebrity_id]
+                self._pending.pop(celebrity_id, None)
+
+    def flush(self) -> int:
+        """
+        Hand the pending batches to their subscribers
+
+        Must run on the event loop that owns the subscriber queues. A
+        subscriber whose queue is full gets ``None`` instead and is dropped;
+        its stream ends and the client reconnects. Returns the number of
+        frames built.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            targets = {
+                celebrity_id: list(self._subscribers.get(celebrity_id, ()))
+                for celebrity_id in pending
+            }
+        if not pending:
+            return 0
+
+        self._tick += 1
+        for celebrity_id, batch in pending.items():
+            frame = (
+                f"id: {self._tick}\nevent: activity\n"
+                f"data: {json.dumps(batch.payload(celebrity_id), ensure_ascii=False)}"
+                "\n\n"
+            )
+            for queue in targets[celebrity_id]:
+                try:
+                    queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    self.unsubscribe(celebrity_id, queue)
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+        return len(pending)
+
+    async def run(self) -> None:
+        """Flush every tick while anyone is subscribed"""
+        while self._subscribers:
+            await asyncio.sleep(self.tick_seconds)
+            self.flush()
+
+    async def stream(self, celebrity_id: str) -> AsyncIterator[str]:
+        """SSE body for one client: frames as they come, heartbeats in between"""
+        queue = self.subscribe(celebrity_id)
+        loop = asyncio.get_running_loop()
+        if (
+            self._ticker is None
+            or self._ticker.done()
+            or self._ticker.get_loop() is not loop
+        ):
+            self._ticker = loop.create_task(self.run())
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    frame = ": keep-alive\n\n"
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            self.unsubscribe(celebrity_id, queue)
+
+
+class LocalTransport:
+    """Delivers events to this process's hub only"""
+
+    def __init__(self, hub: LiveEventHub) -> None:
+        self.hub = hub
+
+    def publish(self, celebrity_id: str, event: Dict[str, Any]) -> None:
+        self.hub.add(celebrity_id, event)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def drain(self) -> None:
+        pass
+
+
+class RedisTransport:
+    """Redis pub/sub bridge so every worker's hub sees every event"""
+
+    def __init__(
+        self, client: Any, hub: LiveEventHub, prefix: str = "live:celebrity:"
+    ) -> None:
+        self.client = client
+        self.hub = hub
+        self.prefix = prefix
+        self._pubsub: Any = None
+        self._listener: Any = None
+        self._outbox: Queue = Queue(maxsize=PUBLISH_QUEUE_SIZE)
+        self._publisher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_url(cls, url: str, hub: LiveEventHub) -> "RedisTransport":
+        import redis
+
+        client = redis.Redis.from_url(
+            url,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        )
+        return cls(client, hub)
+
+    def publish(self, celebrity_id: str, event: Dict[str, Any]) -> None:
+        """Queue an event for the publisher thread; never blocks"""
+        try:
+            self._outbox.put_nowait((self.prefix + celebrity_id, json.dumps(event)))
+        except Full:
+            print("Live event dropped: the Redis publish queue is full")
+
+    def start(self) -> None:
+        """Start the publisher thread and the listener thread feeding the hub"""
+        self._publisher = threading.Thread(target=self._publish_queued, daemon=True)
+        self._publisher.start()
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{self.prefix + "*": self._receive})
+        self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def drain(self) -> None:
+        """Wait until every queued event has been published (or has failed)"""
+        self._outbox.join()
+
+    def stop(self) -> None:
+        if self._publisher is not None:
+            try:
+                self._outbox.put_nowait(None)
+            except Full:
+                pass  # A daemon thread; it ends with the process
+            self._publisher.join(REDIS_SOCKET_TIMEOUT)
+            self._publisher = None
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def _publish_queued(self) -> None:
+        while True:
+            item = self._outbox.get()
+            try:
+                if item is None:
+                    return
+                self.client.publish(*item)
+            except Exception as e:
+                print(f"Live event publish failed: {e}")
+            finally:
+                self._outbox.task_done()
+
+    def _receive(self, message: Dict[str, Any]) -> None:
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        self.hub.add(channel[len(self.prefix) :], json.loads(message["data"]))
+
+
+Transport = Union[LocalTransport, RedisTransport]
+
+_hub: Optional[LiveEventHub] = None
+_transport: Optional[Transport] = None
+
+
+def get_live_event_hub() -> LiveEventHub:
+    """Process-wide hub configured from settings"""
+    global _hub
+    if _hub is None:
+        _hub = LiveEventHub(settings.live_events_tick_ms / 1000)
+    return _hub
+
+
+def get_live_event_transport() -> Transport:
+    """Process-wide transport configured from settings"""
+    global _transport
+    if _transport is None:
+        if settings.live_events_backend == "redis":
+            _transport = RedisTransport.from_url(
+                settings.redis_url, get_live_event_hub()
+            )
+        else:
+            _transport = LocalTransport(get_live_event_hub())
+    return _transport
+
+
+def _publish(celebrity_id: str, event: Dict[str, Any]) -> None:
+    # The write is already committed; a broken bridge must not fail it
+    try:
+        get_live_event_transport().publish(celebrity_id, event)
+    except Exception as e:
+        print(f"Live event publish failed: {e}")
+
+
+def comment_created(comment: Comment) -> None:
+    """A comment was committed"""
+    _publish(
+        comment.celebrity_id,
+        {
+            "type": "comment",
+            "comment": CommentResponse.model_validate(comment).model_dump(mode="json"),
+        },
+    )
+
+
+def votes_changed(celebrity_id: str, mbti_type: MBTIType, delta: int) -> None:
+    """A celebrity gained (``delta > 0``) or lost a vote for ``mbti_type``"""
+    _publish(
+        celebrity_id,
+        {"type": "votes", "mbti_type": MBTIType(mbti_type).value, "delta": delta},
+    )
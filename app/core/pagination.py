@@ -0,0 +1,95 @@
+"""
+Keyset (cursor) pagination over ``(created_at, id)``
+
+A cursor is an opaque, URL-safe token naming the last row of a page. The next
+page continues strictly after that row, so deep pages cost the same index seek
+as the first one, unlike ``OFFSET`` which has to walk every skipped row.
+
+List endpoints keep accepting ``skip`` for compatibility and return the cursor
+for the following page in the ``X-Next-Cursor`` response header.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, func, or_, select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Build the opaque cursor for a row"""
+    payload = json.dumps(
+        {"t": created_at.isoformat() if created_at else None, "id": row_id},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """Parse a cursor produced by ``encode_cursor``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+        return created_at, str(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+        )
+
+
+def apply_keyset(query: Any, model: Any, cursor: Optional[str], descending: bool):
+    """
+    Order ``query`` by ``(created_at, id)`` and start it after ``cursor``
+
+    The cursor row's own ``created_at`` is read back through a primary-key
+    subquery so that the comparison is column-to-column; SQLite stores
+    ``CURRENT_TIMESTAMP`` values in a different text format than bound
+    parameters. The timestamp encoded in the cursor is only a fallback for
+    when that row has been deleted in the meantime.
+    """
+    created_at_col, id_col = model.created_at, model.id
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        anchor = func.coalesce(
+            select(created_at_col).where(id_col == cursor_id).scalar_subquery(),
+            cursor_created_at,
+        )
+        if descending:
+            query = query.filter(
+                or_(
+                    created_at_col < anchor,
+                    and_(created_at_col == anchor, id_col < cursor_id),
+                )
+            )
+        else:
+            query = query.filter(
+                or_(
+                    created_at_col > anchor,
+                    and_(created_at_col == anchor, id_col > cursor_id),
+                )
+            )
+
+    if descending:
+        return query.order_by(created_at_col.desc(), id_col.desc())
+    return query.order_by(created_at_col.asc(), id_col.asc())
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after ``items``, or None on the last page"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int) -> None:
+    """Expose the next page's cursor on a list response"""
+    cursor = next_cursor(items, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
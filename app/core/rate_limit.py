@@ -0,0 +1,351 @@
+"""
+Rate limiting for quota checks that must not touch the relational database
+
+Two policies are supported:
+
+- ``SlidingWindowPolicy``: at most ``limit`` hits in any ``window_seconds``
+  interval (used for the per-user vote quotas).
+- ``TokenBucketPolicy``: a bucket of ``capacity`` tokens refilled evenly over
+  ``refill_seconds`` (used for registrations per IP).
+
+State lives in a backend: ``InMemoryBackend`` for a single process, or
+``RedisBackend`` (``settings.redis_url``) when several workers must share
+quotas. Select one with ``settings.rate_limit_backend``; it defaults to
+Redis when ``settings.web_concurrency`` is above one, and the in-memory
+backend is refused there, since each worker would enforce its own quota.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+
+
+class SlidingWindowPolicy:
+    """At most ``limit`` hits within any ``window_seconds`` interval"""
+
+    def __init__(self, limit: int, window_seconds: float):
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+
+class TokenBucketPolicy:
+    """Bucket of ``capacity`` tokens, fully refilled over ``refill_seconds``"""
+
+    def __init__(self, capacity: int, refill_seconds: float):
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+
+    @property
+    def refill_rate(self) -> float:
+        """Tokens added per second"""
+        return self.capacity / self.refill_seconds
+
+
+Policy = Union[SlidingWindowPolicy, TokenBucketPolicy]
+
+
+class RateLimitHit:
+    """A successful acquisition that can be handed back with ``release``"""
+
+    def __init__(self, key: str, policy: Policy, member: str):
+        self.key = key
+        self.policy = policy
+        self.member = member
+
+
+class RateLimitResult:
+    """Outcome of ``RateLimiter.acquire``"""
+
+    def __init__(
+        self,
+        allowed: bool,
+        hits: Optional[List[RateLimitHit]] = None,
+        denied_key: Optional[str] = None,
+        retry_after: float = 0.0,
+    ):
+        self.allowed = allowed
+        self.hits = hits or []
+        self.denied_key = denied_key
+        self.retry_after = retry_after
+
+
+class InMemoryBackend:
+    """
+    Process-local backend; quotas are not shared between workers
+
+    Every key remembers when its state stops mattering (its newest hit left
+    the window, or its bucket is full again). Expired keys are swept at most
+    once per ``sweep_seconds``, so memory is bounded by the keys active
+    within the longest window rather than by every IP and user ever seen.
+    """
+
+    def __init__(self, sweep_seconds: float = 60.0) -> None:
+        self.sweep_seconds = sweep_seconds
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Deque[Tuple[float, str]]] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._expires: Dict[str, float] = {}
+        self._next_sweep = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._windows) + len(self._buckets)
+
+    def sliding_window_acquire(
+        self, key: str, policy: SlidingWindowPolicy, now: float, member: str
+    ) -> Tuple[bool, float]:
+        with self._lock:
+            self._sweep(now)
+            window = self._windows.setdefault(key, deque())
+            self._trim(window, policy, now)
+            if len(window) >= policy.limit:
+                oldest = window[0][0] if window else now
+                return False, oldest + policy.window_seconds - now
+            window.append((now, member))
+            self._expires[key] = now + policy.window_seconds
+            return True, 0.0
+
+    def sliding_window_release(self, key: str, member: str) -> None:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return
+            for entry in window:
+                if entry[1] == member:
+                    window.remove(entry)
+                    break
+
+    def sliding_window_count(
+        self, key: str, policy: SlidingWindowPolicy, now: float
+    ) -> int:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return 0
+            self._trim(window, policy, now)
+            return len(window)
+
+    def token_bucket_acquire(
+        self, key: str, policy: TokenBucketPolicy, now: float
+    ) -> Tuple[bool, float]:
+        with self._lock:
+            self._sweep(now)
+            tokens, updated = self._buckets.get(key, (float(policy.capacity), now))
+            tokens = min(
+                float(policy.capacity), tokens + (now - updated) * policy.refill_rate
+            )
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._expires[key] = now + (policy.capacity - tokens) / policy.refill_rate
+            if not allowed:
+                return False, (1 - tokens) / policy.refill_rate
+            return True, 0.0
+
+    def token_bucket_release(
+        self, key: str, policy: TokenBucketPolicy, now: float
+    ) -> None:
+        with self._lock:
+            if key not in self._buckets:
+                # Already refilled and swept
+                return
+            tokens, updated = self._buckets[key]
+            self._buckets[key] = (min(float(policy.capacity), tokens + 1), updated)
+
+    @staticmethod
+    def _trim(
+        window: Deque[Tuple[float, str]], policy: SlidingWindowPolicy, now: float
+    ) -> None:
+        while window and window[0][0] <= now - policy.window_seconds:
+            window.popleft()
+
+    def _sweep(self, now: float) -> None:
+        """Drop keys whose state has expired; called with the lock held"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_seconds
+        expired = [key for key, expires in self._expires.items() if expires <= now]
+        for key in expired:
+            del self._expires[key]
+            self._windows.pop(key, None)
+            self._buckets.pop(key, None)
+
+
+class RedisBackend:
+    """Redis backend shared by all workers pointing at the same server"""
+
+    def __init__(self, client: Any, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def sliding_window_acquire(
+        self, key: str, policy: SlidingWindowPolicy, now: float, member: str
+    ) -> Tuple[bool, float]:
+        redis_key = self.prefix + key
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zremrangebyscore(redis_key, 0, now - policy.window_seconds)
+        pipe.zadd(redis_key, {member: now})
+        pipe.zcard(redis_key)
+        pipe.zrange(redis_key, 0, 0, withscores=True)
+        pipe.expire(redis_key, int(policy.window_seconds) + 1)
+        _, _, count, oldest, _ = pipe.execute()
+
+        if count > policy.limit:
+            # Denied attempts do not count against the window
+            self.client.zrem(redis_key, member)
+            oldest_score = oldest[0][1] if oldest else now
+            return False, oldest_score + policy.window_seconds - now
+        return True, 0.0
+
+    def sliding_window_release(self, key: str, member: str) -> None:
+        self.client.zrem(self.prefix + key, member)
+
+    def sliding_window_count(
+        self, key: str, policy: SlidingWindowPolicy, now: float
+    ) -> int:
+        return self.client.zcount(
+            self.prefix + key, f"({now - policy.window_seconds}", "+inf"
+        )
+
+    def token_bucket_acquire(
+        self, key: str, policy: TokenBucketPolicy, now: float
+    ) -> Tuple[bool, float]:
+        return self._update_bucket(key, policy, now, -1)
+
+    def token_bucket_release(
+        self, key: str, policy: TokenBucketPolicy, now: float
+    ) -> None:
+        self._update_bucket(key, policy, now, 1)
+
+    def _update_bucket(
+        self, key: str, policy: TokenBucketPolicy, now: float, change: int
+    ) -> Tuple[bool, float]:
+        """Read-modify-write a bucket hash under WATCH, retrying on conflicts"""
+        from redis.exceptions import WatchError
+
+        redis_key = self.prefix + key
+        with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(redis_key)
+                    state = pipe.hgetall(redis_key)
+                    tokens = float(state.get(b"tokens", policy.capacity))
+                    updated = float(state.get(b"updated", now))
+                    if change < 0:
+                        tokens = min(
+                            float(policy.capacity),
+                            tokens + (now - updated) * policy.refill_rate,
+                        )
+                        updated = now
+                    allowed = tokens + change >= 0
+                    if allowed:
+                        tokens = min(float(policy.capacity), tokens + change)
+
+                    pipe.multi()
+                    pipe.hset(redis_key, mapping={"tokens": tokens, "updated": updated})
+                    pipe.expire(redis_key, int(policy.refill_seconds) + 1)
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        if allowed:
+            return True, 0.0
+        return False, (1 - tokens) / policy.refill_rate
+
+
+Backend = Union[InMemoryBackend, RedisBackend]
+
+
+class RateLimiter:
+    """Applies policies against a backend"""
+
+    def __init__(self, backend: Backend, clock: Any = time.time):
+        self.backend = backend
+        self.clock = clock
+
+    def acquire(
+        self, rules: List[Tuple[str, Policy]], member: Optional[str] = None
+    ) -> RateLimitResult:
+        """
+        Take one unit from every ``(key, policy)`` rule, all or nothing
+
+        When any rule denies, units already taken for earlier rules are
+        handed back, so a rejected request never consumes quota. A
+        ``member`` (unique per acquisition, e.g. the ID of the row it
+        guards) lets sliding-window units be handed back later with
+        ``release_member``.
+        """
+        now = self.clock()
+        hits: List[RateLimitHit] = []
+        for key, policy in rules:
+            unit = member or uuid.uuid4().hex
+            if isinstance(policy, SlidingWindowPolicy):
+                allowed, retry_after = self.backend.sliding_window_acquire(
+                    key, policy, now, unit
+                )
+            else:
+                allowed, retry_after = self.backend.token_bucket_acquire(
+                    key, policy, now
+                )
+            if not allowed:
+                self.release(hits)
+                return RateLimitResult(
+                    False, denied_key=key, retry_after=max(retry_after, 0.0)
+                )
+            hits.append(RateLimitHit(key, policy, unit))
+        return RateLimitResult(True, hits=hits)
+
+    def remaining(self, rules: List[Tuple[str, SlidingWindowPolicy]]) -> int:
+        """Hits the sliding-window ``rules`` still admit right now, all applied"""
+        now = self.clock()
+        return min(
+            max(0, policy.limit - self.backend.sliding_window_count(key, policy, now))
+            for key, policy in rules
+        )
+
+    def release_member(
+        self, rules: List[Tuple[str, SlidingWindowPolicy]], member: str
+    ) -> None:
+        """
+        Hand back the units an earlier ``acquire`` took for ``member``
+
+        Rules it did not take a unit from, or whose unit has left the
+        window, are left as they are.
+        """
+        self.release([RateLimitHit(key, policy, member) for key, policy in rules])
+
+    def release(self, hits: List[RateLimitHit]) -> None:
+        """Hand back units, e.g. when the guarded operation failed afterwards"""
+        now = self.clock()
+        for hit in hits:
+            if isinstance(hit.policy, SlidingWindowPolicy):
+                self.backend.sliding_window_release(hit.key, hit.member)
+            else:
+                self.backend.token_bucket_release(hit.key, hit.policy, now)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter configured from settings"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        if settings.rate_limit_backend == "redis":
+            backend: Backend = RedisBackend.from_url(settings.redis_url)
+        else:
+            backend = InMemoryBackend()
+        _rate_limiter = RateLimiter(backend)
+    return _rate_limiter
@@ -0,0 +1,213 @@
+"""
+Newest comments across the site, kept in memory
+
+``RecentCommentBuffer`` holds the newest ``capacity`` comments in feed order
+(``created_at`` then ``id``, newest first, as ``apply_keyset``). It is loaded
+from the ``ix_comments_created`` index on first use and then kept current by
+``CommentService`` on every comment write, so the first pages of the global
+feed are served without a query. Pages reaching past the buffer, or
+continuing from a cursor it does not hold, fall back to the database.
+
+The buffer is reloaded once it is ``ttl_seconds`` old, which brings in the
+comments other workers created, edited or deleted and the counts that change
+without a comment write (reactions). Until then a feed page costs no query.
+
+Every comment write also bumps the shared ``comments`` generation
+(``app.core.generations``) right after committing. The buffer remembers the
+generation it was loaded at, and a write of this process is applied in place
+only if it moved the generation by exactly one; otherwise another worker
+wrote in between and the buffer is reloaded on next use.
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import generations
+from app.core.config import settings
+from app.core.pagination import decode_cursor
+from app.schemas.comment import CommentResponse
+
+
+def _feed_key(comment: CommentResponse):
+    created_at = comment.created_at.replace(tzinfo=None) if comment.created_at else None
+    return (created_at is not None, created_at, comment.id)
+
+
+class RecentCommentBuffer:
+    """Bounded, newest-first copy of the latest comments"""
+
+    def __init__(
+        self,
+        capacity: int = 200,
+        ttl_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._comments: List[CommentResponse] = []
+        self._loaded_at: Optional[float] = None
+        # Comments generation the buffer reflects
+        self._generation: Optional[int] = None
+        # True when the buffer holds every comment (the table is smaller)
+        self._complete = False
+
+    def needs_load(self) -> bool:
+        """
+        True before the first load, past the TTL, or after a write of this
+        process that could not be applied in place
+        """
+        with self._lock:
+            return (
+                self._loaded_at is None
+                or self._clock() - self._loaded_at >= self.ttl_seconds
+            )
+
+    def load(self, comments: Iterable[CommentResponse], generation: int) -> None:
+        """
+        Replace the buffer with the newest comments read from the database
+
+        ``generation`` must be read before the rows. If a comment is written
+        while they are read, the generation moves past it and the buffer is
+        reloaded on next use.
+        """
+        comments = sorted(comments, key=_feed_key, reverse=True)
+        with self._lock:
+            self._comments = comments[: self.capacity]
+            self._complete = len(comments) < self.capacity
+            self._loaded_at = self._clock()
+            self._generation = generation
+
+    def page(
+        self,
+        skip: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        include_replies: bool = True,
+    ) -> Optional[List[CommentResponse]]:
+        """A feed page from memory, or None when the buffer cannot answer it"""
+        with self._lock:
+            if self._loaded_at is None:
+                return None
+            comments = self._comments
+            start = 0
+            if cursor:
+                _, cursor_id = decode_cursor(cursor)
+                ids = [comment.id for comment in comments]
+                if cursor_id not in ids:
+                    return None
+                start = ids.index(cursor_id) + 1
+            if not include_replies:
+                candidates = [c for c in comments[start:] if c.parent_id is None]
+            else:
+                candidates = comments[start:]
+            # A short page is only final if no older comments exist
+            if len(candidates) < skip + limit and not self._complete:
+                return None
+            return candidates[skip : skip + limit]
+
+    def comment_created(
+        self, comment: CommentResponse, generation: Optional[int]
+    ) -> None:
+        """A comment was committed; a reply also bumps its parent's count"""
+        with self._lock:
+            if not self._follows(generation):
+                return
+            comments = self._comments
+            if comment.parent_id is not None:
+                self._adjust_reply_count(comment.parent_id, 1)
+            key = _feed_key(comment)
+            index = 0
+            while index < len(comments) and _feed_key(comments[index]) > key:
+                index += 1
+            if index == len(comments) and not self._complete:
+                # Older than everything held; older comments may be missing
+                return
+            comments.insert(index, comment)
+            if len(comments) > self.capacity:
+                del comments[self.capacity :]
+                self._complete = False
+
+    def comment_updated(
+        self, comment: CommentResponse, generation: Optional[int]
+    ) -> None:
+        """A comment's content was edited"""
+        with self._lock:
+            if not self._follows(generation):
+                return
+            for index, current in enumerate(self._comments):
+                if current.id == comment.id:
+                    self._comments[index] = comment
+                    break
+
+    def comment_deleted(
+        self, comment_id: str, parent_id: Optional[str], generation: Optional[int]
+    ) -> None:
+        """A comment was deleted"""
+        with self._lock:
+            if not self._follows(generation):
+                return
+            if parent_id is not None:
+                self._adjust_reply_count(parent_id, -1)
+            self._comments = [c for c in self._comments if c.id != comment_id]
+
+    def _follows(self, generation: Optional[int]) -> bool:
+        """
+        Whether a write of this process, which bumped the comments generation
+        to ``generation`` (None if the bump failed), can be applied in place
+
+        Only if no other write came between it and the buffer's contents;
+        otherwise the buffer is dropped and reloaded on next use.
+        """
+        if self._loaded_at is None:
+            return False
+        if (
+            generation is None
+            or self._generation is None
+            or generation != self._generation + 1
+        ):
+            self._loaded_at = None
+            return False
+        self._generation = generation
+        return True
+
+    def _adjust_reply_count(self, comment_id: str, delta: int) -> None:
+        for index, current in enumerate(self._comments):
+            if current.id == comment_id:
+                self._comments[index] = current.model_copy(
+                    update={"reply_count": current.reply_count + delta}
+                )
+                break
+
+
+def comments_written(db: Session) -> Optional[int]:
+    """
+    Bump the comments generation after the write committed, in its own
+    transaction
+
+    Pass the returned generation to the buffer.
+    """
+    return generations.bump_committed(db, generations.COMMENTS)
+
+
+def comments_generation(db: Session) -> int:
+    """Current comments generation, read before loading the buffer"""
+    return generations.read(db, [generations.COMMENTS])[generations.COMMENTS]
+
+
+_buffer: Optional[RecentCommentBuffer] = None
+
+
+def get_recent_comment_buffer() -> RecentCommentBuffer:
+    """Process-wide buffer configured from settings"""
+    global _buffer
+    if _buffer is None:
+        _buffer = RecentCommentBuffer(
+            capacity=settings.recent_comments_buffer_size,
+            ttl_seconds=settings.recent_comments_buffer_ttl,
+        )
+    return _buffer
@@ -1,10 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Index, and_, create_engine, insert, literal, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.engine import make_url
-from typing import Generator
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Generator, List, Sequence, Union
 import os
 from app.core.config import settings
-from app.database.models import Base
+from app.database.migrations import upgrade_database
 
 # Create engine with SQLite for prototype
 # If using SQLite, ensure directory exists for relative paths and set connect args
@@ -24,9 +26,116 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def upsert(
+    db: Session,
+    model: Any,
+    values: Union[Dict[str, Any], List[Dict[str, Any]]],
+    index_elements: List[Any],
+    set_: Union[Dict[str, Any], Callable[[Any], Dict[str, Any]], None],
+    returning: Sequence[Any] = (),
+) -> List[Any]:
+    """
+        INSERT ``values`` (one row or a list of rows); a row whose
+        ``index_elements`` already exist UPDATEs that row with ``set_`` instead
+
+        ``set_`` is either a mapping of column names to new values or a callable
+        that takes ``excluded``, the row that could not be inserted, and returns
+        that mapping, e.g. ``lambda excluded: {"n": Model.n + excluded.n}``.
+    With ``set_=None`` an existing row is left as it is (``DO NOTHING``).
+
+        SQLite and PostgreSQL run this as one ``INSERT ... ON CONFLICT DO
+        UPDATE``. Other databases get an UPDATE of each row, followed by an
+        INSERT (in a savepoint) when no row was updated; if a concurrent writer
+        inserted the row first, the UPDATE is applied to it after all.
+
+        With ``returning`` columns, the written rows' values of those columns
+        are returned, read back in the same transaction where the database has
+        no ``RETURNING``.
+    """
+    rows = values if isinstance(values, list) else [values]
+    if not rows:
+        return []
+    make_set = set_ if callable(set_) else (lambda excluded: set_ or {})
+    dialect = db.get_bind().dialect
+
+    def key_filter(row: Dict[str, Any]) -> Any:
+        return and_(*(column == row[column.key] for column in index_elements))
+
+    def written() -> List[Any]:
+        if not returning:
+            return []
+        keys = [tuple(row[column.key] for column in index_elements) for row in rows]
+        return db.query(*returning).filter(tuple_(*index_elements).in_(keys)).all()
+
+    if dialect.name in ("postgresql", "sqlite"):
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        dialect_insert: Callable[[Any], Any] = (
+            postgresql.insert if dialect.name == "postgresql" else sqlite.insert
+        )
+        stmt = dialect_insert(model).values(rows)
+        if set_ is None:
+            # RETURNING would skip the rows that already existed
+            db.execute(stmt.on_conflict_do_nothing(index_elements=index_elements))
+            return written()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements, set_=make_set(stmt.excluded)
+        )
+        if returning and dialect.insert_returning:
+            return list(db.execute(stmt.returning(*returning)).all())
+        db.execute(stmt)
+        return written()
+
+    columns = model.__table__.c
+    for row in rows:
+        if set_ is None:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model).values(row))
+            except IntegrityError:
+                if db.query(*index_elements).filter(key_filter(row)).first() is None:
+                    raise
+            continue
+        excluded = SimpleNamespace(
+            **{name: literal(value, columns[name].type) for name, value in row.items()}
+        )
+        statement = (
+            update(model)
+            .where(key_filter(row))
+            .values(make_set(excluded))
+            .execution_options(synchronize_session=False)
+        )
+        if db.execute(statement).rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(model).values(row))
+        except IntegrityError:
+            if not db.execute(statement).rowcount:
+                raise
+    return written()
+
+
+def is_unique_violation(error: IntegrityError, index: Index) -> bool:
+    """Whether ``error`` was raised by the unique ``index``, not another constraint"""
+    constraint_name = getattr(
+        getattr(error.orig, "diag", None), "constraint_name", None
+    )
+    if constraint_name is not None:
+        # PostgreSQL names the violated constraint
+        return constraint_name == index.name
+    message = str(error.orig)
+    if "UNIQUE constraint failed: " in message and index.table is not None:
+        # SQLite lists the columns instead: "table.column, table.column"
+        table = index.table.name
+        columns = ", ".join(f"{table}.{column.name}" for column in index.columns)
+        return message.split("UNIQUE constraint failed: ", 1)[1].strip() == columns
+    return index.name is not None and index.name in message
+
+
 def create_tables() -> None:
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Bring the database schema up to date by applying pending migrations"""
+    upgrade_database(engine)
 
 
 def get_db() -> Generator[Session, None, None]:
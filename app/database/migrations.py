@@ -0,0 +1,105 @@
+"""
+Alembic migration helpers
+
+The schema is owned by the migration chain in ``alembic/versions``; every
+change to ``app/database/models.py`` needs a matching revision
+(``alembic revision -m "..."``). Migrations never import application code:
+helpers they need are copied into the revision, frozen as of that revision.
+
+Migrations run once per deployment, before any worker serves requests
+(``migrate.py``, which ``gunicorn.conf.py`` calls in the master process).
+A single-process server still migrates at startup; with several workers
+each one only checks the database is at head.
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database.models import Base
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# PostgreSQL advisory lock serializing concurrent ``upgrade_database`` calls
+MIGRATION_LOCK_ID = 16_160_001
+
+
+def alembic_config() -> Config:
+    """Alembic configuration that works regardless of the working directory"""
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "alembic"))
+    return config
+
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    """Apply all pending migrations to the database behind ``engine``"""
+    config = alembic_config()
+    with engine.connect() as connection:
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            # Session-level lock: it outlives the per-migration transactions
+            connection.execute(
+                text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+            connection.commit()
+        try:
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
+            connection.commit()
+        finally:
+            if locked:
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+                )
+                connection.commit()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    """Revision the database is at; None before the first migration"""
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision() -> str:
+    """Newest revision of the migration chain"""
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    if head is None:
+        raise RuntimeError("The migration chain has no revisions")
+    return head
+
+
+def check_database_current(engine: Engine) -> None:
+    """Raise RuntimeError unless the database behind ``engine`` is at head"""
+    with engine.connect() as connection:
+        current = current_revision(connection)
+    head = head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database is at revision {current}, expected {head}; run migrate.py"
+        )
+
+
+def find_missing_indexes(connection: Connection) -> List[Tuple[str, str]]:
+    """
+    Indexes declared on the models but absent from the database
+
+    Returns ``(table, index)`` pairs; an empty list means the migration chain
+    covers every model index.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    missing: List[Tuple[str, str]] = []
+    for table in Base.metadata.sorted_tables:
+        # Model indexes are all named explicitly
+        names = [str(index.name) for index in table.indexes if index.name]
+        if table.name not in existing_tables:
+            missing.extend((table.name, name) for name in names)
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend((table.name, name) for name in names if name not in existing)
+    return sorted(missing)
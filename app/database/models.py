@@ -1,6 +1,7 @@
 from sqlalchemy import (
     Column,
     Integer,
+    Float,
     String,
     DateTime,
     Text,
@@ -11,12 +12,14 @@ from sqlalchemy import (
     Index,
 )
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.sql import false, func, text
 from enum import Enum
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Optional
 import uuid
 
+from app.core import comment_paths
+
 if TYPE_CHECKING:
     from sqlalchemy.orm import DeclarativeBase
 
@@ -49,6 +52,13 @@ class MBTIType(str, Enum):
     ESFP = "ESFP"
 
 
+class ReactionType(str, Enum):
+    LIKE = "LIKE"
+    LOVE = "LOVE"
+    HAHA = "HAHA"
+    INSIGHTFUL = "INSIGHTFUL"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -75,6 +85,11 @@ class Celebrity(Base):
     name_en = Column(String)
     description = Column(Text)
     image_url = Column(String)
+    # 姓名查找键（繁简、全半角、大小写折叠，见 app.search.text.name_key）
+    name_key = Column(String)
+    name_en_key = Column(String)
+    # 搜索文档（规范化的姓名、简介和标签，见 app.search.text）
+    search_document = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -82,6 +97,28 @@ class Celebrity(Base):
     votes = relationship("Vote", back_populates="celebrity")
     comments = relationship("Comment", back_populates="celebrity")
     tags = relationship("CelebrityTag", back_populates="celebrity")
+    vote_tally = relationship(
+        "CelebrityVoteTally",
+        back_populates="celebrity",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+
+    # 分页与姓名查找索引
+    __table_args__ = (
+        Index("ix_celebrities_created", "created_at", "id"),
+        Index("ix_celebrities_name_key", "name_key", unique=True),
+        Index("ix_celebrities_name_en_key", "name_en_key"),
+    )
+
+    @validates("name", "name_en")
+    def _update_name_key(self, field: str, value: Optional[str]) -> Optional[str]:
+        """Keep ``name_key``/``name_en_key`` in step with every name write"""
+        # Imported here: app.search imports these models
+        from app.search.text import name_key
+
+        setattr(self, f"{field}_key", name_key(value))
+        return value
 
 
 class Tag(Base):
@@ -106,6 +143,9 @@ class CelebrityTag(Base):
     celebrity = relationship("Celebrity", back_populates="tags")
     tag = relationship("Tag", back_populates="celebrities")
 
+    # 按标签查询索引（主键以 celebrity_id 开头）
+    __table_args__ = (Index("ix_celebrity_tags_tag", "tag_id"),)
+
 
 class Vote(Base):
     __tablename__ = "votes"
@@ -121,9 +161,13 @@ class Vote(Base):
     user = relationship("User", back_populates="votes")
     celebrity = relationship("Celebrity", back_populates="votes")
 
-    # 唯一约束
+    # 唯一约束与查询索引
     __table_args__ = (
         Index("ix_user_celebrity_vote", "user_id", "celebrity_id", unique=True),
+        Index("ix_votes_celebrity_mbti", "celebrity_id", "mbti_type"),
+        Index("ix_votes_celebrity_created", "celebrity_id", "created_at", "id"),
+        Index("ix_votes_user_created", "user_id", "created_at"),
+        Index("ix_votes_created", "created_at", "id"),
     )
 
 
@@ -136,6 +180,12 @@ class Comment(Base):
     content = Column(Text, nullable=False)
     parent_id = Column(String, ForeignKey("comments.id"))
     level = Column(Integer, default=1)
+    # 物化路径（见 app.core.comment_paths）与直接回复数
+    path = Column(String)
+    reply_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # 反应总数与热度排序键（见 app.core.hot_score），由定时任务批量刷新
+    reaction_count = Column(Integer, nullable=False, default=0, server_default="0")
+    hot_score = Column(Float, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -145,6 +195,26 @@ class Comment(Base):
     parent = relationship("Comment", remote_side=[id])
     replies = relationship("Comment", back_populates="parent")
 
+    @property
+    def depth(self) -> int:
+        """Nesting depth in the thread (0 for top-level comments)"""
+        return comment_paths.depth(self.path) if self.path else self.level - 1
+
+    # 查询索引
+    __table_args__ = (
+        Index("ix_comments_celebrity_path", "celebrity_id", "path"),
+        Index(
+            "ix_comments_celebrity_parent_created",
+            "celebrity_id",
+            "parent_id",
+            "created_at",
+        ),
+        Index("ix_comments_user_created", "user_id", "created_at"),
+        Index("ix_comments_parent_created", "parent_id", "created_at"),
+        Index("ix_comments_created", "created_at", "id"),
+        Index("ix_comments_celebrity_hot", "celebrity_id", "hot_score", "id"),
+    )
+
 
 class DailyUserStats(Base):
     __tablename__ = "daily_user_stats"
@@ -160,3 +230,183 @@ class DailyUserStats(Base):
 
     # 唯一约束
     __table_args__ = (Index("ix_user_date_stats", "user_id", "date", unique=True),)
+
+
+class CelebrityVoteTally(Base):
+    """Denormalized per-celebrity vote counters, maintained on every vote write"""
+
+    __tablename__ = "celebrity_vote_tallies"
+
+    celebrity_id = Column(String, ForeignKey("celebrities.id"), primary_key=True)
+    total_votes = Column(Integer, nullable=False, default=0)
+    votes_with_reason = Column(Integer, nullable=False, default=0)
+    intj_count = Column(Integer, nullable=False, default=0)
+    intp_count = Column(Integer, nullable=False, default=0)
+    entj_count = Column(Integer, nullable=False, default=0)
+    entp_count = Column(Integer, nullable=False, default=0)
+    infj_count = Column(Integer, nullable=False, default=0)
+    infp_count = Column(Integer, nullable=False, default=0)
+    enfj_count = Column(Integer, nullable=False, default=0)
+    enfp_count = Column(Integer, nullable=False, default=0)
+    istj_count = Column(Integer, nullable=False, default=0)
+    isfj_count = Column(Integer, nullable=False, default=0)
+    estj_count = Column(Integer, nullable=False, default=0)
+    esfj_count = Column(Integer, nullable=False, default=0)
+    istp_count = Column(Integer, nullable=False, default=0)
+    isfp_count = Column(Integer, nullable=False, default=0)
+    estp_count = Column(Integer, nullable=False, default=0)
+    esfp_count = Column(Integer, nullable=False, default=0)
+    top_mbti_type = Column(SQLEnum(MBTIType))
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    # 关系
+    celebrity = relationship("Celebrity", back_populates="vote_tally")
+
+    # 排行榜索引
+    __table_args__ = (
+        Index("ix_vote_tally_leaderboard", "total_votes", "celebrity_id"),
+    )
+
+    @staticmethod
+    def count_column_name(mbti_type: MBTIType) -> str:
+        """Name of the counter column holding votes for an MBTI type"""
+        return f"{MBTIType(mbti_type).value.lower()}_count"
+
+    def type_counts(self) -> Dict[MBTIType, int]:
+        """Per-type vote counts, in MBTIType declaration order"""
+        return {
+            mbti_type: getattr(self, self.count_column_name(mbti_type)) or 0
+            for mbti_type in MBTIType
+        }
+
+    @staticmethod
+    def pick_top_type(type_counts: Dict[MBTIType, int]) -> Optional[MBTIType]:
+        """Most voted type; ties go to the earlier type in declaration order"""
+        top_type, top_count = None, 0
+        for mbti_type in MBTIType:
+            count = type_counts.get(mbti_type, 0)
+            if count > top_count:
+                top_type, top_count = mbti_type, count
+        return top_type
+
+
+class PopularSearchCount(Base):
+    """Searches per query and time bucket of a rolling window, from every worker"""
+
+    __tablename__ = "popular_search_counts"
+
+    window = Column(String(8), primary_key=True)
+    # Bucket start divided by the window's bucket length
+    bucket = Column(Integer, primary_key=True)
+    # The empty term holds the number of searches in the bucket
+    term = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
+class AnalyticsCounter(Base):
+    """Global counters behind /search/analytics, maintained on every write"""
+
+    __tablename__ = "analytics_counters"
+
+    name = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class TagUsageCount(Base):
+    """Number of celebrities carrying each tag, maintained on every tag write"""
+
+    __tablename__ = "tag_usage_counts"
+
+    tag_id = Column(String, ForeignKey("tags.id"), primary_key=True)
+    usage_count = Column(Integer, nullable=False, default=0)
+
+    # 热门标签索引
+    __table_args__ = (Index("ix_tag_usage_counts_usage", "usage_count", "tag_id"),)
+
+
+class CelebrityCommentStats(Base):
+    """Per-celebrity comment counters, maintained on every comment write"""
+
+    __tablename__ = "celebrity_comment_stats"
+
+    celebrity_id = Column(String, ForeignKey("celebrities.id"), primary_key=True)
+    total_comments = Column(Integer, nullable=False, default=0)
+    reply_comments = Column(Integer, nullable=False, default=0)
+
+
+class CelebrityCommenterCount(Base):
+    """Comments per user on each celebrity, for the most active commenters"""
+
+    __tablename__ = "celebrity_commenter_counts"
+
+    celebrity_id = Column(String, ForeignKey("celebrities.id"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    comment_count = Column(Integer, nullable=False, default=0)
+
+    # 活跃评论者索引
+    __table_args__ = (
+        Index(
+            "ix_celebrity_commenter_counts_rank",
+            "celebrity_id",
+            "comment_count",
+            "user_id",
+        ),
+    )
+
+
+class UserCommentStats(Base):
+    """Per-user comment counters, maintained on every comment write"""
+
+    __tablename__ = "user_comment_stats"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    total_comments = Column(Integer, nullable=False, default=0)
+    reply_comments = Column(Integer, nullable=False, default=0)
+    # recent_comments 只统计 recent_date（UTC 日期）当天的评论
+    recent_date = Column(Date)
+    recent_comments = Column(Integer, nullable=False, default=0)
+
+
+class CommentReaction(Base):
+    """One reaction per user and comment"""
+
+    __tablename__ = "comment_reactions"
+
+    comment_id = Column(String, ForeignKey("comments.id"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    reaction = Column(SQLEnum(ReactionType), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CommentReactionCount(Base):
+    """Reactions per comment and type, split over shards to spread row locks"""
+
+    __tablename__ = "comment_reaction_counts"
+
+    comment_id = Column(String, ForeignKey("comments.id"), primary_key=True)
+    reaction = Column(SQLEnum(ReactionType), primary_key=True)
+    # 分片号由用户 ID 决定，同一评论的并发反应落在不同的行上
+    shard = Column(Integer, primary_key=True)
+    reaction_count = Column(Integer, nullable=False, default=0)
+    # 计数变化后置位，热度分刷新后清除；重启后待刷新的评论不会丢失
+    score_stale = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        Index(
+            "ix_comment_reaction_counts_stale",
+            "comment_id",
+            postgresql_where=text("score_stale"),
+            sqlite_where=text("score_stale"),
+        ),
+    )
+
+
+class StateGeneration(Base):
+    """Change counters telling each worker when its in-memory state is stale"""
+
+    __tablename__ = "state_generations"
+
+    name = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -1,13 +1,29 @@
+import asyncio
 import os
 
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
+from sqlalchemy import inspect
+
+from app.core.config import settings
+from app.core.live_events import get_live_event_transport
+from app.core.pagination import NEXT_CURSOR_HEADER
 
 # Import database
-from app.database.database import create_tables
+from app.database.database import SessionLocal, create_tables, engine
+from app.database.migrations import (
+    check_database_current,
+    current_revision,
+    head_revision,
+)
+from app.search import get_popular_search_tracker, get_search_backend
+from app.search import sync as search_sync
+from app.services.analytics_counter_service import AnalyticsCounterService
+from app.services.comment_reaction_service import CommentReactionService
 
 # Import API routers
 from app.api.auth import router as auth_router
@@ -15,7 +31,7 @@ from app.api.celebrities import router as celebrities_router
 from app.api.votes import router as votes_router
 from app.api.comments import router as comments_router
 from app.api.uploads import router as uploads_router
-from app.api.search import router as search_router
+from app.api.search import SEARCH_CACHE_HEADER, router as search_router
 from app.api.mbti import router as mbti_router
 
 # Create FastAPI application
@@ -28,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SEARCH_CACHE_HEADER],
 )
 
 # Static files and templates
@@ -148,24 +165,26 @@ def test_endpoint():
     }
 
 
-# Database test endpoint
+# Database test endpoint (read-only; migrations run through migrate.py)
 @app.get("/db-test")
 def test_database():
     try:
-        # Try to create tables
-        create_tables()
+        with engine.connect() as connection:
+            revision = current_revision(connection)
+            tables = sorted(inspect(connection).get_table_names())
+        head = head_revision()
+        if revision != head:
+            return {
+                "status": "error",
+                "message": f"Database is at revision {revision}, expected {head}",
+                "revision": revision,
+                "tables": tables,
+            }
         return {
             "status": "success",
-            "message": "Database connection and tables created successfully",
-            "tables": [
-                "users",
-                "celebrities",
-                "votes",
-                "comments",
-                "tags",
-                "celebrity_tags",
-                "daily_user_stats",
-            ],
+            "message": "Database connection works and the schema is up to date",
+            "revision": revision,
+            "tables": tables,
         }
     except Exception as e:
         return {"status": "error", "message": f"Database error: {str(e)}"}
@@ -181,15 +200,121 @@ def env_info():
     }
 
 
+# Long-running tasks started at startup, cancelled at shutdown
+background_tasks = []
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
+    if settings.web_concurrency > 1:
+        # Migrated once by the gunicorn master (gunicorn.conf.py); refuse to
+        # serve a schema the code does not match
+        check_database_current(engine)
+    else:
+        try:
+            create_tables()
+            print("Database tables created successfully")
+        except Exception as e:
+            print(f"Database initialization error: {e}")
+
+    db = SessionLocal()
+    try:
+        backend = get_search_backend()
+        # A backend the database cannot serve must not start
+        backend.check(db)
+        try:
+            indexed = search_sync.rebuild_all(db)
+            print(f"Search backend '{backend.name}' ready ({indexed} rows indexed)")
+        except Exception as e:
+            print(f"Search backend initialization error: {e}")
+    finally:
+        db.close()
+
     try:
-        create_tables()
-        print("Database tables created successfully")
+        # Counts of earlier runs and of the other workers
+        _sync_popular_searches()
     except Exception as e:
-        print(f"Database initialization error: {e}")
+        print(f"Popular search initialization error: {e}")
+
+    try:
+        get_live_event_transport().start()
+    except Exception as e:
+        print(f"Live event transport initialization error: {e}")
+
+    for interval, job in [
+        (settings.popular_search_sync_interval, _sync_popular_searches),
+        (settings.analytics_reconcile_interval, _reconcile_analytics_counters),
+        (settings.comment_hot_score_interval, _refresh_comment_hot_scores),
+        (settings.search_refresh_interval, _refresh_search_indexes),
+        (settings.search_vote_refresh_interval, _refresh_search_vote_weights),
+    ]:
+        if interval > 0:
+            background_tasks.append(
+                asyncio.create_task(run_periodically(interval, job))
+            )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks"""
+    for task in background_tasks:
+        task.cancel()
+    get_live_event_transport().stop()
+
+
+def _sync_popular_searches():
+    db = SessionLocal()
+    try:
+        get_popular_search_tracker().sync(db)
+    finally:
+        db.close()
+
+
+def _reconcile_analytics_counters():
+    db = SessionLocal()
+    try:
+        drift = AnalyticsCounterService(db).reconcile()
+        if drift:
+            print(f"Corrected analytics counter drift: {drift}")
+    finally:
+        db.close()
+
+
+def _refresh_search_indexes():
+    db = SessionLocal()
+    try:
+        if search_sync.refresh_if_stale(db):
+            print("Rebuilt search indexes after catalog writes by another worker")
+    finally:
+        db.close()
+
+
+def _refresh_search_vote_weights():
+    db = SessionLocal()
+    try:
+        search_sync.refresh_votes_if_stale(db)
+    finally:
+        db.close()
+
+
+def _refresh_comment_hot_scores():
+    db = SessionLocal()
+    try:
+        CommentReactionService(db).refresh_hot_scores()
+    finally:
+        db.close()
+
+
+async def run_periodically(interval: float, job):
+    """Run a blocking job every ``interval`` seconds in the threadpool"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(job)
+        except Exception as e:
+            print(f"Background job {job.__name__} failed: {e}")
 
 
 if __name__ == "__main__":
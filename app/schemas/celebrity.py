@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from app.schemas.comment import CommentThreadResponse
 
 
 class CelebrityCreate(BaseModel):
@@ -31,6 +32,28 @@ class CelebrityResponse(BaseModel):
     image_url: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    tags: List[str] = []
 
     class Config:
         from_attributes = True
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def _tag_names(cls, tags: List[Any]) -> List[str]:
+        # Celebrity.tags holds CelebrityTag association rows; list queries
+        # load them with selectinload(Celebrity.tags).joinedload(CelebrityTag.tag)
+        return sorted(tag if isinstance(tag, str) else tag.tag.name for tag in tags)
+
+
+class CelebrityBatchResponse(BaseModel):
+    celebrities: List[CelebrityResponse]
+    missing_ids: List[str]
+
+
+class CelebrityFullResponse(BaseModel):
+    celebrity: CelebrityResponse
+    tags: List[str]
+    vote_statistics: Dict[str, Any]
+    comments: List[CommentThreadResponse]
+    comments_next_cursor: Optional[str] = None
+    comment_statistics: Dict[str, Any]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from app.database.models import ReactionType
 
 
 class CommentCreate(BaseModel):
@@ -20,8 +21,29 @@ class CommentResponse(BaseModel):
     content: str
     parent_id: Optional[str] = None
     level: int
+    reply_count: int = 0
+    reaction_count: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class CommentThreadResponse(CommentResponse):
+    replies: List["CommentThreadResponse"] = []
+
+
+class CommentTreeNodeResponse(CommentResponse):
+    depth: int
+
+
+class ReactionCreate(BaseModel):
+    reaction: ReactionType = Field(..., description="Reaction to the comment")
+
+
+class ReactionSummaryResponse(BaseModel):
+    comment_id: str
+    total_reactions: int
+    reactions: Dict[ReactionType, int]
+    my_reaction: Optional[ReactionType] = None
@@ -0,0 +1,26 @@
+# Celebrity search: text normalization, indexes and backends
+from .index import CelebritySearchIndex, get_search_index
+from .backends import SearchBackend, SearchHit, get_search_backend
+from .fuzzy import FuzzyNameIndex, get_fuzzy_index
+from .facets import FacetIndex, get_facet_index
+from .cache import SearchResultCache, get_search_cache
+from .popular import PopularSearchTracker, get_popular_search_tracker
+from .suggestions import SuggestionIndex, get_suggestion_index
+
+__all__ = [
+    "CelebritySearchIndex",
+    "get_search_index",
+    "SearchBackend",
+    "SearchHit",
+    "get_search_backend",
+    "FuzzyNameIndex",
+    "get_fuzzy_index",
+    "FacetIndex",
+    "get_facet_index",
+    "SearchResultCache",
+    "get_search_cache",
+    "PopularSearchTracker",
+    "get_popular_search_tracker",
+    "SuggestionIndex",
+    "get_suggestion_index",
+]
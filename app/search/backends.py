@@ -0,0 +1,306 @@
+"""
+Pluggable celebrity search backends
+
+Every backend ranks celebrities for a text query with the same relevance
+tiers (100 exact name, 80 name contains, 60 description contains, 40 tag
+contains; ties newest first) and returns ``SearchHit`` tuples. Choose one with
+``settings.search_backend``:
+
+- ``memory``: the in-process inverted index (``app.search.index``)
+- ``like``: ``LIKE '%q%'`` over the denormalized ``search_document``
+  column; works everywhere, scans
+- ``fts5``: the LIKE tiers, with candidates from an SQLite FTS5 trigram
+  table maintained by triggers
+- ``postgres``: the LIKE tiers, served by a pg_trgm GIN index and ranked
+  by full-text and trigram similarity
+
+The database-side plumbing for ``fts5`` and ``postgres`` is created by the
+``0003_search_backends``, ``0006_celebrity_search_document`` and
+``0014_fts5_search_document`` migrations. The settings refuse a backend
+that does not match the database dialect, and ``check`` refuses to start
+``fts5`` on an SQLite build without its table.
+"""
+
+import abc
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    ColumnElement,
+    and_,
+    case,
+    column,
+    desc,
+    func,
+    inspect,
+    or_,
+    text,
+)
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.database.models import Celebrity
+from app.search import documents
+from app.search.index import (
+    DESCRIPTION_SCORE,
+    EXACT_NAME_SCORE,
+    NAME_SCORE,
+    TAG_SCORE,
+    CelebritySearchIndex,
+    get_search_index,
+)
+from app.search.text import (
+    DESCRIPTION_MARKER,
+    TAGS_MARKER,
+    document_text,
+    name_key,
+    normalize_text,
+)
+
+
+class SearchHit(NamedTuple):
+    celebrity_id: str
+    relevance_score: int
+    created_ts: float
+
+
+def _timestamp(created_at: Optional[datetime]) -> float:
+    return created_at.timestamp() if created_at else 0.0
+
+
+class SearchBackend(abc.ABC):
+    """Base class; database-backed backends need no write notifications"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def search(self, db: Session, query: str, field: str = "all") -> List[SearchHit]:
+        """Every matching celebrity, best first"""
+
+    def normalize_query(self, query: str) -> str:
+        """The query as this backend matches it; equal forms match alike"""
+        return normalize_text(query).strip()
+
+    def check(self, db: Session) -> None:
+        """Raise RuntimeError if the database cannot serve this backend"""
+
+    def rebuild(self, db: Session) -> int:
+        """Rebuild derived search state from the database; returns rows indexed"""
+        return 0
+
+    def refresh(self, db: Session, celebrity_ids: Iterable[str]) -> None:
+        """Called after celebrities or their tags were written and committed"""
+
+    def remove(self, celebrity_id: str) -> None:
+        """Called after a celebrity was deleted"""
+
+
+class MemoryIndexBackend(SearchBackend):
+    """In-process inverted index, updated by write notifications"""
+
+    name = "memory"
+
+    def __init__(self, index: Optional[CelebritySearchIndex] = None):
+        self._index = index
+
+    @property
+    def index(self) -> CelebritySearchIndex:
+        return self._index if self._index is not None else get_search_index()
+
+    def search(self, db: Session, query: str, field: str = "all") -> List[SearchHit]:
+        return [
+            SearchHit(celebrity_id, score, self.index.created_ts(celebrity_id))
+            for celebrity_id, score in self.index.search(query, field)
+        ]
+
+    def rebuild(self, db: Session) -> int:
+        return self.index.rebuild(db)
+
+    def refresh(self, db: Session, celebrity_ids: Iterable[str]) -> None:
+        self.index.refresh(db, celebrity_ids)
+
+    def remove(self, celebrity_id: str) -> None:
+        self.index.remove(celebrity_id)
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+class LikeSearchBackend(SearchBackend):
+    """
+    Substring matching with SQL LIKE over ``celebrities.search_document``
+
+    The document's section markers place a match in a field, so the tiers
+    are ``LIKE`` patterns on the same column: ``%q%GS%`` for names,
+    ``%GS%q%RS%`` for the description, ``%RS%q%`` for tags. Exact names
+    compare the persisted name keys. No per-row lowercasing and no
+    correlated tag subquery.
+    """
+
+    name = "like"
+
+    def normalize_query(self, query: str) -> str:
+        return document_text(query).strip()
+
+    def search(self, db: Session, query: str, field: str = "all") -> List[SearchHit]:
+        normalized = self.normalize_query(query)
+        if not normalized:
+            return []
+        return [
+            SearchHit(celebrity_id, relevance_score, _timestamp(created_at))
+            for celebrity_id, relevance_score, created_at in self.query(
+                db, query, normalized, field
+            )
+        ]
+
+    def query(self, db: Session, query: str, normalized: str, field: str) -> Query:
+        """Ranked ``(id, relevance_score, created_at)`` rows of a search"""
+        q = _like_escape(normalized)
+        key = name_key(query)
+        document = Celebrity.search_document
+
+        def like(pattern: str) -> ColumnElement[bool]:
+            return document.like(pattern, escape="/")
+
+        tiers = []
+        if field in ("all", "name"):
+            tiers += [
+                (
+                    or_(Celebrity.name_key == key, Celebrity.name_en_key == key),
+                    EXACT_NAME_SCORE,
+                ),
+                (like(f"%{q}%{DESCRIPTION_MARKER}%"), NAME_SCORE),
+            ]
+        if field in ("all", "description"):
+            tiers.append(
+                (like(f"%{DESCRIPTION_MARKER}%{q}%{TAGS_MARKER}%"), DESCRIPTION_SCORE)
+            )
+        if field in ("all", "tag"):
+            tiers.append((like(f"%{TAGS_MARKER}%{q}%"), TAG_SCORE))
+
+        condition = self.candidates(normalized, key, like(f"%{q}%"))
+        if field != "all":
+            condition = and_(condition, or_(*(tier for tier, _ in tiers)))
+
+        score = case(*tiers, else_=0).label("relevance_score")
+        return (
+            db.query(Celebrity.id, score, Celebrity.created_at)
+            .filter(condition)
+            .order_by(
+                desc("relevance_score"),
+                *self.ranking(normalized),
+                desc(Celebrity.created_at),
+            )
+        )
+
+    def candidates(
+        self, normalized: str, key: Optional[str], contains: ColumnElement[bool]
+    ) -> ColumnElement[bool]:
+        """Rows worth scoring; ``contains`` is the plain substring test"""
+        return contains
+
+    def ranking(self, normalized: str) -> list:
+        """Order within a relevance tier, before newest first"""
+        return []
+
+    def rebuild(self, db: Session) -> int:
+        """Fill in documents of rows written without them; returns rows filled"""
+        return documents.backfill(db, missing_only=True)
+
+
+class PostgresTrigramBackend(LikeSearchBackend):
+    """
+    The LIKE tiers on PostgreSQL, ranked by full-text and trigram similarity
+
+    A trigram GIN index on ``search_document`` answers the ``LIKE '%q%'``
+    candidate test; the tier patterns are then checked on the matching rows.
+    Within a tier, rows whose words match the query's words rank first
+    (``ts_rank`` over the ``simple`` configuration, which does not stem
+    and leaves the folded text alone), then rows whose whole document is
+    most similar to the query (``pg_trgm`` ``similarity``), which puts
+    short, focused documents ahead of long ones that merely mention it.
+    """
+
+    name = "postgres"
+
+    def ranking(self, normalized: str) -> list:
+        document = Celebrity.search_document
+        words = func.plainto_tsquery("simple", normalized)
+        return [
+            desc(func.ts_rank(func.to_tsvector("simple", document), words)),
+            desc(func.similarity(document, normalized)),
+        ]
+
+
+class SQLiteFTS5Backend(LikeSearchBackend):
+    """
+    The LIKE tiers, with candidates found in an SQLite FTS5 trigram index
+
+    ``celebrity_search_fts`` holds a copy of each folded ``search_document``,
+    kept in step by triggers, so Traditional and Simplified, full- and
+    half-width and upper- and lower-case forms match each other as in the
+    other backends. Queries of three or more characters take their
+    candidates from a ``MATCH`` on the trigram index. Shorter queries (common
+    for two-character Chinese names) cannot form a trigram and fall back to
+    the ``LIKE`` scan.
+    """
+
+    name = "fts5"
+
+    def candidates(
+        self, normalized: str, key: Optional[str], contains: ColumnElement[bool]
+    ) -> ColumnElement[bool]:
+        if len(normalized) < 3:
+            return contains
+        phrase = normalized.replace('"', '""')
+        matched = text(
+            "SELECT k.celebrity_id FROM celebrity_search_fts f "
+            "JOIN celebrity_search_keys k ON k.doc_id = f.rowid "
+            "WHERE celebrity_search_fts MATCH :match"
+        ).bindparams(match=f'"{phrase}"')
+        # Exact names written in another script are found by their keys
+        return or_(
+            Celebrity.id.in_(matched.columns(column("celebrity_id"))),
+            Celebrity.name_key == key,
+            Celebrity.name_en_key == key,
+        )
+
+    def check(self, db: Session) -> None:
+        if "celebrity_search_fts" not in inspect(db.get_bind()).get_table_names():
+            raise RuntimeError(
+                "SEARCH_BACKEND=fts5 needs the celebrity_search_fts table, which "
+                "the migrations only create on SQLite 3.34+ built with FTS5"
+            )
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (
+        MemoryIndexBackend,
+        LikeSearchBackend,
+        SQLiteFTS5Backend,
+        PostgresTrigramBackend,
+    )
+}
+
+
+def create_search_backend(name: str) -> SearchBackend:
+    """Instantiate a backend by its ``settings.search_backend`` name"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown search backend {name!r}; expected one of {sorted(BACKENDS)}"
+        )
+
+
+_search_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    """Process-wide search backend configured from settings"""
+    global _search_backend
+    if _search_backend is None:
+        _search_backend = create_search_backend(settings.search_backend)
+    return _search_backend
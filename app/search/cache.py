@@ -0,0 +1,204 @@
+"""
+Search result cache
+
+Search responses are cached as pre-serialized JSON, keyed by the search
+parameters, with the query normalized the way the search backend matches it.
+Entries are bounded in number (least recently used are evicted first) and in
+age (``ttl_seconds``).
+
+Keys also carry the shared generations (``app.core.generations``) the
+results depend on, read from the database per request: the ``catalog``
+generation always, the ``votes`` generation only for searches ordered or
+filtered by votes (the ``popular`` sort, ``search_type=mbti`` and the MBTI
+type filter). A write by any worker therefore retires the entries it can
+change, and a vote leaves text searches cached. Their facet counts may trail
+votes by up to the TTL.
+
+A local catalog write or rebuild also clears the entries of this process
+(``invalidate``), since they were computed from the in-process indexes.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from sqlalchemy.orm import Session
+
+from app.core import generations
+from app.core.config import settings
+from app.search.backends import get_search_backend
+from app.search.text import normalize_text
+
+CacheKey = Tuple[Any, ...]
+
+
+class CachedResults(NamedTuple):
+    total: int  # number of results in body
+    body: bytes  # JSON array of the result objects
+    facets: bytes  # JSON object of the facet counts
+    generation: int
+    expires_at: float
+
+
+def serialize(content: Any) -> bytes:
+    """JSON bytes identical to what FastAPI's ``JSONResponse`` would send"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class SearchResultCache:
+    """LRU + TTL cache of serialized search results"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, CachedResults]" = OrderedDict()
+        self._generation = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def make_key(
+        db: Session,
+        query: str,
+        search_type: str = "all",
+        mbti_type: Optional[str] = None,
+        tag_filter: Optional[str] = None,
+        popularity_filter: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> CacheKey:
+        """Key under which equivalent searches share one entry"""
+        mbti_type = mbti_type.upper() if mbti_type else None
+        popularity_filter = (
+            None if popularity_filter == "all" else popularity_filter or None
+        )
+        names = [generations.CATALOG]
+        if popularity_filter == "popular" or search_type == "mbti" or mbti_type:
+            names.append(generations.VOTES)
+        current = generations.read(db, names)
+        return (
+            tuple(current[name] for name in names),
+            get_search_backend().normalize_query(query),
+            search_type,
+            mbti_type,
+            normalize_text(tag_filter).strip() or None,
+            popularity_filter,
+            skip,
+            limit,
+        )
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_or_compute(
+        self,
+        key: CacheKey,
+        compute: Callable[[], Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+    ) -> Tuple[CachedResults, bool]:
+        """
+        Cached results for ``key``, computing and storing them on a miss
+
+        ``compute`` returns the page of results and the facet counts.
+
+        Returns ``(results, hit)``. Exceptions from ``compute`` propagate and
+        nothing is stored.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        generation = self._generation
+        results, facets = compute()
+        cached = CachedResults(
+            len(results),
+            serialize(results),
+            serialize(facets),
+            generation,
+            self._clock() + self.ttl_seconds,
+        )
+        self._store(key, cached)
+        return cached, False
+
+    def get(self, key: CacheKey) -> Optional[CachedResults]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                if cached.generation != self._generation:
+                    del self._entries[key]
+                    cached = None
+                elif cached.expires_at <= self._clock():
+                    del self._entries[key]
+                    self._stats["expirations"] += 1
+                    cached = None
+            if cached is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return cached
+
+    def invalidate(self) -> None:
+        """Retire every entry of this process; called when its indexes change"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "generation": self._generation,
+            }
+
+    def _store(self, key: CacheKey, cached: CachedResults) -> None:
+        with self._lock:
+            # A write landed while computing: the results may already be stale
+            if cached.generation != self._generation or self.max_entries <= 0:
+                return
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+
+_search_cache: Optional[SearchResultCache] = None
+
+
+def get_search_cache() -> SearchResultCache:
+    """Process-wide search result cache configured from settings"""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchResultCache(
+            settings.search_cache_size, settings.search_cache_ttl
+        )
+    return _search_cache
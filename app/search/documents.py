@@ -0,0 +1,87 @@
+"""
+Maintenance of the denormalized ``celebrities.search_document`` column
+
+The document (see ``app.search.text.search_document``) holds a celebrity's
+normalized names, description and tag names, so the SQL search backends
+match one column instead of lowercasing each field and probing the tags
+with a correlated subquery.
+
+``refresh`` runs inside the caller's transaction and never commits, like
+the tally and counter services: a celebrity or tag write and its document
+change succeed or fail together. ``backfill`` fills rows written by other
+means (imports, older versions) and commits per batch.
+"""
+
+from typing import Dict, Iterable, List, cast
+
+from sqlalchemy import Table, bindparam, update
+from sqlalchemy.orm import Session
+
+from app.database.models import Celebrity, CelebrityTag, Tag
+from app.search.text import search_document
+
+BACKFILL_BATCH_SIZE = 500
+
+# Core table: executemany UPDATEs with custom bind names, not ORM bulk updates
+_CELEBRITIES = cast(Table, Celebrity.__table__)
+
+
+def refresh(db: Session, celebrity_ids: Iterable[str]) -> None:
+    """Recompute the documents of celebrities whose fields or tags changed"""
+    celebrity_ids = list(set(celebrity_ids))
+    if not celebrity_ids:
+        return
+    db.flush()
+    rows = (
+        db.query(Celebrity.id, Celebrity.name, Celebrity.name_en, Celebrity.description)
+        .filter(Celebrity.id.in_(celebrity_ids))
+        .all()
+    )
+    tag_names: Dict[str, List[str]] = {}
+    for celebrity_id, tag_name in (
+        db.query(CelebrityTag.celebrity_id, Tag.name)
+        .join(Tag, Tag.id == CelebrityTag.tag_id)
+        .filter(CelebrityTag.celebrity_id.in_(celebrity_ids))
+    ):
+        tag_names.setdefault(celebrity_id, []).append(tag_name)
+
+    if rows:
+        # A derived column: leave updated_at as it was
+        db.execute(
+            update(_CELEBRITIES)
+            .where(Celebrity.id == bindparam("celebrity_id"))
+            .values(
+                search_document=bindparam("document"),
+                updated_at=Celebrity.updated_at,
+            ),
+            [
+                {
+                    "celebrity_id": row.id,
+                    "document": search_document(
+                        row.name,
+                        row.name_en,
+                        row.description,
+                        tag_names.get(row.id, []),
+                    ),
+                }
+                for row in rows
+            ],
+        )
+
+
+def backfill(
+    db: Session, missing_only: bool = False, batch_size: int = BACKFILL_BATCH_SIZE
+) -> int:
+    """
+    Recompute every document (or only missing ones), committing per batch
+
+    Returns the number of documents written.
+    """
+    query = db.query(Celebrity.id).order_by(Celebrity.id)
+    if missing_only:
+        query = query.filter(Celebrity.search_document.is_(None))
+    celebrity_ids = [celebrity_id for (celebrity_id,) in query]
+    for start in range(0, len(celebrity_ids), batch_size):
+        refresh(db, celebrity_ids[start : start + batch_size])
+        db.commit()
+    return len(celebrity_ids)
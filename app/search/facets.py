@@ -0,0 +1,224 @@
+"""
+Bitmap facet index
+
+Every celebrity gets a small integer slot; a set of celebrities is a Python
+int with those bits set. The index keeps one bitmap per tag, one per MBTI
+type the celebrity has votes for, and one per top (most voted) type. Search
+filters become bitwise ANDs and the count of each facet value is the
+population count of ``results & bitmap``, with no SQL joins or GROUP BY.
+
+Slots of deleted celebrities are reused, so bitmaps stay as wide as the
+catalog. Per-type vote counts are mirrored in memory so that a vote can move
+a celebrity between top-type bitmaps without a database read.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy.orm import Session
+
+from app.database.models import CelebrityTag, CelebrityVoteTally, MBTIType, Tag
+from app.search.text import normalize_text
+
+FACET_TAG_LIMIT = 20
+
+_TYPES = list(MBTIType)
+_COUNT_COLUMNS = [
+    getattr(CelebrityVoteTally, CelebrityVoteTally.count_column_name(mbti_type))
+    for mbti_type in _TYPES
+]
+
+
+def _top_type(counts: List[int]) -> Optional[MBTIType]:
+    return CelebrityVoteTally.pick_top_type(dict(zip(_TYPES, counts)))
+
+
+class FacetIndex:
+    """Tag and MBTI bitmaps over celebrity slots"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        # Normalized tag name -> bitmap, and -> name as written
+        self._tags: Dict[str, int] = {}
+        self._tag_names: Dict[str, str] = {}
+        self._voted: Dict[MBTIType, int] = {t: 0 for t in _TYPES}
+        self._top: Dict[MBTIType, int] = {t: 0 for t in _TYPES}
+        self._type_counts: Dict[str, List[int]] = {}
+        self._celebrity_tags: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def rebuild(self, db: Session) -> int:
+        """Replace the contents with every celebrity's tags and vote tally"""
+        tally_rows = db.query(CelebrityVoteTally.celebrity_id, *_COUNT_COLUMNS).all()
+        tag_rows = (
+            db.query(CelebrityTag.celebrity_id, Tag.name)
+            .join(Tag, Tag.id == CelebrityTag.tag_id)
+            .all()
+        )
+        with self._lock:
+            self._reset()
+            self._load(tally_rows, tag_rows)
+        return len(self._slots)
+
+    def refresh(self, db: Session, celebrity_ids: Iterable[str]) -> None:
+        """Re-read celebrities' tags and tallies after a write"""
+        celebrity_ids = set(celebrity_ids)
+        if not celebrity_ids:
+            return
+        tally_rows = (
+            db.query(CelebrityVoteTally.celebrity_id, *_COUNT_COLUMNS)
+            .filter(CelebrityVoteTally.celebrity_id.in_(celebrity_ids))
+            .all()
+        )
+        tag_rows = (
+            db.query(CelebrityTag.celebrity_id, Tag.name)
+            .join(Tag, Tag.id == CelebrityTag.tag_id)
+            .filter(CelebrityTag.celebrity_id.in_(celebrity_ids))
+            .all()
+        )
+        with self._lock:
+            for celebrity_id in celebrity_ids:
+                self._remove(celebrity_id)
+            self._load(tally_rows, tag_rows)
+
+    def remove(self, celebrity_id: str) -> None:
+        """Drop a deleted celebrity and free its slot"""
+        with self._lock:
+            self._remove(celebrity_id)
+
+    def apply_vote(self, celebrity_id: str, mbti_type: MBTIType, delta: int) -> None:
+        """Mirror a committed vote (``delta`` 1) or vote removal (``delta`` -1)"""
+        with self._lock:
+            slot = self._slot(celebrity_id)
+            counts = self._type_counts.setdefault(celebrity_id, [0] * len(_TYPES))
+            self._unset_types(slot, counts)
+            counts[_TYPES.index(MBTIType(mbti_type))] += delta
+            self._set_types(slot, counts)
+
+    def bitmap(self, celebrity_ids: Iterable[str]) -> int:
+        """Bitmap of the given celebrities (unknown ids are ignored)"""
+        bits = 0
+        with self._lock:
+            for celebrity_id in celebrity_ids:
+                slot = self._slots.get(celebrity_id)
+                if slot is not None:
+                    bits |= 1 << slot
+        return bits
+
+    def contains(self, bitmap: int, celebrity_id: str) -> bool:
+        slot = self._slots.get(celebrity_id)
+        return slot is not None and bool(bitmap >> slot & 1)
+
+    def voted_for(self, mbti_type: str) -> int:
+        """Celebrities with at least one vote for ``mbti_type``"""
+        return self._voted[MBTIType(mbti_type.upper())]
+
+    def tagged(self, tag_query: str) -> int:
+        """Celebrities with a tag whose name contains ``tag_query``"""
+        normalized = normalize_text(tag_query)
+        bits = 0
+        with self._lock:
+            for tag, tag_bits in self._tags.items():
+                if normalized in tag:
+                    bits |= tag_bits
+        return bits
+
+    def counts(self, bitmap: int, tag_limit: int = FACET_TAG_LIMIT) -> Dict:
+        """Per-facet-value counts within ``bitmap``"""
+        with self._lock:
+            top_types = {
+                mbti_type.value: count
+                for mbti_type, bits in self._top.items()
+                if (count := (bitmap & bits).bit_count())
+            }
+            tags = [
+                (count, self._tag_names[tag])
+                for tag, bits in self._tags.items()
+                if (count := (bitmap & bits).bit_count())
+            ]
+        tags.sort(key=lambda item: (-item[0], item[1]))
+        return {
+            "top_mbti_type": top_types,
+            "tags": [{"tag": tag, "count": count} for count, tag in tags[:tag_limit]],
+        }
+
+    def _load(
+        self,
+        tally_rows: Iterable[Sequence[Any]],
+        tag_rows: Iterable[Sequence[Any]],
+    ) -> None:
+        for celebrity_id, *counts in tally_rows:
+            counts = [count or 0 for count in counts]
+            self._type_counts[celebrity_id] = counts
+            self._set_types(self._slot(celebrity_id), counts)
+        for celebrity_id, tag_name in tag_rows:
+            tag = normalize_text(tag_name)
+            self._tags[tag] = self._tags.get(tag, 0) | 1 << self._slot(celebrity_id)
+            self._tag_names[tag] = tag_name
+            self._celebrity_tags.setdefault(celebrity_id, set()).add(tag)
+
+    def _slot(self, celebrity_id: str) -> int:
+        slot = self._slots.get(celebrity_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._ids[slot] = celebrity_id
+            else:
+                slot = len(self._ids)
+                self._ids.append(celebrity_id)
+            self._slots[celebrity_id] = slot
+        return slot
+
+    def _set_types(self, slot: int, counts: List[int]) -> None:
+        for mbti_type, count in zip(_TYPES, counts):
+            if count > 0:
+                self._voted[mbti_type] |= 1 << slot
+        top = _top_type(counts)
+        if top is not None:
+            self._top[top] |= 1 << slot
+
+    def _unset_types(self, slot: int, counts: List[int]) -> None:
+        mask = ~(1 << slot)
+        for mbti_type, count in zip(_TYPES, counts):
+            if count > 0:
+                self._voted[mbti_type] &= mask
+        top = _top_type(counts)
+        if top is not None:
+            self._top[top] &= mask
+
+    def _remove(self, celebrity_id: str) -> None:
+        slot = self._slots.pop(celebrity_id, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        counts = self._type_counts.pop(celebrity_id, None)
+        if counts is not None:
+            self._unset_types(slot, counts)
+        for tag in self._celebrity_tags.pop(celebrity_id, ()):
+            bits = self._tags[tag] & mask
+            if bits:
+                self._tags[tag] = bits
+            else:
+                del self._tags[tag]
+                del self._tag_names[tag]
+        self._ids[slot] = None
+        self._free.append(slot)
+
+
+_facet_index: Optional[FacetIndex] = None
+
+
+def get_facet_index() -> FacetIndex:
+    """Process-wide facet index"""
+    global _facet_index
+    if _facet_index is None:
+        _facet_index = FacetIndex()
+    return _facet_index
@@ -0,0 +1,242 @@
+"""
+Typo-tolerant matching of Latin name words
+
+A SymSpell-style deletion dictionary over the Latin words of celebrity
+names (``name`` and ``name_en``). Every indexed word is stored under all
+strings obtained by deleting up to its allowed number of edits from its
+first ``PREFIX_LENGTH`` characters. A query word generates its own deletions
+the same way; words sharing a deletion are candidates, which are verified
+with the optimal string alignment distance (Damerau-Levenshtein without
+repeated edits of a substring). A lookup costs a few dozen dictionary probes,
+independent of the number of names.
+
+Allowed edits grow with word length: one for words of up to four letters,
+two beyond that; a pair of words may differ by what the shorter one allows,
+so short words only need single deletions indexed. Words shorter than
+``MIN_LOOKUP_LENGTH`` are too ambiguous to look up; they are only checked
+against the candidates found by the other words of the query (with up to
+two edits), so "jackson yi" still finds "Jackson Yee".
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database.models import Celebrity
+from app.search.text import index_terms, is_word_term, normalize_text
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+MIN_LOOKUP_LENGTH = 3
+
+
+class FuzzyMatch(NamedTuple):
+    celebrity_id: str
+    distance: int  # total edits over the query words
+    created_ts: float
+
+
+def max_distance(word: str) -> int:
+    """Edits allowed when matching ``word``"""
+    return 1 if len(word) <= 4 else MAX_EDIT_DISTANCE
+
+
+def latin_words(text: Optional[str]) -> List[str]:
+    """Distinct Latin words of a text"""
+    return [term for term in index_terms(normalize_text(text)) if is_word_term(term)]
+
+
+def deletes(word: str, distance: int = MAX_EDIT_DISTANCE) -> Set[str]:
+    """``word``'s prefix with up to ``distance`` characters deleted"""
+    variants = {word[:PREFIX_LENGTH]}
+    frontier = set(variants)
+    for _ in range(distance):
+        frontier = {
+            variant[:i] + variant[i + 1 :]
+            for variant in frontier
+            for i in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or ``limit + 1`` once it exceeds"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        # A transposition reaches back two rows, so both must be over the limit
+        if min(current) > limit and min(previous) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyNameIndex:
+    """Deletion dictionary over Latin name words, maintained incrementally"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        # celebrity id -> (name words, created timestamp)
+        self._docs: Dict[str, Tuple[Tuple[str, ...], float]] = {}
+        # word -> celebrities whose names contain it
+        self._postings: Dict[str, Set[str]] = {}
+        # deletion variant -> words producing it
+        self._deletes: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, db: Session) -> int:
+        """Replace the contents with every celebrity in the database"""
+        rows = db.query(
+            Celebrity.id, Celebrity.name, Celebrity.name_en, Celebrity.created_at
+        ).all()
+        with self._lock:
+            self._docs, self._postings, self._deletes = {}, {}, {}
+            for row in rows:
+                self._add(row.id, row.name, row.name_en, row.created_at)
+        return len(rows)
+
+    def refresh(self, db: Session, celebrity_ids: Iterable[str]) -> None:
+        """Re-read celebrities after a write"""
+        celebrity_ids = set(celebrity_ids)
+        if not celebrity_ids:
+            return
+        rows = (
+            db.query(
+                Celebrity.id, Celebrity.name, Celebrity.name_en, Celebrity.created_at
+            )
+            .filter(Celebrity.id.in_(celebrity_ids))
+            .all()
+        )
+        with self._lock:
+            for celebrity_id in celebrity_ids:
+                self._remove(celebrity_id)
+            for row in rows:
+                self._add(row.id, row.name, row.name_en, row.created_at)
+
+    def remove(self, celebrity_id: str) -> None:
+        """Drop a deleted celebrity"""
+        with self._lock:
+            self._remove(celebrity_id)
+
+    def search(self, query: str) -> List[FuzzyMatch]:
+        """
+        Celebrities whose name words match every query word within the
+        allowed edits, fewest total edits first, then newest first
+
+        Only the longest query word is looked up in the dictionary; the
+        other words are checked against the few candidates it yields.
+        """
+        terms = index_terms(normalize_text(query))
+        if not terms or not all(is_word_term(term) for term in terms):
+            # Chinese names are not matched by spelling
+            return []
+        anchor = max(sorted(terms), key=len)
+        if len(anchor) < MIN_LOOKUP_LENGTH:
+            return []
+        others = terms - {anchor}
+
+        with self._lock:
+            candidates: Dict[str, int] = {}
+            for word, distance in self._similar_words(anchor).items():
+                for celebrity_id in self._postings[word]:
+                    if distance < candidates.get(celebrity_id, distance + 1):
+                        candidates[celebrity_id] = distance
+
+            results = []
+            for celebrity_id, total in candidates.items():
+                names, created_ts = self._docs[celebrity_id]
+                for word in others:
+                    limit = (
+                        max_distance(word)
+                        if len(word) >= MIN_LOOKUP_LENGTH
+                        else MAX_EDIT_DISTANCE
+                    )
+                    best = min(edit_distance(word, name, limit) for name in names)
+                    if best > limit:
+                        break
+                    total += best
+                else:
+                    results.append(FuzzyMatch(celebrity_id, total, created_ts))
+
+        results.sort(key=lambda match: (match.distance, -match.created_ts))
+        return results
+
+    def _similar_words(self, word: str) -> Dict[str, int]:
+        """Indexed words within the edits allowed for both of the pair"""
+        limit = max_distance(word)
+        similar: Dict[str, int] = {}
+        checked: Set[str] = set()
+        for variant in deletes(word, limit):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                pair_limit = min(limit, max_distance(candidate))
+                distance = edit_distance(word, candidate, pair_limit)
+                if distance <= pair_limit:
+                    similar[candidate] = distance
+        return similar
+
+    def _add(
+        self,
+        celebrity_id: str,
+        name: Optional[str],
+        name_en: Optional[str],
+        created_at: Optional[datetime],
+    ) -> None:
+        words = tuple(dict.fromkeys(latin_words(name) + latin_words(name_en)))
+        if not words:
+            return
+        self._docs[celebrity_id] = (
+            words,
+            created_at.timestamp() if created_at else 0.0,
+        )
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                for variant in deletes(word, max_distance(word)):
+                    self._deletes.setdefault(variant, set()).add(word)
+            postings.add(celebrity_id)
+
+    def _remove(self, celebrity_id: str) -> None:
+        doc = self._docs.pop(celebrity_id, None)
+        if doc is None:
+            return
+        for word in doc[0]:
+            postings = self._postings[word]
+            postings.discard(celebrity_id)
+            if postings:
+                continue
+            del self._postings[word]
+            for variant in deletes(word, max_distance(word)):
+                words = self._deletes[variant]
+                words.discard(word)
+                if not words:
+                    del self._deletes[variant]
+
+
+_fuzzy_index: Optional[FuzzyNameIndex] = None
+
+
+def get_fuzzy_index() -> FuzzyNameIndex:
+    """Process-wide fuzzy name index"""
+    global _fuzzy_index
+    if _fuzzy_index is None:
+        _fuzzy_index = FuzzyNameIndex()
+    return _fuzzy_index
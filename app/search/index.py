@@ -0,0 +1,274 @@
+"""
+In-process inverted index over celebrity text
+
+Every celebrity is indexed under the terms of its name, English name,
+description and tag names (see ``app.search.text``). A query intersects the
+posting sets of its terms to get candidates, then verifies each candidate
+with the same substring rules and relevance tiers as the SQL search:
+
+- exact name match: 100
+- name contains the query: 80
+- description contains the query: 60
+- a tag contains the query: 40
+
+Below these, ``SearchService`` adds typo-tolerant name matches (20, see
+``app.search.fuzzy``) when the tiers above do not fill a page.
+
+Lookups cost one posting-set intersection instead of a full table scan, so
+latency stays flat as the catalog grows. The index lives in process memory:
+it is rebuilt at startup, kept current by ``CelebrityService`` writes in the
+same process, and rebuilt when another worker has written the catalog (see
+``app.search.sync``).
+"""
+
+import bisect
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database.models import Celebrity, CelebrityTag, Tag
+from app.search.text import index_terms, is_word_term, normalize_text, query_terms
+
+# Relevance tiers, highest first
+EXACT_NAME_SCORE = 100
+NAME_SCORE = 80
+DESCRIPTION_SCORE = 60
+TAG_SCORE = 40
+FUZZY_SCORE = 20
+
+SEARCH_FIELDS = ("all", "name", "description", "tag")
+
+
+class IndexedCelebrity:
+    """Normalized searchable fields of one celebrity"""
+
+    __slots__ = ("id", "names", "description", "tags", "created_ts")
+
+    def __init__(
+        self,
+        celebrity_id: str,
+        name: Optional[str],
+        name_en: Optional[str],
+        description: Optional[str],
+        tags: Iterable[str],
+        created_at: Optional[datetime],
+    ):
+        self.id = celebrity_id
+        self.names = tuple(normalize_text(n) for n in (name, name_en) if n)
+        self.description = normalize_text(description)
+        self.tags = tuple(normalize_text(tag) for tag in tags)
+        self.created_ts = created_at.timestamp() if created_at else 0.0
+
+    def terms(self) -> Set[str]:
+        terms: Set[str] = set()
+        for text in (*self.names, self.description, *self.tags):
+            terms |= index_terms(text)
+        return terms
+
+    def score(self, query: str, field: str = "all") -> int:
+        """Relevance of this celebrity for a normalized query, 0 if no match"""
+        if field in ("all", "name"):
+            if query in self.names:
+                return EXACT_NAME_SCORE
+            if any(query in name for name in self.names):
+                return NAME_SCORE
+        if field in ("all", "description") and query in self.description:
+            return DESCRIPTION_SCORE
+        if field in ("all", "tag") and any(query in tag for tag in self.tags):
+            return TAG_SCORE
+        return 0
+
+
+class CelebritySearchIndex:
+    """Term -> celebrity id posting sets with incremental maintenance"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._docs: Dict[str, IndexedCelebrity] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        # Sorted Latin vocabulary for prefix lookups
+        self._words: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, db: Session) -> int:
+        """Replace the index contents with every celebrity in the database"""
+        tags_by_celebrity: Dict[str, List[str]] = {}
+        for celebrity_id, tag_name in db.query(
+            CelebrityTag.celebrity_id, Tag.name
+        ).join(Tag, Tag.id == CelebrityTag.tag_id):
+            tags_by_celebrity.setdefault(celebrity_id, []).append(tag_name)
+
+        docs = [
+            IndexedCelebrity(
+                row.id,
+                row.name,
+                row.name_en,
+                row.description,
+                tags_by_celebrity.get(row.id, []),
+                row.created_at,
+            )
+            for row in db.query(
+                Celebrity.id,
+                Celebrity.name,
+                Celebrity.name_en,
+                Celebrity.description,
+                Celebrity.created_at,
+            ).yield_per(1000)
+        ]
+
+        postings: Dict[str, Set[str]] = {}
+        for doc in docs:
+            for term in doc.terms():
+                postings.setdefault(term, set()).add(doc.id)
+        # One sort instead of an insertion per new word
+        words = sorted(term for term in postings if is_word_term(term))
+
+        with self._lock:
+            self._docs = {doc.id: doc for doc in docs}
+            self._postings, self._words = postings, words
+        return len(docs)
+
+    def refresh(self, db: Session, celebrity_ids: Iterable[str]) -> None:
+        """Re-read celebrities from the database after a write"""
+        celebrity_ids = set(celebrity_ids)
+        if not celebrity_ids:
+            return
+        celebrities = (
+            db.query(
+                Celebrity.id,
+                Celebrity.name,
+                Celebrity.name_en,
+                Celebrity.description,
+                Celebrity.created_at,
+            )
+            .filter(Celebrity.id.in_(celebrity_ids))
+            .all()
+        )
+        tags_by_celebrity: Dict[str, List[str]] = {}
+        for celebrity_id, tag_name in (
+            db.query(CelebrityTag.celebrity_id, Tag.name)
+            .join(Tag, Tag.id == CelebrityTag.tag_id)
+            .filter(CelebrityTag.celebrity_id.in_(celebrity_ids))
+        ):
+            tags_by_celebrity.setdefault(celebrity_id, []).append(tag_name)
+
+        with self._lock:
+            for celebrity in celebrities:
+                self._remove(celebrity.id)
+                self._add(
+                    IndexedCelebrity(
+                        celebrity.id,
+                        celebrity.name,
+                        celebrity.name_en,
+                        celebrity.description,
+                        tags_by_celebrity.get(celebrity.id, []),
+                        celebrity.created_at,
+                    )
+                )
+            for missing_id in celebrity_ids - {c.id for c in celebrities}:
+                self._remove(missing_id)
+
+    def remove(self, celebrity_id: str) -> None:
+        """Drop a deleted celebrity from the index"""
+        with self._lock:
+            self._remove(celebrity_id)
+
+    def search(self, query: str, field: str = "all") -> List[Tuple[str, int]]:
+        """
+        Ranked ``(celebrity_id, relevance_score)`` pairs for a query
+
+        Ordered by relevance, then newest first. ``field`` is one of
+        ``SEARCH_FIELDS``.
+        """
+        normalized = normalize_text(query).strip()
+        if not normalized:
+            return []
+
+        with self._lock:
+            candidates = self._candidates(normalized)
+            scored = []
+            for celebrity_id in candidates:
+                doc = self._docs[celebrity_id]
+                score = doc.score(normalized, field)
+                if score:
+                    scored.append((score, doc.created_ts, celebrity_id))
+
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [(celebrity_id, score) for score, _, celebrity_id in scored]
+
+    def created_ts(self, celebrity_id: str) -> float:
+        """Creation time of an indexed celebrity as a POSIX timestamp"""
+        doc = self._docs.get(celebrity_id)
+        return doc.created_ts if doc else 0.0
+
+    def has_tag_containing(self, celebrity_id: str, tag_query: str) -> bool:
+        """Whether one of the celebrity's tags contains ``tag_query``"""
+        doc = self._docs.get(celebrity_id)
+        normalized = normalize_text(tag_query)
+        return doc is not None and any(normalized in tag for tag in doc.tags)
+
+    def _candidates(self, normalized: str) -> Iterable[str]:
+        cjk_terms, latin_prefixes = query_terms(normalized)
+        if not cjk_terms and not latin_prefixes:
+            # Punctuation-only query: nothing to look up, check every document
+            return list(self._docs)
+
+        groups = [self._postings.get(term, set()) for term in cjk_terms]
+        groups.extend(self._prefix_postings(prefix) for prefix in latin_prefixes)
+        groups.sort(key=len)
+        candidates = set(groups[0])
+        for group in groups[1:]:
+            if not candidates:
+                break
+            candidates &= group
+        return candidates
+
+    def _prefix_postings(self, prefix: str) -> Set[str]:
+        matched: Set[str] = set()
+        start = bisect.bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            matched |= self._postings[word]
+        return matched
+
+    def _add(self, doc: IndexedCelebrity) -> None:
+        self._docs[doc.id] = doc
+        for term in doc.terms():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                if is_word_term(term):
+                    bisect.insort(self._words, term)
+            postings.add(doc.id)
+
+    def _remove(self, celebrity_id: str) -> None:
+        doc = self._docs.pop(celebrity_id, None)
+        if doc is None:
+            return
+        for term in doc.terms():
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.discard(celebrity_id)
+            if not postings:
+                del self._postings[term]
+                if is_word_term(term):
+                    position = bisect.bisect_left(self._words, term)
+                    if position < len(self._words) and self._words[position] == term:
+                        del self._words[position]
+
+
+_search_index: Optional[CelebritySearchIndex] = None
+
+
+def get_search_index() -> CelebritySearchIndex:
+    """Process-wide celebrity search index"""
+    global _search_index
+    if _search_index is None:
+        _search_index = CelebritySearchIndex()
+    return _search_index
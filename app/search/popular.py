@@ -0,0 +1,249 @@
+"""
+Popular search tracking
+
+Every text search records its normalized query. Counting every distinct
+query would grow without bound, so each time bucket keeps a Space-Saving
+summary instead (Metwally et al.): at most ``capacity`` counters. When a new
+term arrives and the summary is full, the term with the smallest count is
+replaced and the new term inherits that count plus one. Any term seen more
+than ``total / capacity`` times is guaranteed to be tracked, and counts
+overestimate by at most the inherited amount.
+
+Windows are rolling sequences of buckets:
+
+- ``hour``: 12 buckets of 5 minutes
+- ``day``: 24 buckets of 1 hour
+- ``week``: 7 buckets of 1 day
+
+Searches are summarized in memory and periodically added (``sync``) to
+``popular_search_counts``, one row per window, bucket and term, so every
+worker and every restart counts towards the same totals. ``sync`` also
+deletes buckets that left their window and reloads the top terms of every
+window, summed over all workers. A read merges that shared summary with the
+searches not yet synced and never touches the database.
+"""
+
+import heapq
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.database import upsert
+from app.database.models import PopularSearchCount
+from app.search.text import normalize_text
+
+WINDOWS: Dict[str, Tuple[int, int]] = {
+    # name: (bucket seconds, bucket count)
+    "hour": (5 * 60, 12),
+    "day": (60 * 60, 24),
+    "week": (24 * 60 * 60, 7),
+}
+
+MAX_TERM_LENGTH = 100
+
+# Term of the row counting every search of a bucket
+TOTAL_TERM = ""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Form under which a search query is counted"""
+    return _WHITESPACE.sub(" ", normalize_text(query)).strip()[:MAX_TERM_LENGTH]
+
+
+class SpaceSaving:
+    """Heavy-hitter counts for one stream using at most ``capacity`` counters"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        # Lazy min-heap of (count, term); entries whose count is outdated are
+        # skipped when popped and dropped when the heap is compacted
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, term: str, weight: int = 1) -> None:
+        self.total += weight
+        if term in self.counts:
+            self.counts[term] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[term] = weight
+        else:
+            evicted, floor = self._pop_min()
+            del self.counts[evicted]
+            self.counts[term] = floor + weight
+        heapq.heappush(self._heap, (self.counts[term], term))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, term) for term, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        while True:
+            count, term = heapq.heappop(self._heap)
+            if self.counts.get(term) == count:
+                return term, count
+
+
+# Counts of the most frequent terms, and the number of searches they cover
+Merged = Tuple[Dict[str, int], int]
+
+
+def _merge(summaries: Iterable[Merged], capacity: int) -> Merged:
+    """Sum summaries, keeping the ``capacity`` largest counts"""
+    counts: Dict[str, int] = {}
+    total = 0
+    for summary_counts, summary_total in summaries:
+        total += summary_total
+        for term, count in summary_counts.items():
+            counts[term] = counts.get(term, 0) + count
+    if len(counts) > capacity:
+        counts = dict(heapq.nlargest(capacity, counts.items(), key=lambda i: i[1]))
+    return counts, total
+
+
+# (window, bucket number) -> searches not yet added to the database
+Pending = Dict[Tuple[str, int], SpaceSaving]
+
+
+def _bucket(window: str, now: float) -> int:
+    return int(now // WINDOWS[window][0])
+
+
+def _oldest_bucket(window: str, now: float) -> int:
+    """First bucket number still inside ``window``"""
+    return _bucket(window, now) - WINDOWS[window][1] + 1
+
+
+class PopularSearchTracker:
+    """Rolling-window top queries of every worker, bounded in memory"""
+
+    def __init__(
+        self,
+        capacity: int = 200,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.capacity = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: Pending = {}
+        # Taken by a running ``sync`` and counted until its reload lands
+        self._syncing: Pending = {}
+        # Top terms of every window as last read from the database
+        self._shared: Dict[str, Merged] = {window: ({}, 0) for window in WINDOWS}
+
+    def record(self, query: str) -> None:
+        """Count one search for ``query``"""
+        term = normalize_query(query)
+        if not term:
+            return
+        now = self._clock()
+        with self._lock:
+            for window in WINDOWS:
+                key = (window, _bucket(window, now))
+                if key not in self._pending:
+                    self._pending[key] = SpaceSaving(self.capacity)
+                self._pending[key].add(term)
+
+    def top(
+        self, window: str = "day", k: int = 10
+    ) -> Tuple[List[Tuple[str, int]], int]:
+        """``([(term, count), ...], searches in window)`` for the top ``k``"""
+        now = self._clock()
+        with self._lock:
+            local = [
+                (summary.counts, summary.total)
+                for pending in (self._syncing, self._pending)
+                for (name, bucket), summary in pending.items()
+                if name == window and bucket >= _oldest_bucket(window, now)
+            ]
+            counts, total = _merge([self._shared[window], *local], self.capacity)
+        return heapq.nlargest(k, counts.items(), key=lambda item: item[1]), total
+
+    def sync(self, db: Session) -> int:
+        """
+        Add the searches seen since the last sync to the database, delete
+        expired buckets and reload the totals of every worker
+
+        Returns the rows written. If writing fails the searches are kept for
+        the next sync.
+        """
+        with self._lock:
+            self._syncing, self._pending = self._pending, {}
+            syncing = self._syncing
+        now = self._clock()
+        rows = [
+            {"window": window, "bucket": bucket, "term": term, "count": count}
+            for (window, bucket), summary in syncing.items()
+            for term, count in [(TOTAL_TERM, summary.total), *summary.counts.items()]
+        ]
+        try:
+            upsert(
+                db,
+                PopularSearchCount,
+                rows,
+                [
+                    PopularSearchCount.window,
+                    PopularSearchCount.bucket,
+                    PopularSearchCount.term,
+                ],
+                lambda excluded: {"count": PopularSearchCount.count + excluded.count},
+            )
+            for window in WINDOWS:
+                db.query(PopularSearchCount).filter(
+                    PopularSearchCount.window == window,
+                    PopularSearchCount.bucket < _oldest_bucket(window, now),
+                ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for key, summary in self._syncing.items():
+                    target = self._pending.setdefault(key, SpaceSaving(self.capacity))
+                    for term, count in summary.counts.items():
+                        target.add(term, count)
+                self._syncing = {}
+            raise
+
+        shared = {window: self._load(db, window, now) for window in WINDOWS}
+        with self._lock:
+            self._shared = shared
+            self._syncing = {}
+        return len(rows)
+
+    def _load(self, db: Session, window: str, now: float) -> Merged:
+        """The ``capacity`` most searched terms of ``window`` and its total"""
+        count = func.sum(PopularSearchCount.count)
+        in_window = db.query(PopularSearchCount.term, count).filter(
+            PopularSearchCount.window == window,
+            PopularSearchCount.bucket >= _oldest_bucket(window, now),
+        )
+        total = (
+            in_window.filter(PopularSearchCount.term == TOTAL_TERM)
+            .group_by(PopularSearchCount.term)
+            .all()
+        )
+        top = (
+            in_window.filter(PopularSearchCount.term != TOTAL_TERM)
+            .group_by(PopularSearchCount.term)
+            .order_by(count.desc(), PopularSearchCount.term)
+            .limit(self.capacity)
+            .all()
+        )
+        return {term: int(n) for term, n in top}, int(total[0][1]) if total else 0
+
+
+_popular_search_tracker: Optional[PopularSearchTracker] = None
+
+
+def get_popular_search_tracker() -> PopularSearchTracker:
+    """Process-wide popular search tracker"""
+    global _popular_search_tracker
+    if _popular_search_tracker is None:
+        _popular_search_tracker = PopularSearchTracker(settings.popular_search_capacity)
+    return _popular_search_tracker
@@ -0,0 +1,349 @@
+"""
+In-memory autocomplete over celebrity names and tag names
+
+Completion keys live in one sorted list, so the entries for a prefix form a
+contiguous range found with ``bisect``. Besides the full text, every Latin
+word start is a key too, so "chou" completes to "Jay Chou".
+
+Each entry carries a popularity weight, the number of votes:
+
+- a celebrity's names weigh that celebrity's vote count
+- a tag weighs the votes of all celebrities carrying it
+
+A prefix that has been asked for keeps its best ``TOP_K`` completions, so
+short, popular prefixes ("j", "周") are answered without walking their
+whole range. A weight that grows (a vote, a new name) updates those lists in
+place; one that shrinks, or an entry that goes away, drops the lists that
+held it, to be recomputed from the range on the next request.
+
+Weights are adjusted in place on every vote write; name and tag changes
+refresh the affected celebrity. Answers never touch the database. Writes by
+other workers arrive through the shared generations (``app.search.sync``).
+"""
+
+import bisect
+import heapq
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database.models import Celebrity, CelebrityTag, CelebrityVoteTally, Tag
+from app.search.text import index_terms, is_word_term, normalize_text
+
+# Entries are ("celebrity", celebrity_id, name) or ("tag", normalized_name)
+EntryId = Tuple[str, ...]
+
+# Completions kept per prefix: the largest limit the API accepts
+TOP_K = 20
+
+# (weight, text) pairs of one prefix, best first, one per text
+TopList = List[Tuple[int, str]]
+
+
+def _rank(item: Tuple[int, str]) -> Tuple[int, int, str]:
+    weight, text = item
+    return (-weight, len(text), text)
+
+
+class _CelebrityEntry:
+    __slots__ = ("names", "tags", "votes")
+
+    def __init__(self, names: Tuple[str, ...], tags: Tuple[str, ...], votes: int):
+        self.names = names
+        self.tags = tags
+        self.votes = votes
+
+
+class SuggestionIndex:
+    """Prefix completions ranked by vote count"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._keys: List[Tuple[str, EntryId]] = []
+        self._texts: Dict[EntryId, str] = {}
+        self._weights: Dict[EntryId, int] = {}
+        self._celebrities: Dict[str, _CelebrityEntry] = {}
+        self._top: Dict[str, TopList] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def rebuild(self, db: Session) -> int:
+        """Replace the contents with every celebrity and tag in the database"""
+        tags_by_celebrity: Dict[str, List[str]] = {}
+        for celebrity_id, tag_name in db.query(
+            CelebrityTag.celebrity_id, Tag.name
+        ).join(Tag, Tag.id == CelebrityTag.tag_id):
+            tags_by_celebrity.setdefault(celebrity_id, []).append(tag_name)
+
+        rows = (
+            db.query(
+                Celebrity.id,
+                Celebrity.name,
+                Celebrity.name_en,
+                CelebrityVoteTally.total_votes,
+            )
+            .outerjoin(
+                CelebrityVoteTally, CelebrityVoteTally.celebrity_id == Celebrity.id
+            )
+            .all()
+        )
+
+        tag_names = [tag_name for (tag_name,) in db.query(Tag.name)]
+
+        with self._lock:
+            self._keys, self._texts, self._weights = [], {}, {}
+            self._celebrities, self._top = {}, {}
+            keys: List[Tuple[str, EntryId]] = []
+            for celebrity_id, name, name_en, votes in rows:
+                self._add_celebrity(
+                    celebrity_id,
+                    (name, name_en),
+                    tags_by_celebrity.get(celebrity_id, []),
+                    votes or 0,
+                    keys,
+                )
+            # Tags without celebrities still complete, with zero weight
+            for tag_name in tag_names:
+                self._add_tag(tag_name, keys)
+            # One sort instead of an insertion per key
+            keys.sort()
+            self._keys = keys
+        return len(rows)
+
+    def reload_votes(self, db: Session) -> None:
+        """Re-read every celebrity's vote count, e.g. after other workers voted"""
+        votes: Dict[str, int] = {
+            celebrity_id: total_votes
+            for celebrity_id, total_votes in db.query(
+                CelebrityVoteTally.celebrity_id, CelebrityVoteTally.total_votes
+            )
+        }
+        with self._lock:
+            for entry_id in self._weights:
+                if entry_id[0] == "tag":
+                    self._weights[entry_id] = 0
+            for celebrity_id, entry in self._celebrities.items():
+                entry.votes = votes.get(celebrity_id) or 0
+                for name in entry.names:
+                    self._weights[("celebrity", celebrity_id, name)] = entry.votes
+                for tag in entry.tags:
+                    self._weights[("tag", tag)] += entry.votes
+            self._top = {}
+
+    def refresh(self, db: Session, celebrity_ids: Iterable[str]) -> None:
+        """Re-read celebrities (names, tags, votes) after a write"""
+        celebrity_ids = set(celebrity_ids)
+        if not celebrity_ids:
+            return
+        rows = (
+            db.query(
+                Celebrity.id,
+                Celebrity.name,
+                Celebrity.name_en,
+                CelebrityVoteTally.total_votes,
+            )
+            .outerjoin(
+                CelebrityVoteTally, CelebrityVoteTally.celebrity_id == Celebrity.id
+            )
+            .filter(Celebrity.id.in_(celebrity_ids))
+            .all()
+        )
+        tags_by_celebrity: Dict[str, List[str]] = {}
+        for celebrity_id, tag_name in (
+            db.query(CelebrityTag.celebrity_id, Tag.name)
+            .join(Tag, Tag.id == CelebrityTag.tag_id)
+            .filter(CelebrityTag.celebrity_id.in_(celebrity_ids))
+        ):
+            tags_by_celebrity.setdefault(celebrity_id, []).append(tag_name)
+
+        with self._lock:
+            for celebrity_id in celebrity_ids:
+                self._remove_celebrity(celebrity_id)
+            for celebrity_id, name, name_en, votes in rows:
+                self._add_celebrity(
+                    celebrity_id,
+                    (name, name_en),
+                    tags_by_celebrity.get(celebrity_id, []),
+                    votes or 0,
+                )
+
+    def remove(self, celebrity_id: str) -> None:
+        """Drop a deleted celebrity's names; its tags stay completable"""
+        with self._lock:
+            self._remove_celebrity(celebrity_id)
+
+    def add_votes(self, celebrity_id: str, delta: int) -> None:
+        """Shift the weight of a celebrity's names and tags by ``delta`` votes"""
+        with self._lock:
+            entry = self._celebrities.get(celebrity_id)
+            if entry is None:
+                return
+            entry.votes += delta
+            changed: List[EntryId] = [
+                ("celebrity", celebrity_id, name) for name in entry.names
+            ]
+            changed += [("tag", tag) for tag in entry.tags]
+            for entry_id in changed:
+                self._weights[entry_id] += delta
+                if delta > 0:
+                    self._promote(entry_id)
+                else:
+                    self._forget(entry_id)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Top ``limit`` completions of ``prefix``, most voted first"""
+        normalized = normalize_text(prefix).strip()
+        if not normalized:
+            return []
+
+        with self._lock:
+            if limit > TOP_K:
+                return [text for _, text in self._scan(normalized, limit)]
+            top = self._top.get(normalized)
+            if top is None:
+                top = self._scan(normalized, TOP_K)
+                if top:
+                    self._top[normalized] = top
+            return [text for _, text in top[:limit]]
+
+    def _scan(self, prefix: str, limit: int) -> TopList:
+        """Best ``limit`` texts completing ``prefix``, from the key range"""
+        best: Dict[str, Tuple[int, str]] = {}
+        start = bisect.bisect_left(self._keys, (prefix,))
+        for key, entry_id in self._keys[start:]:
+            if not key.startswith(prefix):
+                break
+            text = self._texts[entry_id]
+            weight = self._weights[entry_id]
+            # The same text from several sources is offered once
+            dedupe_key = text.lower()
+            if dedupe_key not in best or best[dedupe_key][0] < weight:
+                best[dedupe_key] = (weight, text)
+        return heapq.nsmallest(limit, best.values(), key=_rank)
+
+    def _prefixes(self, entry_id: EntryId) -> Set[str]:
+        keys = self._completion_keys(self._texts[entry_id])
+        return {key[:end] for key in keys for end in range(1, len(key) + 1)}
+
+    def _promote(self, entry_id: EntryId) -> None:
+        """Merge an entry whose weight grew into the cached lists"""
+        if not self._top:
+            return
+        item = (self._weights[entry_id], self._texts[entry_id])
+        dedupe_key = item[1].lower()
+        for prefix in self._prefixes(entry_id):
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            same = [other for other in top if other[1].lower() == dedupe_key]
+            if same and same[0][0] >= item[0]:
+                continue
+            if not same and len(top) == TOP_K and _rank(item) >= _rank(top[-1]):
+                continue
+            top = [other for other in top if other[1].lower() != dedupe_key]
+            top.append(item)
+            top.sort(key=_rank)
+            self._top[prefix] = top[:TOP_K]
+
+    def _forget(self, entry_id: EntryId) -> None:
+        """Drop cached lists an entry whose weight shrank may have been in"""
+        if not self._top:
+            return
+        dedupe_key = self._texts[entry_id].lower()
+        for prefix in self._prefixes(entry_id):
+            top = self._top.get(prefix)
+            if top is not None and any(t.lower() == dedupe_key for _, t in top):
+                del self._top[prefix]
+
+    def _add_celebrity(
+        self,
+        celebrity_id: str,
+        names: Iterable[Optional[str]],
+        tags: Iterable[str],
+        votes: int,
+        keys: Optional[List[Tuple[str, EntryId]]] = None,
+    ) -> None:
+        present = tuple(name for name in names if name)
+        tag_keys = tuple(normalize_text(tag) for tag in tags)
+        self._celebrities[celebrity_id] = _CelebrityEntry(present, tag_keys, votes)
+
+        for name in present:
+            entry_id = ("celebrity", celebrity_id, name)
+            self._texts[entry_id] = name
+            self._weights[entry_id] = votes
+            self._insert_keys(entry_id, keys)
+
+        for tag, tag_key in zip(tags, tag_keys):
+            self._add_tag(tag, keys)
+            self._weights[("tag", tag_key)] += votes
+            self._promote(("tag", tag_key))
+
+    def _add_tag(
+        self, tag: str, keys: Optional[List[Tuple[str, EntryId]]] = None
+    ) -> None:
+        tag_key = normalize_text(tag)
+        entry_id = ("tag", tag_key)
+        if entry_id in self._texts:
+            return
+        self._texts[entry_id] = tag
+        self._weights[entry_id] = 0
+        self._insert_keys(entry_id, keys)
+
+    def _insert_keys(
+        self, entry_id: EntryId, keys: Optional[List[Tuple[str, EntryId]]]
+    ) -> None:
+        """Add an entry's keys; a rebuild collects them in ``keys`` to sort once"""
+        completion_keys = self._completion_keys(self._texts[entry_id])
+        if keys is not None:
+            keys.extend((key, entry_id) for key in completion_keys)
+            return
+        for key in completion_keys:
+            bisect.insort(self._keys, (key, entry_id))
+        self._promote(entry_id)
+
+    def _remove_celebrity(self, celebrity_id: str) -> None:
+        entry = self._celebrities.pop(celebrity_id, None)
+        if entry is None:
+            return
+        for name in entry.names:
+            entry_id = ("celebrity", celebrity_id, name)
+            self._forget(entry_id)
+            for key in self._completion_keys(name):
+                self._remove_key(key, entry_id)
+            del self._texts[entry_id]
+            del self._weights[entry_id]
+        for tag_key in entry.tags:
+            self._weights[("tag", tag_key)] -= entry.votes
+            self._forget(("tag", tag_key))
+
+    def _remove_key(self, key: str, entry_id: EntryId) -> None:
+        position = bisect.bisect_left(self._keys, (key, entry_id))
+        if position < len(self._keys) and self._keys[position] == (key, entry_id):
+            del self._keys[position]
+
+    @staticmethod
+    def _completion_keys(text: str) -> Set[str]:
+        """The full text plus every Latin word start inside it"""
+        normalized = normalize_text(text)
+        keys = {normalized}
+        for term in index_terms(normalized):
+            if is_word_term(term):
+                position = normalized.find(term)
+                while position != -1:
+                    if position == 0 or not normalized[position - 1].isalnum():
+                        keys.add(normalized[position:])
+                    position = normalized.find(term, position + 1)
+        return keys
+
+
+_suggestion_index: Optional[SuggestionIndex] = None
+
+
+def get_suggestion_index() -> SuggestionIndex:
+    """Process-wide suggestion index"""
+    global _suggestion_index
+    if _suggestion_index is None:
+        _suggestion_index = SuggestionIndex()
+    return _suggestion_index
@@ -0,0 +1,115 @@
+"""
+Write notifications for the in-process search structures
+
+Services call these after committing, so the search backend, the
+suggestion, fuzzy and facet indexes and the result cache never need to
+know which service wrote what.
+
+Those notifications only reach the worker that wrote. Catalog writes also
+bump the shared ``catalog`` generation (``app.core.generations``) before
+committing, and votes bump the ``votes`` generation right after committing.
+``refresh_if_stale`` and ``refresh_votes_if_stale`` run periodically in every
+worker to catch up once another worker has written.
+"""
+
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import generations
+from app.database.models import MBTIType
+
+from app.search.backends import get_search_backend
+from app.search.cache import get_search_cache
+from app.search.facets import get_facet_index
+from app.search.fuzzy import get_fuzzy_index
+from app.search.suggestions import get_suggestion_index
+
+# Generations the structures of this process were built at
+catalog_generation = generations.GenerationTracker(generations.CATALOG)
+vote_generation = generations.GenerationTracker(generations.VOTES)
+
+
+def rebuild_all(db: Session) -> int:
+    """Rebuild every structure from the database; returns celebrities indexed"""
+    # Read first: a write racing the rebuild leaves the tracker stale
+    catalog = catalog_generation.current(db)
+    votes = vote_generation.current(db)
+    get_suggestion_index().rebuild(db)
+    get_fuzzy_index().rebuild(db)
+    get_facet_index().rebuild(db)
+    indexed = get_search_backend().rebuild(db)
+    get_search_cache().invalidate()
+    catalog_generation.mark_built(catalog)
+    vote_generation.mark_built(votes)
+    return indexed
+
+
+def refresh_if_stale(db: Session) -> bool:
+    """Rebuild if any worker wrote the catalog since the last rebuild"""
+    if not catalog_generation.is_stale(db):
+        return False
+    rebuild_all(db)
+    return True
+
+
+def refresh_votes_if_stale(db: Session) -> bool:
+    """Reload vote weights and facets if any worker voted since"""
+    if not vote_generation.is_stale(db):
+        return False
+    generation = vote_generation.current(db)
+    get_suggestion_index().reload_votes(db)
+    get_facet_index().rebuild(db)
+    vote_generation.mark_built(generation)
+    return True
+
+
+def catalog_written(db: Session) -> int:
+    """
+    Bump the catalog generation inside the write's transaction
+
+    Pass the returned generation to the notification after committing.
+    """
+    return generations.bump(db, generations.CATALOG)[generations.CATALOG]
+
+
+def votes_written(db: Session) -> Optional[int]:
+    """
+    Bump the vote generation after the vote committed, in its own transaction
+
+    Pass the returned generation to ``votes_changed``.
+    """
+    return generations.bump_committed(db, generations.VOTES)
+
+
+def celebrities_changed(
+    db: Session, celebrity_ids: Iterable[str], generation: int
+) -> None:
+    """Celebrities, their tags or tag names were written"""
+    celebrity_ids = list(celebrity_ids)
+    get_search_backend().refresh(db, celebrity_ids)
+    get_suggestion_index().refresh(db, celebrity_ids)
+    get_fuzzy_index().refresh(db, celebrity_ids)
+    get_facet_index().refresh(db, celebrity_ids)
+    get_search_cache().invalidate()
+    catalog_generation.acknowledge_own_write(generation)
+
+
+def celebrity_deleted(celebrity_id: str, generation: int) -> None:
+    """A celebrity was deleted"""
+    get_search_backend().remove(celebrity_id)
+    get_suggestion_index().remove(celebrity_id)
+    get_fuzzy_index().remove(celebrity_id)
+    get_facet_index().remove(celebrity_id)
+    get_search_cache().invalidate()
+    catalog_generation.acknowledge_own_write(generation)
+
+
+def votes_changed(
+    celebrity_id: str, mbti_type: MBTIType, delta: int, generation: Optional[int]
+) -> None:
+    """A celebrity gained (``delta > 0``) or lost a vote for ``mbti_type``"""
+    get_suggestion_index().add_votes(celebrity_id, delta)
+    get_facet_index().apply_vote(celebrity_id, mbti_type, delta)
+    # Cached searches that depend on votes are keyed by the vote generation
+    vote_generation.acknowledge_own_write(generation)
@@ -0,0 +1,121 @@
+"""
+Text normalization and tokenization for celebrity search
+
+Chinese (and Japanese/Korean) text has no word boundaries, so CJK runs are
+indexed as single characters plus overlapping character bigrams. Latin text
+is split into lowercase word tokens.
+
+``search_document`` packs a celebrity's searchable fields into the single
+denormalized ``celebrities.search_document`` column.
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Set, Tuple
+
+from app.search.t2s import traditional_to_simplified
+
+# CJK ideographs, kana and hangul syllables
+CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+
+_TOKEN_PATTERN = re.compile(rf"([{CJK_CHARS}]+)|((?:(?![{CJK_CHARS}])[^\W_])+)")
+_CJK_PATTERN = re.compile(rf"[{CJK_CHARS}]")
+
+
+# Section markers of the search document (ASCII unit/group/record separators)
+FIELD_SEPARATOR = "\x1f"
+DESCRIPTION_MARKER = "\x1d"
+TAGS_MARKER = "\x1e"
+_SIMPLIFIED = traditional_to_simplified()
+_MARKERS = str.maketrans(
+    {FIELD_SEPARATOR: " ", DESCRIPTION_MARKER: " ", TAGS_MARKER: " "}
+)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    Normalized form used for both indexing and matching
+
+    NFKC folds full-width Latin letters and digits to ASCII (and other
+    compatibility forms to their canonical ones), Traditional Chinese
+    characters are folded to Simplified, then the text is case folded.
+    """
+    return unicodedata.normalize("NFKC", text or "").translate(_SIMPLIFIED).casefold()
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    """
+    Persisted lookup key of a name (``Celebrity.name_key``/``name_en_key``)
+
+    The normalized name with runs of whitespace collapsed, so "周杰倫",
+    "周杰伦" and " 周杰伦" share a key; None for a missing or blank name.
+    """
+    return " ".join(normalize_text(name).split()) or None
+
+
+def document_text(text: Optional[str]) -> str:
+    """Normalized text that cannot be confused with a document marker"""
+    return normalize_text(text).translate(_MARKERS)
+
+
+def search_document(
+    name: str,
+    name_en: Optional[str],
+    description: Optional[str],
+    tag_names: Iterable[str],
+) -> str:
+    """
+    Normalized search text of one celebrity
+
+    Layout: ``name US name_en GS description RS tag US tag ...``. GS and RS
+    occur exactly once, so a ``LIKE`` pattern can tell which field a match
+    falls in: ``%q%GS%`` is a name match, ``%RS%q%`` a tag match.
+    """
+    return (
+        document_text(name)
+        + FIELD_SEPARATOR
+        + document_text(name_en)
+        + DESCRIPTION_MARKER
+        + document_text(description)
+        + TAGS_MARKER
+        + FIELD_SEPARATOR.join(sorted(document_text(tag) for tag in tag_names))
+    )
+
+
+def is_word_term(term: str) -> bool:
+    """Whether an index term is a Latin word rather than CJK characters"""
+    return _CJK_PATTERN.match(term) is None
+
+
+def _bigrams(run: str) -> List[str]:
+    return [run[i : i + 2] for i in range(len(run) - 1)]
+
+
+def index_terms(normalized: str) -> Set[str]:
+    """Terms under which a normalized document field is indexed"""
+    terms: Set[str] = set()
+    for cjk_run, word in _TOKEN_PATTERN.findall(normalized):
+        if cjk_run:
+            terms.update(cjk_run)
+            terms.update(_bigrams(cjk_run))
+        else:
+            terms.add(word)
+    return terms
+
+
+def query_terms(normalized: str) -> Tuple[List[str], List[str]]:
+    """
+    Split a normalized query into ``(cjk_terms, latin_prefixes)``
+
+    A single CJK character is looked up as a unigram, longer runs by their
+    bigrams. Latin words match any indexed word they are a prefix of, so
+    results update while the last word is still being typed.
+    """
+    cjk_terms: List[str] = []
+    latin_prefixes: List[str] = []
+    for cjk_run, word in _TOKEN_PATTERN.findall(normalized):
+        if cjk_run:
+            cjk_terms.extend(_bigrams(cjk_run) if len(cjk_run) > 1 else [cjk_run])
+        else:
+            latin_prefixes.append(word)
+    return cjk_terms, latin_prefixes
@@ -3,7 +3,11 @@ from .auth_service import AuthService
 from .user_service import UserService
 from .celebrity_service import CelebrityService
 from .vote_service import VoteService
+from .vote_tally_service import VoteTallyService
+from .leaderboard_service import LeaderboardService
 from .comment_service import CommentService
+from .comment_counter_service import CommentCounterService
+from .comment_reaction_service import CommentReactionService
 from .search_service import SearchService
 
 __all__ = [
@@ -11,6 +15,10 @@ __all__ = [
     "UserService",
     "CelebrityService",
     "VoteService",
+    "VoteTallyService",
+    "LeaderboardService",
     "CommentService",
+    "CommentCounterService",
+    "CommentReactionService",
     "SearchService",
 ]
@@ -0,0 +1,209 @@
+from typing import Any, Dict, Mapping
+from sqlalchemy.orm import Session
+from sqlalchemy import case, desc, func, select, text, update
+from app.database.database import upsert
+from app.database.models import (
+    AnalyticsCounter,
+    Celebrity,
+    CelebrityTag,
+    MBTIType,
+    Tag,
+    TagUsageCount,
+    Vote,
+)
+
+POPULAR_TAG_LIMIT = 10
+
+# PostgreSQL advisory lock held by the running ``reconcile``
+RECONCILE_LOCK_ID = 16_160_002
+
+
+class AnalyticsCounterService:
+    """Maintains the ``analytics_counters`` and ``tag_usage_counts`` tables.
+
+    Like ``VoteTallyService``, write helpers never commit: they run inside the
+    caller's transaction, so a write and its counter change succeed or fail
+    together. ``reconcile`` recomputes the counters from the base tables and
+    corrects any drift (e.g. from scripts that write to the database directly).
+    """
+
+    # Global counter names
+    CELEBRITIES = "celebrities"
+    TAGS = "tags"
+    VOTES = "votes"
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def vote_type_counter(mbti_type: MBTIType) -> str:
+        """Name of the counter holding the number of votes for an MBTI type"""
+        return f"votes:{MBTIType(mbti_type).value}"
+
+    def add(self, deltas: Mapping[str, int]) -> None:
+        """Add to global counters in one upsert, locking rows in name order"""
+        rows = [
+            {"name": name, "value": delta} for name, delta in sorted(deltas.items())
+        ]
+        if not rows:
+            return
+        upsert(
+            self.db,
+            AnalyticsCounter,
+            rows,
+            [AnalyticsCounter.name],
+            lambda excluded: {"value": AnalyticsCounter.value + excluded.value},
+        )
+
+    def add_tag_usage(self, deltas: Mapping[str, int]) -> None:
+        """Add to per-tag usage counts (keyed by tag id) in one upsert"""
+        rows = [
+            {"tag_id": tag_id, "usage_count": delta}
+            for tag_id, delta in sorted(deltas.items())
+        ]
+        if not rows:
+            return
+        upsert(
+            self.db,
+            TagUsageCount,
+            rows,
+            [TagUsageCount.tag_id],
+            lambda excluded: {
+                "usage_count": TagUsageCount.usage_count + excluded.usage_count
+            },
+        )
+
+    def count_vote(self, mbti_type: MBTIType, delta: int = 1) -> None:
+        """Count an added (``delta=1``) or removed (``delta=-1``) vote"""
+        self.add({self.VOTES: delta, self.vote_type_counter(mbti_type): delta})
+
+    def get_analytics(self) -> Dict[str, Any]:
+        """
+        Totals, popular tags and popular MBTI types
+
+        Two small reads: every global counter, and the top tags from the
+        usage index. Neither depends on the number of votes or tag links.
+        """
+        counters = dict(self.db.query(AnalyticsCounter.name, AnalyticsCounter.value))
+        popular_tags = (
+            self.db.query(Tag.name, TagUsageCount.usage_count)
+            .join(Tag, Tag.id == TagUsageCount.tag_id)
+            .filter(TagUsageCount.usage_count > 0)
+            .order_by(desc(TagUsageCount.usage_count), TagUsageCount.tag_id)
+            .limit(POPULAR_TAG_LIMIT)
+            .all()
+        )
+        type_counts = [
+            (mbti_type.value, counters.get(self.vote_type_counter(mbti_type), 0))
+            for mbti_type in MBTIType
+        ]
+        type_counts.sort(key=lambda item: -item[1])
+
+        return {
+            "total_celebrities": counters.get(self.CELEBRITIES, 0),
+            "total_tags": counters.get(self.TAGS, 0),
+            "total_votes": counters.get(self.VOTES, 0),
+            "popular_tags": [
+                {"tag": tag, "count": count} for tag, count in popular_tags
+            ],
+            "popular_mbti_types": [
+                {"type": mbti_type, "count": count}
+                for mbti_type, count in type_counts
+                if count > 0
+            ],
+        }
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Recompute every counter from the base tables and fix drift
+
+        The counter rows are locked (in name order, like every counter
+        write) before one UPDATE per table sets them to counts computed in
+        that same statement. A write that committed before the lock is
+        counted; one that commits after it increments the corrected value.
+        Either way no write is lost or counted twice, however many workers
+        reconcile. On PostgreSQL a run that finds another one in progress
+        does nothing.
+
+        Returns the corrections made, keyed by counter name (``tag:<id>`` for
+        tag usage); empty when nothing drifted.
+        """
+        db = self.db
+        if (
+            db.get_bind().dialect.name == "postgresql"
+            and not db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": RECONCILE_LOCK_ID}
+            ).scalar()
+        ):
+            db.rollback()
+            return {}
+
+        counts = {
+            self.CELEBRITIES: select(func.count(Celebrity.id)),
+            self.TAGS: select(func.count(Tag.id)),
+            self.VOTES: select(func.count(Vote.id)),
+        }
+        for mbti_type in MBTIType:
+            counts[self.vote_type_counter(mbti_type)] = select(
+                func.count(Vote.id)
+            ).where(Vote.mbti_type == mbti_type)
+        # Creating missing rows locks every counter row
+        self.add({name: 0 for name in counts})
+        before = self._counter_values(counts)
+        db.execute(
+            update(AnalyticsCounter)
+            .where(AnalyticsCounter.name.in_(counts))
+            .values(
+                value=case(
+                    {name: count.scalar_subquery() for name, count in counts.items()},
+                    value=AnalyticsCounter.name,
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        after = self._counter_values(counts)
+        drift = {
+            name: after[name] - before[name]
+            for name in counts
+            if after[name] != before[name]
+        }
+
+        linked = select(CelebrityTag.tag_id).distinct()
+        self.add_tag_usage({tag_id: 0 for (tag_id,) in db.execute(linked)})
+        usage_before = self._usage_counts()
+        db.execute(
+            update(TagUsageCount)
+            .values(
+                usage_count=select(func.count(CelebrityTag.celebrity_id))
+                .where(CelebrityTag.tag_id == TagUsageCount.tag_id)
+                .scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        usage_after = self._usage_counts()
+        usage_drift = {
+            tag_id: count - usage_before.get(tag_id, 0)
+            for tag_id, count in usage_after.items()
+            if count != usage_before.get(tag_id, 0)
+        }
+        db.commit()
+
+        return {
+            **drift,
+            **{f"tag:{tag_id}": delta for tag_id, delta in usage_drift.items()},
+        }
+
+    def _counter_values(self, names) -> Dict[str, int]:
+        return dict(
+            self.db.query(AnalyticsCounter.name, AnalyticsCounter.value)
+            .filter(AnalyticsCounter.name.in_(names))
+            .order_by(AnalyticsCounter.name)
+            .with_for_update()
+        )
+
+    def _usage_counts(self) -> Dict[str, int]:
+        return dict(
+            self.db.query(TagUsageCount.tag_id, TagUsageCount.usage_count)
+            .order_by(TagUsageCount.tag_id)
+            .with_for_update()
+        )
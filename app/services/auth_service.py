@@ -2,6 +2,13 @@ from datetime import timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.rate_limit import (
+    RateLimiter,
+    RateLimitResult,
+    TokenBucketPolicy,
+    get_rate_limiter,
+)
 from app.database.models import User, UserRole
 from app.core.security import (
     verify_password,
@@ -11,18 +18,47 @@ from app.core.security import (
 )
 from app.schemas.auth import UserCreate, UserLogin, Token
 
+# Registrations per IP refill over one day
+REGISTRATION_REFILL_SECONDS = 24 * 60 * 60
+
 
 class AuthService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rate_limiter: Optional[RateLimiter] = None):
         self.db = db
+        self.rate_limiter = rate_limiter or get_rate_limiter()
 
-    def register_user(self, user_data: UserCreate) -> User:
+    def register_user(
+        self, user_data: UserCreate, client_ip: Optional[str] = None
+    ) -> User:
         """Register a new user"""
+        # Limit registrations per IP (token bucket, no database access)
+        quota = RateLimitResult(True)
+        if client_ip:
+            quota = self.rate_limiter.acquire(
+                [
+                    (
+                        f"signup:ip:{client_ip}",
+                        TokenBucketPolicy(
+                            settings.daily_registrations_per_ip,
+                            REGISTRATION_REFILL_SECONDS,
+                        ),
+                    )
+                ]
+            )
+            if not quota.allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="该网络今日注册次数已达上限，请明天再试",
+                    headers={"Retry-After": str(int(quota.retry_after) + 1)},
+                )
+
         # Check if user already exists
         existing_user = (
             self.db.query(User).filter(User.email == user_data.email).first()
         )
         if existing_user:
+            # A rejected sign-up does not use up the IP's registrations
+            self.rate_limiter.release(quota.hits)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="该邮箱已被注册，请使用其他邮箱或直接登录。如果您忘记密码，请联系管理员重置",
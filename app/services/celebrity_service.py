@@ -1,34 +1,41 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, Optional, List, Set, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from app.core.pagination import apply_keyset, next_cursor
 from app.database.models import Celebrity, Tag, CelebrityTag
+from app.search import documents as search_documents
+from app.search import sync as search_sync
+from app.search.text import name_key
 from app.schemas.celebrity import CelebrityCreate, CelebrityUpdate
+from app.services.analytics_counter_service import AnalyticsCounterService
+from app.services.comment_service import CommentService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.vote_service import VoteService
+from app.services.vote_tally_service import VoteTallyService
+
+# Most IDs resolved by one batch lookup
+MAX_BATCH_IDS = 500
 
 
 class CelebrityService:
     def __init__(self, db: Session):
         self.db = db
+        self.analytics_counters = AnalyticsCounterService(db)
 
     def create_celebrity(self, celebrity_data: CelebrityCreate) -> Celebrity:
         """Create a new celebrity"""
-        # Check if celebrity with same name already exists
-        existing_celebrity = (
-            self.db.query(Celebrity)
-            .filter(
-                or_(
-                    Celebrity.name == celebrity_data.name,
-                    Celebrity.name_en == celebrity_data.name_en,
-                )
-            )
-            .first()
-        )
+        # Check if celebrity with same name already exists; the name keys
+        # fold Traditional/Simplified, width and case
+        conflicts = [Celebrity.name_key == name_key(celebrity_data.name)]
+        name_en_key = name_key(celebrity_data.name_en)
+        if name_en_key:
+            conflicts.append(Celebrity.name_en_key == name_en_key)
+        existing_celebrity = self.db.query(Celebrity).filter(or_(*conflicts)).first()
 
         if existing_celebrity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Celebrity with this name already exists",
-            )
+            raise self._name_taken()
 
         # Create new celebrity
         celebrity = Celebrity(
@@ -39,28 +46,141 @@ class CelebrityService:
         )
 
         self.db.add(celebrity)
-        self.db.commit()
+        self.db.flush()
+        VoteTallyService(self.db).ensure_tally(celebrity.id)
+        self.analytics_counters.add({AnalyticsCounterService.CELEBRITIES: 1})
+        search_documents.refresh(self.db, [celebrity.id])
+        generation = search_sync.catalog_written(self.db)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Created concurrently under the same name key
+            self.db.rollback()
+            raise self._name_taken()
         self.db.refresh(celebrity)
+        search_sync.celebrities_changed(self.db, [celebrity.id], generation)
 
         return celebrity
 
+    @staticmethod
+    def _name_taken() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Celebrity with this name already exists",
+        )
+
     def get_celebrity_by_id(self, celebrity_id: str) -> Optional[Celebrity]:
         """Get celebrity by ID"""
         return self.db.query(Celebrity).filter(Celebrity.id == celebrity_id).first()
 
+    def get_celebrities_by_ids(
+        self, celebrity_ids: Iterable[str]
+    ) -> Tuple[List[Celebrity], List[str]]:
+        """
+        Look up many celebrities with one ``IN`` query, tags loaded eagerly
+
+        Returns ``(celebrities, missing_ids)``, both in request order;
+        repeated IDs are returned once.
+        """
+        celebrity_ids = list(dict.fromkeys(celebrity_ids))
+        if len(celebrity_ids) > MAX_BATCH_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BATCH_IDS} IDs can be looked up at once",
+            )
+        if not celebrity_ids:
+            return [], []
+
+        found = {
+            celebrity.id: celebrity
+            for celebrity in self.db.query(Celebrity)
+            .options(selectinload(Celebrity.tags).joinedload(CelebrityTag.tag))
+            .filter(Celebrity.id.in_(celebrity_ids))
+        }
+        return (
+            [found[id_] for id_ in celebrity_ids if id_ in found],
+            [id_ for id_ in celebrity_ids if id_ not in found],
+        )
+
+    def get_existing_name_keys(self, names: Iterable[str]) -> Set[str]:
+        """Name keys among ``names`` already taken, in one query"""
+        keys = {key for key in map(name_key, names) if key}
+        if not keys:
+            return set()
+        rows = (
+            self.db.query(Celebrity.name_key, Celebrity.name_en_key)
+            .filter(or_(Celebrity.name_key.in_(keys), Celebrity.name_en_key.in_(keys)))
+            .all()
+        )
+        return keys & {key for row in rows for key in row}
+
+    def get_celebrity_full(
+        self, celebrity_id: str, comment_limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Everything a celebrity page shows, in a fixed number of statements
+
+        The profile, its vote tally and its tags are loaded eagerly with the
+        celebrity; vote statistics come from the precomputed tally. Comments
+        are the first page of threads (see
+        ``CommentService.get_comment_threads``) plus the comment statistics.
+        """
+        celebrity = (
+            self.db.query(Celebrity)
+            .options(
+                joinedload(Celebrity.vote_tally),
+                selectinload(Celebrity.tags).joinedload(CelebrityTag.tag),
+            )
+            .filter(Celebrity.id == celebrity_id)
+            .first()
+        )
+        if not celebrity:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Celebrity not found"
+            )
+
+        comment_service = CommentService(self.db)
+        threads = comment_service.get_comment_threads(celebrity_id, comment_limit)
+        return {
+            "celebrity": celebrity,
+            "tags": sorted(celebrity_tag.tag.name for celebrity_tag in celebrity.tags),
+            "vote_statistics": VoteService.celebrity_statistics_from_tally(
+                celebrity.id, celebrity.name, celebrity.vote_tally
+            ),
+            "comments": threads,
+            "comments_next_cursor": next_cursor(
+                [thread["comment"] for thread in threads], comment_limit
+            ),
+            "comment_statistics": comment_service.get_comment_statistics(celebrity_id),
+        }
+
     def get_celebrity_by_name(self, name: str) -> Optional[Celebrity]:
-        """Get celebrity by name (Chinese or English)"""
+        """
+        Get celebrity by name (Chinese or English)
+
+        Matches on the indexed name keys, so Traditional and Simplified
+        spellings, full-width letters and case differences find the same row.
+        """
+        key = name_key(name)
+        if key is None:
+            return None
         return (
             self.db.query(Celebrity)
-            .filter(or_(Celebrity.name == name, Celebrity.name_en == name))
+            .filter(or_(Celebrity.name_key == key, Celebrity.name_en_key == key))
             .first()
         )
 
     def get_all_celebrities(
-        self, skip: int = 0, limit: int = 100, search: Optional[str] = None
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> List[Celebrity]:
-        """Get all celebrities with optional search and pagination"""
-        query = self.db.query(Celebrity)
+        """Get all celebrities with optional search and pagination, oldest first"""
+        query = self.db.query(Celebrity).options(
+            selectinload(Celebrity.tags).joinedload(CelebrityTag.tag)
+        )
 
         if search:
             query = query.filter(
@@ -71,6 +191,7 @@ class CelebrityService:
                 )
             )
 
+        query = apply_keyset(query, Celebrity, cursor, descending=False)
         return query.offset(skip).limit(limit).all()
 
     def update_celebrity(
@@ -84,13 +205,10 @@ class CelebrityService:
             )
 
         # Check for name conflicts if name is being updated
-        if celebrity_data.name and celebrity_data.name != celebrity.name:
+        if celebrity_data.name and name_key(celebrity_data.name) != celebrity.name_key:
             existing = self.get_celebrity_by_name(celebrity_data.name)
             if existing and existing.id != celebrity_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Celebrity with this name already exists",
-                )
+                raise self._name_taken()
 
         # Update fields if provided
         if celebrity_data.name is not None:
@@ -102,8 +220,15 @@ class CelebrityService:
         if celebrity_data.image_url is not None:
             celebrity.image_url = celebrity_data.image_url
 
-        self.db.commit()
+        search_documents.refresh(self.db, [celebrity_id])
+        generation = search_sync.catalog_written(self.db)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise self._name_taken()
         self.db.refresh(celebrity)
+        search_sync.celebrities_changed(self.db, [celebrity_id], generation)
 
         return celebrity
 
@@ -122,8 +247,14 @@ class CelebrityService:
                 detail="Cannot delete celebrity with existing votes or comments",
             )
 
+        self.analytics_counters.add({AnalyticsCounterService.CELEBRITIES: -1})
+        self.analytics_counters.add_tag_usage(
+            {celebrity_tag.tag_id: -1 for celebrity_tag in celebrity.tags}
+        )
         self.db.delete(celebrity)
+        generation = search_sync.catalog_written(self.db)
         self.db.commit()
+        search_sync.celebrity_deleted(celebrity_id, generation)
 
         return True
 
@@ -140,6 +271,7 @@ class CelebrityService:
         if not tag:
             tag = Tag(name=tag_name)
             self.db.add(tag)
+            self.analytics_counters.add({AnalyticsCounterService.TAGS: 1})
             self.db.commit()
             self.db.refresh(tag)
 
@@ -162,8 +294,12 @@ class CelebrityService:
         celebrity_tag = CelebrityTag(celebrity_id=celebrity_id, tag_id=tag.id)
 
         self.db.add(celebrity_tag)
+        self.analytics_counters.add_tag_usage({tag.id: 1})
+        search_documents.refresh(self.db, [celebrity_id])
+        generation = search_sync.catalog_written(self.db)
         self.db.commit()
         self.db.refresh(celebrity_tag)
+        search_sync.celebrities_changed(self.db, [celebrity_id], generation)
 
         return celebrity_tag
 
@@ -196,41 +332,36 @@ class CelebrityService:
             )
 
         self.db.delete(celebrity_tag)
+        self.analytics_counters.add_tag_usage({tag.id: -1})
+        search_documents.refresh(self.db, [celebrity_id])
+        generation = search_sync.catalog_written(self.db)
         self.db.commit()
+        search_sync.celebrities_changed(self.db, [celebrity_id], generation)
 
         return True
 
     def get_celebrities_by_tag(
-        self, tag_name: str, skip: int = 0, limit: int = 100
+        self,
+        tag_name: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[Celebrity]:
-        """Get celebrities by tag"""
+        """Get celebrities by tag, oldest first"""
         tag = self.db.query(Tag).filter(Tag.name == tag_name).first()
         if not tag:
             return []
 
-        celebrities = (
+        query = (
             self.db.query(Celebrity)
+            .options(selectinload(Celebrity.tags).joinedload(CelebrityTag.tag))
             .join(CelebrityTag)
             .filter(CelebrityTag.tag_id == tag.id)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
-
-        return celebrities
+        query = apply_keyset(query, Celebrity, cursor, descending=False)
+        return query.offset(skip).limit(limit).all()
 
     def get_popular_celebrities(self, limit: int = 10) -> List[Celebrity]:
         """Get celebrities with most votes"""
-        from sqlalchemy import func
-
-        celebrities = (
-            self.db.query(Celebrity, func.count(Celebrity.votes).label("vote_count"))
-            .outerjoin(Celebrity.votes)
-            .group_by(Celebrity.id)
-            .order_by(func.count(Celebrity.votes).desc())
-            .limit(limit)
-            .all()
-        )
-
-        # Extract just the celebrity objects from the result
-        return [celebrity for celebrity, _ in celebrities]
+        entries = LeaderboardService(self.db).get_top_celebrities(limit)
+        return [entry["celebrity"] for entry in entries]
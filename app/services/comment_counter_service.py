@@ -0,0 +1,233 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func
+from app.database.database import upsert
+from app.database.models import (
+    CelebrityCommenterCount,
+    CelebrityCommentStats,
+    Comment,
+    UserCommentStats,
+)
+
+ACTIVE_COMMENTER_LIMIT = 5
+
+
+class CommentCounterService:
+    """Maintains the denormalized comment counter tables.
+
+    ``celebrity_comment_stats`` and ``user_comment_stats`` hold total and
+    reply counts (top-level is the difference); ``celebrity_commenter_counts``
+    ranks each celebrity's most active commenters. Like ``VoteTallyService``,
+    write helpers never commit, so a comment and its counters succeed or fail
+    together. ``rebuild_counters`` recomputes everything from the ``comments`` table.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_comment(
+        self,
+        celebrity_id: str,
+        user_id: str,
+        is_reply: bool,
+        delta: int = 1,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Count an added (``delta=1``) or removed (``delta=-1``) comment
+
+        ``created_at`` is needed for removals only: a comment removed on the
+        day it was written also leaves the user's recent count.
+        """
+        replies = delta if is_reply else 0
+        self._upsert(
+            CelebrityCommentStats,
+            [CelebrityCommentStats.celebrity_id],
+            {
+                "celebrity_id": celebrity_id,
+                "total_comments": delta,
+                "reply_comments": replies,
+            },
+        )
+        self._upsert(
+            CelebrityCommenterCount,
+            [CelebrityCommenterCount.celebrity_id, CelebrityCommenterCount.user_id],
+            {"celebrity_id": celebrity_id, "user_id": user_id, "comment_count": delta},
+        )
+
+        today = self._today()
+        set_ = {
+            "total_comments": UserCommentStats.total_comments + delta,
+            "reply_comments": UserCommentStats.reply_comments + replies,
+        }
+        if delta > 0:
+            # The recent count restarts on the first comment of a new day
+            set_["recent_date"] = today
+            set_["recent_comments"] = (
+                case(
+                    (
+                        UserCommentStats.recent_date == today,
+                        UserCommentStats.recent_comments,
+                    ),
+                    else_=0,
+                )
+                + delta
+            )
+        elif created_at is not None and created_at.date() == today:
+            set_["recent_comments"] = case(
+                (
+                    UserCommentStats.recent_date == today,
+                    UserCommentStats.recent_comments + delta,
+                ),
+                else_=UserCommentStats.recent_comments,
+            )
+        upsert(
+            self.db,
+            UserCommentStats,
+            {
+                "user_id": user_id,
+                "total_comments": delta,
+                "reply_comments": replies,
+                "recent_date": today,
+                "recent_comments": max(delta, 0),
+            },
+            [UserCommentStats.user_id],
+            set_,
+        )
+
+    def get_celebrity_statistics(self, celebrity_id: str) -> Dict[str, Any]:
+        """Counters and most active commenters of a celebrity, in one statement"""
+        rows = (
+            self.db.query(
+                CelebrityCommentStats.total_comments,
+                CelebrityCommentStats.reply_comments,
+                CelebrityCommenterCount.user_id,
+                CelebrityCommenterCount.comment_count,
+            )
+            .outerjoin(
+                CelebrityCommenterCount,
+                and_(
+                    CelebrityCommenterCount.celebrity_id
+                    == CelebrityCommentStats.celebrity_id,
+                    CelebrityCommenterCount.comment_count > 0,
+                ),
+            )
+            .filter(CelebrityCommentStats.celebrity_id == celebrity_id)
+            .order_by(
+                CelebrityCommenterCount.comment_count.desc(),
+                CelebrityCommenterCount.user_id,
+            )
+            .limit(ACTIVE_COMMENTER_LIMIT)
+            .all()
+        )
+        total_comments, reply_comments = (rows[0][0], rows[0][1]) if rows else (0, 0)
+        return {
+            "total_comments": total_comments,
+            "top_level_comments": total_comments - reply_comments,
+            "reply_comments": reply_comments,
+            "active_commenters": [
+                {"user_id": user_id, "comment_count": count}
+                for _, _, user_id, count in rows
+                if user_id is not None
+            ],
+        }
+
+    def get_user_statistics(self, user_id: str) -> Dict[str, Any]:
+        """Counters of a user, from one primary-key lookup"""
+        row = (
+            self.db.query(
+                UserCommentStats.total_comments,
+                UserCommentStats.reply_comments,
+                UserCommentStats.recent_date,
+                UserCommentStats.recent_comments,
+            )
+            .filter(UserCommentStats.user_id == user_id)
+            .first()
+        )
+        if row is None:
+            row = (0, 0, None, 0)
+        total_comments, reply_comments, recent_date, recent_comments = row
+        if recent_date != self._today():
+            recent_comments = 0
+        return {
+            "total_comments": total_comments,
+            "top_level_comments": total_comments - reply_comments,
+            "reply_comments": reply_comments,
+            "recent_comments": recent_comments,
+        }
+
+    def rebuild_counters(self) -> Dict[str, int]:
+        """
+        Recompute every counter row from the ``comments`` table
+
+        Returns the number of celebrity, commenter and user rows written.
+        """
+        midnight = datetime.combine(self._today(), datetime.min.time())
+        is_reply = case((Comment.parent_id.is_not(None), 1), else_=0)
+        celebrity_rows = [
+            {
+                "celebrity_id": celebrity_id,
+                "total_comments": total,
+                "reply_comments": replies,
+            }
+            for celebrity_id, total, replies in self.db.query(
+                Comment.celebrity_id, func.count(Comment.id), func.sum(is_reply)
+            ).group_by(Comment.celebrity_id)
+        ]
+        commenter_rows = [
+            {"celebrity_id": celebrity_id, "user_id": user_id, "comment_count": count}
+            for celebrity_id, user_id, count in self.db.query(
+                Comment.celebrity_id, Comment.user_id, func.count(Comment.id)
+            ).group_by(Comment.celebrity_id, Comment.user_id)
+        ]
+        user_rows = [
+            {
+                "user_id": user_id,
+                "total_comments": total,
+                "reply_comments": replies,
+                "recent_date": self._today(),
+                "recent_comments": recent,
+            }
+            for user_id, total, replies, recent in self.db.query(
+                Comment.user_id,
+                func.count(Comment.id),
+                func.sum(is_reply),
+                func.sum(case((Comment.created_at >= midnight, 1), else_=0)),
+            ).group_by(Comment.user_id)
+        ]
+
+        for model, rows in (
+            (CelebrityCommentStats, celebrity_rows),
+            (CelebrityCommenterCount, commenter_rows),
+            (UserCommentStats, user_rows),
+        ):
+            self.db.query(model).delete()
+            if rows:
+                self.db.execute(model.__table__.insert(), rows)
+        self.db.commit()
+
+        return {
+            "celebrities": len(celebrity_rows),
+            "commenters": len(commenter_rows),
+            "users": len(user_rows),
+        }
+
+    def _upsert(self, model, key_columns: List, values: Dict[str, Any]) -> None:
+        """Insert a counter row or add its counts to the existing one"""
+        keys = {column.key for column in key_columns}
+        upsert(
+            self.db,
+            model,
+            values,
+            key_columns,
+            lambda excluded: {
+                name: getattr(model, name) + getattr(excluded, name)
+                for name in values
+                if name not in keys
+            },
+        )
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.utcnow().date()
@@ -0,0 +1,282 @@
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, update
+from fastapi import HTTPException, status
+from app.core.hot_score import hot_score
+from app.database.database import upsert
+from app.database.models import (
+    Comment,
+    CommentReaction,
+    CommentReactionCount,
+    ReactionType,
+)
+
+# Counter rows per comment and reaction type; concurrent reactions from
+# different users land on different rows
+REACTION_SHARDS = 8
+
+# Comments per statement when refreshing hot scores
+REFRESH_BATCH_SIZE = 500
+
+
+class CommentReactionService:
+    """Per-user comment reactions, sharded counters and hot scores.
+
+    A reaction write touches the user's ``comment_reactions`` row and one
+    ``comment_reaction_counts`` shard, never the comment row itself, so a
+    viral comment is not a row-lock hotspot. ``comments.reaction_count`` and
+    ``comments.hot_score`` are refreshed in batches by ``refresh_hot_scores``,
+    which ``app.main`` runs every ``comment_hot_score_interval`` seconds for
+    the comments whose shards are flagged ``score_stale``. The flag is set
+    by the shard update the reaction makes anyway and commits with it, so no
+    refresh is lost to a restart. ``get_reaction_summary`` always sums the
+    shards, so it is exact.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def set_reaction(
+        self, comment_id: str, user_id: str, reaction: ReactionType
+    ) -> Dict[str, Any]:
+        """
+        Add the user's reaction to a comment, or change it
+
+        Returns:
+            The comment's reaction summary
+
+        Raises:
+            HTTPException: If the comment doesn't exist
+        """
+        if self.db.get(Comment, comment_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found"
+            )
+
+        previous = self._upsert_reaction(comment_id, user_id, reaction)
+        if previous is None:
+            self._count(comment_id, user_id, reaction, 1)
+        elif previous != reaction:
+            self._count(comment_id, user_id, previous, -1)
+            self._count(comment_id, user_id, reaction, 1)
+        self.db.commit()
+
+        return self.get_reaction_summary(comment_id, user_id)
+
+    def remove_reaction(self, comment_id: str, user_id: str) -> None:
+        """
+        Remove the user's reaction from a comment
+
+        Raises:
+            HTTPException: If the user has not reacted to the comment
+        """
+        current = self._locked_reaction(comment_id, user_id)
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Reaction not found"
+            )
+
+        self._count(comment_id, user_id, current, -1)
+        self.db.execute(
+            delete(CommentReaction).where(
+                CommentReaction.comment_id == comment_id,
+                CommentReaction.user_id == user_id,
+            )
+        )
+        self.db.commit()
+
+    def get_reaction_summary(
+        self, comment_id: str, user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Exact reaction counts of a comment, summed over the shards
+
+        Args:
+            comment_id: ID of the comment
+            user_id: Also report this user's own reaction
+
+        Returns:
+            Dictionary with the total, the count per reaction type and, when
+            ``user_id`` is given, the user's reaction
+        """
+        counts = {
+            reaction.value: count
+            for reaction, count in self.db.query(
+                CommentReactionCount.reaction,
+                func.sum(CommentReactionCount.reaction_count),
+            )
+            .filter(CommentReactionCount.comment_id == comment_id)
+            .group_by(CommentReactionCount.reaction)
+            if count
+        }
+        summary: Dict[str, Any] = {
+            "comment_id": comment_id,
+            "total_reactions": sum(counts.values()),
+            "reactions": counts,
+        }
+        if user_id is not None:
+            mine = self.db.get(CommentReaction, (comment_id, user_id))
+            summary["my_reaction"] = mine.reaction.value if mine else None
+        return summary
+
+    def delete_comment_reactions(self, comment_id: str) -> None:
+        """Remove a comment's reactions and counters; the caller commits"""
+        self.db.query(CommentReaction).filter(
+            CommentReaction.comment_id == comment_id
+        ).delete(synchronize_session=False)
+        self.db.query(CommentReactionCount).filter(
+            CommentReactionCount.comment_id == comment_id
+        ).delete(synchronize_session=False)
+
+    def refresh_hot_scores(self, comment_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Recompute ``reaction_count`` and ``hot_score`` from the shard counters
+
+        Args:
+            comment_ids: Comments to refresh; by default those with shards
+                flagged ``score_stale`` by reaction writes
+
+        Returns:
+            Number of comments updated
+        """
+        flagged = comment_ids is None
+        comment_ids = self._stale_comment_ids() if flagged else list(comment_ids)
+
+        updated = 0
+        try:
+            for start in range(0, len(comment_ids), REFRESH_BATCH_SIZE):
+                batch = comment_ids[start : start + REFRESH_BATCH_SIZE]
+                if flagged:
+                    # Cleared before the shards are summed: a reaction that
+                    # commits after this statement flags its shard again
+                    self.db.execute(
+                        update(CommentReactionCount)
+                        .where(
+                            CommentReactionCount.comment_id.in_(batch),
+                            CommentReactionCount.score_stale,
+                        )
+                        .values(score_stale=False)
+                        .execution_options(synchronize_session=False)
+                    )
+                updated += self._refresh_batch(batch)
+            self.db.commit()
+        except Exception:
+            # The flags roll back with the scores; the next run retries
+            self.db.rollback()
+            raise
+        return updated
+
+    def rebuild_hot_scores(self) -> int:
+        """Refresh every comment's counters and score; returns comments updated"""
+        comment_ids = [comment_id for (comment_id,) in self.db.query(Comment.id)]
+        return self.refresh_hot_scores(comment_ids)
+
+    def _stale_comment_ids(self) -> List[str]:
+        return sorted(
+            {
+                comment_id
+                for (comment_id,) in self.db.query(
+                    CommentReactionCount.comment_id
+                ).filter(CommentReactionCount.score_stale)
+            }
+        )
+
+    def _locked_reaction(self, comment_id: str, user_id: str) -> Optional[ReactionType]:
+        """The user's reaction, locking its row until the commit"""
+        return (
+            self.db.query(CommentReaction.reaction)
+            .filter(
+                CommentReaction.comment_id == comment_id,
+                CommentReaction.user_id == user_id,
+            )
+            .with_for_update()
+            .scalar()
+        )
+
+    def _upsert_reaction(
+        self, comment_id: str, user_id: str, reaction: ReactionType
+    ) -> Optional[ReactionType]:
+        """
+        Insert the user's reaction row, or update it if there is one
+
+        Returns:
+            The reaction it replaced, None if the row was inserted
+        """
+        previous = self._locked_reaction(comment_id, user_id)
+        if previous is None:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(
+                        insert(CommentReaction).values(
+                            comment_id=comment_id, user_id=user_id, reaction=reaction
+                        )
+                    )
+                return None
+            except IntegrityError:
+                # A concurrent request of the same user inserted it first
+                previous = self._locked_reaction(comment_id, user_id)
+                if previous is None:
+                    raise
+        if previous != reaction:
+            self.db.execute(
+                update(CommentReaction)
+                .where(
+                    CommentReaction.comment_id == comment_id,
+                    CommentReaction.user_id == user_id,
+                )
+                .values(reaction=reaction)
+                .execution_options(synchronize_session=False)
+            )
+        return previous
+
+    def _refresh_batch(self, comment_ids: List[str]) -> int:
+        totals = dict(
+            self.db.query(
+                CommentReactionCount.comment_id,
+                func.sum(CommentReactionCount.reaction_count),
+            )
+            .filter(CommentReactionCount.comment_id.in_(comment_ids))
+            .group_by(CommentReactionCount.comment_id)
+            .all()
+        )
+        rows = [
+            {
+                "id": comment_id,
+                "reaction_count": totals.get(comment_id) or 0,
+                "hot_score": hot_score(totals.get(comment_id) or 0, created_at),
+            }
+            for comment_id, created_at in self.db.query(
+                Comment.id, Comment.created_at
+            ).filter(Comment.id.in_(comment_ids))
+        ]
+        if rows:
+            # Bulk UPDATE by primary key: one executemany for the batch
+            self.db.execute(update(Comment), rows)
+        return len(rows)
+
+    def _count(
+        self, comment_id: str, user_id: str, reaction: ReactionType, delta: int
+    ) -> None:
+        upsert(
+            self.db,
+            CommentReactionCount,
+            {
+                "comment_id": comment_id,
+                "reaction": reaction,
+                "shard": zlib.crc32(user_id.encode()) % REACTION_SHARDS,
+                "reaction_count": delta,
+                "score_stale": True,
+            },
+            [
+                CommentReactionCount.comment_id,
+                CommentReactionCount.reaction,
+                CommentReactionCount.shard,
+            ],
+            lambda excluded: {
+                "reaction_count": CommentReactionCount.reaction_count
+                + excluded.reaction_count,
+                "score_stale": True,
+            },
+        )
@@ -1,8 +1,14 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
+from sqlalchemy import and_
+from app.core import comment_paths, live_events, recent_comments
+from app.core.hot_score import hot_score
+from app.core.pagination import apply_keyset
+from app.core.recent_comments import get_recent_comment_buffer
 from app.database.models import Comment, Celebrity
-from app.schemas.comment import CommentCreate
+from app.schemas.comment import CommentCreate, CommentResponse
+from app.services.comment_counter_service import CommentCounterService
+from app.services.comment_reaction_service import CommentReactionService
 from fastapi import HTTPException, status
 import uuid
 from datetime import datetime
@@ -63,19 +69,39 @@ class CommentService:
             # Set level based on parent (max 3 levels deep)
             level = min(parent_comment.level + 1, 3)
 
-        # Create the comment
+            parent_comment.reply_count = Comment.reply_count + 1
+
+        # Create the comment; its path and created_at share one timestamp, so
+        # thread order by path matches the (created_at, id) keyset order
+        comment_id = str(uuid.uuid4())
+        created_at = datetime.utcnow()
         comment = Comment(
-            id=str(uuid.uuid4()),
+            id=comment_id,
             user_id=user_id,
             celebrity_id=comment_data.celebrity_id,
             content=comment_data.content,
             parent_id=comment_data.parent_id,
             level=level,
+            path=comment_paths.child_path(
+                parent_comment.path if comment_data.parent_id else None,
+                comment_id,
+                created_at,
+            ),
+            created_at=created_at,
+            hot_score=hot_score(0, created_at),
         )
 
         self.db.add(comment)
+        CommentCounterService(self.db).apply_comment(
+            comment.celebrity_id, user_id, is_reply=comment.parent_id is not None
+        )
         self.db.commit()
         self.db.refresh(comment)
+        live_events.comment_created(comment)
+        generation = recent_comments.comments_written(self.db)
+        get_recent_comment_buffer().comment_created(
+            CommentResponse.model_validate(comment), generation
+        )
 
         return comment
 
@@ -97,15 +123,17 @@ class CommentService:
         skip: int = 0,
         limit: int = 100,
         include_replies: bool = True,
+        cursor: Optional[str] = None,
     ) -> List[Comment]:
         """
-        Get all comments for a celebrity
+        Get all comments for a celebrity, newest first
 
         Args:
             celebrity_id: ID of the celebrity
             skip: Number of records to skip
             limit: Number of records to return
             include_replies: Whether to include reply comments
+            cursor: Keyset cursor of the last comment of the previous page
 
         Returns:
             List of comments
@@ -116,31 +144,185 @@ class CommentService:
             # Only top-level comments (no parent_id)
             query = query.filter(Comment.parent_id.is_(None))
 
-        return query.order_by(desc(Comment.created_at)).offset(skip).limit(limit).all()
+        query = apply_keyset(query, Comment, cursor, descending=True)
+        return query.offset(skip).limit(limit).all()
 
-    def get_user_comments(
-        self, user_id: str, skip: int = 0, limit: int = 100
+    def get_hot_comments(
+        self,
+        celebrity_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        include_replies: bool = True,
     ) -> List[Comment]:
         """
-        Get all comments by a specific user
+        Get a celebrity's comments by hot score, highest first
+
+        The stored ``hot_score`` (see ``app.core.hot_score``) is the sort key
+        of ``ix_comments_celebrity_hot``, so a page is one index range scan.
+        Scores follow new reactions within ``comment_hot_score_interval``
+        seconds.
 
         Args:
-            user_id: ID of the user
+            celebrity_id: ID of the celebrity
             skip: Number of records to skip
             limit: Number of records to return
+            include_replies: Whether to include reply comments
 
         Returns:
             List of comments
         """
+        query = self.db.query(Comment).filter(Comment.celebrity_id == celebrity_id)
+        if not include_replies:
+            query = query.filter(Comment.parent_id.is_(None))
         return (
-            self.db.query(Comment)
-            .filter(Comment.user_id == user_id)
-            .order_by(desc(Comment.created_at))
+            query.order_by(Comment.hot_score.desc(), Comment.id.desc())
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def get_recent_comments(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        include_replies: bool = True,
+        cursor: Optional[str] = None,
+    ) -> List[CommentResponse]:
+        """
+        Get the newest comments across all celebrities
+
+        The first pages come from the in-memory buffer of the newest comments
+        (see ``app.core.recent_comments``), reloaded every
+        ``recent_comments_buffer_ttl`` seconds; anything else is a keyset scan
+        of the ``ix_comments_created`` index.
+
+        Args:
+            skip: Number of records to skip
+            limit: Number of records to return
+            include_replies: Whether to include reply comments
+            cursor: Keyset cursor of the last comment of the previous page
+
+        Returns:
+            List of comments, newest first
+        """
+        buffer = get_recent_comment_buffer()
+        if buffer.needs_load():
+            generation = recent_comments.comments_generation(self.db)
+            newest = self._recent_comments_query(True, None).limit(buffer.capacity)
+            buffer.load([CommentResponse.model_validate(c) for c in newest], generation)
+
+        page = buffer.page(skip, limit, cursor, include_replies)
+        if page is not None:
+            return page
+        comments = (
+            self._recent_comments_query(include_replies, cursor)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return [CommentResponse.model_validate(comment) for comment in comments]
+
+    def _recent_comments_query(self, include_replies: bool, cursor: Optional[str]):
+        query = self.db.query(Comment)
+        if not include_replies:
+            query = query.filter(Comment.parent_id.is_(None))
+        return apply_keyset(query, Comment, cursor, descending=True)
+
+    def get_comment_tree(
+        self, celebrity_id: str, limit: int = 200, cursor: Optional[str] = None
+    ) -> List[Comment]:
+        """
+        A celebrity's comments in thread order, with one index range scan
+
+        Threads come newest first; within a thread every comment is directly
+        followed by its replies, oldest first (see ``app.core.comment_paths``).
+        A page may end inside a thread; the next page continues from there.
+
+        Args:
+            celebrity_id: ID of the celebrity
+            limit: Number of comments to return
+            cursor: Path of the last comment of the previous page
+
+        Returns:
+            List of comments in display order
+        """
+        query = self.db.query(Comment).filter(Comment.celebrity_id == celebrity_id)
+        if cursor:
+            query = query.filter(Comment.path > comment_paths.parse_path_cursor(cursor))
+        return query.order_by(Comment.path).limit(limit).all()
+
+    def get_comment_threads(
+        self, celebrity_id: str, limit: int = 20, cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        A page of a celebrity's comment threads, newest thread first
+
+        Top-level comments are paged like ``get_celebrity_comments`` with
+        ``include_replies=False``; every reply below them, at any depth, is
+        then read with one range scan over the thread paths.
+
+        Args:
+            celebrity_id: ID of the celebrity
+            limit: Number of top-level comments to return
+            cursor: Keyset cursor of the last top-level comment of the previous
+                page
+
+        Returns:
+            List of ``{"comment": Comment, "replies": [...]}`` nodes
+        """
+        query = self.db.query(Comment).filter(
+            and_(Comment.celebrity_id == celebrity_id, Comment.parent_id.is_(None))
+        )
+        roots = apply_keyset(query, Comment, cursor, descending=True).limit(limit).all()
+        if not roots:
+            return []
+
+        # Newer threads sort first, so the page's subtrees are one path range
+        paths = sorted(root.path for root in roots)
+        replies = (
+            self.db.query(Comment)
+            .filter(
+                Comment.celebrity_id == celebrity_id,
+                Comment.path > paths[0],
+                Comment.path < paths[-1] + comment_paths.SUBTREE_END,
+                Comment.parent_id.is_not(None),
+            )
+            .order_by(Comment.path)
+            .all()
+        )
+
+        nodes = {
+            comment.id: {"comment": comment, "replies": []}
+            for comment in roots + replies
+        }
+        for reply in replies:
+            if reply.parent_id in nodes:
+                nodes[reply.parent_id]["replies"].append(nodes[reply.id])
+        return [nodes[root.id] for root in roots]
+
+    def get_user_comments(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> List[Comment]:
+        """
+        Get all comments by a specific user, newest first
+
+        Args:
+            user_id: ID of the user
+            skip: Number of records to skip
+            limit: Number of records to return
+            cursor: Keyset cursor of the last comment of the previous page
+
+        Returns:
+            List of comments
+        """
+        query = self.db.query(Comment).filter(Comment.user_id == user_id)
+        query = apply_keyset(query, Comment, cursor, descending=True)
+        return query.offset(skip).limit(limit).all()
+
     def get_comment_replies(
         self, comment_id: str, skip: int = 0, limit: int = 50
     ) -> List[Comment]:
@@ -196,6 +378,10 @@ class CommentService:
 
         self.db.commit()
         self.db.refresh(comment)
+        generation = recent_comments.comments_written(self.db)
+        get_recent_comment_buffer().comment_updated(
+            CommentResponse.model_validate(comment), generation
+        )
 
         return comment
 
@@ -223,10 +409,7 @@ class CommentService:
             )
 
         # Check if comment has replies
-        replies_count = (
-            self.db.query(Comment).filter(Comment.parent_id == comment_id).count()
-        )
-        if replies_count > 0:
+        if comment.reply_count > 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=(
@@ -234,8 +417,24 @@ class CommentService:
                 ),
             )
 
+        if comment.parent_id:
+            self.db.query(Comment).filter(Comment.id == comment.parent_id).update(
+                {Comment.reply_count: Comment.reply_count - 1},
+                synchronize_session=False,
+            )
+        CommentCounterService(self.db).apply_comment(
+            comment.celebrity_id,
+            comment.user_id,
+            is_reply=comment.parent_id is not None,
+            delta=-1,
+            created_at=comment.created_at,
+        )
+        CommentReactionService(self.db).delete_comment_reactions(comment_id)
+        parent_id = comment.parent_id
         self.db.delete(comment)
         self.db.commit()
+        generation = recent_comments.comments_written(self.db)
+        get_recent_comment_buffer().comment_deleted(comment_id, parent_id, generation)
 
     def get_comment_statistics(self, celebrity_id: str) -> Dict[str, Any]:
         """
@@ -247,52 +446,7 @@ class CommentService:
         Returns:
             Dictionary with comment statistics
         """
-        # Total comments
-        total_comments = (
-            self.db.query(Comment).filter(Comment.celebrity_id == celebrity_id).count()
-        )
-
-        # Top-level comments
-        top_level_comments = (
-            self.db.query(Comment)
-            .filter(
-                and_(Comment.celebrity_id == celebrity_id, Comment.parent_id.is_(None))
-            )
-            .count()
-        )
-
-        # Reply comments
-        reply_comments = (
-            self.db.query(Comment)
-            .filter(
-                and_(
-                    Comment.celebrity_id == celebrity_id, Comment.parent_id.is_not(None)
-                )
-            )
-            .count()
-        )
-
-        # Most active commenters
-        active_commenters = (
-            self.db.query(
-                Comment.user_id, func.count(Comment.id).label("comment_count")
-            )
-            .filter(Comment.celebrity_id == celebrity_id)
-            .group_by(Comment.user_id)
-            .order_by(desc("comment_count"))
-            .limit(5)
-            .all()
-        )
-
-        return {
-            "total_comments": total_comments,
-            "top_level_comments": top_level_comments,
-            "reply_comments": reply_comments,
-            "active_commenters": [
-                {"user_id": user_id, "comment_count": count}
-                for user_id, count in active_commenters
-            ],
-        }
+        return CommentCounterService(self.db).get_celebrity_statistics(celebrity_id)
 
     def get_user_comment_statistics(self, user_id: str) -> Dict[str, Any]:
         """
@@ -302,45 +456,7 @@ class CommentService:
             user_id: ID of the user
 
         Returns:
-            Dictionary with user comment statistics
+            Dictionary with user comment statistics; ``recent_comments``
+            counts the comments written since midnight (UTC)
         """
-        # Total comments by user
-        total_comments = (
-            self.db.query(Comment).filter(Comment.user_id == user_id).count()
-        )
-
-        # Top-level comments
-        top_level_comments = (
-            self.db.query(Comment)
-            .filter(and_(Comment.user_id == user_id, Comment.parent_id.is_(None)))
-            .count()
-        )
-
-        # Reply comments
-        reply_comments = (
-            self.db.query(Comment)
-            .filter(and_(Comment.user_id == user_id, Comment.parent_id.is_not(None)))
-            .count()
-        )
-
-        # Recent comments (last 7 days)
-        recent_comments = (
-            self.db.query(Comment)
-            .filter(
-                and_(
-                    Comment.user_id == user_id,
-                    Comment.created_at
-                    >= datetime.utcnow().replace(
-                        hour=0, minute=0, second=0, microsecond=0
-                    ),
-                )
-            )
-            .count()
-        )
-
-        return {
-            "total_comments": total_comments,
-            "top_level_comments": top_level_comments,
-            "reply_comments": reply_comments,
-            "recent_comments": recent_comments,
-        }
+        return CommentCounterService(self.db).get_user_statistics(user_id)
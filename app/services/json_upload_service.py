@@ -4,6 +4,7 @@ JSON Upload Service for automated celebrity data import
 """
 
 import json
+from collections import Counter
 
 import shutil
 from datetime import datetime
@@ -21,8 +22,13 @@ from app.database.models import (
     UserRole,
     MBTIType,
 )
+from app.search import documents as search_documents
+from app.search import sync as search_sync
+from app.search.text import name_key
+from app.services.analytics_counter_service import AnalyticsCounterService
 from app.services.celebrity_service import CelebrityService
 from app.services.vote_service import VoteService
+from app.services.vote_tally_service import VoteTallyService
 import uuid
 
 
@@ -60,6 +66,8 @@ class JSONUploadService:
         self.db = db
         self.celebrity_service = CelebrityService(db)
         self.vote_service = VoteService(db)
+        self.tally_service = VoteTallyService(db)
+        self.analytics_counters = AnalyticsCounterService(db)
 
         # Upload directories
         self.base_dir = Path("data_uploads")
@@ -87,6 +95,11 @@ class JSONUploadService:
 
             # Check MBTI types
             valid_mbti_types = [mbti.value for mbti in MBTIType]
+            # Name key -> position of its first occurrence in this file
+            names_in_file: Dict[Optional[str], int] = {}
+            taken_keys = self.celebrity_service.get_existing_name_keys(
+                celeb.name for celeb in upload_data.celebrities
+            )
             for i, celeb in enumerate(upload_data.celebrities):
                 if celeb.mbti not in valid_mbti_types:
                     validation_errors.append(
@@ -95,13 +108,16 @@ class JSONUploadService:
                     )
 
                 # Check for duplicate names
-                existing_celebrity = self.celebrity_service.get_celebrity_by_name(
-                    celeb.name
-                )
-                if existing_celebrity:
+                if name_key(celeb.name) in taken_keys:
                     validation_errors.append(
                         f"Celebrity {i+1} ({celeb.name}): Already exists in database"
                     )
+                first = names_in_file.setdefault(name_key(celeb.name), i + 1)
+                if first != i + 1:
+                    validation_errors.append(
+                        f"Celebrity {i+1} ({celeb.name}): "
+                        f"Same name as celebrity {first} in this file"
+                    )
 
             if validation_errors:
                 return {"valid": False, "errors": validation_errors, "data": None}
@@ -147,7 +163,10 @@ class JSONUploadService:
             existing_tags = {tag.name: tag for tag in self.db.query(Tag).all()}
 
             imported_count = 0
+            imported_ids = []
             errors = []
+            counter_deltas: Counter = Counter()
+            tag_usage_deltas: Counter = Counter()
 
             for celeb_data in upload_data.celebrities:
                 try:
@@ -174,6 +193,14 @@ class JSONUploadService:
                         created_at=datetime.utcnow(),
                     )
                     self.db.add(vote)
+                    self.tally_service.apply_vote(
+                        celebrity.id, vote.mbti_type, vote.reason is not None
+                    )
+                    counter_deltas[AnalyticsCounterService.CELEBRITIES] += 1
+                    counter_deltas[AnalyticsCounterService.VOTES] += 1
+                    counter_deltas[
+                        AnalyticsCounterService.vote_type_counter(vote.mbti_type)
+                    ] += 1
 
                     # Handle tags
                     for tag_name in celeb_data.tags:
@@ -185,14 +212,17 @@ class JSONUploadService:
                             )
                             self.db.add(tag)
                             existing_tags[tag_name] = tag
+                            counter_deltas[AnalyticsCounterService.TAGS] += 1
 
                         # Create celebrity-tag relationship
                         celebrity_tag = CelebrityTag(
                             celebrity_id=celebrity.id, tag_id=existing_tags[tag_name].id
                         )
                         self.db.add(celebrity_tag)
+                        tag_usage_deltas[existing_tags[tag_name].id] += 1
 
                     imported_count += 1
+                    imported_ids.append(celebrity.id)
 
                 except Exception as e:
                     errors.append(f"Error importing {celeb_data.name}: {str(e)}")
@@ -202,7 +232,12 @@ class JSONUploadService:
                 self.db.rollback()
                 return {"success": False, "errors": errors, "imported_count": 0}
             else:
+                self.analytics_counters.add(counter_deltas)
+                self.analytics_counters.add_tag_usage(tag_usage_deltas)
+                search_documents.refresh(self.db, imported_ids)
+                generation = search_sync.catalog_written(self.db)
                 self.db.commit()
+                search_sync.celebrities_changed(self.db, imported_ids, generation)
                 return {"success": True, "errors": [], "imported_count": imported_count}
 
         except Exception as e:
@@ -0,0 +1,64 @@
+from typing import List, Dict, Any
+from sqlalchemy.orm import Session, joinedload
+from app.database.models import Celebrity, CelebrityTag, CelebrityVoteTally
+
+
+class LeaderboardService:
+    """Popular-celebrity ranking served from the precomputed vote tallies.
+
+    ``VoteTallyService.apply_vote`` keeps ``total_votes`` and ``top_mbti_type``
+    current on every vote write, and ``ix_vote_tally_leaderboard`` keeps the
+    rows ordered, so a top-N read is a single index scan joined to celebrities
+    (and their tags, which celebrity responses include).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_top_celebrities(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the most voted celebrities together with their top MBTI type"""
+        ranked = (
+            self.db.query(
+                Celebrity,
+                CelebrityVoteTally.total_votes,
+                CelebrityVoteTally.top_mbti_type,
+            )
+            .join(CelebrityVoteTally, CelebrityVoteTally.celebrity_id == Celebrity.id)
+            .options(joinedload(Celebrity.tags).joinedload(CelebrityTag.tag))
+            .order_by(
+                CelebrityVoteTally.total_votes.desc(),
+                CelebrityVoteTally.celebrity_id.desc(),
+            )
+            .limit(limit)
+            .all()
+        )
+
+        entries = [
+            {
+                "celebrity": celebrity,
+                "vote_count": vote_count,
+                "top_mbti": top_mbti.value if top_mbti else None,
+            }
+            for celebrity, vote_count, top_mbti in ranked
+        ]
+
+        if len(entries) < limit:
+            # Celebrities inserted without a tally row (e.g. by import scripts)
+            # have no votes yet; pad with them like the old outer join did.
+            untallied = (
+                self.db.query(Celebrity)
+                .options(joinedload(Celebrity.tags).joinedload(CelebrityTag.tag))
+                .outerjoin(
+                    CelebrityVoteTally,
+                    CelebrityVoteTally.celebrity_id == Celebrity.id,
+                )
+                .filter(CelebrityVoteTally.celebrity_id.is_(None))
+                .limit(limit - len(entries))
+                .all()
+            )
+            entries.extend(
+                {"celebrity": celebrity, "vote_count": 0, "top_mbti": None}
+                for celebrity in untallied
+            )
+
+        return entries
@@ -1,9 +1,31 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, desc, case
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, desc
 from fastapi import HTTPException, status
-from app.database.models import Celebrity, Tag, CelebrityTag, Vote
+from app.database.models import (
+    Celebrity,
+    CelebrityTag,
+    CelebrityVoteTally,
+    MBTIType,
+    Tag,
+    Vote,
+)
+from app.search import (
+    FacetIndex,
+    FuzzyNameIndex,
+    SearchBackend,
+    SearchHit,
+    get_facet_index,
+    get_fuzzy_index,
+    get_search_backend,
+    get_suggestion_index,
+)
+from app.search.index import FUZZY_SCORE
 from app.schemas.celebrity import CelebrityResponse
+from app.services.analytics_counter_service import AnalyticsCounterService
+
+# Celebrity IDs per query when reading vote counts for the popular sort
+VOTE_COUNT_BATCH_SIZE = 500
 
 
 class SearchResult:
@@ -14,8 +36,17 @@ class SearchResult:
 
 
 class SearchService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        backend: Optional[SearchBackend] = None,
+        fuzzy_index: Optional[FuzzyNameIndex] = None,
+        facet_index: Optional[FacetIndex] = None,
+    ):
         self.db = db
+        self.backend = backend or get_search_backend()
+        self.fuzzy_index = fuzzy_index if fuzzy_index is not None else get_fuzzy_index()
+        self.facet_index = facet_index if facet_index is not None else get_facet_index()
 
     def search_celebrities(
         self,
@@ -39,187 +70,154 @@ class SearchService:
             skip: Number of records to skip
             limit: Number of records to return
         """
+        return self.search_with_facets(
+            query, search_type, mbti_type, tag_filter, popularity_filter, skip, limit
+        )[0]
+
+    def search_with_facets(
+        self,
+        query: str,
+        search_type: str = "all",
+        mbti_type: Optional[str] = None,
+        tag_filter: Optional[str] = None,
+        popularity_filter: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Like ``search_celebrities``, plus facet counts over every match
+
+        The facets count all filtered matches, not just the returned page:
+        ``top_mbti_type`` maps each type to the matches whose most voted type
+        it is, ``tags`` lists the most frequent tags among the matches.
+        """
         if not query.strip():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Search query cannot be empty",
             )
 
-        # Build base query
-        base_query = self.db.query(Celebrity)
-
-        # Apply filters
-        if mbti_type:
-            base_query = self._apply_mbti_filter(base_query, mbti_type)
-
-        if tag_filter:
-            base_query = self._apply_tag_filter(base_query, tag_filter)
-
-        if popularity_filter:
-            base_query = self._apply_popularity_filter(base_query, popularity_filter)
-
-        # Apply search based on type
-        if search_type == "name":
-            results = self._search_by_name(base_query, query, skip, limit)
-        elif search_type == "description":
-            results = self._search_by_description(base_query, query, skip, limit)
-        elif search_type == "tag":
-            results = self._search_by_tag(base_query, query, skip, limit)
-        elif search_type == "mbti":
-            results = self._search_by_mbti(base_query, query, skip, limit)
-        else:  # "all"
-            results = self._hybrid_search(base_query, query, skip, limit)
-
-        return results
-
-    def _hybrid_search(
-        self, base_query, query: str, skip: int, limit: int
-    ) -> List[Dict[str, Any]]:
-        """Hybrid search with relevance scoring"""
-        query_lower = query.lower()
-
-        # Build complex query with relevance scoring
-        search_query = (
-            base_query.add_columns(
-                # Relevance scoring
-                case(
-                    # Exact name match (highest priority)
-                    (func.lower(Celebrity.name) == query_lower, 100),
-                    (func.lower(Celebrity.name_en) == query_lower, 100),
-                    # Name contains (high priority)
-                    (func.lower(Celebrity.name).contains(query_lower), 80),
-                    (func.lower(Celebrity.name_en).contains(query_lower), 80),
-                    # Description contains (medium priority)
-                    (func.lower(Celebrity.description).contains(query_lower), 60),
-                    # Tag matches (lower priority)
-                    (
-                        func.lower(Celebrity.tags.any(Tag.name.contains(query_lower))),
-                        40,
-                    ),
-                    # Default score
-                    else_=0,
-                ).label("relevance_score")
+        if search_type == "mbti":
+            base_query = self.db.query(Celebrity).options(
+                selectinload(Celebrity.tags).joinedload(CelebrityTag.tag)
             )
-            .filter(
-                or_(
-                    func.lower(Celebrity.name).contains(query_lower),
-                    func.lower(Celebrity.name_en).contains(query_lower),
-                    func.lower(Celebrity.description).contains(query_lower),
-                    Celebrity.tags.any(Tag.name.contains(query_lower)),
+            if mbti_type:
+                base_query = self._apply_mbti_filter(base_query, mbti_type)
+            if tag_filter:
+                base_query = self._apply_tag_filter(base_query, tag_filter)
+            if popularity_filter:
+                base_query = self._apply_popularity_filter(
+                    base_query, popularity_filter
                 )
+            matches = self._filter_bitmap(
+                self._voted_for(query.strip()), mbti_type, tag_filter
             )
-            .order_by(desc("relevance_score"), desc(Celebrity.created_at))
-        )
-
-        # Execute query with pagination
-        results = search_query.offset(skip).limit(limit).all()
-
-        # Format results
-        formatted_results = []
-        for celebrity, relevance_score in results:
-            result = CelebrityResponse.model_validate(celebrity).model_dump()
-            result["relevance_score"] = relevance_score or 0
-            result["match_type"] = self._determine_match_type(
-                query_lower, celebrity, relevance_score
+            return (
+                self._search_by_mbti(base_query, query, skip, limit),
+                self.facet_index.counts(matches),
             )
-            formatted_results.append(result)
-
-        return formatted_results
 
-    def _search_by_name(
-        self, base_query, query: str, skip: int, limit: int
-    ) -> List[Dict[str, Any]]:
-        """Search by celebrity name only"""
-        query_lower = query.lower()
-
-        search_query = (
-            base_query.add_columns(
-                case(
-                    (func.lower(Celebrity.name) == query_lower, 100),
-                    (func.lower(Celebrity.name_en) == query_lower, 100),
-                    (func.lower(Celebrity.name).contains(query_lower), 80),
-                    (func.lower(Celebrity.name_en).contains(query_lower), 80),
-                    else_=0,
-                ).label("relevance_score")
-            )
-            .filter(
-                or_(
-                    func.lower(Celebrity.name).contains(query_lower),
-                    func.lower(Celebrity.name_en).contains(query_lower),
-                )
-            )
-            .order_by(desc("relevance_score"), desc(Celebrity.created_at))
+        # Text search: the backend ranks, only the requested page is loaded
+        hits = self.backend.search(self.db, query, field=search_type)
+        if search_type in ("all", "name") and len(hits) < skip + limit:
+            hits += self._fuzzy_hits(query, hits)
+        hits = self._filter_hits(hits, mbti_type, tag_filter, popularity_filter)
+        facets = self.facet_index.counts(
+            self.facet_index.bitmap(hit.celebrity_id for hit in hits)
         )
+        page = hits[skip : skip + limit]
 
-        results = search_query.offset(skip).limit(limit).all()
-
-        formatted_results = []
-        for celebrity, relevance_score in results:
-            result = CelebrityResponse.model_validate(celebrity).model_dump()
-            result["relevance_score"] = relevance_score or 0
-            result["match_type"] = "name_match"
-            formatted_results.append(result)
-
-        return formatted_results
-
-    def _search_by_description(
-        self, base_query, query: str, skip: int, limit: int
-    ) -> List[Dict[str, Any]]:
-        """Search by description only"""
-        query_lower = query.lower()
-
-        search_query = (
-            base_query.add_columns(
-                case(
-                    (func.lower(Celebrity.description).contains(query_lower), 60),
-                    else_=0,
-                ).label("relevance_score")
-            )
-            .filter(func.lower(Celebrity.description).contains(query_lower))
-            .order_by(desc("relevance_score"), desc(Celebrity.created_at))
+        # No LIMIT here, so tags can join into the same statement
+        page_query = (
+            self.db.query(Celebrity)
+            .options(joinedload(Celebrity.tags).joinedload(CelebrityTag.tag))
+            .filter(Celebrity.id.in_([hit.celebrity_id for hit in page]))
         )
-
-        results = search_query.offset(skip).limit(limit).all()
+        celebrities = {celebrity.id: celebrity for celebrity in page_query}
 
         formatted_results = []
-        for celebrity, relevance_score in results:
+        for celebrity_id, relevance_score, _ in page:
+            celebrity = celebrities.get(celebrity_id)
+            if celebrity is None:
+                # Deleted since the index was last refreshed
+                continue
             result = CelebrityResponse.model_validate(celebrity).model_dump()
-            result["relevance_score"] = relevance_score or 0
-            result["match_type"] = "description_match"
+            result["relevance_score"] = relevance_score
+            if search_type == "all":
+                result["match_type"] = self._determine_match_type(
+                    query.lower(), celebrity, relevance_score
+                )
+            else:
+                result["match_type"] = f"{search_type}_match"
             formatted_results.append(result)
 
-        return formatted_results
+        return formatted_results, facets
 
-    def _search_by_tag(
-        self, base_query, query: str, skip: int, limit: int
-    ) -> List[Dict[str, Any]]:
-        """Search by tag only"""
-        query_lower = query.lower()
+    def _fuzzy_hits(self, query: str, hits: List[SearchHit]) -> List[SearchHit]:
+        """Typo-tolerant name matches not already among ``hits``"""
+        found = {hit.celebrity_id for hit in hits}
+        return [
+            SearchHit(match.celebrity_id, FUZZY_SCORE, match.created_ts)
+            for match in self.fuzzy_index.search(query)
+            if match.celebrity_id not in found
+        ]
 
-        search_query = (
-            base_query.add_columns(
-                case(
-                    (
-                        func.lower(Celebrity.tags.any(Tag.name.contains(query_lower))),
-                        40,
+    def _filter_hits(
+        self,
+        hits: List[SearchHit],
+        mbti_type: Optional[str],
+        tag_filter: Optional[str],
+        popularity_filter: Optional[str],
+    ) -> List[SearchHit]:
+        """Apply the optional filters to ranked search hits"""
+        if tag_filter or mbti_type:
+            allowed = self._filter_bitmap(-1, mbti_type, tag_filter)
+            hits = [
+                hit
+                for hit in hits
+                if self.facet_index.contains(allowed, hit.celebrity_id)
+            ]
+
+        # Both orderings keep relevance as the tie-breaker (sorts are stable)
+        if popularity_filter == "popular":
+            vote_counts = self._vote_counts([hit.celebrity_id for hit in hits])
+            hits = sorted(hits, key=lambda hit: -vote_counts.get(hit.celebrity_id, 0))
+        elif popularity_filter == "recent":
+            hits = sorted(hits, key=lambda hit: -hit.created_ts)
+
+        return hits
+
+    def _vote_counts(self, celebrity_ids: List[str]) -> Dict[str, int]:
+        """Total votes of the given celebrities, read in batches; absent if none"""
+        vote_counts: Dict[str, int] = {}
+        for start in range(0, len(celebrity_ids), VOTE_COUNT_BATCH_SIZE):
+            vote_counts.update(
+                self.db.query(
+                    CelebrityVoteTally.celebrity_id, CelebrityVoteTally.total_votes
+                ).filter(
+                    CelebrityVoteTally.celebrity_id.in_(
+                        celebrity_ids[start : start + VOTE_COUNT_BATCH_SIZE]
                     ),
-                    else_=0,
-                ).label("relevance_score")
+                    CelebrityVoteTally.total_votes > 0,
+                )
             )
-            .filter(Celebrity.tags.any(Tag.name.contains(query_lower)))
-            .order_by(desc("relevance_score"), desc(Celebrity.created_at))
-        )
-
-        results = search_query.offset(skip).limit(limit).all()
+        return vote_counts
 
-        formatted_results = []
-        for celebrity, relevance_score in results:
-            result = CelebrityResponse.model_validate(celebrity).model_dump()
-            result["relevance_score"] = relevance_score or 0
-            result["match_type"] = "tag_match"
-            formatted_results.append(result)
+    def _filter_bitmap(
+        self, bitmap: int, mbti_type: Optional[str], tag_filter: Optional[str]
+    ) -> int:
+        """Narrow a facet bitmap (``-1`` for everyone) by the optional filters"""
+        if tag_filter:
+            bitmap &= self.facet_index.tagged(tag_filter)
+        if mbti_type:
+            bitmap &= self.facet_index.voted_for(mbti_type)
+        return bitmap
 
-        return formatted_results
+    def _voted_for(self, query: str) -> int:
+        """Facet bitmap of an MBTI search; empty when the query is no type"""
+        if query.upper() not in MBTIType.__members__:
+            return 0
+        return self.facet_index.voted_for(query)
 
     def _search_by_mbti(
         self, base_query, query: str, skip: int, limit: int
@@ -286,84 +284,21 @@ class SearchService:
             return "description_match"
         elif relevance_score >= 40:
             return "tag_match"
+        elif relevance_score >= FUZZY_SCORE:
+            return "fuzzy_match"
         else:
             return "partial_match"
 
     def get_search_suggestions(self, query: str, limit: int = 10) -> List[str]:
-        """Get search suggestions based on partial query"""
+        """
+        Autocomplete for a partial query, most voted first
+
+        Served from the in-memory suggestion index; no database access.
+        """
         if len(query.strip()) < 2:
             return []
-
-        query_lower = query.lower()
-
-        # Get celebrity name suggestions
-        name_suggestions = (
-            self.db.query(Celebrity.name)
-            .filter(func.lower(Celebrity.name).contains(query_lower))
-            .limit(limit // 2)
-            .all()
-        )
-
-        # Get English name suggestions
-        name_en_suggestions = (
-            self.db.query(Celebrity.name_en)
-            .filter(func.lower(Celebrity.name_en).contains(query_lower))
-            .limit(limit // 2)
-            .all()
-        )
-
-        # Get tag suggestions
-        tag_suggestions = (
-            self.db.query(Tag.name)
-            .filter(func.lower(Tag.name).contains(query_lower))
-            .limit(limit // 4)
-            .all()
-        )
-
-        # Combine and deduplicate suggestions
-        all_suggestions: List[str] = []
-        for suggestion in name_suggestions + name_en_suggestions + tag_suggestions:
-            if suggestion[0] and suggestion[0].lower() not in [
-                s.lower() for s in all_suggestions
-            ]:
-                all_suggestions.append(suggestion[0])
-
-        return all_suggestions[:limit]
+        return get_suggestion_index().suggest(query, limit)
 
     def get_search_analytics(self) -> Dict[str, Any]:
-        """Get search analytics and statistics"""
-        total_celebrities = self.db.query(Celebrity).count()
-        total_tags = self.db.query(Tag).count()
-        total_votes = self.db.query(Vote).count()
-
-        # Get popular tags
-        popular_tags = (
-            self.db.query(
-                Tag.name, func.count(CelebrityTag.celebrity_id).label("usage_count")
-            )
-            .join(CelebrityTag, Tag.id == CelebrityTag.tag_id)
-            .group_by(Tag.id)
-            .order_by(desc("usage_count"))
-            .limit(10)
-            .all()
-        )
-
-        # Get popular MBTI types
-        popular_mbti = (
-            self.db.query(Vote.mbti_type, func.count(Vote.id).label("vote_count"))
-            .group_by(Vote.mbti_type)
-            .order_by(desc("vote_count"))
-            .all()
-        )
-
-        return {
-            "total_celebrities": total_celebrities,
-            "total_tags": total_tags,
-            "total_votes": total_votes,
-            "popular_tags": [
-                {"tag": tag, "count": count} for tag, count in popular_tags
-            ],
-            "popular_mbti_types": [
-                {"type": mbti_type, "count": count} for mbti_type, count in popular_mbti
-            ],
-        }
+        """Get search analytics and statistics from the maintained counters"""
+        return AnalyticsCounterService(self.db).get_analytics()
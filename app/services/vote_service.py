@@ -1,120 +1,238 @@
-from typing import Optional, List, Dict, Any
+import uuid
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from datetime import date
+from sqlalchemy import func, and_, desc, insert
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
 from fastapi import HTTPException, status
-from app.database.models import Vote, User, Celebrity, DailyUserStats, MBTIType
+from app.core import live_events
+from app.core.config import settings
+from app.core.pagination import apply_keyset
+from app.core.rate_limit import (
+    Policy,
+    RateLimiter,
+    SlidingWindowPolicy,
+    get_rate_limiter,
+)
+from app.database.database import is_unique_violation, upsert
+from app.search import sync as search_sync
+from app.database.models import (
+    Vote,
+    User,
+    Celebrity,
+    CelebrityVoteTally,
+    DailyUserStats,
+    MBTIType,
+)
 from app.schemas.vote import VoteCreate
+from app.services.analytics_counter_service import AnalyticsCounterService
+from app.services.vote_tally_service import VoteTallyService
+from app.services.leaderboard_service import LeaderboardService
+
+# The unique index that rejects a second vote for the same celebrity
+USER_CELEBRITY_VOTE_INDEX = next(
+    index for index in Vote.__table__.indexes if index.name == "ix_user_celebrity_vote"
+)
+
+# Quota windows (seconds)
+VOTE_QUOTA_WINDOW = 24 * 60 * 60
+NEW_USER_PERIOD = timedelta(hours=24)
 
 
 class VoteService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rate_limiter: Optional[RateLimiter] = None):
         self.db = db
+        self.tally_service = VoteTallyService(db)
+        self.analytics_counters = AnalyticsCounterService(db)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
 
-    def create_vote(self, user_id: str, vote_data: VoteCreate) -> Vote:
-        """Create a new vote for a celebrity"""
-        # Check if celebrity exists
-        celebrity = (
-            self.db.query(Celebrity)
-            .filter(Celebrity.id == vote_data.celebrity_id)
-            .first()
+    def create_vote(
+        self,
+        user_id: str,
+        vote_data: VoteCreate,
+        user_created_at: Optional[datetime] = None,
+    ) -> Vote:
+        """
+        Create a new vote for a celebrity
+
+        Quotas (``daily_vote_limit``, ``daily_no_reason_limit`` and, for
+        accounts younger than 24 hours, ``new_user_24h_limit``) are enforced by
+        the rate limiter without touching the database. The write itself issues
+        no pre-check SELECTs: the tally UPDATE doubles as the celebrity
+        existence check, and the ``ix_user_celebrity_vote`` unique index rejects
+        duplicates. Quota taken for a vote that fails is handed back.
+        """
+        no_reason = not vote_data.reason
+        # Also the quota member, so deleting the vote can hand its quota back
+        vote_id = str(uuid.uuid4())
+
+        quota = self.rate_limiter.acquire(
+            self._vote_quota_rules(
+                user_id,
+                no_reason,
+                user_created_at is not None and self._is_new_user(user_created_at),
+            ),
+            member=vote_id,
         )
-        if not celebrity:
+        if not quota.allowed:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Celebrity not found"
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=self._quota_message(quota.denied_key or ""),
+                headers={"Retry-After": str(int(quota.retry_after) + 1)},
             )
 
-        # Check if user has already voted for this celebrity
-        existing_vote = (
-            self.db.query(Vote)
-            .filter(
-                and_(
-                    Vote.user_id == user_id, Vote.celebrity_id == vote_data.celebrity_id
+        try:
+            self._record_daily_vote(user_id, date.today(), no_reason)
+
+            # Keep the per-celebrity tally in the same transaction as the vote
+            if not self.tally_service.apply_vote(
+                vote_data.celebrity_id,
+                vote_data.mbti_type,
+                vote_data.reason is not None,
+                1,
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Celebrity not found"
                 )
-            )
-            .first()
-        )
-
-        if existing_vote:
+            self.analytics_counters.count_vote(vote_data.mbti_type, 1)
+
+            values = {
+                "id": vote_id,
+                "user_id": user_id,
+                "celebrity_id": vote_data.celebrity_id,
+                "mbti_type": vote_data.mbti_type,
+                "reason": vote_data.reason,
+            }
+            if self.db.get_bind().dialect.insert_returning:
+                vote = self.db.execute(
+                    insert(Vote).values(values).returning(Vote)
+                ).scalar_one()
+            else:
+                # No INSERT ... RETURNING (e.g. MySQL): read the defaults back
+                vote = Vote(**values)
+                self.db.add(vote)
+                self.db.flush()
+                self.db.refresh(vote)
+
+            # The row is complete; keep it from being expired (and
+            # re-SELECTed) by the commit
+            self.db.expunge(vote)
+            self.db.commit()
+        except IntegrityError as e:
+            self.db.rollback()
+            self.rate_limiter.release(quota.hits)
+            if not is_unique_violation(e, USER_CELEBRITY_VOTE_INDEX):
+                # e.g. the celebrity was deleted after the tally check
+                raise
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="You have already voted for this celebrity",
             )
+        except Exception:
+            self.db.rollback()
+            self.rate_limiter.release(quota.hits)
+            raise
+
+        generation = search_sync.votes_written(self.db)
+        search_sync.votes_changed(vote.celebrity_id, vote.mbti_type, 1, generation)
+        live_events.votes_changed(vote.celebrity_id, vote.mbti_type, 1)
+        return vote
 
-        # Check daily vote limit (max 10 votes per day)
-        today = date.today()
-        daily_stats = (
-            self.db.query(DailyUserStats)
-            .filter(
-                and_(DailyUserStats.user_id == user_id, DailyUserStats.date == today)
+    def _vote_quota_rules(
+        self, user_id: str, no_reason: bool, new_user: bool
+    ) -> List[Tuple[str, Policy]]:
+        """Rate limit rules that apply to one vote by this user"""
+        rules: List[Tuple[str, Policy]] = [
+            (
+                f"votes:daily:{user_id}",
+                SlidingWindowPolicy(settings.daily_vote_limit, VOTE_QUOTA_WINDOW),
             )
-            .first()
-        )
-
-        if daily_stats and daily_stats.votes_count >= 10:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Daily vote limit reached (10 votes per day)",
+        ]
+        if no_reason:
+            rules.append(
+                (
+                    f"votes:no_reason:{user_id}",
+                    SlidingWindowPolicy(
+                        settings.daily_no_reason_limit, VOTE_QUOTA_WINDOW
+                    ),
+                )
             )
-
-        # Create the vote
-        vote = Vote(
-            user_id=user_id,
-            celebrity_id=vote_data.celebrity_id,
-            mbti_type=vote_data.mbti_type,
-            reason=vote_data.reason,
-        )
-
-        self.db.add(vote)
-
-        # Update or create daily stats
-        if daily_stats:
-            daily_stats.votes_count += 1
-            if not vote_data.reason:
-                daily_stats.votes_no_reason += 1
-        else:
-            daily_stats = DailyUserStats(
-                user_id=user_id,
-                date=today,
-                votes_count=1,
-                votes_no_reason=1 if not vote_data.reason else 0,
+        if new_user:
+            rules.append(
+                (
+                    f"votes:new_user:{user_id}",
+                    SlidingWindowPolicy(settings.new_user_24h_limit, VOTE_QUOTA_WINDOW),
+                )
             )
-            self.db.add(daily_stats)
-
-        self.db.commit()
-        self.db.refresh(vote)
+        return rules
+
+    @staticmethod
+    def _is_new_user(user_created_at: datetime) -> bool:
+        if user_created_at.tzinfo is None:
+            # SQLite hands back naive UTC timestamps
+            user_created_at = user_created_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - user_created_at < NEW_USER_PERIOD
+
+    @staticmethod
+    def _quota_message(denied_key: str) -> str:
+        if denied_key.startswith("votes:no_reason:"):
+            return (
+                f"Daily limit for votes without a reason reached "
+                f"({settings.daily_no_reason_limit} per 24 hours)"
+            )
+        if denied_key.startswith("votes:new_user:"):
+            return (
+                f"New accounts can cast {settings.new_user_24h_limit} votes "
+                f"in their first 24 hours"
+            )
+        return f"Daily vote limit reached ({settings.daily_vote_limit} votes per day)"
 
-        return vote
+    def _record_daily_vote(self, user_id: str, today: date, no_reason: bool) -> None:
+        """Count a vote in the user's daily stats with a single upsert"""
+        upsert(
+            self.db,
+            DailyUserStats,
+            {
+                "user_id": user_id,
+                "date": today,
+                "votes_count": 1,
+                "votes_no_reason": 1 if no_reason else 0,
+            },
+            [DailyUserStats.user_id, DailyUserStats.date],
+            {
+                "votes_count": DailyUserStats.votes_count + 1,
+                "votes_no_reason": DailyUserStats.votes_no_reason
+                + (1 if no_reason else 0),
+            },
+        )
 
     def get_vote_by_id(self, vote_id: str) -> Optional[Vote]:
         """Get vote by ID"""
         return self.db.query(Vote).filter(Vote.id == vote_id).first()
 
     def get_user_votes(
-        self, user_id: str, skip: int = 0, limit: int = 100
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[Vote]:
-        """Get all votes by a user"""
-        return (
-            self.db.query(Vote)
-            .filter(Vote.user_id == user_id)
-            .order_by(Vote.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        """Get all votes by a user, newest first"""
+        query = self.db.query(Vote).filter(Vote.user_id == user_id)
+        query = apply_keyset(query, Vote, cursor, descending=True)
+        return query.offset(skip).limit(limit).all()
 
     def get_celebrity_votes(
-        self, celebrity_id: str, skip: int = 0, limit: int = 100
+        self,
+        celebrity_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[Vote]:
-        """Get all votes for a celebrity"""
-        return (
-            self.db.query(Vote)
-            .filter(Vote.celebrity_id == celebrity_id)
-            .order_by(Vote.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        """Get all votes for a celebrity, newest first"""
+        query = self.db.query(Vote).filter(Vote.celebrity_id == celebrity_id)
+        query = apply_keyset(query, Vote, cursor, descending=True)
+        return query.offset(skip).limit(limit).all()
 
     def get_all_votes(
         self,
@@ -123,8 +241,9 @@ class VoteService:
         celebrity_id: Optional[str] = None,
         user_id: Optional[str] = None,
         mbti_type: Optional[MBTIType] = None,
+        cursor: Optional[str] = None,
     ) -> List[Vote]:
-        """Get all votes with optional filters"""
+        """Get all votes with optional filters, newest first"""
         query = self.db.query(Vote)
 
         if celebrity_id:
@@ -134,7 +253,8 @@ class VoteService:
         if mbti_type:
             query = query.filter(Vote.mbti_type == mbti_type)
 
-        return query.order_by(Vote.created_at.desc()).offset(skip).limit(limit).all()
+        query = apply_keyset(query, Vote, cursor, descending=True)
+        return query.offset(skip).limit(limit).all()
 
     def delete_vote(self, vote_id: str, user_id: str) -> bool:
         """Delete a vote (only by the user who created it)"""
@@ -171,50 +291,59 @@ class VoteService:
             if daily_stats.votes_count <= 0:
                 self.db.delete(daily_stats)
 
+        self.tally_service.apply_vote(
+            vote.celebrity_id, vote.mbti_type, vote.reason is not None, -1
+        )
+        self.analytics_counters.count_vote(vote.mbti_type, -1)
+
         self.db.delete(vote)
         self.db.commit()
+        # Like the daily stats, the rolling quota no longer counts the vote
+        # (a no-op once it has left the window, or for rules it was not under)
+        self.rate_limiter.release_member(
+            self._vote_quota_rules(user_id, not vote.reason, True), vote.id
+        )
+        generation = search_sync.votes_written(self.db)
+        search_sync.votes_changed(vote.celebrity_id, vote.mbti_type, -1, generation)
+        live_events.votes_changed(vote.celebrity_id, vote.mbti_type, -1)
 
         return True
 
     def get_celebrity_vote_statistics(self, celebrity_id: str) -> Dict[str, Any]:
         """Get vote statistics for a celebrity"""
-        # Check if celebrity exists
-        celebrity = (
-            self.db.query(Celebrity).filter(Celebrity.id == celebrity_id).first()
+        # Celebrity and its precomputed tally in one primary-key lookup
+        row = (
+            self.db.query(Celebrity.name, CelebrityVoteTally)
+            .outerjoin(
+                CelebrityVoteTally, CelebrityVoteTally.celebrity_id == Celebrity.id
+            )
+            .filter(Celebrity.id == celebrity_id)
+            .first()
         )
-        if not celebrity:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Celebrity not found"
             )
 
-        # Get total votes count
-        total_votes = (
-            self.db.query(func.count(Vote.id))
-            .filter(Vote.celebrity_id == celebrity_id)
-            .scalar()
-        )
-
-        # Get votes by MBTI type
-        mbti_counts = (
-            self.db.query(Vote.mbti_type, func.count(Vote.id).label("count"))
-            .filter(Vote.celebrity_id == celebrity_id)
-            .group_by(Vote.mbti_type)
-            .order_by(desc("count"))
-            .all()
-        )
-
-        # Get votes with reasons vs without reasons
-        votes_with_reason = (
-            self.db.query(func.count(Vote.id))
-            .filter(and_(Vote.celebrity_id == celebrity_id, Vote.reason.isnot(None)))
-            .scalar()
-        )
-
+        celebrity_name, tally = row
+        return self.celebrity_statistics_from_tally(celebrity_id, celebrity_name, tally)
+
+    @staticmethod
+    def celebrity_statistics_from_tally(
+        celebrity_id: str,
+        celebrity_name: str,
+        tally: Optional[CelebrityVoteTally],
+    ) -> Dict[str, Any]:
+        """Vote statistics payload for a celebrity from its precomputed tally"""
+        distribution = VoteTallyService.tally_distribution(tally)
+        total_votes = distribution["total_votes"]
+        votes_with_reason = distribution["votes_with_reason"]
+        mbti_counts = distribution["mbti_counts"]
         votes_without_reason = total_votes - votes_with_reason
 
         return {
             "celebrity_id": celebrity_id,
-            "celebrity_name": celebrity.name,
+            "celebrity_name": celebrity_name,
             "total_votes": total_votes,
             "votes_with_reason": votes_with_reason,
             "votes_without_reason": votes_without_reason,
@@ -277,7 +406,14 @@ class VoteService:
             "user_name": user.name,
             "total_votes": total_votes,
             "today_votes": today_votes,
-            "votes_remaining_today": max(0, 10 - today_votes),
+            # Same rolling windows as the quota check in create_vote
+            "votes_remaining_today": self.rate_limiter.remaining(
+                self._vote_quota_rules(
+                    user_id,
+                    False,
+                    user.created_at is not None and self._is_new_user(user.created_at),
+                )
+            ),
             "mbti_distribution": [
                 {
                     "mbti_type": mbti_type.value,
@@ -302,32 +438,4 @@ class VoteService:
 
     def get_popular_celebrities_by_votes(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get celebrities ordered by number of votes"""
-        celebrities = (
-            self.db.query(Celebrity, func.count(Vote.id).label("vote_count"))
-            .outerjoin(Vote)
-            .group_by(Celebrity.id)
-            .order_by(desc("vote_count"))
-            .limit(limit)
-            .all()
-        )
-
-        return [
-            {
-                "celebrity": celebrity,
-                "vote_count": vote_count,
-                "top_mbti": self._get_celebrity_top_mbti(celebrity.id),
-            }
-            for celebrity, vote_count in celebrities
-        ]
-
-    def _get_celebrity_top_mbti(self, celebrity_id: str) -> Optional[str]:
-        """Get the most voted MBTI type for a celebrity"""
-        result = (
-            self.db.query(Vote.mbti_type, func.count(Vote.id).label("count"))
-            .filter(Vote.celebrity_id == celebrity_id)
-            .group_by(Vote.mbti_type)
-            .order_by(desc("count"))
-            .first()
-        )
-
-        return result[0].value if result else None
+        return LeaderboardService(self.db).get_top_celebrities(limit)
@@ -0,0 +1,185 @@
+from typing import Optional, Dict, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, update
+from app.database.database import upsert
+from app.database.models import Celebrity, CelebrityVoteTally, MBTIType, Vote
+
+
+class VoteTallyService:
+    """Maintains the denormalized ``celebrity_vote_tallies`` counters.
+
+    Write helpers never commit: they are meant to run inside the caller's
+    transaction so that a vote and its tally change succeed or fail together.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_vote(
+        self,
+        celebrity_id: str,
+        mbti_type: MBTIType,
+        has_reason: bool,
+        delta: int = 1,
+    ) -> bool:
+        """
+        Add ``delta`` (1 for a new vote, -1 for a removed one) to a tally row
+
+        Returns False when the celebrity does not exist, so the tally UPDATE
+        can stand in for a separate existence check on the vote write path.
+        """
+        type_column = getattr(
+            CelebrityVoteTally, CelebrityVoteTally.count_column_name(mbti_type)
+        )
+        values = {
+            CelebrityVoteTally.total_votes: CelebrityVoteTally.total_votes + delta,
+            type_column: type_column + delta,
+        }
+        if has_reason:
+            values[CelebrityVoteTally.votes_with_reason] = (
+                CelebrityVoteTally.votes_with_reason + delta
+            )
+
+        # Increment atomically and read the new counters back, in one statement
+        # where the database supports it
+        count_columns = [
+            getattr(CelebrityVoteTally, CelebrityVoteTally.count_column_name(t))
+            for t in MBTIType
+        ]
+        statement = (
+            update(CelebrityVoteTally)
+            .where(CelebrityVoteTally.celebrity_id == celebrity_id)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.get_bind().dialect.update_returning:
+            row = self.db.execute(
+                statement.returning(CelebrityVoteTally.top_mbti_type, *count_columns)
+            ).first()
+        elif self.db.execute(statement).rowcount:
+            # No UPDATE ... RETURNING (e.g. MySQL): read the counters back
+            row = (
+                self.db.query(CelebrityVoteTally.top_mbti_type, *count_columns)
+                .filter(CelebrityVoteTally.celebrity_id == celebrity_id)
+                .first()
+            )
+        else:
+            row = None
+
+        if row is None:
+            if self.db.get(Celebrity, celebrity_id) is None:
+                return False
+            if delta < 0:
+                return True
+            # Celebrity created without a tally row: add an all-zero one,
+            # unless a concurrent first vote just did, and count again
+            upsert(
+                self.db,
+                CelebrityVoteTally,
+                self._empty_tally_values(celebrity_id),
+                [CelebrityVoteTally.celebrity_id],
+                None,
+            )
+            return self.apply_vote(celebrity_id, mbti_type, has_reason, delta)
+
+        # Only touch the leaderboard's top type when the vote changed it
+        current_top, *counts = row
+        top_type = CelebrityVoteTally.pick_top_type(dict(zip(MBTIType, counts)))
+        if top_type != current_top:
+            self.db.execute(
+                update(CelebrityVoteTally)
+                .where(CelebrityVoteTally.celebrity_id == celebrity_id)
+                .values(top_mbti_type=top_type)
+                .execution_options(synchronize_session=False)
+            )
+        return True
+
+    def ensure_tally(self, celebrity_id: str) -> None:
+        """Add an all-zero tally row so a new celebrity shows up on the leaderboard"""
+        if self.get_tally(celebrity_id) is None:
+            self.db.add(self._empty_tally(celebrity_id))
+
+    def get_tally(self, celebrity_id: str) -> Optional[CelebrityVoteTally]:
+        """Get the tally row for a celebrity"""
+        return self.db.get(CelebrityVoteTally, celebrity_id)
+
+    def rebuild_tallies(self) -> int:
+        """
+        Recompute every tally row from the ``votes`` table
+
+        Celebrities without votes get an all-zero row. Returns the number of
+        tally rows written.
+        """
+        per_type = (
+            self.db.query(
+                Vote.celebrity_id,
+                Vote.mbti_type,
+                func.count(Vote.id),
+                func.sum(case((Vote.reason.isnot(None), 1), else_=0)),
+            )
+            .group_by(Vote.celebrity_id, Vote.mbti_type)
+            .all()
+        )
+
+        tallies: Dict[str, CelebrityVoteTally] = {
+            celebrity_id: self._empty_tally(celebrity_id)
+            for (celebrity_id,) in self.db.query(Celebrity.id).all()
+        }
+        for celebrity_id, mbti_type, count, with_reason in per_type:
+            tally = tallies.get(celebrity_id)
+            if tally is None:
+                # Orphaned votes are not tallied
+                continue
+            column_name = CelebrityVoteTally.count_column_name(mbti_type)
+            setattr(tally, column_name, getattr(tally, column_name) + count)
+            tally.total_votes += count
+            tally.votes_with_reason += with_reason or 0
+
+        for tally in tallies.values():
+            tally.top_mbti_type = CelebrityVoteTally.pick_top_type(tally.type_counts())
+
+        self.db.query(CelebrityVoteTally).delete()
+        self.db.add_all(tallies.values())
+        self.db.commit()
+
+        return len(tallies)
+
+    @staticmethod
+    def tally_distribution(tally: Optional[CelebrityVoteTally]) -> Dict[str, Any]:
+        """Turn a tally row into the distribution fields of the statistics payload"""
+        if tally is None:
+            return {
+                "total_votes": 0,
+                "votes_with_reason": 0,
+                "mbti_counts": [],
+            }
+
+        # Most voted first; ties keep the MBTIType declaration order
+        mbti_counts = sorted(
+            (
+                (mbti_type, count)
+                for mbti_type, count in tally.type_counts().items()
+                if count > 0
+            ),
+            key=lambda item: -item[1],
+        )
+        return {
+            "total_votes": tally.total_votes,
+            "votes_with_reason": tally.votes_with_reason,
+            "mbti_counts": mbti_counts,
+        }
+
+    @staticmethod
+    def _empty_tally(celebrity_id: str) -> CelebrityVoteTally:
+        return CelebrityVoteTally(**VoteTallyService._empty_tally_values(celebrity_id))
+
+    @staticmethod
+    def _empty_tally_values(celebrity_id: str) -> Dict[str, Any]:
+        values: Dict[str, Any] = {
+            "celebrity_id": celebrity_id,
+            "total_votes": 0,
+            "votes_with_reason": 0,
+        }
+        for mbti_type in MBTIType:
+            values[CelebrityVoteTally.count_column_name(mbti_type)] = 0
+        return values
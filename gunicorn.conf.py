@@ -0,0 +1,13 @@
+"""
+Gunicorn settings for the production image
+
+Gunicorn loads this file from the working directory. The worker count comes
+from ``WEB_CONCURRENCY``, which gunicorn reads by itself.
+"""
+
+
+def on_starting(server):
+    """Migrate the database once, in the master, before any worker forks"""
+    from migrate import migrate
+
+    migrate()
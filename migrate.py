@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Apply pending database migrations
+
+Run this once per deployment before starting the web workers. The
+production gunicorn server calls it from its master process
+(``gunicorn.conf.py``); workers then only check that the database is at
+head.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import create_tables, engine
+from app.database.migrations import head_revision
+
+
+def migrate() -> None:
+    """Upgrade the database to the newest revision"""
+    try:
+        create_tables()
+        print(f"Database is at revision {head_revision()}")
+    finally:
+        # Pooled connections must not leak into forked worker processes
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    print("Migrating the 16型花名册 database")
+    print("=" * 50)
+    try:
+        migrate()
+    except Exception as e:
+        print(f"Error migrating the database: {e}")
+        sys.exit(1)
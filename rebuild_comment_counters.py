@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Rebuild the comment counter tables from the comments table
+
+Run this after importing comments with scripts that write to the database
+directly, or whenever the comment statistics look out of sync.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, create_tables
+from app.services.comment_counter_service import CommentCounterService
+
+
+def rebuild_comment_counters() -> None:
+    """Recompute all per-celebrity and per-user comment counters"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        counter_service = CommentCounterService(db)
+        rebuilt = counter_service.rebuild_counters()
+        print(
+            f"Rebuilt comment counters for {rebuilt['celebrities']} celebrities "
+            f"and {rebuilt['users']} users"
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding comment counters: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Rebuilding comment counters for 16型花名册")
+    print("=" * 50)
+    rebuild_comment_counters()
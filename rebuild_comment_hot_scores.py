@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Recompute comment reaction counts and hot scores from the reaction counters
+
+Run this after changing ``HALF_LIFE_SECONDS`` in ``app/core/hot_score.py``
+or after importing reactions directly into the database.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, create_tables
+from app.services.comment_reaction_service import CommentReactionService
+
+
+def rebuild_comment_hot_scores() -> None:
+    """Recompute reaction_count and hot_score for every comment"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        reaction_service = CommentReactionService(db)
+        rebuilt = reaction_service.rebuild_hot_scores()
+        print(f"Rebuilt hot scores for {rebuilt} comments")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding hot scores: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Rebuilding comment hot scores for 16型花名册")
+    print("=" * 50)
+    rebuild_comment_hot_scores()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Rebuild the celebrities.search_document column
+
+Run this after importing celebrities or tags with scripts that write to the
+database directly, or after changing the search text normalization.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, create_tables
+from app.search import documents
+
+
+def rebuild_search_documents() -> None:
+    """Recompute the search document of every celebrity"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        rebuilt = documents.backfill(db)
+        print(f"Rebuilt search documents for {rebuilt} celebrities")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding search documents: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Rebuilding search documents for 16型花名册")
+    print("=" * 50)
+    rebuild_search_documents()
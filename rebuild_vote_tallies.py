@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Rebuild the celebrity_vote_tallies table from the votes table
+
+Run this after importing votes with scripts that write to the database
+directly, or whenever the statistics look out of sync with the raw votes.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, create_tables
+from app.services.vote_tally_service import VoteTallyService
+
+
+def rebuild_vote_tallies() -> None:
+    """Recompute all per-celebrity vote tallies"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        tally_service = VoteTallyService(db)
+        rebuilt = tally_service.rebuild_tallies()
+        print(f"Rebuilt vote tallies for {rebuilt} celebrities")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding vote tallies: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Rebuilding vote tallies for 16型花名册")
+    print("=" * 50)
+    rebuild_vote_tallies()
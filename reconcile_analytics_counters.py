@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Correct drift of the analytics counters against the base tables
+
+The server does this every ANALYTICS_RECONCILE_INTERVAL seconds. Set that to
+0 and run this from cron instead to reconcile from a single place.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal
+from app.services.analytics_counter_service import AnalyticsCounterService
+
+
+def reconcile_analytics_counters() -> None:
+    """Recompute the counters and print the corrections"""
+    db = SessionLocal()
+    try:
+        drift = AnalyticsCounterService(db).reconcile()
+        print(f"Corrected analytics counter drift: {drift}" if drift else "No drift")
+    except Exception as e:
+        db.rollback()
+        print(f"Error reconciling analytics counters: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    reconcile_analytics_counters()
@@ -91,7 +91,57 @@ async function apiCall(endpoint, options = {}) {
 }
 
 // Search functionality
+// Search-as-you-type goes over one WebSocket: the server debounces keystrokes
+// and only answers the latest query, so superseded searches resolve to null
+let searchSocket = null;
+let searchSeq = 0;
+const pendingSearches = new Map();
+
+function settlePendingSearches(upToSeq, data) {
+    for (const [seq, resolve] of pendingSearches) {
+        if (seq <= upToSeq) {
+            resolve(seq === upToSeq ? data : null);
+            pendingSearches.delete(seq);
+        }
+    }
+}
+
+function openSearchSocket() {
+    if (searchSocket && searchSocket.readyState <= WebSocket.OPEN) {
+        return searchSocket;
+    }
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    searchSocket = new WebSocket(`${protocol}//${window.location.host}/search/ws`);
+    searchSocket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.error) {
+            showMessage('Search failed: ' + data.error, 'error');
+            settlePendingSearches(data.seq ?? searchSeq, null);
+            return;
+        }
+        settlePendingSearches(data.seq, data);
+    };
+    searchSocket.onclose = () => {
+        settlePendingSearches(searchSeq, null);
+        searchSocket = null;
+    };
+    return searchSocket;
+}
+
 async function searchCelebrities(query, searchType = 'all') {
+    if ('WebSocket' in window) {
+        const socket = openSearchSocket();
+        const seq = ++searchSeq;
+        const result = new Promise((resolve) => pendingSearches.set(seq, resolve));
+        const send = () => socket.send(JSON.stringify({ seq, q: query, search_type: searchType }));
+        if (socket.readyState === WebSocket.OPEN) {
+            send();
+        } else {
+            socket.addEventListener('open', send, { once: true });
+        }
+        return result;
+    }
+
     try {
         const response = await apiCall(`/search/?q=${encodeURIComponent(query)}&search_type=${searchType}`);
         return response;
@@ -0,0 +1,140 @@
+"""
+Shared pytest fixtures for in-process service tests
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.recent_comments import RecentCommentBuffer
+from app.database.migrations import upgrade_database
+from app.database.models import User, Celebrity, UserRole
+from app.search import (
+    CelebritySearchIndex,
+    FacetIndex,
+    FuzzyNameIndex,
+    SearchResultCache,
+    SuggestionIndex,
+)
+from app.search.backends import MemoryIndexBackend, create_search_backend
+
+
+@pytest.fixture
+def db_engine():
+    """Fresh in-memory SQLite database built by the migration chain"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    upgrade_database(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    """Database session bound to the in-memory test database"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db_session):
+    """Factory creating users directly in the test database"""
+    counter = {"n": 0}
+
+    def _make_user(name: str = "tester", role: UserRole = UserRole.CLIENT) -> User:
+        counter["n"] += 1
+        user = User(
+            email=f"{name}{counter['n']}@example.com",
+            hashed_password="not-a-real-hash",
+            name=name,
+            role=role,
+        )
+        db_session.add(user)
+        db_session.commit()
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def make_celebrity(db_session):
+    """Factory creating celebrities directly in the test database"""
+
+    def _make_celebrity(name: str, name_en: str = None, **fields) -> Celebrity:
+        celebrity = Celebrity(name=name, name_en=name_en, **fields)
+        db_session.add(celebrity)
+        db_session.commit()
+        return celebrity
+
+    return _make_celebrity
+
+
+@pytest.fixture
+def search_index(monkeypatch):
+    """Fresh process-wide search index, isolated from other tests"""
+    index = CelebritySearchIndex()
+    monkeypatch.setattr("app.search.index._search_index", index)
+    return index
+
+
+@pytest.fixture
+def fuzzy_index(monkeypatch):
+    """Fresh process-wide fuzzy name index, isolated from other tests"""
+    index = FuzzyNameIndex()
+    monkeypatch.setattr("app.search.fuzzy._fuzzy_index", index)
+    return index
+
+
+@pytest.fixture
+def facet_index(monkeypatch):
+    """Fresh process-wide facet index, isolated from other tests"""
+    index = FacetIndex()
+    monkeypatch.setattr("app.search.facets._facet_index", index)
+    return index
+
+
+@pytest.fixture
+def suggestion_index(monkeypatch):
+    """Fresh process-wide suggestion index, isolated from other tests"""
+    index = SuggestionIndex()
+    monkeypatch.setattr("app.search.suggestions._suggestion_index", index)
+    return index
+
+
+@pytest.fixture
+def search_cache(monkeypatch):
+    """Fresh process-wide search result cache, isolated from other tests"""
+    cache = SearchResultCache()
+    monkeypatch.setattr("app.search.cache._search_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def recent_comments(monkeypatch):
+    """Fresh process-wide recent comments buffer, isolated from other tests"""
+    buffer = RecentCommentBuffer(capacity=5)
+    monkeypatch.setattr("app.core.recent_comments._buffer", buffer)
+    return buffer
+
+
+@pytest.fixture
+def memory_backend(monkeypatch, search_index):
+    """The in-process index backend over ``search_index``, installed process-wide"""
+    backend = MemoryIndexBackend(search_index)
+    monkeypatch.setattr("app.search.backends._search_backend", backend)
+    return backend
+
+
+@pytest.fixture(params=["memory", "like", "fts5"])
+def search_backend(request, monkeypatch, search_index, fuzzy_index, facet_index):
+    """Each SQLite-capable search backend in turn, installed process-wide"""
+    backend = create_search_backend(request.param)
+    monkeypatch.setattr("app.search.backends._search_backend", backend)
+    return backend
@@ -0,0 +1,187 @@
+"""
+Minimal in-process stand-in for the redis-py client
+
+Implements only the commands used by ``app.core.rate_limit.RedisBackend`` and
+``app.core.live_events.RedisTransport``.
+"""
+
+import fnmatch
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FakeRedis:
+    """Dictionary-backed subset of ``redis.Redis``"""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {}
+        self.expirations: Dict[str, int] = {}
+        self.versions: Dict[str, int] = {}
+        self.pattern_handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def _touch(self, key: str) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    # Sorted sets
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        zset = self.data.setdefault(key, {})
+        added = len([m for m in mapping if m not in zset])
+        zset.update(mapping)
+        self._touch(key)
+        return added
+
+    def zrem(self, key: str, *members: str) -> int:
+        zset = self.data.get(key, {})
+        removed = 0
+        for member in members:
+            if zset.pop(member, None) is not None:
+                removed += 1
+        self._touch(key)
+        return removed
+
+    def zremrangebyscore(self, key: str, minimum: float, maximum: float) -> int:
+        zset = self.data.get(key, {})
+        doomed = [m for m, score in zset.items() if minimum <= score <= maximum]
+        for member in doomed:
+            del zset[member]
+        self._touch(key)
+        return len(doomed)
+
+    def zcard(self, key: str) -> int:
+        return len(self.data.get(key, {}))
+
+    def zcount(self, key: str, minimum: Any, maximum: Any) -> int:
+        def bound(value: Any) -> Callable[[float], bool]:
+            value = str(value)
+            if value in ("-inf", "+inf"):
+                return lambda score: True
+            if value.startswith("("):
+                return lambda score: score > float(value[1:])
+            return lambda score: score >= float(value)
+
+        above = bound(minimum)
+        maximum = str(maximum)
+        return len(
+            [
+                score
+                for score in self.data.get(key, {}).values()
+                if above(score) and (maximum == "+inf" or score <= float(maximum))
+            ]
+        )
+
+    def zrange(
+        self, key: str, start: int, end: int, withscores: bool = False
+    ) -> List[Any]:
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        stop = None if end == -1 else end + 1
+        selected = items[start:stop]
+        if withscores:
+            return [(member.encode(), score) for member, score in selected]
+        return [member.encode() for member, _ in selected]
+
+    # Hashes
+    def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        return {
+            field.encode(): str(value).encode()
+            for field, value in self.data.get(key, {}).items()
+        }
+
+    def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        self.data.setdefault(key, {}).update(mapping)
+        self._touch(key)
+        return len(mapping)
+
+    # Pub/sub
+    def publish(self, channel: str, message: str) -> int:
+        receivers = 0
+        for pattern, handler in list(self.pattern_handlers.items()):
+            if fnmatch.fnmatchcase(channel, pattern):
+                handler(
+                    {
+                        "type": "pmessage",
+                        "pattern": pattern.encode(),
+                        "channel": channel.encode(),
+                        "data": message.encode(),
+                    }
+                )
+                receivers += 1
+        return receivers
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> "FakePubSub":
+        return FakePubSub(self)
+
+    # Keys
+    def expire(self, key: str, seconds: int) -> bool:
+        self.expirations[key] = seconds
+        return key in self.data
+
+
+class FakePubSub:
+    """Pattern subscriptions whose handlers run synchronously on publish"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+
+    def psubscribe(self, **handlers: Callable[[Dict[str, Any]], None]) -> None:
+        self.client.pattern_handlers.update(handlers)
+
+    def run_in_thread(self, sleep_time: float = 0, daemon: bool = False) -> Any:
+        return self
+
+    def stop(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.client.pattern_handlers.clear()
+
+
+class FakePipeline:
+    """Queues commands after ``multi()`` and honours ``watch()`` conflicts"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.queue: List[Any] = []
+        self.watched: Dict[str, int] = {}
+        self.buffering = True
+
+    def __enter__(self) -> "FakePipeline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.reset()
+
+    def __getattr__(self, name: str) -> Any:
+        command = getattr(self.client, name)
+
+        def call(*args: Any, **kwargs: Any) -> Optional["FakePipeline"]:
+            if not self.buffering:
+                return command(*args, **kwargs)
+            self.queue.append((command, args, kwargs))
+            return self
+
+        return call
+
+    def watch(self, *keys: str) -> None:
+        self.watched = {key: self.client.versions.get(key, 0) for key in keys}
+        self.buffering = False
+
+    def multi(self) -> None:
+        self.buffering = True
+
+    def execute(self) -> List[Any]:
+        from redis.exceptions import WatchError
+
+        for key, version in self.watched.items():
+            if self.client.versions.get(key, 0) != version:
+                self.reset()
+                raise WatchError("Watched variable changed")
+        results = [command(*args, **kwargs) for command, args, kwargs in self.queue]
+        self.reset()
+        return results
+
+    def reset(self) -> None:
+        self.queue = []
+        self.watched = {}
+        self.buffering = True
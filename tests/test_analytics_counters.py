@@ -0,0 +1,111 @@
+"""
+Tests for the incrementally maintained analytics counters
+"""
+
+from sqlalchemy import event
+
+from app.database.models import AnalyticsCounter, CelebrityTag, Tag, Vote
+from app.schemas.celebrity import CelebrityCreate
+from app.schemas.vote import VoteCreate
+from app.services.analytics_counter_service import AnalyticsCounterService
+from app.services.celebrity_service import CelebrityService
+from app.services.search_service import SearchService
+from app.services.vote_service import VoteService
+
+
+def _analytics(db_session):
+    return SearchService(db_session).get_search_analytics()
+
+
+class TestAnalyticsCounters:
+    """Test that writes keep the counters exact and reads stay cheap"""
+
+    def test_writes_update_counters(
+        self,
+        db_session,
+        make_user,
+        search_index,
+        facet_index,
+        suggestion_index,
+        search_cache,
+    ):
+        """Test that celebrity, tag and vote writes are counted"""
+        service = CelebrityService(db_session)
+        jay = service.create_celebrity(CelebrityCreate(name="周杰伦", name_en="Jay"))
+        eason = service.create_celebrity(
+            CelebrityCreate(name="陈奕迅", name_en="Eason")
+        )
+        service.add_tag_to_celebrity(jay.id, "歌手")
+        service.add_tag_to_celebrity(eason.id, "歌手")
+        service.add_tag_to_celebrity(jay.id, "演员")
+        service.remove_tag_from_celebrity(jay.id, "演员")
+
+        votes = VoteService(db_session)
+        for celebrity_id, mbti_type in [
+            (jay.id, "ISFP"),
+            (eason.id, "ISFP"),
+            (eason.id, "INFP"),
+        ]:
+            votes.create_vote(
+                make_user().id,
+                VoteCreate(celebrity_id=celebrity_id, mbti_type=mbti_type),
+            )
+        vote = db_session.query(Vote).filter(Vote.mbti_type == "INFP").one()
+        votes.delete_vote(vote.id, vote.user_id)
+
+        assert _analytics(db_session) == {
+            "total_celebrities": 2,
+            "total_tags": 2,
+            "total_votes": 2,
+            "popular_tags": [{"tag": "歌手", "count": 2}],
+            "popular_mbti_types": [{"type": "ISFP", "count": 2}],
+        }
+
+    def test_read_cost_does_not_depend_on_data_size(
+        self, db_engine, db_session, make_user, make_celebrity
+    ):
+        """Test that analytics are answered by two statements"""
+        celebrity = make_celebrity("张学友", "Jacky Cheung")
+        for _ in range(5):
+            VoteService(db_session).create_vote(
+                make_user().id,
+                VoteCreate(celebrity_id=celebrity.id, mbti_type="ESFJ"),
+            )
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        analytics = _analytics(db_session)
+
+        assert len(statements) == 2
+        assert analytics["total_votes"] == 5
+        assert all("FROM votes" not in sql for sql in statements)
+
+    def test_reconcile_corrects_drift(self, db_session, make_user, make_celebrity):
+        """Test that rows written behind the services' back are reconciled"""
+        celebrity = make_celebrity("王菲", "Faye Wong")
+        tag = Tag(name="歌手")
+        db_session.add(tag)
+        db_session.flush()
+        db_session.add(CelebrityTag(celebrity_id=celebrity.id, tag_id=tag.id))
+        db_session.add(
+            Vote(user_id=make_user().id, celebrity_id=celebrity.id, mbti_type="INFP")
+        )
+        db_session.commit()
+
+        counters = AnalyticsCounterService(db_session)
+        drift = counters.reconcile()
+
+        assert drift == {
+            "celebrities": 1,
+            "tags": 1,
+            "votes": 1,
+            "votes:INFP": 1,
+            f"tag:{tag.id}": 1,
+        }
+        assert counters.reconcile() == {}
+        assert db_session.get(AnalyticsCounter, "votes").value == 1
+        assert _analytics(db_session)["popular_tags"] == [{"tag": "歌手", "count": 1}]
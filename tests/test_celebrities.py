@@ -57,6 +57,65 @@ def test_get_celebrity_by_id():
         return False
 
 
+def test_get_celebrity_full():
+    """Test getting the celebrity page aggregate in one request"""
+    try:
+        response = test_config.make_request("GET", "/celebrities/?limit=1")
+        celebrities = response.json() if response.status_code == 200 else []
+        if not celebrities:
+            test_config.add_test_result(
+                "Get Celebrity Full", False, "No celebrities found"
+            )
+            return False
+
+        celebrity_id = celebrities[0]["id"]
+        response = test_config.make_request("GET", f"/celebrities/{celebrity_id}/full")
+        data = response.json()
+        success = (
+            response.status_code == 200
+            and data["celebrity"]["id"] == celebrity_id
+            and "mbti_distribution" in data["vote_statistics"]
+            and "total_comments" in data["comment_statistics"]
+            and isinstance(data["comments"], list)
+        )
+        test_config.add_test_result(
+            "Get Celebrity Full",
+            success,
+            f"Status: {response.status_code}, Threads: {len(data.get('comments', []))}",
+        )
+        return success
+    except Exception as e:
+        test_config.add_test_result("Get Celebrity Full", False, str(e))
+        return False
+
+
+def test_get_celebrities_batch():
+    """Test getting several celebrities by ID in one request"""
+    try:
+        response = test_config.make_request("GET", "/celebrities/?limit=3")
+        celebrities = response.json() if response.status_code == 200 else []
+        ids = [celebrity["id"] for celebrity in celebrities]
+        requested = list(reversed(ids)) + ["no-such-celebrity"]
+        response = test_config.make_request(
+            "GET", f"/celebrities/batch?ids={','.join(requested)}"
+        )
+        data = response.json()
+        success = (
+            response.status_code == 200
+            and [c["id"] for c in data["celebrities"]] == requested[:-1]
+            and data["missing_ids"] == ["no-such-celebrity"]
+        )
+        test_config.add_test_result(
+            "Get Celebrities Batch",
+            success,
+            f"Status: {response.status_code}, Missing: {data.get('missing_ids')}",
+        )
+        return success
+    except Exception as e:
+        test_config.add_test_result("Get Celebrities Batch", False, str(e))
+        return False
+
+
 def test_search_celebrities():
     """Test celebrity search functionality"""
     try:
@@ -206,6 +265,8 @@ def run_celebrities_tests():
     tests = [
         test_get_all_celebrities,
         test_get_celebrity_by_id,
+        test_get_celebrity_full,
+        test_get_celebrities_batch,
         test_search_celebrities,
         test_get_popular_celebrities,
         test_get_celebrities_by_tag,
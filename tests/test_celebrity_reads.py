@@ -0,0 +1,241 @@
+"""
+Tests for celebrity read paths: the page aggregate, batch lookups and eager
+loading
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.database.models import Celebrity, CelebrityTag, Tag
+from app.schemas.celebrity import CelebrityResponse
+from app.schemas.comment import CommentCreate
+from app.schemas.vote import VoteCreate
+from app.search import sync as search_sync
+from app.services.celebrity_service import MAX_BATCH_IDS, CelebrityService
+from app.services.comment_service import CommentService
+from app.services.search_service import SearchService
+from app.services.vote_service import VoteService
+
+# Statements behind GET /celebrities/{id}/full, whatever the page holds
+FULL_PAGE_STATEMENTS = 6
+
+
+def _count_statements(db_engine, call):
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:
+        result = call()
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+    return result, statements
+
+
+def _tag(db_session, celebrity_id, name):
+    tag = Tag(name=name)
+    db_session.add(tag)
+    db_session.flush()
+    db_session.add(CelebrityTag(celebrity_id=celebrity_id, tag_id=tag.id))
+    db_session.commit()
+
+
+def _comment(db_session, user, celebrity_id, content, parent=None):
+    return CommentService(db_session).create_comment(
+        user.id,
+        CommentCreate(
+            celebrity_id=celebrity_id,
+            content=content,
+            parent_id=parent.id if parent else None,
+        ),
+    )
+
+
+class TestCelebrityFull:
+    """Test the single-request celebrity page aggregate"""
+
+    def test_aggregate_contents(self, db_session, make_user, make_celebrity):
+        """Test that profile, tags, votes, threads and stats are all returned"""
+        celebrity = make_celebrity("周杰伦", "Jay Chou")
+        _tag(db_session, celebrity.id, "歌手")
+        _tag(db_session, celebrity.id, "导演")
+        VoteService(db_session).create_vote(
+            make_user().id, VoteCreate(celebrity_id=celebrity.id, mbti_type="INFP")
+        )
+        user = make_user()
+        first = _comment(db_session, user, celebrity.id, "first")
+        reply = _comment(db_session, user, celebrity.id, "reply", first)
+        deep = _comment(db_session, user, celebrity.id, "deep", reply)
+        _comment(db_session, user, celebrity.id, "deeper", deep)
+        second = _comment(db_session, user, celebrity.id, "second")
+
+        full = CelebrityService(db_session).get_celebrity_full(celebrity.id)
+
+        assert full["celebrity"].name == "周杰伦"
+        assert full["tags"] == sorted(["歌手", "导演"])
+        assert full["vote_statistics"]["total_votes"] == 1
+        assert full["vote_statistics"]["top_mbti_type"] == "INFP"
+        assert full["comment_statistics"]["total_comments"] == 5
+        assert full["comment_statistics"]["top_level_comments"] == 2
+        assert full["comment_statistics"]["reply_comments"] == 3
+
+        threads = {t["comment"].id: t for t in full["comments"]}
+        assert set(threads) == {first.id, second.id}
+        chain, node = [], threads[first.id]
+        while node["replies"]:
+            node = node["replies"][0]
+            chain.append(node["comment"].content)
+        assert chain == ["reply", "deep", "deeper"]
+        assert full["comments_next_cursor"] is None
+
+    def test_statement_cap(self, db_engine, db_session, make_user, make_celebrity):
+        """Test that the aggregate costs a fixed number of statements"""
+        celebrity = make_celebrity("刘德华", "Andy Lau")
+        celebrity_id = celebrity.id
+        service = CelebrityService(db_session)
+        user = make_user()
+
+        _tag(db_session, celebrity_id, "演员")
+        root = _comment(db_session, user, celebrity_id, "root")
+        _comment(db_session, user, celebrity_id, "reply", root)
+        db_session.expire_all()
+        _, small = _count_statements(
+            db_engine, lambda: service.get_celebrity_full(celebrity_id)
+        )
+
+        for i in range(5):
+            _tag(db_session, celebrity_id, f"tag{i}")
+            parent = _comment(db_session, user, celebrity_id, f"root{i}")
+            for depth in range(3):
+                parent = _comment(db_session, user, celebrity_id, "r", parent)
+        db_session.expire_all()
+        full, large = _count_statements(
+            db_engine, lambda: service.get_celebrity_full(celebrity_id, 3)
+        )
+
+        assert len(small) == len(large) <= FULL_PAGE_STATEMENTS
+        assert len(full["tags"]) == 6
+        assert len(full["comments"]) == 3
+        assert full["comments_next_cursor"] is not None
+
+    def test_missing_celebrity(self, db_session):
+        """Test that an unknown ID is a 404"""
+        with pytest.raises(HTTPException) as error:
+            CelebrityService(db_session).get_celebrity_full("missing")
+        assert error.value.status_code == 404
+
+
+class TestCelebrityBatch:
+    """Test looking up many celebrities at once"""
+
+    def test_order_missing_and_tags(self, db_engine, db_session, make_celebrity):
+        """Test that order is kept, misses are reported and tags come along"""
+        celebrities = [make_celebrity(f"名人{i}") for i in range(20)]
+        for celebrity in celebrities:
+            _tag(db_session, celebrity.id, f"标签{celebrity.name}")
+        ids = [celebrity.id for celebrity in reversed(celebrities)]
+        requested = ids[:5] + ["missing-1"] + ids[5:] + [ids[0], "missing-2"]
+        db_session.expire_all()
+
+        service = CelebrityService(db_session)
+        (found, missing), statements = _count_statements(
+            db_engine,
+            lambda: service.get_celebrities_by_ids(requested),
+        )
+        names = [
+            CelebrityResponse.model_validate(celebrity).tags for celebrity in found
+        ]
+
+        assert [celebrity.id for celebrity in found] == ids
+        assert missing == ["missing-1", "missing-2"]
+        assert names == [[f"标签{celebrity.name}"] for celebrity in found]
+        # One IN query for the celebrities, one for all of their tags
+        assert len(statements) == 2
+
+    def test_limit(self, db_session):
+        """Test that more than the maximum number of IDs is rejected"""
+        service = CelebrityService(db_session)
+        assert service.get_celebrities_by_ids([]) == ([], [])
+        with pytest.raises(HTTPException) as error:
+            service.get_celebrities_by_ids(str(i) for i in range(MAX_BATCH_IDS + 1))
+        assert error.value.status_code == 400
+
+    def test_existing_name_keys(self, db_session, make_celebrity):
+        """Test that taken names are found in one lookup, folded like name keys"""
+        make_celebrity("周杰伦", "Jay Chou")
+        service = CelebrityService(db_session)
+        assert service.get_existing_name_keys(["周杰倫", "JAY CHOU", "林俊杰"]) == {
+            "周杰伦",
+            "jay chou",
+        }
+
+
+class TestTagsInResponses:
+    """Test that list responses carry tag names without per-row queries"""
+
+    def _catalog(self, db_session, count, prefix="名人"):
+        tags = [Tag(name=f"标签{i}") for i in range(5)]
+        celebrities = [Celebrity(name=f"{prefix}{i}") for i in range(count)]
+        db_session.add_all(tags + celebrities)
+        db_session.flush()
+        db_session.add_all(
+            CelebrityTag(celebrity_id=celebrity.id, tag_id=tag.id)
+            for i, celebrity in enumerate(celebrities)
+            for tag in tags[: i % 3 + 1]
+        )
+        db_session.commit()
+        db_session.expire_all()
+        return celebrities
+
+    def test_large_list_page(self, db_engine, db_session):
+        """Test that a 1000-row page costs a fixed number of queries"""
+        self._catalog(db_session, 1000)
+        service = CelebrityService(db_session)
+
+        responses, statements = _count_statements(
+            db_engine,
+            lambda: [
+                CelebrityResponse.model_validate(celebrity)
+                for celebrity in service.get_all_celebrities(limit=1000)
+            ],
+        )
+
+        # The page, then tags in selectinload's batches of 500 parent rows
+        assert len(statements) == 3
+        tags = {response.name: response.tags for response in responses}
+        assert len(tags) == 1000
+        assert tags["名人0"] == ["标签0"]
+        assert tags["名人2"] == ["标签0", "标签1", "标签2"]
+
+        responses, statements = _count_statements(
+            db_engine,
+            lambda: [
+                CelebrityResponse.model_validate(celebrity)
+                for celebrity in service.get_celebrities_by_tag("标签2", limit=1000)
+            ],
+        )
+        assert len(statements) == 3  # tag lookup, page, tags of the page
+        assert len(responses) == 333
+        assert all("标签2" in response.tags for response in responses)
+
+    def test_search_results(
+        self, db_engine, db_session, suggestion_index, search_cache, search_backend
+    ):
+        """Test that search results include tags at a cost independent of size"""
+        self._catalog(db_session, 60, prefix="演员")
+        search_sync.rebuild_all(db_session)
+        service = SearchService(db_session)
+
+        counts = []
+        for limit in (5, 50):
+            db_session.expire_all()
+            results, statements = _count_statements(
+                db_engine, lambda: service.search_celebrities("演员", limit=limit)
+            )
+            assert len(results) == limit
+            assert all(result["tags"] for result in results)
+            counts.append(len(statements))
+        assert counts[0] == counts[1]
@@ -0,0 +1,661 @@
+"""
+Tests for comment threads (materialized paths and reply counts), the
+denormalized comment counters, the global recent comments feed and comment
+reactions
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.hot_score import HALF_LIFE_SECONDS, hot_score
+from app.core.pagination import next_cursor
+from app.core.recent_comments import RecentCommentBuffer
+from app.database.migrations import upgrade_database
+from app.database.models import (
+    Comment,
+    CommentReaction,
+    CommentReactionCount,
+    ReactionType,
+)
+from app.schemas.comment import CommentCreate
+from app.services.comment_counter_service import CommentCounterService
+from app.services.comment_reaction_service import CommentReactionService
+from app.services.comment_service import CommentService
+
+
+def _count_statements(db_engine, call):
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:
+        result = call()
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+    return result, statements
+
+
+class TestCommentTree:
+    """Test that thread listings are one range scan in display order"""
+
+    @pytest.fixture
+    def thread(self, db_session, make_user, make_celebrity):
+        """Two threads; the older one nests deeper than the level cap"""
+        celebrity = make_celebrity("周杰伦", "Jay Chou")
+        user = make_user()
+        service = CommentService(db_session)
+        comments = {}
+
+        def post(key, parent=None):
+            comments[key] = service.create_comment(
+                user.id,
+                CommentCreate(
+                    celebrity_id=celebrity.id,
+                    content=key,
+                    parent_id=comments[parent].id if parent else None,
+                ),
+            )
+
+        post("a")
+        post("a1", "a")
+        post("b")
+        post("a11", "a1")
+        post("a111", "a11")
+        post("a2", "a")
+        return celebrity, comments
+
+    def test_display_order_depth_and_reply_counts(self, db_engine, db_session, thread):
+        """Test that one statement returns threads newest first, replies nested"""
+        celebrity, comments = thread
+        celebrity_id = celebrity.id
+        db_session.expire_all()
+
+        tree, statements = _count_statements(
+            db_engine,
+            lambda: CommentService(db_session).get_comment_tree(celebrity_id),
+        )
+
+        assert len(statements) == 1
+        assert [c.content for c in tree] == ["b", "a", "a1", "a11", "a111", "a2"]
+        assert [c.depth for c in tree] == [0, 0, 1, 2, 3, 1]
+        assert [c.level for c in tree] == [1, 1, 2, 3, 3, 2]
+        assert [c.reply_count for c in tree] == [0, 2, 1, 1, 0, 0]
+
+    def test_pages_continue_inside_a_thread(self, db_session, thread):
+        """Test that the path cursor resumes exactly after the last comment"""
+        celebrity, _ = thread
+        service = CommentService(db_session)
+
+        first = service.get_comment_tree(celebrity.id, limit=3)
+        rest = service.get_comment_tree(celebrity.id, cursor=first[-1].path)
+
+        assert [c.content for c in first + rest] == [
+            "b",
+            "a",
+            "a1",
+            "a11",
+            "a111",
+            "a2",
+        ]
+        with pytest.raises(HTTPException) as error:
+            service.get_comment_tree(celebrity.id, cursor="not-a-path")
+        assert error.value.status_code == 400
+
+    def test_threads_match_the_tree(self, db_session, thread):
+        """Test that nested threads are built from the same path range"""
+        celebrity, comments = thread
+        threads = CommentService(db_session).get_comment_threads(celebrity.id)
+
+        def contents(node):
+            return [node["comment"].content, [contents(r) for r in node["replies"]]]
+
+        assert [contents(node) for node in threads] == [
+            ["b", []],
+            ["a", [["a1", [["a11", [["a111", []]]]]], ["a2", []]]],
+        ]
+
+    def test_delete_updates_reply_count(self, db_session, thread):
+        """Test that deleting a reply decrements its parent's reply count"""
+        _, comments = thread
+        service = CommentService(db_session)
+
+        with pytest.raises(HTTPException):
+            service.delete_comment(comments["a"].id, comments["a"].user_id)
+        service.delete_comment(comments["a2"].id, comments["a2"].user_id)
+
+        db_session.expire_all()
+        assert service.get_comment_by_id(comments["a"].id).reply_count == 1
+
+    def test_migration_backfills_paths(self):
+        """Test that upgrading fills paths and reply counts for old comments"""
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        upgrade_database(engine, "0007_celebrity_name_keys")
+        rows = [
+            ("a", None, "2024-01-01 10:00:00"),
+            ("a1", "a", "2024-01-01 11:00:00"),
+            ("b", None, "2024-01-02 10:00:00"),
+            ("a11", "a1", "2024-01-03 10:00:00"),
+            ("a2", "a", "2024-01-03 11:00:00"),
+        ]
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO users (id, email, hashed_password, name) "
+                    "VALUES ('u', 'u@example.com', 'x', 'u')"
+                )
+            )
+            connection.execute(
+                text("INSERT INTO celebrities (id, name) VALUES ('c', '周杰伦')")
+            )
+            for comment_id, parent_id, created_at in rows:
+                connection.execute(
+                    text(
+                        "INSERT INTO comments (id, user_id, celebrity_id, content, "
+                        "parent_id, level, created_at) VALUES "
+                        "(:id, 'u', 'c', :id, :parent_id, 1, :created_at)"
+                    ),
+                    {
+                        "id": comment_id,
+                        "parent_id": parent_id,
+                        "created_at": created_at,
+                    },
+                )
+
+        upgrade_database(engine)
+        session = sessionmaker(bind=engine)()
+        tree = CommentService(session).get_comment_tree("c")
+        session.close()
+
+        assert [c.id for c in tree] == ["b", "a", "a1", "a11", "a2"]
+        assert [c.reply_count for c in tree] == [0, 2, 1, 0, 0]
+
+    def test_ties_follow_the_keyset_order(self):
+        """Test that comments of the same second list in keyset order"""
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        upgrade_database(engine, "0015_popular_search_counts")
+        first, second, reply1, reply2 = (str(uuid.UUID(int=n)) for n in (3, 0, 1, 2))
+        # Two threads and two replies, all from the same second
+        rows = [(first, None), (reply2, first), (reply1, first), (second, None)]
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO users (id, email, hashed_password, name) "
+                    "VALUES ('u', 'u@example.com', 'x', 'u')"
+                )
+            )
+            connection.execute(
+                text("INSERT INTO celebrities (id, name) VALUES ('c', '周杰伦')")
+            )
+            for comment_id, parent_id in rows:
+                connection.execute(
+                    text(
+                        "INSERT INTO comments (id, user_id, celebrity_id, content, "
+                        "parent_id, level, created_at) VALUES "
+                        "(:id, 'u', 'c', :id, :parent_id, 1, '2024-01-01 10:00:00')"
+                    ),
+                    {"id": comment_id, "parent_id": parent_id},
+                )
+
+        upgrade_database(engine)
+        session = sessionmaker(bind=engine)()
+        service = CommentService(session)
+        tree = [c.id for c in service.get_comment_tree("c")]
+        threads = service.get_comment_threads("c")
+        session.close()
+
+        assert [node["comment"].id for node in threads] == [first, second]
+        assert [r["comment"].id for r in threads[0]["replies"]] == [reply1, reply2]
+        assert tree == [first, reply1, reply2, second]
+
+
+class TestCommentCounters:
+    """Test that comment statistics are maintained counters read in one statement"""
+
+    @pytest.fixture
+    def comments(self, db_session, make_user, make_celebrity):
+        """Two users commenting on two celebrities, with replies"""
+        jay = make_celebrity("周杰伦", "Jay Chou")
+        faye = make_celebrity("王菲", "Faye Wong")
+        alice = make_user("alice")
+        bob = make_user("bob")
+        service = CommentService(db_session)
+
+        def post(user, celebrity, parent=None):
+            return service.create_comment(
+                user.id,
+                CommentCreate(
+                    celebrity_id=celebrity.id,
+                    content="评论",
+                    parent_id=parent.id if parent else None,
+                ),
+            )
+
+        root = post(alice, jay)
+        reply = post(bob, jay, root)
+        post(bob, jay, reply)
+        post(bob, jay)
+        post(alice, faye)
+        return jay, faye, alice, bob, reply
+
+    def test_statistics_follow_writes(self, db_session, comments):
+        """Test that creating and deleting comments keeps every counter exact"""
+        jay, faye, alice, bob, reply = comments
+        service = CommentService(db_session)
+
+        assert service.get_comment_statistics(jay.id) == {
+            "total_comments": 4,
+            "top_level_comments": 2,
+            "reply_comments": 2,
+            "active_commenters": [
+                {"user_id": bob.id, "comment_count": 3},
+                {"user_id": alice.id, "comment_count": 1},
+            ],
+        }
+        assert service.get_user_comment_statistics(bob.id) == {
+            "total_comments": 3,
+            "top_level_comments": 1,
+            "reply_comments": 2,
+            "recent_comments": 3,
+        }
+
+        nested = service.get_comment_replies(reply.id)[0]
+        service.delete_comment(nested.id, bob.id)
+
+        assert service.get_comment_statistics(jay.id)["reply_comments"] == 1
+        assert service.get_user_comment_statistics(bob.id) == {
+            "total_comments": 2,
+            "top_level_comments": 1,
+            "reply_comments": 1,
+            "recent_comments": 2,
+        }
+        assert service.get_comment_statistics(faye.id)["active_commenters"] == [
+            {"user_id": alice.id, "comment_count": 1}
+        ]
+
+    def test_statistics_for_unknown_ids(self, db_session):
+        """Test that celebrities and users without comments report zeros"""
+        service = CommentService(db_session)
+
+        assert service.get_comment_statistics("missing") == {
+            "total_comments": 0,
+            "top_level_comments": 0,
+            "reply_comments": 0,
+            "active_commenters": [],
+        }
+        assert service.get_user_comment_statistics("missing")["total_comments"] == 0
+
+    def test_statistics_are_single_statement_reads(
+        self, db_engine, db_session, comments
+    ):
+        """Test that each statistics endpoint reads one statement"""
+        jay, _, _, bob, _ = comments
+        celebrity_id, user_id = jay.id, bob.id
+        service = CommentService(db_session)
+
+        _, celebrity_statements = _count_statements(
+            db_engine, lambda: service.get_comment_statistics(celebrity_id)
+        )
+        _, user_statements = _count_statements(
+            db_engine, lambda: service.get_user_comment_statistics(user_id)
+        )
+
+        assert len(celebrity_statements) == 1
+        assert len(user_statements) == 1
+
+    def test_rebuild_matches_maintained_counters(self, db_session, comments):
+        """Test that rebuilding from the comments table changes nothing"""
+        jay, faye, alice, bob, _ = comments
+        service = CommentService(db_session)
+        before = [
+            service.get_comment_statistics(jay.id),
+            service.get_comment_statistics(faye.id),
+            service.get_user_comment_statistics(alice.id),
+            service.get_user_comment_statistics(bob.id),
+        ]
+
+        rebuilt = CommentCounterService(db_session).rebuild_counters()
+
+        assert rebuilt == {"celebrities": 2, "commenters": 3, "users": 2}
+        assert before == [
+            service.get_comment_statistics(jay.id),
+            service.get_comment_statistics(faye.id),
+            service.get_user_comment_statistics(alice.id),
+            service.get_user_comment_statistics(bob.id),
+        ]
+
+
+class TestRecentComments:
+    """Test that the global feed is served from memory, then from the index"""
+
+    @pytest.fixture
+    def feed(self, db_session, make_user, make_celebrity, recent_comments):
+        """Seven comments on two celebrities, buffer capacity five"""
+        jay = make_celebrity("周杰伦", "Jay Chou")
+        faye = make_celebrity("王菲", "Faye Wong")
+        user = make_user()
+        service = CommentService(db_session)
+        comments = []
+        for i in range(7):
+            parent = comments[1] if i in (3, 5) else None
+            comments.append(
+                service.create_comment(
+                    user.id,
+                    CommentCreate(
+                        celebrity_id=(jay if i % 2 else faye).id,
+                        content=f"c{i}",
+                        parent_id=parent.id if parent else None,
+                    ),
+                )
+            )
+        return user, jay, [c.content for c in comments]
+
+    def test_first_pages_come_from_memory(self, db_engine, db_session, feed):
+        """Test that after the first load a page costs no query"""
+        _, _, contents = feed
+        service = CommentService(db_session)
+
+        first, statements = _count_statements(
+            db_engine, lambda: service.get_recent_comments(limit=3)
+        )
+        again, statements_again = _count_statements(
+            db_engine, lambda: service.get_recent_comments(skip=2, limit=3)
+        )
+
+        assert [c.content for c in first] == ["c6", "c5", "c4"]
+        assert [c.content for c in again] == ["c4", "c3", "c2"]
+        assert len(statements) == 2
+        assert statements_again == []
+
+    def test_cursor_pages_cross_into_the_database(self, db_engine, db_session, feed):
+        """Test that cursor pages continue seamlessly past the buffer"""
+        _, _, contents = feed
+        service = CommentService(db_session)
+        seen, cursor = [], None
+        for expected_statements in (2, 0, 1, 1):
+            page, statements = _count_statements(
+                db_engine,
+                lambda: service.get_recent_comments(limit=2, cursor=cursor),
+            )
+            assert len(statements) == expected_statements
+            seen += [c.content for c in page]
+            cursor = next_cursor(page, 2)
+
+        assert seen == list(reversed(contents))
+        assert cursor is None
+
+    def test_writes_keep_the_buffer_current(self, db_engine, db_session, feed):
+        """Test that creates, edits, replies and deletes update the buffer"""
+        user, jay, _ = feed
+        service = CommentService(db_session)
+        service.get_recent_comments(limit=1)
+
+        newest = service.create_comment(
+            user.id, CommentCreate(celebrity_id=jay.id, content="new")
+        )
+        reply = service.create_comment(
+            user.id,
+            CommentCreate(celebrity_id=jay.id, content="reply", parent_id=newest.id),
+        )
+        service.update_comment(newest.id, user.id, "edited")
+        page, statements = _count_statements(
+            db_engine, lambda: service.get_recent_comments(limit=3)
+        )
+
+        assert statements == []
+        assert [(c.content, c.reply_count) for c in page] == [
+            ("reply", 0),
+            ("edited", 1),
+            ("c6", 0),
+        ]
+
+        service.delete_comment(reply.id, user.id)
+        page = service.get_recent_comments(limit=2)
+        assert [(c.content, c.reply_count) for c in page] == [
+            ("edited", 0),
+            ("c6", 0),
+        ]
+
+    def test_writes_of_other_workers_show_after_the_ttl(
+        self, monkeypatch, db_session, feed
+    ):
+        """Test that the TTL reload picks up edits and deletes of other workers"""
+        user, jay, _ = feed
+        now = [0.0]
+        buffer = RecentCommentBuffer(capacity=5, ttl_seconds=30, clock=lambda: now[0])
+        # Another worker has its own buffer; this one never hears of its writes
+        other_worker = RecentCommentBuffer(capacity=5)
+
+        def as_other_worker(write):
+            monkeypatch.setattr("app.core.recent_comments._buffer", other_worker)
+            write()
+            monkeypatch.setattr("app.core.recent_comments._buffer", buffer)
+
+        monkeypatch.setattr("app.core.recent_comments._buffer", buffer)
+        service = CommentService(db_session)
+        newest = service.create_comment(
+            user.id, CommentCreate(celebrity_id=jay.id, content="new")
+        )
+        assert service.get_recent_comments(limit=1)[0].content == "new"
+
+        as_other_worker(
+            lambda: service.update_comment(newest.id, user.id, "edited elsewhere")
+        )
+        assert service.get_recent_comments(limit=1)[0].content == "new"
+        now[0] += 30
+        assert service.get_recent_comments(limit=1)[0].content == "edited elsewhere"
+
+        # A write of this worker after another worker's reloads the buffer
+        as_other_worker(lambda: service.delete_comment(newest.id, user.id))
+        service.create_comment(
+            user.id, CommentCreate(celebrity_id=jay.id, content="mine")
+        )
+        page = service.get_recent_comments(limit=2)
+        assert [c.content for c in page] == ["mine", "c6"]
+
+    def test_top_level_feed(self, db_session, feed):
+        """Test that include_replies=False skips replies in memory and in SQL"""
+        service = CommentService(db_session)
+
+        top_level = service.get_recent_comments(limit=10, include_replies=False)
+
+        assert [c.content for c in top_level] == ["c6", "c4", "c2", "c1", "c0"]
+
+    def test_feed_query_uses_the_created_index(self, db_engine, db_session):
+        """Test that the fallback query is an index scan, not a sort"""
+        query = CommentService(db_session)._recent_comments_query(True, None)
+        sql = str(
+            query.limit(10).statement.compile(compile_kwargs={"literal_binds": True})
+        )
+
+        with db_engine.connect() as connection:
+            plan = " ".join(
+                str(row[-1])
+                for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql))
+            )
+
+        assert "ix_comments_created" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+class TestCommentReactions:
+    """Test reactions, their sharded counters and the hot ordering"""
+
+    @pytest.fixture
+    def setup(self, db_session, make_user, make_celebrity):
+        celebrity = make_celebrity("周杰伦", "Jay Chou")
+        author = make_user()
+        service = CommentService(db_session)
+        comments = [
+            service.create_comment(
+                author.id, CommentCreate(celebrity_id=celebrity.id, content=f"c{i}")
+            )
+            for i in range(3)
+        ]
+        return celebrity, author, comments
+
+    def test_one_reaction_per_user(self, db_session, make_user, setup):
+        """Test that reacting again changes the user's reaction instead of adding"""
+        _, _, comments = setup
+        comment_id = comments[0].id
+        user = make_user()
+        service = CommentReactionService(db_session)
+
+        service.set_reaction(comment_id, user.id, ReactionType.LIKE)
+        summary = service.set_reaction(comment_id, user.id, ReactionType.LOVE)
+
+        assert summary == {
+            "comment_id": comment_id,
+            "total_reactions": 1,
+            "reactions": {"LOVE": 1},
+            "my_reaction": "LOVE",
+        }
+        service.remove_reaction(comment_id, user.id)
+        assert service.get_reaction_summary(comment_id)["total_reactions"] == 0
+        with pytest.raises(HTTPException) as error:
+            service.remove_reaction(comment_id, user.id)
+        assert error.value.status_code == 404
+        with pytest.raises(HTTPException) as error:
+            service.set_reaction("missing", user.id, ReactionType.LIKE)
+        assert error.value.status_code == 404
+
+    def test_counters_are_sharded(self, db_session, make_user, setup):
+        """Test that many users' reactions spread over several counter rows"""
+        _, _, comments = setup
+        comment_id = comments[0].id
+        service = CommentReactionService(db_session)
+        for _ in range(40):
+            service.set_reaction(comment_id, make_user().id, ReactionType.LIKE)
+
+        shards = (
+            db_session.query(CommentReactionCount)
+            .filter(CommentReactionCount.comment_id == comment_id)
+            .all()
+        )
+
+        assert len(shards) > 1
+        assert sum(shard.reaction_count for shard in shards) == 40
+        assert service.get_reaction_summary(comment_id)["reactions"] == {"LIKE": 40}
+
+    def test_hot_order_follows_refreshed_reactions(self, db_session, make_user, setup):
+        """Test that reactions lift a comment once the coalesced refresh runs"""
+        celebrity, _, comments = setup
+        reactions = CommentReactionService(db_session)
+        service = CommentService(db_session)
+        for _ in range(3):
+            reactions.set_reaction(comments[0].id, make_user().id, ReactionType.LIKE)
+        reactions.set_reaction(comments[1].id, make_user().id, ReactionType.HAHA)
+
+        before = [c.content for c in service.get_hot_comments(celebrity.id)]
+        refreshed = reactions.refresh_hot_scores()
+        db_session.expire_all()
+        after = service.get_hot_comments(celebrity.id)
+
+        assert before == ["c2", "c1", "c0"]
+        assert refreshed == 2
+        assert [c.content for c in after] == ["c0", "c1", "c2"]
+        assert [c.reaction_count for c in after] == [3, 1, 0]
+        assert reactions.refresh_hot_scores() == 0
+
+    def test_pending_refreshes_survive_a_restart(self, db_session, make_user, setup):
+        """Test that the comments awaiting a refresh are kept in the database"""
+        _, _, comments = setup
+        comment_id = comments[0].id
+        CommentReactionService(db_session).set_reaction(
+            comment_id, make_user().id, ReactionType.LIKE
+        )
+        db_session.close()
+
+        # A new service, as in a restarted worker
+        refreshed = CommentReactionService(db_session).refresh_hot_scores()
+
+        assert refreshed == 1
+        assert db_session.get(Comment, comment_id).reaction_count == 1
+        assert (
+            db_session.query(CommentReactionCount)
+            .filter(CommentReactionCount.score_stale)
+            .count()
+            == 0
+        )
+
+    def test_concurrent_first_reactions_of_a_user(self, db_session, make_user, setup):
+        """Test that a reaction row inserted meanwhile is updated, not an error"""
+        _, _, comments = setup
+        comment_id = comments[0].id
+        user = make_user()
+        service = CommentReactionService(db_session)
+        service.set_reaction(comment_id, user.id, ReactionType.LIKE)
+
+        # The first read finds no row, as if the other request had not
+        # committed yet; the insert then conflicts with it
+        locked_reaction = service._locked_reaction
+        reads = []
+
+        def racing_read(*args):
+            reads.append(args)
+            return None if len(reads) == 1 else locked_reaction(*args)
+
+        service._locked_reaction = racing_read
+        summary = service.set_reaction(comment_id, user.id, ReactionType.LOVE)
+
+        assert len(reads) == 2
+        assert summary["reactions"] == {"LOVE": 1}
+        assert summary["my_reaction"] == "LOVE"
+
+    def test_hot_score_decays_with_age(self):
+        """Test that an older comment needs twice the reactions per half-life"""
+        now = datetime(2026, 10, 16, 12, 0, 0)
+        day_old = now - timedelta(seconds=2 * HALF_LIFE_SECONDS)
+
+        assert hot_score(3, day_old) == pytest.approx(hot_score(0, now))
+        assert hot_score(4, day_old) > hot_score(0, now)
+        assert hot_score(0, now) > hot_score(2, day_old)
+
+    def test_deleting_a_comment_removes_its_reactions(
+        self, db_session, make_user, setup
+    ):
+        """Test that reactions and counters go with their comment"""
+        _, author, comments = setup
+        comment_id = comments[0].id
+        CommentReactionService(db_session).set_reaction(
+            comment_id, make_user().id, ReactionType.LIKE
+        )
+
+        CommentService(db_session).delete_comment(comment_id, author.id)
+
+        assert db_session.query(CommentReaction).count() == 0
+        assert db_session.query(CommentReactionCount).count() == 0
+
+    def test_hot_query_is_an_index_range_scan(self, db_engine, db_session):
+        """Test that the hot page reads ix_comments_celebrity_hot without sorting"""
+        query = (
+            db_session.query(Comment)
+            .filter(Comment.celebrity_id == "c")
+            .order_by(Comment.hot_score.desc(), Comment.id.desc())
+            .limit(20)
+        )
+        sql = str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+
+        with db_engine.connect() as connection:
+            plan = " ".join(
+                str(row[-1])
+                for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql))
+            )
+
+        assert "ix_comments_celebrity_hot" in plan
+        assert "TEMP B-TREE" not in plan
@@ -113,6 +113,66 @@ def test_get_celebrity_comments():
         return False
 
 
+def test_get_celebrity_comment_tree():
+    """Test getting a celebrity's comments as a thread tree"""
+    try:
+        response = test_config.make_request("GET", "/celebrities/?limit=1")
+        celebrities = response.json() if response.status_code == 200 else []
+        if not celebrities:
+            test_config.add_test_result(
+                "Get Celebrity Comment Tree", False, "No celebrities found"
+            )
+            return False
+
+        celebrity_id = celebrities[0]["id"]
+        response = test_config.make_request(
+            "GET", f"/comments/celebrity/{celebrity_id}/tree"
+        )
+        data = response.json()
+        success = response.status_code == 200 and all(
+            "depth" in comment and "reply_count" in comment for comment in data
+        )
+        test_config.add_test_result(
+            "Get Celebrity Comment Tree",
+            success,
+            f"Status: {response.status_code}, Count: {len(data)}",
+        )
+        return success
+    except Exception as e:
+        test_config.add_test_result("Get Celebrity Comment Tree", False, str(e))
+        return False
+
+
+def test_get_hot_comments():
+    """Test getting a celebrity's comments ordered by hot score"""
+    try:
+        response = test_config.make_request("GET", "/celebrities/?limit=1")
+        celebrities = response.json() if response.status_code == 200 else []
+        if not celebrities:
+            test_config.add_test_result(
+                "Get Hot Comments", False, "No celebrities found"
+            )
+            return False
+
+        celebrity_id = celebrities[0]["id"]
+        response = test_config.make_request(
+            "GET", f"/comments/celebrity/{celebrity_id}?sort=hot"
+        )
+        data = response.json()
+        success = response.status_code == 200 and all(
+            "reaction_count" in comment for comment in data
+        )
+        test_config.add_test_result(
+            "Get Hot Comments",
+            success,
+            f"Status: {response.status_code}, Count: {len(data)}",
+        )
+        return success
+    except Exception as e:
+        test_config.add_test_result("Get Hot Comments", False, str(e))
+        return False
+
+
 def test_create_reply():
     """Test creating a reply to a comment"""
     try:
@@ -243,6 +303,8 @@ def run_comments_tests():
         test_create_comment,
         test_get_user_comments,
         test_get_celebrity_comments,
+        test_get_celebrity_comment_tree,
+        test_get_hot_comments,
         test_create_reply,
         test_update_comment,
         test_delete_comment,
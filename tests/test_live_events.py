@@ -0,0 +1,193 @@
+"""
+Tests for live celebrity events: tick batching, transports and SSE streams
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.core import live_events
+from app.core.config import Settings
+from app.core.live_events import LiveEventHub, LocalTransport, RedisTransport
+from app.core.rate_limit import InMemoryBackend, RateLimiter
+from app.schemas.comment import CommentCreate
+from app.schemas.vote import VoteCreate
+from app.services.comment_service import CommentService
+from app.services.vote_service import VoteService
+from tests.fake_redis import FakeRedis
+
+
+def _payload(frame):
+    lines = frame.strip().split("\n")
+    assert lines[1] == "event: activity"
+    return json.loads(lines[2][len("data: ") :])
+
+
+@pytest.fixture(params=["memory", "redis"])
+def hub(request, monkeypatch):
+    """Process-wide hub and transport on each backend"""
+    hub = LiveEventHub(tick_seconds=0.01)
+    if request.param == "redis":
+        transport = RedisTransport(FakeRedis(), hub)
+    else:
+        transport = LocalTransport(hub)
+    transport.start()
+    monkeypatch.setattr(live_events, "_hub", hub)
+    monkeypatch.setattr(live_events, "_transport", transport)
+    yield hub
+    transport.stop()
+
+
+class TestLiveEventHub:
+    """Test that events are coalesced into one shared frame per tick"""
+
+    def test_one_frame_per_tick_for_all_subscribers(self):
+        """Test that a tick's events become one frame shared by every queue"""
+        hub = LiveEventHub(tick_seconds=1)
+        queues = [hub.subscribe("c") for _ in range(3)]
+        for mbti_type, delta in [("INTJ", 1), ("INTJ", 1), ("ENFP", 1), ("ENFP", -1)]:
+            hub.add("c", {"type": "votes", "mbti_type": mbti_type, "delta": delta})
+        hub.add("c", {"type": "comment", "comment": {"id": "1"}})
+        hub.add("c", {"type": "comment", "comment": {"id": "2"}})
+
+        assert hub.flush() == 1
+        frames = [queue.get_nowait() for queue in queues]
+        assert frames[0] is frames[1] is frames[2]
+        assert _payload(frames[0]) == {
+            "celebrity_id": "c",
+            "comments": [{"id": "1"}, {"id": "2"}],
+            "votes": {"INTJ": 2},
+        }
+        assert hub.flush() == 0
+
+    def test_unwatched_celebrities_are_dropped(self):
+        """Test that events nobody subscribed to are never batched"""
+        hub = LiveEventHub(tick_seconds=1)
+        queue = hub.subscribe("c")
+        hub.add("other", {"type": "votes", "mbti_type": "INTJ", "delta": 1})
+        hub.unsubscribe("c", queue)
+        hub.add("c", {"type": "votes", "mbti_type": "INTJ", "delta": 1})
+
+        assert hub.flush() == 0
+
+    def test_slow_subscriber_is_disconnected(self):
+        """Test that a full queue is replaced by the end-of-stream marker"""
+        hub = LiveEventHub(tick_seconds=1, queue_size=2)
+        slow = hub.subscribe("c")
+        for _ in range(3):
+            hub.add("c", {"type": "votes", "mbti_type": "INTJ", "delta": 1})
+            hub.flush()
+
+        assert slow.get_nowait() is None
+        assert slow.empty()
+        hub.add("c", {"type": "votes", "mbti_type": "INTJ", "delta": 1})
+        assert hub.flush() == 0
+
+    def test_stream_ticks_and_unsubscribes(self):
+        """Test that a stream receives the ticked frame and cleans up after itself"""
+        hub = LiveEventHub(tick_seconds=0.01)
+
+        async def scenario():
+            stream = hub.stream("c")
+            assert (await stream.__anext__()).startswith("retry:")
+            pending = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            hub.add("c", {"type": "comment", "comment": {"id": "1"}})
+            frame = await asyncio.wait_for(pending, 1)
+            await stream.aclose()
+            return frame
+
+        frame = asyncio.run(scenario())
+
+        assert _payload(frame)["comments"] == [{"id": "1"}]
+        assert hub._subscribers == {}
+
+
+class TestPublishing:
+    """Test that comment and vote writes reach subscribers on every transport"""
+
+    def test_comment_and_votes_are_published(
+        self, hub, db_session, make_user, make_celebrity
+    ):
+        """Test that committed comments and vote changes arrive in one frame"""
+        celebrity = make_celebrity("周杰伦", "Jay Chou")
+        user = make_user()
+        queue = hub.subscribe(celebrity.id)
+
+        comment = CommentService(db_session).create_comment(
+            user.id, CommentCreate(celebrity_id=celebrity.id, content="好听")
+        )
+        votes = VoteService(db_session, rate_limiter=RateLimiter(InMemoryBackend()))
+        vote = votes.create_vote(
+            user.id, VoteCreate(celebrity_id=celebrity.id, mbti_type="INFP")
+        )
+        live_events.get_live_event_transport().drain()
+        hub.flush()
+
+        payload = _payload(queue.get_nowait())
+        assert [c["id"] for c in payload["comments"]] == [comment.id]
+        assert payload["comments"][0]["content"] == "好听"
+        assert payload["votes"] == {"INFP": 1}
+
+        votes.delete_vote(vote.id, user.id)
+        live_events.get_live_event_transport().drain()
+        hub.flush()
+        assert _payload(queue.get_nowait())["votes"] == {"INFP": -1}
+
+    def test_publish_failure_does_not_fail_the_write(
+        self, monkeypatch, db_session, make_user, make_celebrity
+    ):
+        """Test that a broken transport does not turn a committed write into an error"""
+
+        class BrokenTransport:
+            def publish(self, celebrity_id, event):
+                raise ConnectionError("redis is down")
+
+        monkeypatch.setattr(live_events, "_transport", BrokenTransport())
+        celebrity = make_celebrity("王菲", "Faye Wong")
+
+        comment = CommentService(db_session).create_comment(
+            make_user().id, CommentCreate(celebrity_id=celebrity.id, content="天籁")
+        )
+
+        assert comment.id
+
+    def test_redis_publishes_off_the_request_path(self):
+        """Test that publishing returns while Redis is still busy"""
+        release = threading.Event()
+
+        class SlowRedis(FakeRedis):
+            def publish(self, channel, message):
+                release.wait(5)
+                return super().publish(channel, message)
+
+        hub = LiveEventHub(tick_seconds=1)
+        queue = hub.subscribe("c")
+        transport = RedisTransport(SlowRedis(), hub)
+        transport.start()
+        try:
+            transport.publish("c", {"type": "comment", "comment": {"id": "1"}})
+            assert hub.flush() == 0
+            release.set()
+            transport.drain()
+        finally:
+            transport.stop()
+
+        assert hub.flush() == 1
+        assert _payload(queue.get_nowait())["comments"] == [{"id": "1"}]
+
+    def test_redis_client_has_timeouts(self):
+        """Test that the Redis transport cannot hang on a dead connection"""
+        transport = RedisTransport.from_url("redis://localhost:6379", LiveEventHub(1))
+        options = transport.client.connection_pool.connection_kwargs
+        assert options["socket_timeout"] == live_events.REDIS_SOCKET_TIMEOUT
+        assert options["socket_connect_timeout"] == live_events.REDIS_SOCKET_TIMEOUT
+
+    def test_several_workers_default_to_redis(self):
+        """Test that the process-local bus is refused for several workers"""
+        assert Settings(web_concurrency=1).live_events_backend == "memory"
+        assert Settings(web_concurrency=4).live_events_backend == "redis"
+        with pytest.raises(ValueError):
+            Settings(web_concurrency=4, live_events_backend="memory")
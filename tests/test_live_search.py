@@ -0,0 +1,114 @@
+"""
+Tests for the search-as-you-type WebSocket endpoint
+"""
+
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.search import router
+from app.core.config import settings
+from app.database.database import get_db
+from app.schemas.celebrity import CelebrityCreate
+from app.search import PopularSearchTracker, get_popular_search_tracker
+from app.services.celebrity_service import CelebrityService
+from app.services.search_service import SearchService
+
+
+@pytest.fixture
+def client(monkeypatch, db_session, search_index, suggestion_index, search_cache):
+    """Client for an app serving only the search routes on the test database"""
+    monkeypatch.setattr(settings, "search_ws_debounce_ms", 50)
+    monkeypatch.setattr(
+        "app.search.popular._popular_search_tracker", PopularSearchTracker()
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    return TestClient(app)
+
+
+class TestLiveSearch:
+    """Test debouncing, superseded queries and the pushed results"""
+
+    def _searched(self, monkeypatch):
+        queries = []
+        search_with_facets = SearchService.search_with_facets
+
+        def recording(service, query, *args, **kwargs):
+            queries.append(query)
+            return search_with_facets(service, query, *args, **kwargs)
+
+        monkeypatch.setattr(SearchService, "search_with_facets", recording)
+        return queries
+
+    def test_only_the_latest_query_is_answered(self, monkeypatch, client, db_session):
+        """Test that a burst of keystrokes runs and answers one search"""
+        service = CelebrityService(db_session)
+        service.create_celebrity(CelebrityCreate(name="周杰伦", name_en="Jay Chou"))
+        service.create_celebrity(CelebrityCreate(name="周星驰", name_en="Stephen"))
+        searched = self._searched(monkeypatch)
+
+        with client.websocket_connect("/search/ws") as websocket:
+            for seq, query in enumerate(["周", "周杰", "周杰伦"], start=1):
+                websocket.send_text(json.dumps({"q": query, "seq": seq}))
+            reply = websocket.receive_json()
+            assert reply["seq"] == 3
+            assert reply["query"] == "周杰伦"
+            assert reply["total_results"] == 1
+            assert reply["results"][0]["name"] == "周杰伦"
+            assert reply["suggestions"] == ["周杰伦"]
+
+            # Plain-text frames work too; nothing else was queued in between
+            websocket.send_text("周")
+            reply = websocket.receive_json()
+            assert reply["seq"] is None
+            assert {r["name"] for r in reply["results"]} == {"周杰伦", "周星驰"}
+
+        assert searched == ["周杰伦", "周"]
+        # Keystrokes are not submitted searches
+        assert get_popular_search_tracker().top("hour") == ([], 0)
+
+    def test_results_overtaken_by_a_newer_query_are_dropped(
+        self, monkeypatch, client, db_session
+    ):
+        """Test that a query typed during a search is answered, not the old one"""
+        service = CelebrityService(db_session)
+        service.create_celebrity(CelebrityCreate(name="周杰伦", name_en="Jay Chou"))
+        searched = self._searched(monkeypatch)
+        slow_search = SearchService.search_with_facets
+
+        def slow(service, query, *args, **kwargs):
+            if query == "周":
+                time.sleep(0.3)
+            return slow_search(service, query, *args, **kwargs)
+
+        monkeypatch.setattr(SearchService, "search_with_facets", slow)
+
+        with client.websocket_connect("/search/ws") as websocket:
+            websocket.send_text(json.dumps({"q": "周", "seq": 1}))
+            time.sleep(0.15)  # debounced; the first search is running
+            for seq, query in enumerate(["周杰", "周杰伦"], start=2):
+                websocket.send_text(json.dumps({"q": query, "seq": seq}))
+            reply = websocket.receive_json()
+            assert reply["seq"] == 3
+            assert reply["total_results"] == 1
+
+        # The keystrokes typed during the first search were debounced together
+        assert searched == ["周", "周杰伦"]
+
+    def test_invalid_frames_report_errors(self, client):
+        """Test that a bad frame gets an error and the connection stays usable"""
+        with client.websocket_connect("/search/ws") as websocket:
+            websocket.send_text(json.dumps({"q": "周", "search_type": "nope"}))
+            assert "Invalid search_type" in websocket.receive_json()["error"]
+            websocket.send_text(json.dumps({"q": "周", "limit": 500}))
+            assert "limit" in websocket.receive_json()["error"]
+
+            websocket.send_text(json.dumps({"q": "  ", "seq": 7}))
+            reply = websocket.receive_json()
+            assert reply["seq"] == 7
+            assert reply["results"] == []
@@ -0,0 +1,116 @@
+"""
+Tests for the Alembic migration chain
+"""
+
+import ast
+import os
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from app import main
+from app.database.migrations import (
+    PROJECT_ROOT,
+    alembic_config,
+    check_database_current,
+    find_missing_indexes,
+    upgrade_database,
+)
+from app.database.models import Base
+
+
+def _memory_engine():
+    return create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+class TestMigrations:
+    """Test that migrations build the schema the models describe"""
+
+    def test_chain_creates_every_model_index(self):
+        """Test that no model index is missing after upgrading to head"""
+        engine = _memory_engine()
+        upgrade_database(engine)
+
+        with engine.connect() as connection:
+            tables = set(inspect(connection).get_table_names())
+            assert set(Base.metadata.tables) <= tables
+            assert find_missing_indexes(connection) == []
+
+    def test_missing_index_is_reported(self):
+        """Test that the check flags an index the database lacks"""
+        engine = _memory_engine()
+        upgrade_database(engine)
+
+        with engine.connect() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_votes_celebrity_mbti")
+            assert find_missing_indexes(connection) == [
+                ("votes", "ix_votes_celebrity_mbti")
+            ]
+
+    def test_upgrade_adopts_create_all_database(self):
+        """Test that a database built by create_all upgrades cleanly"""
+        engine = _memory_engine()
+        Base.metadata.create_all(bind=engine)
+        upgrade_database(engine)
+
+        with engine.connect() as connection:
+            version = connection.exec_driver_sql(
+                "SELECT version_num FROM alembic_version"
+            ).scalar()
+            head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+            assert version == head
+            assert find_missing_indexes(connection) == []
+
+    def test_revisions_do_not_import_application_code(self):
+        """Test that revisions stay frozen instead of following app changes"""
+        versions = os.path.join(PROJECT_ROOT, "alembic", "versions")
+        for filename in sorted(os.listdir(versions)):
+            if not filename.endswith(".py"):
+                continue
+            with open(os.path.join(versions, filename), encoding="utf-8") as f:
+                tree = ast.parse(f.read())
+            modules = [
+                alias.name
+                for node in ast.walk(tree)
+                if isinstance(node, ast.Import)
+                for alias in node.names
+            ] + [
+                node.module
+                for node in ast.walk(tree)
+                if isinstance(node, ast.ImportFrom) and node.module
+            ]
+            assert not [
+                module for module in modules if module.split(".")[0] == "app"
+            ], filename
+
+    def test_check_database_current(self):
+        """Test that workers refuse an unmigrated database"""
+        engine = _memory_engine()
+        with pytest.raises(RuntimeError, match="run migrate.py"):
+            check_database_current(engine)
+
+        upgrade_database(engine)
+        check_database_current(engine)
+
+    def test_db_test_endpoint_does_not_migrate(self, monkeypatch):
+        """Test that /db-test only reports the schema state"""
+        engine = _memory_engine()
+        monkeypatch.setattr(main, "engine", engine)
+
+        response = main.test_database()
+
+        assert response["status"] == "error"
+        assert response["revision"] is None
+        with engine.connect() as connection:
+            assert inspect(connection).get_table_names() == []
+
+        upgrade_database(engine)
+        response = main.test_database()
+        assert response["status"] == "success"
+        assert "celebrity_vote_tallies" in response["tables"]
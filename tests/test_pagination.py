@@ -0,0 +1,100 @@
+"""
+Tests for keyset (cursor) pagination
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor, next_cursor
+from app.database.models import Comment, MBTIType, Vote
+from app.services.celebrity_service import CelebrityService
+from app.services.comment_service import CommentService
+from app.services.vote_service import VoteService
+
+
+class TestPagination:
+    """Test cursor encoding and stable paging through the list services"""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes back to the row it was built from"""
+        created_at = datetime(2024, 5, 1, 12, 30, 15)
+        assert decode_cursor(encode_cursor(created_at, "abc")) == (created_at, "abc")
+
+    def test_invalid_cursor(self):
+        """Test that a garbled cursor is rejected with 400"""
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor("not-a-cursor")
+        assert exc_info.value.status_code == 400
+
+    def test_pages_cover_ties_without_gaps(self, db_session, make_user, make_celebrity):
+        """Test that rows sharing a timestamp are neither repeated nor skipped"""
+        celebrity = make_celebrity("张学友", "Jacky Cheung")
+        same_time = datetime(2024, 1, 1, 8, 0, 0)
+        for _ in range(7):
+            db_session.add(
+                Vote(
+                    user_id=make_user().id,
+                    celebrity_id=celebrity.id,
+                    mbti_type=MBTIType.ISFJ,
+                    created_at=same_time,
+                )
+            )
+        db_session.commit()
+        expected = [
+            vote.id for vote in db_session.query(Vote).order_by(Vote.id.desc()).all()
+        ]
+
+        service = VoteService(db_session)
+        seen, cursor = [], None
+        while True:
+            page = service.get_celebrity_votes(celebrity.id, limit=3, cursor=cursor)
+            seen.extend(vote.id for vote in page)
+            cursor = next_cursor(page, 3)
+            if cursor is None:
+                break
+
+        assert seen == expected
+
+    def test_cursor_survives_deleted_row(self, db_session, make_user, make_celebrity):
+        """Test that paging continues when the cursor row has been deleted"""
+        celebrity = make_celebrity("李宇春", "Chris Lee")
+        user = make_user()
+        for minute in range(4):
+            db_session.add(
+                Comment(
+                    user_id=user.id,
+                    celebrity_id=celebrity.id,
+                    content=f"评论{minute}",
+                    created_at=datetime(2024, 1, 1, 8, minute, 0),
+                )
+            )
+        db_session.commit()
+
+        service = CommentService(db_session)
+        first_page = service.get_celebrity_comments(celebrity.id, limit=2)
+        cursor = next_cursor(first_page, 2)
+        db_session.delete(first_page[-1])
+        db_session.commit()
+
+        second_page = service.get_celebrity_comments(
+            celebrity.id, limit=2, cursor=cursor
+        )
+        assert [c.content for c in second_page] == ["评论1", "评论0"]
+
+    def test_celebrities_page_oldest_first(self, db_session, make_celebrity):
+        """Test that the celebrity list pages in creation order"""
+        for i in range(5):
+            make_celebrity(f"歌手{i}", created_at=datetime(2024, 1, 1, 8, i, 0))
+
+        service = CelebrityService(db_session)
+        first_page = service.get_all_celebrities(limit=3)
+        second_page = service.get_all_celebrities(
+            limit=3, cursor=next_cursor(first_page, 3)
+        )
+
+        assert [c.name for c in first_page + second_page] == [
+            f"歌手{i}" for i in range(5)
+        ]
+        assert next_cursor(second_page, 3) is None
@@ -0,0 +1,118 @@
+"""
+Tests for the popular search tracker
+"""
+
+from app.database.models import PopularSearchCount
+from app.search.popular import PopularSearchTracker, SpaceSaving, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSpaceSaving:
+    """Test the bounded heavy-hitter summary"""
+
+    def test_counts_are_exact_below_capacity(self):
+        """Test that every term is counted exactly while counters are free"""
+        summary = SpaceSaving(capacity=3)
+        for term in ["a", "b", "a", "c", "a", "b"]:
+            summary.add(term)
+        assert summary.counts == {"a": 3, "b": 2, "c": 1}
+        assert summary.total == 6
+
+    def test_heavy_hitters_survive_a_long_tail(self):
+        """Test that frequent terms stay tracked with bounded counters"""
+        summary = SpaceSaving(capacity=10)
+        for i in range(1000):
+            summary.add("周杰伦" if i % 3 == 0 else f"rare-{i}")
+            if i % 5 == 0:
+                summary.add("jay chou")
+
+        assert len(summary.counts) == 10
+        top = sorted(summary.counts.items(), key=lambda item: -item[1])[:2]
+        assert [term for term, _ in top] == ["周杰伦", "jay chou"]
+        # Space-Saving never underestimates a tracked term
+        assert summary.counts["周杰伦"] >= 334
+        assert summary.counts["jay chou"] >= 200
+
+
+class TestPopularSearchTracker:
+    """Test windows, normalization and syncing through the database"""
+
+    def test_queries_are_normalized(self):
+        """Test that case and whitespace differences count as one query"""
+        assert normalize_query("  Jay   CHOU ") == "jay chou"
+        tracker = PopularSearchTracker(clock=FakeClock())
+        for query in ["Jay Chou", "jay  chou", "周杰伦", "   "]:
+            tracker.record(query)
+        assert tracker.top("hour") == ([("jay chou", 2), ("周杰伦", 1)], 3)
+
+    def test_windows_roll(self):
+        """Test that searches leave the hour window but stay in day and week"""
+        clock = FakeClock()
+        tracker = PopularSearchTracker(clock=clock)
+        for _ in range(3):
+            tracker.record("old")
+        clock.now += 30 * 60
+        tracker.record("new")
+        assert tracker.top("hour", 1) == ([("old", 3)], 4)
+
+        clock.now += 45 * 60
+        assert tracker.top("hour") == ([("new", 1)], 1)
+        assert tracker.top("day") == ([("old", 3), ("new", 1)], 4)
+
+        clock.now += 2 * 24 * 60 * 60
+        assert tracker.top("day") == ([], 0)
+        assert tracker.top("week")[1] == 4
+
+    def test_sync_sums_the_searches_of_every_worker(self, db_session):
+        """Test that synced workers see each other's searches, counted once"""
+        clock = FakeClock()
+        first = PopularSearchTracker(clock=clock)
+        second = PopularSearchTracker(clock=clock)
+        for query in ["a", "b", "a"]:
+            first.record(query)
+        second.record("b")
+        second.record("b")
+
+        assert first.sync(db_session) == 3 * 3  # total, "a" and "b" per window
+        second.sync(db_session)
+        first.sync(db_session)
+        assert first.top("hour") == ([("b", 3), ("a", 2)], 5)
+        assert second.top("week") == ([("b", 3), ("a", 2)], 5)
+
+        first.record("a")
+        top, searches = first.top("hour")
+        assert dict(top) == {"a": 3, "b": 3}
+        assert searches == 6
+
+    def test_sync_restores_counts_after_a_restart(self, db_session):
+        """Test that a new tracker picks up the counts synced before"""
+        clock = FakeClock()
+        tracker = PopularSearchTracker(clock=clock)
+        tracker.record("周杰伦")
+        tracker.sync(db_session)
+
+        restarted = PopularSearchTracker(clock=clock)
+        assert restarted.top("day") == ([], 0)
+        restarted.sync(db_session)
+        assert restarted.top("day") == ([("周杰伦", 1)], 1)
+
+    def test_sync_deletes_buckets_outside_their_window(self, db_session):
+        """Test that rows are pruned once their bucket leaves the window"""
+        clock = FakeClock()
+        tracker = PopularSearchTracker(clock=clock)
+        tracker.record("old")
+        tracker.sync(db_session)
+
+        clock.now += 2 * 60 * 60
+        tracker.sync(db_session)
+        windows = {window for (window,) in db_session.query(PopularSearchCount.window)}
+        assert windows == {"day", "week"}
+        assert tracker.top("hour") == ([], 0)
+        assert tracker.top("day") == ([("old", 1)], 1)
@@ -0,0 +1,307 @@
+"""
+Tests for the rate limiting subsystem
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import Settings, settings
+from app.core.rate_limit import (
+    InMemoryBackend,
+    RateLimiter,
+    RedisBackend,
+    SlidingWindowPolicy,
+    TokenBucketPolicy,
+)
+from app.schemas.auth import UserCreate
+from app.schemas.vote import VoteCreate
+from app.services.auth_service import AuthService
+from app.services.vote_service import VoteService
+from tests.fake_redis import FakeRedis
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request):
+    """Rate limiter on each backend, with a controllable clock"""
+    if request.param == "redis":
+        backend = RedisBackend(FakeRedis())
+    else:
+        backend = InMemoryBackend()
+    return RateLimiter(backend, clock=FakeClock())
+
+
+class TestPolicies:
+    """Test sliding-window and token-bucket behaviour on every backend"""
+
+    def test_sliding_window(self, limiter):
+        """Test that the window admits ``limit`` hits and slides with time"""
+        rule = [("k", SlidingWindowPolicy(limit=2, window_seconds=60))]
+        assert limiter.acquire(rule).allowed
+        limiter.clock.now += 30
+        assert limiter.acquire(rule).allowed
+
+        denied = limiter.acquire(rule)
+        assert not denied.allowed
+        assert denied.denied_key == "k"
+        assert denied.retry_after == pytest.approx(30)
+
+        limiter.clock.now += 31
+        assert limiter.acquire(rule).allowed
+
+    def test_token_bucket(self, limiter):
+        """Test that the bucket drains and refills at the configured rate"""
+        rule = [("ip", TokenBucketPolicy(capacity=3, refill_seconds=300))]
+        for _ in range(3):
+            assert limiter.acquire(rule).allowed
+        denied = limiter.acquire(rule)
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(100)
+
+        limiter.clock.now += 100
+        assert limiter.acquire(rule).allowed
+        assert not limiter.acquire(rule).allowed
+
+    def test_acquire_is_all_or_nothing(self, limiter):
+        """Test that a denial hands back units taken for earlier rules"""
+        loose = ("loose", SlidingWindowPolicy(limit=5, window_seconds=60))
+        tight = ("tight", SlidingWindowPolicy(limit=1, window_seconds=60))
+        assert limiter.acquire([loose, tight]).allowed
+        for _ in range(3):
+            assert not limiter.acquire([loose, tight]).allowed
+
+        # Only the successful acquisition counted against "loose"
+        for _ in range(4):
+            assert limiter.acquire([loose]).allowed
+        assert not limiter.acquire([loose]).allowed
+
+    def test_release(self, limiter):
+        """Test that released units can be reused"""
+        rules = [
+            ("window", SlidingWindowPolicy(limit=1, window_seconds=60)),
+            ("bucket", TokenBucketPolicy(capacity=1, refill_seconds=60)),
+        ]
+        result = limiter.acquire(rules)
+        assert result.allowed
+        assert not limiter.acquire(rules).allowed
+
+        limiter.release(result.hits)
+        assert limiter.acquire(rules).allowed
+
+    def test_remaining(self, limiter):
+        """Test that remaining hits are read from the same sliding windows"""
+        daily = ("daily", SlidingWindowPolicy(limit=3, window_seconds=60))
+        tight = ("tight", SlidingWindowPolicy(limit=2, window_seconds=60))
+        assert limiter.remaining([daily, tight]) == 2
+
+        limiter.acquire([daily])
+        assert limiter.remaining([daily]) == 2
+        limiter.acquire([daily, tight])
+        assert limiter.remaining([daily, tight]) == 1
+
+        limiter.clock.now += 61
+        assert limiter.remaining([daily, tight]) == 2
+
+
+class TestInMemoryBackend:
+    """Test that the in-process backend forgets idle keys"""
+
+    def test_expired_keys_are_evicted(self):
+        """Test that per-IP and per-user state does not accumulate forever"""
+        backend = InMemoryBackend(sweep_seconds=10)
+        limiter = RateLimiter(backend, clock=FakeClock())
+        for n in range(100):
+            limiter.acquire(
+                [
+                    (f"user:{n}", SlidingWindowPolicy(limit=5, window_seconds=60)),
+                    (f"ip:{n}", TokenBucketPolicy(capacity=3, refill_seconds=30)),
+                ]
+            )
+        assert len(backend) == 200
+
+        limiter.clock.now += 31
+        limiter.acquire([("late", SlidingWindowPolicy(limit=5, window_seconds=60))])
+        # Buckets refilled after 10 seconds; windows still hold their hit
+        assert len(backend) == 101
+
+        limiter.clock.now += 30
+        limiter.acquire([("late", SlidingWindowPolicy(limit=5, window_seconds=60))])
+        assert len(backend) == 1
+
+
+class TestBackendSelection:
+    """Test that process-local quotas are refused for several workers"""
+
+    def test_defaults_follow_worker_count(self):
+        """Test that the backend defaults to redis for several workers"""
+        assert Settings(web_concurrency=1).rate_limit_backend == "memory"
+        assert Settings(web_concurrency=4).rate_limit_backend == "redis"
+
+    def test_memory_backend_with_several_workers_fails(self):
+        """Test that an explicit memory backend cannot serve several workers"""
+        with pytest.raises(ValueError, match="WEB_CONCURRENCY=4"):
+            Settings(web_concurrency=4, rate_limit_backend="memory")
+
+
+class TestQuotaWiring:
+    """Test that vote and sign-up quotas come from the rate limiter"""
+
+    def test_daily_vote_limit(self, db_session, make_user, make_celebrity):
+        """Test that votes past ``daily_vote_limit`` are rejected with a 429"""
+        user_id = make_user().id
+        service = VoteService(db_session, rate_limiter=RateLimiter(InMemoryBackend()))
+        for i in range(settings.daily_vote_limit):
+            celebrity_id = make_celebrity(f"演员{i}", f"Actor {i}").id
+            service.create_vote(
+                user_id,
+                VoteCreate(celebrity_id=celebrity_id, mbti_type="ESFJ", reason="热情"),
+            )
+
+        extra_id = make_celebrity("额外", "Extra").id
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_vote(
+                user_id,
+                VoteCreate(celebrity_id=extra_id, mbti_type="ESFJ", reason="热情"),
+            )
+        assert exc_info.value.status_code == 429
+        assert "Retry-After" in exc_info.value.headers
+
+    def test_no_reason_and_new_user_limits(self, db_session, make_user, make_celebrity):
+        """Test the no-reason quota and the stricter quota for new accounts"""
+        limiter = RateLimiter(InMemoryBackend())
+        service = VoteService(db_session, rate_limiter=limiter)
+        celebrity_ids = [
+            make_celebrity(f"主持人{i}", f"Host {i}").id for i in range(10)
+        ]
+
+        veteran = make_user()
+        for celebrity_id in celebrity_ids[: settings.daily_no_reason_limit]:
+            service.create_vote(
+                veteran.id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ENTJ")
+            )
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_vote(
+                veteran.id, VoteCreate(celebrity_id=celebrity_ids[-1], mbti_type="ENTJ")
+            )
+        assert exc_info.value.status_code == 429
+
+        newcomer = make_user()
+        for celebrity_id in celebrity_ids[: settings.new_user_24h_limit]:
+            service.create_vote(
+                newcomer.id,
+                VoteCreate(celebrity_id=celebrity_id, mbti_type="ENTJ", reason="果断"),
+                user_created_at=newcomer.created_at,
+            )
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_vote(
+                newcomer.id,
+                VoteCreate(
+                    celebrity_id=celebrity_ids[-1], mbti_type="ENTJ", reason="x"
+                ),
+                user_created_at=newcomer.created_at,
+            )
+        assert exc_info.value.status_code == 429
+
+    def test_failed_vote_returns_quota(self, db_session, make_user, make_celebrity):
+        """Test that a duplicate vote does not consume quota"""
+        limiter = RateLimiter(InMemoryBackend())
+        service = VoteService(db_session, rate_limiter=limiter)
+        user_id = make_user().id
+        celebrity_id = make_celebrity("古天乐", "Louis Koo").id
+        vote = VoteCreate(celebrity_id=celebrity_id, mbti_type="ISTP", reason="酷")
+        service.create_vote(user_id, vote)
+        for _ in range(settings.daily_vote_limit):
+            with pytest.raises(HTTPException) as exc_info:
+                service.create_vote(user_id, vote)
+            assert exc_info.value.status_code == 400
+
+    def test_deleted_vote_returns_quota(self, db_session, make_user, make_celebrity):
+        """Test that deleting a vote lets the user vote again at the daily limit"""
+        service = VoteService(db_session, rate_limiter=RateLimiter(InMemoryBackend()))
+        user_id = make_user().id
+        votes = [
+            service.create_vote(
+                user_id,
+                VoteCreate(
+                    celebrity_id=make_celebrity(f"导演{i}", f"Director {i}").id,
+                    mbti_type="INTP",
+                ),
+            )
+            for i in range(settings.daily_no_reason_limit)
+        ]
+
+        service.delete_vote(votes[0].id, user_id)
+        service.create_vote(
+            user_id, VoteCreate(celebrity_id=votes[0].celebrity_id, mbti_type="INFP")
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_vote(
+                user_id,
+                VoteCreate(
+                    celebrity_id=make_celebrity("额外", "Extra").id, mbti_type="INTP"
+                ),
+            )
+        assert exc_info.value.status_code == 429
+
+    def test_remaining_votes_match_the_quota(
+        self, db_session, make_user, make_celebrity
+    ):
+        """Test that statistics report the rolling quota create_vote enforces"""
+        service = VoteService(db_session, rate_limiter=RateLimiter(InMemoryBackend()))
+        user = make_user()
+        for i in range(2):
+            service.create_vote(
+                user.id,
+                VoteCreate(
+                    celebrity_id=make_celebrity(f"歌手{i}", f"Singer {i}").id,
+                    mbti_type="ISFP",
+                    reason="温柔",
+                ),
+                user_created_at=user.created_at,
+            )
+
+        statistics = service.get_user_vote_statistics(user.id)
+
+        # A brand-new account is bound by the stricter 24-hour quota
+        assert statistics["votes_remaining_today"] == settings.new_user_24h_limit - 2
+
+    def test_registrations_per_ip(self, db_session):
+        """Test the per-IP registration bucket, and that 409s give tokens back"""
+        service = AuthService(db_session, rate_limiter=RateLimiter(InMemoryBackend()))
+        first = UserCreate(email="new0@example.com", password="secret1", name="新用户")
+        service.register_user(first, client_ip="10.0.0.1")
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc_info:
+                service.register_user(first, client_ip="10.0.0.1")
+            assert exc_info.value.status_code == 409
+
+        for i in range(1, settings.daily_registrations_per_ip):
+            service.register_user(
+                UserCreate(
+                    email=f"new{i}@example.com", password="secret1", name=f"新用户{i}"
+                ),
+                client_ip="10.0.0.1",
+            )
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.register_user(
+                UserCreate(email="late@example.com", password="secret1", name="迟到"),
+                client_ip="10.0.0.1",
+            )
+        assert exc_info.value.status_code == 429
+
+        # Other networks are unaffected
+        service.register_user(
+            UserCreate(email="other@example.com", password="secret1", name="别处"),
+            client_ip="10.0.0.2",
+        )
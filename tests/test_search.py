@@ -216,6 +216,32 @@ def test_empty_search_query():
         return False
 
 
+def test_search_cache():
+    """Test that a repeated search is served from the result cache"""
+    try:
+        first = test_config.make_request("GET", "/search/?q=Cache%20Probe")
+        second = test_config.make_request("GET", "/search/?q=cache%20probe%20")
+        stats = test_config.make_request("GET", "/search/cache-stats").json()
+        success = (
+            first.status_code == 200
+            and second.headers.get("X-Search-Cache") == "HIT"
+            and second.json()["query"] == "cache probe "
+            and second.json()["results"] == first.json()["results"]
+            and second.json()["facets"] == first.json()["facets"]
+            and stats["hits"] >= 1
+        )
+        test_config.add_test_result(
+            "Search Cache",
+            success,
+            f"Second request: {second.headers.get('X-Search-Cache')}, "
+            f"Hit rate: {stats.get('hit_rate')}",
+        )
+        return success
+    except Exception as e:
+        test_config.add_test_result("Search Cache", False, str(e))
+        return False
+
+
 def run_search_tests():
     """Run all search functionality tests"""
     print("Running Search Functionality Tests...")
@@ -233,6 +259,7 @@ def run_search_tests():
         test_popular_searches,
         test_search_pagination,
         test_empty_search_query,
+        test_search_cache,
     ]
 
     passed = 0
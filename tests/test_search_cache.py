@@ -0,0 +1,177 @@
+"""
+Tests for the search result cache and its write-driven invalidation
+"""
+
+import json
+
+from app.core import generations
+from app.schemas.celebrity import CelebrityCreate
+from app.schemas.vote import VoteCreate
+from app.search.cache import SearchResultCache, serialize
+from app.services.celebrity_service import CelebrityService
+from app.services.search_service import SearchService
+from app.services.vote_service import VoteService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSearchResultCache:
+    """Test LRU, TTL and generation handling"""
+
+    def test_equivalent_parameters_share_an_entry(self, db_session, search_backend):
+        """Test that case, padding, scripts and the "all" filter normalize away"""
+
+        def key(query, **filters):
+            return SearchResultCache.make_key(db_session, query, **filters)
+
+        assert key(" Jay ", mbti_type="intj", popularity_filter="all") == key(
+            "jay", mbti_type="INTJ"
+        )
+        assert key("周杰倫") == key("周杰伦")
+        assert key("jay", skip=0) != key("jay", skip=50)
+        assert key("jay", tag_filter="Singer ") == key("jay", tag_filter="singer")
+        assert key("jay")[1] == search_backend.normalize_query("jay")
+
+    def test_hits_return_serialized_results(self):
+        """Test that a hit skips computing and returns the stored bytes"""
+        cache = SearchResultCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return [{"name": "周杰伦", "relevance_score": 100}], {"tags": []}
+
+        first, hit = cache.get_or_compute(("q",), compute)
+        assert not hit
+        second, hit = cache.get_or_compute(("q",), compute)
+        assert hit
+        assert len(calls) == 1
+        assert second.body == first.body
+        assert json.loads(second.body) == [{"name": "周杰伦", "relevance_score": 100}]
+        assert json.loads(second.facets) == {"tags": []}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction_and_ttl(self):
+        """Test that the least recently used entry goes first and entries expire"""
+        clock = FakeClock()
+        cache = SearchResultCache(max_entries=2, ttl_seconds=30, clock=clock)
+        for name in ("a", "b"):
+            cache.get_or_compute((name,), lambda: ([], {}))
+        cache.get(("a",))  # "b" is now least recently used
+        cache.get_or_compute(("c",), lambda: ([], {}))
+
+        assert cache.get(("b",)) is None
+        assert cache.get(("a",)) is not None
+        assert cache.stats()["evictions"] == 1
+
+        clock.now += 31
+        assert cache.get(("a",)) is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_results_computed_across_a_write_are_not_stored(self):
+        """Test that a write during computation keeps the result out"""
+        cache = SearchResultCache()
+
+        def compute():
+            cache.invalidate()
+            return [], {}
+
+        cache.get_or_compute(("q",), compute)
+        assert cache.get(("q",)) is None
+
+    def test_serialize_matches_json_response(self):
+        """Test that bytes match FastAPI's compact, non-ASCII-escaping JSON"""
+        assert serialize({"name": "周杰伦", "score": 1}) == (
+            '{"name":"周杰伦","score":1}'.encode("utf-8")
+        )
+
+
+class TestInvalidation:
+    """Test that celebrity and vote writes retire cached results"""
+
+    def _cached_search(self, db_session, cache, query, **filters):
+        key = cache.make_key(db_session, query, **filters)
+        cached, hit = cache.get_or_compute(
+            key,
+            lambda: SearchService(db_session).search_with_facets(query, **filters),
+        )
+        return json.loads(cached.body), hit
+
+    def test_writes_invalidate(
+        self,
+        db_session,
+        make_user,
+        search_index,
+        facet_index,
+        suggestion_index,
+        search_cache,
+    ):
+        """Test that a new celebrity and a new vote are visible immediately"""
+        service = CelebrityService(db_session)
+        jay = service.create_celebrity(CelebrityCreate(name="周杰伦", name_en="Jay"))
+
+        results, hit = self._cached_search(db_session, search_cache, "周")
+        assert [r["name"] for r in results] == ["周杰伦"]
+        assert self._cached_search(db_session, search_cache, "周")[1]
+
+        service.create_celebrity(CelebrityCreate(name="周星驰", name_en="Stephen"))
+        results, hit = self._cached_search(db_session, search_cache, "周")
+        assert not hit
+        assert len(results) == 2
+
+        filters = {"mbti_type": "INTJ"}
+        assert self._cached_search(db_session, search_cache, "周", **filters)[0] == []
+        VoteService(db_session).create_vote(
+            make_user().id, VoteCreate(celebrity_id=jay.id, mbti_type="INTJ")
+        )
+        results, hit = self._cached_search(db_session, search_cache, "周", **filters)
+        assert not hit
+        assert [r["name"] for r in results] == ["周杰伦"]
+
+    def test_votes_retire_only_vote_ordered_results(
+        self,
+        db_session,
+        make_user,
+        search_index,
+        facet_index,
+        suggestion_index,
+        search_cache,
+    ):
+        """Test that a vote keeps text searches cached but not popular sorts"""
+        jay = CelebrityService(db_session).create_celebrity(
+            CelebrityCreate(name="周杰伦", name_en="Jay")
+        )
+        popular = {"popularity_filter": "popular"}
+        self._cached_search(db_session, search_cache, "周")
+        self._cached_search(db_session, search_cache, "周", **popular)
+
+        VoteService(db_session).create_vote(
+            make_user().id, VoteCreate(celebrity_id=jay.id, mbti_type="INTJ")
+        )
+        assert self._cached_search(db_session, search_cache, "周")[1]
+        assert not self._cached_search(db_session, search_cache, "周", **popular)[1]
+
+    def test_writes_of_other_workers_retire_entries(
+        self, db_session, search_index, facet_index, suggestion_index, search_cache
+    ):
+        """Test that shared generations bumped elsewhere change the key"""
+        popular = {"popularity_filter": "popular"}
+        self._cached_search(db_session, search_cache, "周")
+        self._cached_search(db_session, search_cache, "周", **popular)
+
+        # Another worker's vote, seen only through the database
+        generations.bump(db_session, generations.VOTES)
+        db_session.commit()
+        assert not self._cached_search(db_session, search_cache, "周", **popular)[1]
+        assert self._cached_search(db_session, search_cache, "周")[1]
+
+        generations.bump(db_session, generations.CATALOG)
+        db_session.commit()
+        assert not self._cached_search(db_session, search_cache, "周")[1]
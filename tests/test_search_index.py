@@ -0,0 +1,659 @@
+"""
+Tests for celebrity search indexing and the search backends
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql
+
+from app.core import generations
+from app.core.config import Settings
+from app.schemas.celebrity import CelebrityCreate, CelebrityUpdate
+from app.schemas.vote import VoteCreate
+from app.database.models import Celebrity, CelebrityVoteTally
+from app.search import sync as search_sync
+from app.search.backends import (
+    LikeSearchBackend,
+    MemoryIndexBackend,
+    PostgresTrigramBackend,
+    SQLiteFTS5Backend,
+)
+from app.search.fuzzy import edit_distance
+from app.search.suggestions import TOP_K
+from app.search.text import (
+    index_terms,
+    name_key,
+    normalize_text,
+    query_terms,
+    search_document,
+)
+from app.services.celebrity_service import CelebrityService
+from app.services.search_service import SearchService
+from app.services.vote_service import VoteService
+
+
+def _create(db_session, name, name_en=None, description=None):
+    return CelebrityService(db_session).create_celebrity(
+        CelebrityCreate(name=name, name_en=name_en, description=description)
+    )
+
+
+class TestTokenization:
+    """Test CJK bigram and Latin word tokenization"""
+
+    def test_index_terms(self):
+        """Test that CJK runs yield unigrams and bigrams, Latin text words"""
+        assert index_terms("周杰伦 jay chou") == {
+            "周",
+            "杰",
+            "伦",
+            "周杰",
+            "杰伦",
+            "jay",
+            "chou",
+        }
+
+    def test_query_terms(self):
+        """Test that queries split into CJK bigrams and Latin prefixes"""
+        assert query_terms("周杰伦 jay ch") == (["周杰", "杰伦"], ["jay", "ch"])
+        assert query_terms("周") == (["周"], [])
+
+
+class TestNameKeys:
+    """Test the folded name keys behind lookups and duplicate checks"""
+
+    def test_name_key_folding(self):
+        """Test Traditional/Simplified, width, case and whitespace folding"""
+        assert name_key("周杰倫") == name_key("周杰伦") == "周杰伦"
+        assert name_key(" \uff2a\uff41\uff59  CHOU ") == "jay chou"
+        assert name_key("   ") is None
+        assert name_key(None) is None
+
+    def test_lookups_and_duplicates(self, db_engine, db_session, search_index):
+        """Test that spellings of one name find it and cannot be re-created"""
+        service = CelebrityService(db_session)
+        jay = _create(db_session, "周杰伦", "Jay Chou")
+        # A missing English name does not collide with other missing ones
+        _create(db_session, "林俊杰")
+        _create(db_session, "邓紫棋")
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        assert service.get_celebrity_by_name("周杰倫").id == jay.id
+        assert service.get_celebrity_by_name("ＪＡＹ　chou").id == jay.id
+        assert all("lower(" not in sql for sql in statements)
+        assert all("name_key" in sql for sql in statements)
+
+        for name, name_en in [("周杰倫", None), ("杰伦", "JAY CHOU")]:
+            with pytest.raises(HTTPException) as error:
+                _create(db_session, name, name_en)
+            assert error.value.status_code == 400
+
+    def test_exact_tier_folds_scripts(self, db_session, search_backend):
+        """Test that a Traditional query is an exact match for a Simplified name"""
+        jay = _create(db_session, "周杰伦", "Jay Chou")
+        results = SearchService(db_session).search_celebrities("周杰倫")
+        assert [(r["id"], r["relevance_score"]) for r in results] == [(jay.id, 100)]
+
+
+class TestSearchBackends:
+    """Test that every backend ranks alike and follows writes"""
+
+    def test_relevance_tiers(self, db_session, search_backend):
+        """Test the 100/80/60/40 tiers across names, descriptions and tags"""
+        exact = _create(db_session, "歌手", "Singer")
+        named = _create(db_session, "流行歌手张三", "Pop Singer Zhang")
+        described = _create(db_session, "李四", "Li Si", "著名歌手和演员")
+        tagged = _create(db_session, "王五", "Wang Wu")
+        CelebrityService(db_session).add_tag_to_celebrity(tagged.id, "歌手组合")
+        _create(db_session, "赵六", "Zhao Liu", "演员")
+
+        results = SearchService(db_session).search_celebrities("歌手")
+
+        assert [r["id"] for r in results] == [
+            exact.id,
+            named.id,
+            described.id,
+            tagged.id,
+        ]
+        assert [r["relevance_score"] for r in results] == [100, 80, 60, 40]
+        assert [r["match_type"] for r in results] == [
+            "exact_match",
+            "name_contains",
+            "description_match",
+            "tag_match",
+        ]
+
+    def test_chinese_substring_and_latin_prefix(self, db_session, search_backend):
+        """Test matching inside Chinese names and on English word prefixes"""
+        jay = _create(db_session, "周杰伦", "Jay Chou")
+        _create(db_session, "王力宏", "Leehom Wang")
+        service = SearchService(db_session)
+
+        for query in ["杰伦", "周", "jay ch", "CHOU", "\uff23\uff48\uff4f\uff55"]:
+            results = service.search_celebrities(query)
+            assert [r["id"] for r in results] == [jay.id], query
+
+    def test_index_follows_writes(self, db_session, search_backend):
+        """Test that create, update and delete keep the index current"""
+        service = SearchService(db_session)
+        celebrity = _create(db_session, "林忆莲", "Sandy Lam")
+        assert len(service.search_celebrities("忆莲")) == 1
+
+        CelebrityService(db_session).update_celebrity(
+            celebrity.id, CelebrityUpdate(name="林子祥")
+        )
+        assert service.search_celebrities("忆莲") == []
+        assert len(service.search_celebrities("子祥")) == 1
+
+        CelebrityService(db_session).delete_celebrity(celebrity.id)
+        assert service.search_celebrities("子祥") == []
+
+    def test_tag_changes_are_searchable(self, db_session, search_backend):
+        """Test that adding and removing tags updates tag matches"""
+        celebrity = _create(db_session, "陈奕迅", "Eason Chan")
+        celebrity_service = CelebrityService(db_session)
+        service = SearchService(db_session)
+
+        celebrity_service.add_tag_to_celebrity(celebrity.id, "粤语流行")
+        results = service.search_celebrities("粤语", search_type="tag")
+        assert [r["match_type"] for r in results] == ["tag_match"]
+
+        celebrity_service.remove_tag_from_celebrity(celebrity.id, "粤语流行")
+        assert service.search_celebrities("粤语", search_type="tag") == []
+
+    def test_substring_tiers_fold_scripts(self, db_session, search_backend):
+        """Test that Traditional and full-width queries match folded fields"""
+        celebrity = _create(db_session, "邓丽君", "Teresa Teng", "华语流行音乐歌手")
+        CelebrityService(db_session).add_tag_to_celebrity(celebrity.id, "经典老歌")
+        service = SearchService(db_session)
+
+        for query, match_type in [
+            ("鄧麗", "name_contains"),
+            ("華語流行", "description_match"),
+            ("經典老歌", "tag_match"),
+            ("\uff34\uff25\uff2e\uff27", "name_contains"),
+        ]:
+            results = service.search_celebrities(query)
+            assert [r["match_type"] for r in results] == [match_type], query
+
+    def test_backend_must_match_the_database(self):
+        """Test that the settings refuse a backend for another dialect"""
+        sqlite_url = "sqlite:///./roster.db"
+        postgres_url = "postgresql://roster@localhost/roster"
+        Settings(search_backend="fts5", database_url=sqlite_url)
+        Settings(search_backend="postgres", database_url=postgres_url)
+        with pytest.raises(ValueError, match="needs a sqlite database"):
+            Settings(search_backend="fts5", database_url=postgres_url)
+        with pytest.raises(ValueError, match="needs a postgresql database"):
+            Settings(search_backend="postgres", database_url=sqlite_url)
+
+    def test_fts5_refuses_to_start_without_its_table(self, db_session):
+        """Test that a missing FTS table stops startup instead of every search"""
+        backend = SQLiteFTS5Backend()
+        backend.check(db_session)
+
+        db_session.execute(text("DROP TABLE celebrity_search_fts"))
+        with pytest.raises(RuntimeError, match="celebrity_search_fts"):
+            backend.check(db_session)
+
+    def test_postgres_ranks_within_tiers(self, db_session):
+        """Test that the PostgreSQL query ranks by full text and similarity"""
+        query = PostgresTrigramBackend().query(db_session, "Jay", "jay", "all")
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+        assert "search_document LIKE" in sql
+        assert sql.index("ts_rank(to_tsvector(") < sql.index("similarity(")
+        assert sql.index("similarity(") < sql.index("celebrities.created_at DESC")
+
+
+class TestSearchDocument:
+    """Test the denormalized search document and the LIKE backend over it"""
+
+    def _document(self, db_session, celebrity_id):
+        db_session.expire_all()
+        return db_session.get(Celebrity, celebrity_id).search_document
+
+    def test_document_follows_writes(self, db_session, search_index):
+        """Test that field and tag writes rebuild the normalized document"""
+        service = CelebrityService(db_session)
+        celebrity = _create(db_session, "周杰伦", "\uff2a\uff41\uff59 Chou")
+        assert self._document(db_session, celebrity.id) == (
+            "周杰伦\x1fjay chou\x1d\x1e"
+        )
+
+        service.add_tag_to_celebrity(celebrity.id, "歌手")
+        service.add_tag_to_celebrity(celebrity.id, "Producer")
+        service.update_celebrity(celebrity.id, CelebrityUpdate(description="台湾"))
+        assert self._document(db_session, celebrity.id) == search_document(
+            "周杰伦", "Jay Chou", "台湾", ["producer", "歌手"]
+        )
+
+        service.remove_tag_from_celebrity(celebrity.id, "Producer")
+        assert self._document(db_session, celebrity.id).endswith("\x1e歌手")
+
+    def test_like_backend_reads_one_column(self, db_engine, db_session, search_index):
+        """Test that tiers are LIKEs on the document, without a tag subquery"""
+        jay_id = _create(db_session, "周杰伦", "Jay Chou").id
+        tagged_id = _create(db_session, "方文山", "Vincent Fang").id
+        CelebrityService(db_session).add_tag_to_celebrity(tagged_id, "jay chou")
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        hits = LikeSearchBackend().search(db_session, "JAY CHOU")
+
+        assert [(hit.celebrity_id, hit.relevance_score) for hit in hits] == [
+            (jay_id, 100),
+            (tagged_id, 40),
+        ]
+        assert len(statements) == 1
+        assert "celebrity_tags" not in statements[0]
+        assert "lower(" not in statements[0]
+
+    def test_rebuild_backfills_missing_documents(self, db_session, search_index):
+        """Test that rows written without a document are filled in"""
+        celebrity = _create(db_session, "王菲", "Faye Wong")
+        db_session.query(Celebrity).update({"search_document": None})
+        db_session.commit()
+        backend = LikeSearchBackend()
+        assert backend.search(db_session, "王菲") == []
+
+        assert backend.rebuild(db_session) == 1
+        assert [hit.celebrity_id for hit in backend.search(db_session, "王菲")] == [
+            celebrity.id
+        ]
+        assert backend.rebuild(db_session) == 0
+
+
+class TestFuzzyMatching:
+    """Test the typo-tolerant fallback tier"""
+
+    def test_edit_distance(self):
+        """Test substitutions, insertions and transpositions within a limit"""
+        assert edit_distance("zan", "zhan", 1) == 1
+        assert edit_distance("jakcson", "jackson", 2) == 1
+        assert edit_distance("yi", "yee", 2) == 2
+        assert edit_distance("wang", "yi", 2) == 3
+
+    def test_misspelled_names_fall_back(self, db_session, search_backend):
+        """Test that typos find names below every exact and contains match"""
+        xiao = _create(db_session, "肖战", "Xiao Zhan")
+        yee = _create(db_session, "易烊千玺", "Jackson Yee")
+        wang = _create(db_session, "王嘉尔", "Jackson Wang")
+        service = SearchService(db_session)
+
+        results = service.search_celebrities("Xiao Zan")
+        assert [r["id"] for r in results] == [xiao.id]
+        assert results[0]["relevance_score"] == 20
+        assert results[0]["match_type"] == "fuzzy_match"
+
+        results = service.search_celebrities("Jackson Yi")
+        assert [r["id"] for r in results] == [yee.id]
+
+        # Contains matches rank first; the typo tier fills the rest
+        results = service.search_celebrities("jackson wnag")
+        assert [r["id"] for r in results] == [wang.id]
+        results = service.search_celebrities("jackson")
+        assert {r["id"] for r in results} == {yee.id, wang.id}
+        assert {r["relevance_score"] for r in results} == {80}
+
+        assert service.search_celebrities("Xiao Zan", search_type="description") == []
+
+    def test_follows_writes(self, db_session, search_backend, fuzzy_index):
+        """Test that renames and deletes update the fuzzy index"""
+        celebrity = _create(db_session, "蔡徐坤", "Cai Xukun")
+        service = SearchService(db_session)
+        assert len(service.search_celebrities("cai xukan")) == 1
+
+        CelebrityService(db_session).update_celebrity(
+            celebrity.id, CelebrityUpdate(name_en="KUN")
+        )
+        assert service.search_celebrities("cai xukan") == []
+
+        CelebrityService(db_session).delete_celebrity(celebrity.id)
+        assert len(fuzzy_index) == 0
+
+
+class TestFacets:
+    """Test facet counts and filters served from the bitmap index"""
+
+    def _vote(self, db_session, make_user, celebrity_id, mbti_type):
+        return VoteService(db_session).create_vote(
+            make_user().id, VoteCreate(celebrity_id=celebrity_id, mbti_type=mbti_type)
+        )
+
+    def test_counts_cover_every_match(self, db_session, make_user, search_backend):
+        """Test that facets count all filtered matches, not only the page"""
+        service = CelebrityService(db_session)
+        jay = _create(db_session, "周杰伦", "Jay Chou")
+        chow = _create(db_session, "周星驰", "Stephen Chow")
+        shen = _create(db_session, "周深", "Zhou Shen")
+        for celebrity in (jay, shen):
+            service.add_tag_to_celebrity(celebrity.id, "Singer")
+        service.add_tag_to_celebrity(chow.id, "演员")
+        self._vote(db_session, make_user, jay.id, "ISFP")
+        self._vote(db_session, make_user, shen.id, "INFP")
+        self._vote(db_session, make_user, chow.id, "ENTP")
+        self._vote(db_session, make_user, chow.id, "INFP")
+        self._vote(db_session, make_user, chow.id, "ENTP")
+
+        search = SearchService(db_session)
+        results, facets = search.search_with_facets("周", limit=1)
+        assert len(results) == 1
+        assert facets == {
+            "top_mbti_type": {"ISFP": 1, "INFP": 1, "ENTP": 1},
+            "tags": [{"tag": "Singer", "count": 2}, {"tag": "演员", "count": 1}],
+        }
+
+        # Filters are bitmap intersections; the mbti filter keeps
+        # "has votes for the type", not "top type is"
+        results, facets = search.search_with_facets("周", mbti_type="infp")
+        assert {r["id"] for r in results} == {chow.id, shen.id}
+        assert facets["top_mbti_type"] == {"INFP": 1, "ENTP": 1}
+        results, facets = search.search_with_facets(
+            "周", mbti_type="INFP", tag_filter="sing"
+        )
+        assert [r["id"] for r in results] == [shen.id]
+        assert facets["tags"] == [{"tag": "Singer", "count": 1}]
+
+        results, facets = search.search_with_facets("entp", search_type="mbti")
+        assert [r["id"] for r in results] == [chow.id]
+        assert facets["top_mbti_type"] == {"ENTP": 1}
+        assert search.search_with_facets("周", tag_filter="dancer") == (
+            [],
+            {"top_mbti_type": {}, "tags": []},
+        )
+
+    def test_popular_sort_reads_only_the_hits(
+        self, db_engine, db_session, make_user, search_backend
+    ):
+        """Test that the popular sort looks up vote counts of the matches only"""
+        jay = _create(db_session, "周杰伦", "Jay Chou")
+        shen = _create(db_session, "周深", "Zhou Shen")
+        other = _create(db_session, "王菲", "Faye Wong")
+        for celebrity in (shen, other, other):
+            self._vote(db_session, make_user, celebrity.id, "INFP")
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append((args[2], args[3])),
+        )
+        results, _ = SearchService(db_session).search_with_facets(
+            "周", popularity_filter="popular"
+        )
+        assert [r["id"] for r in results] == [shen.id, jay.id]
+        tally_reads = [
+            parameters
+            for sql, parameters in statements
+            if "celebrity_vote_tallies" in sql
+        ]
+        assert len(tally_reads) == 1
+        assert other.id not in tally_reads[0]
+        assert jay.id in tally_reads[0] and shen.id in tally_reads[0]
+
+    def test_follows_votes_and_deletes(self, db_session, make_user, facet_index):
+        """Test that votes move the top type and freed slots are reused"""
+        first = _create(db_session, "甲", "Alpha")
+        self._vote(db_session, make_user, first.id, "INTJ")
+        vote = self._vote(db_session, make_user, first.id, "ENFP")
+        self._vote(db_session, make_user, first.id, "ENFP")
+        first_bits = facet_index.bitmap([first.id])
+        assert facet_index.counts(first_bits)["top_mbti_type"] == {"ENFP": 1}
+
+        VoteService(db_session).delete_vote(vote.id, vote.user_id)
+        assert facet_index.counts(first_bits)["top_mbti_type"] == {"INTJ": 1}
+
+        service = CelebrityService(db_session)
+        second = _create(db_session, "乙", "Beta")
+        service.add_tag_to_celebrity(second.id, "歌手")
+        freed = facet_index.bitmap([second.id])
+        facet_index.remove(second.id)
+        assert len(facet_index) == 1
+        assert facet_index.counts(freed) == {"top_mbti_type": {}, "tags": []}
+
+        # The freed slot is reused, so bitmaps do not grow with churn
+        third = _create(db_session, "丙", "Gamma")
+        service.add_tag_to_celebrity(third.id, "演员")
+        assert facet_index.bitmap([third.id]) == freed
+        assert facet_index.counts(freed)["tags"] == [{"tag": "演员", "count": 1}]
+
+
+class TestMemoryIndex:
+    """Test the in-process index specifics"""
+
+    def test_rebuild_and_single_statement(self, db_engine, db_session, search_index):
+        """Test that a rebuilt index answers with one hydration query"""
+        for i in range(20):
+            _create(db_session, f"演员{i}", f"Actor {i}")
+        search_index.rebuild(db_session)
+        assert len(search_index) == 20
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        results = SearchService(
+            db_session, backend=MemoryIndexBackend(search_index)
+        ).search_celebrities("演员1", limit=5)
+
+        assert len(statements) == 1
+        assert [r["name"] for r in results][0] == "演员1"
+        assert len(results) == 5
+
+    def test_rebuild_matches_incremental_writes(
+        self, db_session, search_index, memory_backend
+    ):
+        """Test that the bulk rebuild builds the same index as single writes"""
+        for name, name_en in [("周杰伦", "Jay Chou"), ("周星驰", "Stephen Chow")]:
+            _create(db_session, name, name_en)
+        incremental = (dict(search_index._postings), list(search_index._words))
+
+        search_index.rebuild(db_session)
+
+        assert (search_index._postings, search_index._words) == incremental
+        assert search_index._words == sorted(search_index._words)
+
+    def test_rebuilds_after_writes_of_other_workers(
+        self,
+        monkeypatch,
+        db_session,
+        search_index,
+        memory_backend,
+        fuzzy_index,
+        facet_index,
+        suggestion_index,
+        search_cache,
+    ):
+        """Test that the shared generation tells workers to rebuild"""
+        monkeypatch.setattr(
+            search_sync,
+            "catalog_generation",
+            generations.GenerationTracker(generations.CATALOG),
+        )
+        search_sync.rebuild_all(db_session)
+        assert not search_sync.refresh_if_stale(db_session)
+
+        # This worker's own writes are applied in place
+        _create(db_session, "周杰伦", "Jay Chou")
+        assert not search_sync.refresh_if_stale(db_session)
+
+        # Another worker writes the database and bumps the generation only
+        db_session.add(Celebrity(name="周星驰", name_en="Stephen Chow"))
+        generations.bump(db_session, generations.CATALOG)
+        db_session.commit()
+        assert search_index.search("周星") == []
+
+        assert search_sync.refresh_if_stale(db_session)
+        assert len(search_index.search("周星")) == 1
+        assert not search_sync.refresh_if_stale(db_session)
+
+
+class TestSuggestions:
+    """Test the in-memory autocomplete index"""
+
+    def _vote(self, db_session, make_user, celebrity_id, count=1):
+        for _ in range(count):
+            VoteService(db_session).create_vote(
+                make_user().id, VoteCreate(celebrity_id=celebrity_id, mbti_type="INTJ")
+            )
+
+    def test_prefixes_ranked_by_votes(
+        self, db_session, make_user, search_index, suggestion_index
+    ):
+        """Test that completions match name and word prefixes, most voted first"""
+        _create(db_session, "周杰伦", "Jay Chou")
+        chow = _create(db_session, "周星驰", "Stephen Chow")
+        _create(db_session, "张学友", "Jacky Cheung")
+        suggestion_index.rebuild(db_session)
+        self._vote(db_session, make_user, chow.id, 2)
+
+        service = SearchService(db_session)
+        assert service.get_search_suggestions("周") == []  # below minimum length
+        assert service.get_search_suggestions("周星") == ["周星驰"]
+        assert service.get_search_suggestions("ch") == [
+            "Stephen Chow",
+            "Jay Chou",
+            "Jacky Cheung",
+        ]
+        assert service.get_search_suggestions("ja", limit=1) == ["Jay Chou"]
+
+    def test_tags_are_weighted_and_deduplicated(
+        self, db_session, make_user, search_index, suggestion_index
+    ):
+        """Test that tags weigh their celebrities' votes and repeats collapse"""
+        service = CelebrityService(db_session)
+        singer = _create(db_session, "歌星", "Singer Star")
+        service.add_tag_to_celebrity(singer.id, "singer")
+        _create(db_session, "歌手", "Singer")
+        self._vote(db_session, make_user, singer.id, 3)
+
+        # "Singer" the name and "singer" the tag are offered once
+        suggestions = SearchService(db_session).get_search_suggestions("sing")
+        assert suggestions == ["singer", "Singer Star"]
+
+    def test_follows_writes_without_database_access(
+        self, db_engine, db_session, make_user, search_index, suggestion_index
+    ):
+        """Test that renames and deletes apply and answers issue no statements"""
+        celebrity = _create(db_session, "刘德华", "Andy Lau")
+        CelebrityService(db_session).update_celebrity(
+            celebrity.id, CelebrityUpdate(name_en="Andy Lau Tak-wah")
+        )
+        other = _create(db_session, "安迪", "Andy Williams")
+        CelebrityService(db_session).delete_celebrity(other.id)
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        suggestions = SearchService(db_session).get_search_suggestions("an")
+
+        assert suggestions == ["Andy Lau Tak-wah"]
+        assert statements == []
+
+    def test_cached_prefixes_follow_weight_changes(
+        self, db_session, make_user, search_index, suggestion_index
+    ):
+        """Test that cached top lists always match a scan of the key range"""
+        celebrities = [
+            _create(db_session, f"歌手{i}", f"Singer {i}") for i in range(TOP_K + 5)
+        ]
+        prefixes = ["歌", "歌手1", "s", "singer 2"]
+
+        def check():
+            for prefix in prefixes:
+                for limit in (1, 10, TOP_K):
+                    expected = [
+                        text
+                        for _, text in suggestion_index._scan(
+                            normalize_text(prefix), limit
+                        )
+                    ]
+                    assert suggestion_index.suggest(prefix, limit) == expected
+
+        check()
+        last = celebrities[-1]
+        self._vote(db_session, make_user, last.id, 2)
+        check()
+        assert suggestion_index.suggest("歌", 1) == [last.name]
+
+        vote = VoteService(db_session).create_vote(
+            make_user().id, VoteCreate(celebrity_id=celebrities[3].id, mbti_type="INFP")
+        )
+        check()
+        VoteService(db_session).delete_vote(vote.id, vote.user_id)
+        check()
+        CelebrityService(db_session).delete_celebrity(celebrities[4].id)
+        check()
+        CelebrityService(db_session).update_celebrity(
+            celebrities[5].id, CelebrityUpdate(name_en="Singer Star")
+        )
+        check()
+
+    def test_rebuild_sorts_once(
+        self, db_session, search_index, memory_backend, suggestion_index
+    ):
+        """Test that the bulk rebuild builds the same keys as single writes"""
+        for name, name_en in [("周杰伦", "Jay Chou"), ("周星驰", "Stephen Chow")]:
+            _create(db_session, name, name_en)
+        CelebrityService(db_session).add_tag_to_celebrity(
+            search_index.search("周杰伦")[0][0], "歌手"
+        )
+        incremental = list(suggestion_index._keys)
+
+        suggestion_index.rebuild(db_session)
+
+        assert suggestion_index._keys == sorted(incremental)
+
+    def test_reloads_votes_of_other_workers(
+        self,
+        monkeypatch,
+        db_session,
+        make_user,
+        search_index,
+        memory_backend,
+        fuzzy_index,
+        facet_index,
+        suggestion_index,
+        search_cache,
+    ):
+        """Test that the shared vote generation reloads suggestion weights"""
+        monkeypatch.setattr(
+            search_sync,
+            "vote_generation",
+            generations.GenerationTracker(generations.VOTES),
+        )
+        _create(db_session, "周杰伦", "Jay Chou")
+        chow = _create(db_session, "周星驰", "Stephen Chow")
+        search_sync.rebuild_all(db_session)
+        self._vote(db_session, make_user, chow.id)
+        assert not search_sync.refresh_votes_if_stale(db_session)
+        assert suggestion_index.suggest("周", 1) == ["周星驰"]
+
+        # Another worker's votes: the tally and the generation move, nothing else
+        jay_id = search_index.search("周杰伦")[0][0]
+        db_session.query(CelebrityVoteTally).filter(
+            CelebrityVoteTally.celebrity_id == jay_id
+        ).update({CelebrityVoteTally.total_votes: 5})
+        generations.bump(db_session, generations.VOTES)
+        db_session.commit()
+        assert suggestion_index.suggest("周", 1) == ["周星驰"]
+
+        assert search_sync.refresh_votes_if_stale(db_session)
+        assert suggestion_index.suggest("周", 1) == ["周杰伦"]
+        assert not search_sync.refresh_votes_if_stale(db_session)
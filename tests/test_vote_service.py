@@ -0,0 +1,154 @@
+"""
+Tests for the vote write path
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from app.core import generations
+from app.database.models import CelebrityVoteTally, DailyUserStats
+from app.schemas.vote import VoteCreate
+from app.services.vote_service import VoteService
+
+
+class TestCreateVote:
+    """Test uniqueness and existence handling in VoteService.create_vote"""
+
+    def test_vote_is_written_without_pre_check_selects(
+        self, db_engine, db_session, make_user, make_celebrity
+    ):
+        """Test that a vote costs its five writes and no pre-check selects"""
+        user_id = make_user().id
+        celebrity_id = make_celebrity("张学友", "Jacky Cheung").id
+        # An earlier vote of the same type, so the top type does not change
+        VoteService(db_session).create_vote(
+            make_user().id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ISFJ")
+        )
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        vote = VoteService(db_session).create_vote(
+            user_id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ISFJ")
+        )
+
+        assert len(statements) == 5
+        assert vote.id
+        assert vote.created_at is not None
+        assert vote.mbti_type.value == "ISFJ"
+
+    def test_generation_is_bumped_after_commit(
+        self, db_engine, db_session, make_user, make_celebrity
+    ):
+        """Test that the vote's transaction leaves the shared generation row alone"""
+        user_id = make_user().id
+        celebrity_id = make_celebrity("黎明", "Leon Lai").id
+        before = generations.read(db_session, [generations.VOTES])
+
+        events = []
+        event.listen(
+            db_engine, "before_cursor_execute", lambda *args: events.append(args[2])
+        )
+        event.listen(db_engine, "commit", lambda *args: events.append("COMMIT"))
+        VoteService(db_session).create_vote(
+            user_id, VoteCreate(celebrity_id=celebrity_id, mbti_type="INFP")
+        )
+
+        bumps = [i for i, sql in enumerate(events) if "state_generations" in sql]
+        assert len(bumps) == 1
+        assert events[: bumps[0]].count("COMMIT") == 1
+        assert events[bumps[0] + 1 :] == ["COMMIT"]
+        after = generations.read(db_session, [generations.VOTES])
+        assert after[generations.VOTES] == before[generations.VOTES] + 1
+
+    def test_duplicate_vote_is_rejected(self, db_session, make_user, make_celebrity):
+        """Test that the unique index turns a second vote into a 400"""
+        user_id = make_user().id
+        celebrity_id = make_celebrity("梁朝伟", "Tony Leung").id
+        service = VoteService(db_session)
+        service.create_vote(
+            user_id, VoteCreate(celebrity_id=celebrity_id, mbti_type="INFJ")
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_vote(
+                user_id, VoteCreate(celebrity_id=celebrity_id, mbti_type="INTJ")
+            )
+
+        assert exc_info.value.status_code == 400
+        # The rejected vote must not leak into the tally or the daily stats
+        assert db_session.get(CelebrityVoteTally, celebrity_id).total_votes == 1
+        stats = db_session.query(DailyUserStats).filter_by(user_id=user_id).one()
+        assert stats.votes_count == 1
+
+    def test_unknown_celebrity(self, db_session, make_user):
+        """Test that voting for a missing celebrity is a 404 and writes nothing"""
+        user_id = make_user().id
+
+        with pytest.raises(HTTPException) as exc_info:
+            VoteService(db_session).create_vote(
+                user_id, VoteCreate(celebrity_id="missing", mbti_type="ENTP")
+            )
+
+        assert exc_info.value.status_code == 404
+        assert db_session.query(DailyUserStats).count() == 0
+
+    def test_other_integrity_errors_are_not_duplicates(
+        self, db_session, make_user, make_celebrity
+    ):
+        """Test that only the unique vote index is reported as already voted"""
+        celebrity_id = make_celebrity("黎明", "Leon Lai").id
+        service = VoteService(db_session)
+        service.create_vote(
+            make_user().id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ISFP")
+        )
+        # The celebrity disappears after its tally row was found
+        db_session.execute(text("PRAGMA foreign_keys = OFF"))
+        db_session.execute(
+            text("DELETE FROM celebrities WHERE id = :id"), {"id": celebrity_id}
+        )
+        db_session.commit()
+        db_session.execute(text("PRAGMA foreign_keys = ON"))
+
+        with pytest.raises(IntegrityError):
+            service.create_vote(
+                make_user().id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ISFP")
+            )
+
+    def test_votes_without_upsert_or_returning(
+        self, monkeypatch, db_session, make_user, make_celebrity
+    ):
+        """Test the generic write path used by databases without ON CONFLICT"""
+        dialect = db_session.get_bind().dialect
+        monkeypatch.setattr(dialect, "name", "generic")
+        monkeypatch.setattr(dialect, "insert_returning", False)
+        monkeypatch.setattr(dialect, "update_returning", False)
+        user_id = make_user().id
+        celebrity_id = make_celebrity("郭富城", "Aaron Kwok").id
+        service = VoteService(db_session)
+
+        for mbti_type in ("ESFP", "ESTP"):
+            vote = service.create_vote(
+                make_user().id,
+                VoteCreate(celebrity_id=celebrity_id, mbti_type=mbti_type),
+            )
+        service.create_vote(
+            user_id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ESTP")
+        )
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_vote(
+                user_id, VoteCreate(celebrity_id=celebrity_id, mbti_type="ESFP")
+            )
+
+        assert exc_info.value.status_code == 400
+        assert vote.created_at is not None
+        tally = db_session.get(CelebrityVoteTally, celebrity_id)
+        assert (tally.total_votes, tally.estp_count) == (3, 2)
+        assert tally.top_mbti_type.value == "ESTP"
+        stats = db_session.query(DailyUserStats).filter_by(user_id=user_id).one()
+        assert stats.votes_count == 1
@@ -0,0 +1,256 @@
+"""
+Tests for the denormalized celebrity vote tallies
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import upsert
+from app.database.migrations import upgrade_database
+from app.database.models import CelebrityVoteTally, MBTIType, Vote
+from app.schemas.celebrity import CelebrityCreate
+from app.schemas.vote import VoteCreate
+from app.services.celebrity_service import CelebrityService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.vote_service import VoteService
+from app.services.vote_tally_service import VoteTallyService
+
+
+class TestVoteTallies:
+    """Test tally maintenance on vote writes and the rebuild command"""
+
+    def test_create_vote_updates_tally(self, db_session, make_user, make_celebrity):
+        """Test that every new vote lands in the celebrity's tally row"""
+        celebrity = make_celebrity("周杰伦", "Jay Chou")
+        service = VoteService(db_session)
+        for mbti_type, reason in [("INTJ", "冷静"), ("INTJ", None), ("ENFP", None)]:
+            service.create_vote(
+                make_user().id,
+                VoteCreate(
+                    celebrity_id=celebrity.id, mbti_type=mbti_type, reason=reason
+                ),
+            )
+
+        tally = db_session.get(CelebrityVoteTally, celebrity.id)
+        assert tally.total_votes == 3
+        assert tally.votes_with_reason == 1
+        assert tally.intj_count == 2
+        assert tally.enfp_count == 1
+
+    @pytest.mark.parametrize("dialect_name", ["sqlite", "generic"])
+    def test_first_votes_racing_for_the_tally_row(
+        self, monkeypatch, db_session, make_celebrity, dialect_name
+    ):
+        """Test that a tally row created by a concurrent first vote is counted on"""
+        monkeypatch.setattr(db_session.get_bind().dialect, "name", dialect_name)
+        celebrity_id = make_celebrity("陈奕迅", "Eason Chan").id
+        service = VoteTallyService(db_session)
+        assert service.get_tally(celebrity_id) is None
+
+        def racing_upsert(db, *args, **kwargs):
+            # The other vote's row lands between our UPDATE and our INSERT
+            db.add(
+                CelebrityVoteTally(
+                    **VoteTallyService._empty_tally_values(celebrity_id)
+                    | {"total_votes": 1, "estj_count": 1}
+                )
+            )
+            db.flush()
+            return upsert(db, *args, **kwargs)
+
+        monkeypatch.setattr("app.services.vote_tally_service.upsert", racing_upsert)
+        assert service.apply_vote(celebrity_id, MBTIType.ESTJ, False, 1)
+
+        db_session.expire_all()
+        tally = service.get_tally(celebrity_id)
+        assert (tally.total_votes, tally.estj_count) == (2, 2)
+        assert tally.top_mbti_type == MBTIType.ESTJ
+
+    def test_delete_vote_updates_tally(self, db_session, make_user, make_celebrity):
+        """Test that deleting a vote decrements the tally"""
+        celebrity = make_celebrity("王菲", "Faye Wong")
+        user = make_user()
+        service = VoteService(db_session)
+        vote = service.create_vote(
+            user.id,
+            VoteCreate(celebrity_id=celebrity.id, mbti_type="INFP", reason="安静"),
+        )
+
+        service.delete_vote(vote.id, user.id)
+
+        db_session.expire_all()
+        tally = db_session.get(CelebrityVoteTally, celebrity.id)
+        assert tally.total_votes == 0
+        assert tally.votes_with_reason == 0
+        assert tally.infp_count == 0
+
+    def test_statistics_read_is_single_statement(
+        self, db_engine, db_session, make_user, make_celebrity
+    ):
+        """Test that statistics come from one lookup and match the raw votes"""
+        celebrity = make_celebrity("刘德华", "Andy Lau")
+        service = VoteService(db_session)
+        for mbti_type in ["ESTJ", "ESTJ", "ISTJ"]:
+            service.create_vote(
+                make_user().id,
+                VoteCreate(celebrity_id=celebrity.id, mbti_type=mbti_type),
+            )
+        celebrity_id = celebrity.id
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        stats = service.get_celebrity_vote_statistics(celebrity_id)
+
+        assert len(statements) == 1
+        assert stats["total_votes"] == 3
+        assert stats["votes_without_reason"] == 3
+        assert stats["top_mbti_type"] == "ESTJ"
+        assert stats["top_mbti_count"] == 2
+        assert [d["mbti_type"] for d in stats["mbti_distribution"]] == [
+            "ESTJ",
+            "ISTJ",
+        ]
+
+    def test_rebuild_tallies(self, db_session, make_user, make_celebrity):
+        """Test that the rebuild recomputes tallies from votes written directly"""
+        voted = make_celebrity("邓紫棋", "G.E.M.")
+        unvoted = make_celebrity("林俊杰", "JJ Lin")
+        for mbti_type, reason in [(MBTIType.ENFP, "活泼"), (MBTIType.ENFJ, None)]:
+            db_session.add(
+                Vote(
+                    user_id=make_user().id,
+                    celebrity_id=voted.id,
+                    mbti_type=mbti_type,
+                    reason=reason,
+                )
+            )
+        db_session.commit()
+
+        rebuilt = VoteTallyService(db_session).rebuild_tallies()
+
+        assert rebuilt == 2
+        tally = db_session.get(CelebrityVoteTally, voted.id)
+        assert tally.total_votes == 2
+        assert tally.votes_with_reason == 1
+        assert tally.enfp_count == 1
+        assert tally.enfj_count == 1
+        assert db_session.get(CelebrityVoteTally, unvoted.id).total_votes == 0
+
+    def test_migration_backfills_tallies(self):
+        """Test that upgrading tallies the votes of an existing database"""
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        upgrade_database(engine, "0011_comment_reactions")
+        votes = [
+            ("u1", "c", "ENFP", "活泼"),
+            ("u2", "c", "ENFJ", None),
+            ("u3", "c", "ENFP", None),
+            ("u1", "d", "ENFP", None),
+            ("u2", "d", "ENFJ", None),
+        ]
+        with engine.begin() as connection:
+            for user_id in ("u1", "u2", "u3"):
+                connection.execute(
+                    text(
+                        "INSERT INTO users (id, email, hashed_password, name) "
+                        "VALUES (:id, :id || '@example.com', 'x', :id)"
+                    ),
+                    {"id": user_id},
+                )
+            for celebrity_id in ("c", "d", "e"):
+                connection.execute(
+                    text("INSERT INTO celebrities (id, name) VALUES (:id, :id)"),
+                    {"id": celebrity_id},
+                )
+            for number, (user_id, celebrity_id, mbti_type, reason) in enumerate(votes):
+                connection.execute(
+                    text(
+                        "INSERT INTO votes (id, user_id, celebrity_id, mbti_type, "
+                        "reason) VALUES (:id, :user_id, :celebrity_id, :mbti_type, "
+                        ":reason)"
+                    ),
+                    {
+                        "id": f"v{number}",
+                        "user_id": user_id,
+                        "celebrity_id": celebrity_id,
+                        "mbti_type": mbti_type,
+                        "reason": reason,
+                    },
+                )
+
+        upgrade_database(engine)
+        session = sessionmaker(bind=engine)()
+        tallies = {t.celebrity_id: t for t in session.query(CelebrityVoteTally)}
+        session.close()
+
+        assert tallies["c"].total_votes == 3
+        assert tallies["c"].votes_with_reason == 1
+        assert (tallies["c"].enfp_count, tallies["c"].enfj_count) == (2, 1)
+        assert tallies["c"].top_mbti_type == MBTIType.ENFP
+        # Ties go to the earlier type, as in pick_top_type
+        assert tallies["d"].top_mbti_type == MBTIType.ENFJ
+        assert tallies["e"].total_votes == 0
+        assert tallies["e"].top_mbti_type is None
+
+
+class TestLeaderboard:
+    """Test the popular-celebrity ranking built on the tallies"""
+
+    def _vote(self, db_session, user, celebrity_id, mbti_type):
+        return VoteService(db_session).create_vote(
+            user.id, VoteCreate(celebrity_id=celebrity_id, mbti_type=mbti_type)
+        )
+
+    def test_ranking_and_top_type(self, db_session, make_user, make_celebrity):
+        """Test ordering by votes and incremental top-type maintenance"""
+        first = make_celebrity("成龙", "Jackie Chan").id
+        second = make_celebrity("李连杰", "Jet Li").id
+        users = [make_user() for _ in range(3)]
+        self._vote(db_session, users[0], first, "ESTP")
+        self._vote(db_session, users[1], first, "ISTJ")
+        votes = [self._vote(db_session, users[2], first, "ISTJ")]
+        self._vote(db_session, users[0], second, "INTJ")
+
+        entries = LeaderboardService(db_session).get_top_celebrities(limit=2)
+        assert [e["celebrity"].id for e in entries] == [first, second]
+        assert [e["vote_count"] for e in entries] == [3, 1]
+        assert [e["top_mbti"] for e in entries] == ["ISTJ", "INTJ"]
+
+        # Removing a vote can hand the top type back on a tie
+        VoteService(db_session).delete_vote(votes[0].id, users[2].id)
+        entries = LeaderboardService(db_session).get_top_celebrities(limit=1)
+        assert entries[0]["vote_count"] == 2
+        assert entries[0]["top_mbti"] == "ISTJ"
+
+    def test_popular_celebrities_single_statement(
+        self, db_engine, db_session, make_user
+    ):
+        """Test that a full leaderboard page costs one query, not one per row"""
+        for i in range(5):
+            celebrity_id = (
+                CelebrityService(db_session)
+                .create_celebrity(CelebrityCreate(name=f"名人{i}", name_en=f"Star {i}"))
+                .id
+            )
+            for _ in range(i):
+                self._vote(db_session, make_user(), celebrity_id, "ENFP")
+
+        statements = []
+        event.listen(
+            db_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        celebrities = CelebrityService(db_session).get_popular_celebrities(limit=5)
+
+        assert len(statements) == 1
+        assert [c.name for c in celebrities] == [f"名人{i}" for i in range(4, -1, -1)]